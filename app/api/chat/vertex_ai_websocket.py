@@ -9,6 +9,7 @@ import logging
 from datetime import datetime
 import uuid
 from app.services.vertex_ai_chat_service import VertexAIChatService
+from app.utils import json_codec
 
 logger = logging.getLogger(__name__)
 
@@ -68,7 +69,7 @@ class VertexAIConnectionManager:
         if session_id in self.active_connections:
             try:
                 await self.active_connections[session_id].send_text(
-                    json.dumps(message, ensure_ascii=False)
+                    json_codec.dumps(message)
                 )
                 return True
             except Exception as e:
@@ -168,7 +169,7 @@ async def websocket_vertex_ai_chat_endpoint(websocket: WebSocket, session_id: st
             try:
                 # クライアントからメッセージを受信
                 data = await websocket.receive_text()
-                message_data = json.loads(data)
+                message_data = json_codec.loads(data)
                 
                 logger.info(f"📨 Vertex AI受信メッセージ: session_id={session_id}, type={message_data.get('type')}")
                 
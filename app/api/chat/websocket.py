@@ -9,6 +9,7 @@ import logging
 from datetime import datetime
 import uuid
 from app.services.chat_service import ChatService
+from app.utils import json_codec
 
 logger = logging.getLogger(__name__)
 
@@ -58,7 +59,7 @@ class ConnectionManager:
         if session_id in self.active_connections:
             try:
                 await self.active_connections[session_id].send_text(
-                    json.dumps(message, ensure_ascii=False)
+                    json_codec.dumps(message)
                 )
                 return True
             except Exception as e:
@@ -148,7 +149,7 @@ async def websocket_chat_endpoint(websocket: WebSocket, session_id: str):
             try:
                 # クライアントからメッセージを受信
                 data = await websocket.receive_text()
-                message_data = json.loads(data)
+                message_data = json_codec.loads(data)
                 
                 logger.info(f"📨 受信メッセージ: session_id={session_id}, type={message_data.get('type')}")
                 
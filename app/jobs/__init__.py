@@ -0,0 +1,3 @@
+"""
+__init__.py - app.jobsパッケージ初期化ファイル（オフラインジョブ）
+"""
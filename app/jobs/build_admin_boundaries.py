@@ -0,0 +1,83 @@
+"""
+行政区域ポリゴン索引の構築
+
+対応形式（GeoJSON。シェープファイルは ogr2ogr -f GeoJSON で変換してから指定）:
+  - 国土数値情報「行政区域」(N03): 市区町村ポリゴン（N03_007 = 全国地方公共団体コード）
+  - e-Stat「小地域（町丁・字等）」境界: 町丁目ポリゴン（KEY_CODE, S_NAME）
+  - 汎用: properties に level / code / name を持つフィーチャ
+
+同じ (レベル, コード) の複数フィーチャ（島しょ部など）は1区域にまとめます。
+
+実行例:
+    python -m app.jobs.build_admin_boundaries N03-23_230101.geojson r2ka13.geojson -o data/admin_boundaries
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from app.services.admin_boundaries import ADMIN_BOUNDARY_PATH, BOUNDARY_LEVELS, write_boundary_store
+
+logger = logging.getLogger(__name__)
+
+# e-Stat 小地域の水面調査区（ポリゴンはあるが住所ではない）
+ESTAT_WATER_HCODE = 8154
+
+def _rings(geometry: Dict) -> List[List]:
+    """Polygon / MultiPolygon のリングを平坦化"""
+    if geometry.get("type") == "Polygon":
+        return list(geometry["coordinates"])
+    if geometry.get("type") == "MultiPolygon":
+        return [ring for polygon in geometry["coordinates"] for ring in polygon]
+    return []
+
+def feature_identity(properties: Dict) -> Optional[Dict]:
+    """プロパティからレベル・コード・名称を判定（対象外はNone）"""
+    if "N03_007" in properties:
+        if not properties.get("N03_007"):
+            return None  # 所属未定地
+        return {
+            "level": "municipality",
+            "code": str(properties["N03_007"]).zfill(5),
+            # 郡・政令市名 + 町村・区名（例: 横浜市中区）
+            "name": (properties.get("N03_003") or "") + (properties.get("N03_004") or ""),
+        }
+    if "KEY_CODE" in properties:
+        if properties.get("HCODE") == ESTAT_WATER_HCODE or not properties.get("S_NAME"):
+            return None
+        return {"level": "town", "code": str(properties["KEY_CODE"]), "name": properties["S_NAME"]}
+    if properties.get("level") in BOUNDARY_LEVELS and properties.get("code"):
+        return {"level": properties["level"], "code": str(properties["code"]), "name": properties.get("name", "")}
+    return None
+
+def iter_boundary_features(paths: List[Path]) -> Iterator[Dict]:
+    """複数ファイルの境界をまとめ、(レベル, コード) 単位のフィーチャを返す"""
+    merged: Dict[tuple, Dict] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        count = 0
+        for feature in data.get("features", []):
+            identity = feature_identity(feature.get("properties") or {})
+            rings = _rings(feature.get("geometry") or {})
+            if identity is None or not rings:
+                continue
+            key = (identity["level"], identity["code"])
+            merged.setdefault(key, {**identity, "rings": []})["rings"].extend(rings)
+            count += 1
+        logger.info(f"📥 {path}: {count}フィーチャ")
+    yield from merged.values()
+
+def main():
+    parser = argparse.ArgumentParser(description="行政区域ポリゴンから逆ジオコーディング索引を構築")
+    parser.add_argument("inputs", nargs="+", help="行政区域（N03）・小地域境界の GeoJSON")
+    parser.add_argument("-o", "--output", default=ADMIN_BOUNDARY_PATH, help="索引のディレクトリ")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = write_boundary_store(iter_boundary_features([Path(p) for p in args.inputs]), args.output)
+    print(f"✅ 行政区域索引を作成: {args.output} ({count}区域)")
+
+if __name__ == "__main__":
+    main()
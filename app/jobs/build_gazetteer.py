@@ -0,0 +1,117 @@
+"""
+オフラインジオコーダー（ガゼッティア）の構築
+
+国土交通省「位置参照情報」CSV（街区レベル・大字町丁目レベル）を読み込み、
+照合キーのソート済み配列として保存します。市区町村・都道府県の代表点は
+町丁目代表点の平均で補完します。
+
+実行例:
+    python -m app.jobs.build_gazetteer 13_2023.csv 13000-21.0a.csv -o data/gazetteer.npz
+"""
+import argparse
+import csv
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from app.services.gazetteer import GAZETTEER_PATH, Gazetteer
+from app.utils.address import address_key, join_address_key
+
+logger = logging.getLogger(__name__)
+
+def open_csv(path: Path):
+    """位置参照情報は Shift_JIS 配布のため、UTF-8 で読めなければ cp932 で開く"""
+    try:
+        with open(path, encoding="utf-8-sig") as f:
+            f.read(4096)
+        return open(path, encoding="utf-8-sig", newline="")
+    except UnicodeDecodeError:
+        return open(path, encoding="cp932", newline="")
+
+def iter_reference_rows(path: Path) -> Iterator[Dict]:
+    """1ファイル分の行を {"town_key", "town_label", "block", "lat", "lng"} に変換"""
+    with open_csv(path) as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        is_block_level = "街区符号・地番" in fields
+        town_field = "大字・町丁目名" if is_block_level else "大字町丁目名"
+        if town_field not in fields:
+            raise ValueError(f"位置参照情報の形式ではありません: {path}")
+
+        for row in reader:
+            try:
+                lat, lng = float(row["緯度"]), float(row["経度"])
+            except (KeyError, ValueError):
+                continue
+            town = row[town_field] + (row.get("小字・通称名") or "")
+            town_label = row["都道府県名"] + row["市区町村名"] + town
+            yield {
+                "prefecture": row["都道府県名"],
+                "municipality": row["市区町村名"],
+                "town_key": address_key(town_label),
+                "town_label": town_label,
+                "block": row.get("街区符号・地番", "") if is_block_level else "",
+                "lat": lat,
+                "lng": lng,
+            }
+
+def _accumulate(acc: List[float], lat: float, lng: float):
+    """[緯度合計, 経度合計, 件数] に1点を加算"""
+    acc[0] += lat
+    acc[1] += lng
+    acc[2] += 1
+
+def build_entries(paths: List[Path]) -> Iterator[Dict]:
+    """照合キーのエントリを生成（上位レベルの代表点は下位の平均）"""
+    town_points: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+    town_has_centroid = set()
+    town_parent: Dict[str, tuple] = {}
+    town_labels: Dict[str, str] = {}
+
+    for path in paths:
+        count = 0
+        for row in iter_reference_rows(path):
+            town_key = row["town_key"]
+            town_parent[town_key] = (row["prefecture"], row["municipality"])
+            town_labels.setdefault(town_key, row["town_label"])
+            if row["block"]:
+                yield {"key": join_address_key(town_key, row["block"]), "lat": row["lat"], "lng": row["lng"], "level": "block"}
+                if town_key not in town_has_centroid:
+                    _accumulate(town_points[town_key], row["lat"], row["lng"])
+            else:
+                town_has_centroid.add(town_key)
+                town_points[town_key] = [row["lat"], row["lng"], 1]
+            count += 1
+        logger.info(f"📥 {path}: {count}件")
+
+    municipality_points: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+    municipality_labels: Dict[str, str] = {}
+    prefecture_points: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+    for town_key, (lat_sum, lng_sum, n) in town_points.items():
+        lat, lng = lat_sum / n, lng_sum / n
+        yield {"key": town_key, "lat": lat, "lng": lng, "level": "town", "label": town_labels[town_key]}
+        prefecture, municipality = town_parent[town_key]
+        municipality_key = address_key(prefecture + municipality)
+        municipality_labels.setdefault(municipality_key, prefecture + municipality)
+        _accumulate(municipality_points[municipality_key], lat, lng)
+        _accumulate(prefecture_points[prefecture], lat, lng)
+
+    for key, (lat_sum, lng_sum, n) in municipality_points.items():
+        yield {"key": key, "lat": lat_sum / n, "lng": lng_sum / n, "level": "municipality", "label": municipality_labels[key]}
+    for key, (lat_sum, lng_sum, n) in prefecture_points.items():
+        yield {"key": key, "lat": lat_sum / n, "lng": lng_sum / n, "level": "prefecture", "label": key}
+
+def main():
+    parser = argparse.ArgumentParser(description="位置参照情報からオフラインジオコーダーを構築")
+    parser.add_argument("inputs", nargs="+", help="位置参照情報CSV（街区・大字町丁目レベル）")
+    parser.add_argument("-o", "--output", default=GAZETTEER_PATH, help="出力先 npz")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    gazetteer = Gazetteer.from_entries(build_entries([Path(p) for p in args.inputs]))
+    gazetteer.save(args.output)
+    print(f"✅ オフラインジオコーダーを保存: {args.output} ({len(gazetteer)}件)")
+
+if __name__ == "__main__":
+    main()
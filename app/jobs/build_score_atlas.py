@@ -0,0 +1,173 @@
+"""
+スコアアトラスの構築（全国の居住メッシュの8項目スコアを事前計算）
+
+メッシュ人口ストアで人口のあるメッシュを対象に、第2次メッシュ（約10km四方）を作業単位として
+ローカルのデータ（POIストア・駅索引・ハザードラスター・犯罪統計）だけでグリッド一括スコアリングを行い、
+メッシュ内のセルの平均をそのメッシュのスコアとします。Places API は呼びません。
+
+作業単位ごとの結果を <出力>.parts/ に保存するため、中断しても再実行すれば続きから再開し、
+--bbox で範囲を分けて実行すればアトラスに追加されます（範囲にかかる作業単位は全体を計算します）。--workers でプロセス並列に計算します。
+
+実行例:
+    python -m app.jobs.build_score_atlas --workers 8
+    python -m app.jobs.build_score_atlas --bbox 35.50,139.55,35.82,139.92 --level 4
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+from app.services.grid_scoring import (
+    GridScorer, ScoringGrid, collect_store_facilities, crime_bonus_grid, required_types
+)
+from app.jobs.job_args import comma_floats
+from app.services.hazard_raster import get_hazard_raster
+from app.services.mesh_population import get_mesh_population
+from app.services.poi_store import get_poi_store
+from app.services.score_atlas import SCORE_ATLAS_PATH, write_score_atlas
+from app.services.score_percentiles import SCORE_CATEGORIES
+from app.services.station_index import get_station_index
+from app.utils.jis_mesh import (
+    MESH_LEVEL_DIVISIONS, codes_from_indices, indices_from_codes, mesh_centers, mesh_codes, mesh_size_deg
+)
+
+logger = logging.getLogger(__name__)
+
+# 作業単位（第2次メッシュ）
+UNIT_LEVEL = 2
+# スコアを計算するグリッドのセルの大きさ（メートル）
+DEFAULT_RESOLUTION_M = 100
+
+def inhabited_codes(level: int) -> np.ndarray:
+    """人口のあるメッシュのコード（アトラスのレベルに変換）"""
+    store = get_mesh_population()
+    population = store.columns["population"]
+    codes = store.codes[np.nan_to_num(population, nan=1.0) > 0]
+    if store.level >= level:
+        # 細かいメッシュ → それを含むメッシュ
+        lats, lngs = mesh_centers(codes, store.level)
+        return np.unique(mesh_codes(lats, lngs, level))
+    # 粗いメッシュ → 含まれるすべてのメッシュ
+    scale = MESH_LEVEL_DIVISIONS[level] // MESH_LEVEL_DIVISIONS[store.level]
+    rows, cols = indices_from_codes(codes, store.level)
+    offsets = np.arange(scale)
+    rows = (rows[:, None, None] * scale + offsets[None, :, None]).repeat(scale, axis=2)
+    cols = (cols[:, None, None] * scale + offsets[None, None, :]).repeat(scale, axis=1)
+    return np.unique(codes_from_indices(rows.ravel(), cols.ravel(), level))
+
+def score_unit(args: Tuple[int, np.ndarray, int, float, str]) -> Tuple[int, int]:
+    """1作業単位（第2次メッシュ）のメッシュ別スコアを計算して parts に保存"""
+    unit, codes, level, resolution, parts_dir = args
+    rows, cols = indices_from_codes(np.array([unit]), UNIT_LEVEL)
+    dlat, dlng = mesh_size_deg(UNIT_LEVEL)
+    south, west = float(rows[0]) * dlat, 100.0 + float(cols[0]) * dlng
+    grid = ScoringGrid(south, west, south + dlat, west + dlng, resolution)
+
+    station_index = get_station_index()
+    facilities = collect_store_facilities(
+        get_poi_store(), grid, required_types(SCORE_CATEGORIES, station_index is not None)
+    )
+    scores = GridScorer(grid, facilities, station_index=station_index,
+                        hazard_raster=get_hazard_raster(), crime_bonus_at=crime_bonus_grid).score()
+
+    # セル中心が属するメッシュごとに平均
+    lats, lngs = grid.cell_centers()
+    cell_codes = mesh_codes(lats.ravel(), lngs.ravel(), level)
+    unique, inverse = np.unique(cell_codes, return_inverse=True)
+    cell_counts = np.bincount(inverse)
+    matrix = np.stack(
+        [np.bincount(inverse, weights=scores[c].ravel()) / cell_counts for c in SCORE_CATEGORIES], axis=1
+    )
+    keep = np.isin(unique, codes)
+
+    part = Path(parts_dir) / f"{unit}.npz"
+    tmp = Path(parts_dir) / f"{unit}.tmp.npz"
+    np.savez(tmp, codes=unique[keep], scores=matrix[keep].astype(np.float16))
+    os.replace(tmp, part)
+    return unit, int(keep.sum())
+
+def main():
+    parser = argparse.ArgumentParser(description="居住メッシュの8項目スコアを事前計算してスコアアトラスを構築")
+    parser.add_argument("--level", type=int, choices=[3, 4, 5], default=3, help="メッシュのレベル（3: 約1km）")
+    parser.add_argument("--bbox", type=lambda v: comma_floats(v, 4), help="南,西,北,東（緯度経度）の範囲のみ計算")
+    parser.add_argument("--resolution", type=float, default=DEFAULT_RESOLUTION_M, help="グリッドのセル（メートル）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="並列プロセス数")
+    parser.add_argument("--restart", action="store_true", help="途中結果（parts）を破棄して最初から計算")
+    parser.add_argument("-o", "--output", default=SCORE_ATLAS_PATH, help="アトラスのディレクトリ")
+    args = parser.parse_args()
+
+    mesh_height_m = mesh_size_deg(args.level)[0] * 111320
+    if args.resolution > mesh_height_m / 2:
+        parser.error(f"--resolution はメッシュの大きさの半分（{mesh_height_m / 2:.0f}m）以下にしてください")
+
+    logging.basicConfig(level=logging.INFO)
+    if get_poi_store() is None:
+        parser.error("ローカルPOIストアが必要です（python -m app.jobs.import_poi を実行してください）")
+    if get_mesh_population() is None:
+        parser.error("メッシュ人口ストアが必要です（python -m app.jobs.import_mesh_population を実行してください）")
+
+    parts_dir = Path(args.output + ".parts")
+    if args.restart:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    params = {"level": args.level, "resolution_m": args.resolution}
+    params_path = parts_dir / "params.json"
+    if params_path.exists():
+        with open(params_path, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous != params:
+            parser.error(f"途中結果と条件が異なります（{previous}）。--restart で作り直してください")
+    with open(params_path, "w", encoding="utf-8") as f:
+        json.dump(params, f)
+
+    codes = inhabited_codes(args.level)
+    lats, lngs = mesh_centers(codes, args.level)
+    units = mesh_codes(lats, lngs, UNIT_LEVEL)
+    order = np.argsort(units, kind="stable")
+    codes, units, lats, lngs = codes[order], units[order], lats[order], lngs[order]
+    unit_codes, starts = np.unique(units, return_index=True)
+    bounds = np.append(starts[1:], len(codes))
+    if args.bbox:
+        # --bbox は作業単位の選択だけに使い、選んだ単位は範囲外のメッシュも含めて全体を計算する
+        # （parts は作業単位ごとに1度だけ作るので、範囲の境界で単位の一部が欠けないように）
+        south, west, north, east = args.bbox
+        inside = (lats >= south) & (lats <= north) & (lngs >= west) & (lngs <= east)
+        selected = np.isin(unit_codes, units[inside])
+        unit_codes, starts, bounds = unit_codes[selected], starts[selected], bounds[selected]
+
+    tasks = [
+        (int(unit), codes[start:end], args.level, args.resolution, str(parts_dir))
+        for unit, start, end in zip(unit_codes.tolist(), starts.tolist(), bounds.tolist())
+        if not (parts_dir / f"{int(unit)}.npz").exists()
+    ]
+    meshes = int((bounds - starts).sum())
+    logger.info(f"📥 居住メッシュ {meshes}件 / 作業単位 {len(unit_codes)}件（未計算 {len(tasks)}件）")
+
+    done = 0
+    if tasks:
+        with Pool(max(1, args.workers)) as pool:
+            for unit, count in pool.imap_unordered(score_unit, tasks):
+                done += 1
+                if done % 50 == 0 or done == len(tasks):
+                    logger.info(f"🧮 {done}/{len(tasks)} 作業単位（{unit}: {count}メッシュ）")
+
+    parts = [np.load(path) for path in sorted(parts_dir.glob("*.npz")) if not path.name.endswith(".tmp.npz")]
+    all_codes = np.concatenate([p["codes"] for p in parts]) if parts else np.zeros(0, dtype=np.int64)
+    all_scores = np.concatenate([p["scores"] for p in parts]) if parts else np.zeros((0, len(SCORE_CATEGORIES)))
+    meta = write_score_atlas(all_codes, all_scores, args.level, args.output, {
+        "resolution_m": args.resolution,
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "transport": "station_index" if get_station_index() is not None else "poi_store",
+        "hazard": "hazard_raster" if get_hazard_raster() is not None else "default",
+    })
+    print(f"✅ スコアアトラスを保存: {args.output} ({meta['meshes']}メッシュ / レベル{args.level})")
+
+if __name__ == "__main__":
+    main()
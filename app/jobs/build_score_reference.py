@@ -0,0 +1,82 @@
+"""
+スコア参照分布の構築ジョブ
+
+記録済みデータ（JSONL、1行1地点）にスコア計算パイプラインを適用し、
+カテゴリ別のソート済みスコア配列を npz に保存します。
+
+各行は次のいずれかの形式:
+  - /api/lifestyle-analysis-8items の記録レスポンス（breakdown をそのまま使用）
+  - {"address": ..., "collector_data": {"education_data": {...}, ...}}
+    （キャッシュ済み施設データからスコアを再計算）
+
+実行例:
+    python -m app.jobs.build_score_reference samples.jsonl -o data/score_reference.npz
+"""
+import argparse
+import json
+import logging
+from typing import Dict, Iterator, Optional
+
+from app.services.score_percentiles import ScoreReference, SCORE_REFERENCE_PATH, MIN_PREFECTURE_SAMPLES
+from app.utils.address import extract_prefecture
+
+logger = logging.getLogger(__name__)
+
+def score_record(record: Dict) -> Optional[Dict[str, float]]:
+    """1地点分の記録からカテゴリ別スコアを取得"""
+    breakdown = (
+        record.get("lifestyle_analysis", {})
+        .get("lifestyle_scores", {})
+        .get("breakdown")
+    )
+    if breakdown:
+        return breakdown
+
+    collector_data = record.get("collector_data")
+    if collector_data:
+        # スコア計算ロジックはAPI本体と共通
+        from main_original import calculate_comprehensive_scores_with_safety_8items
+        return calculate_comprehensive_scores_with_safety_8items(**collector_data)
+
+    return None
+
+def iter_samples(path: str) -> Iterator[Dict]:
+    """JSONL を読み込み {"prefecture", "scores"} を順に返す"""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                # メンテナンスモードの代替レスポンスは分布を歪めるため除外
+                if record.get("maintenance_mode"):
+                    continue
+                scores = score_record(record)
+            except Exception as e:
+                logger.warning(f"⚠️ {line_no}行目をスキップ: {e}")
+                continue
+            if scores:
+                yield {
+                    "prefecture": record.get("prefecture") or extract_prefecture(record.get("address", "")),
+                    "scores": scores
+                }
+
+def main():
+    parser = argparse.ArgumentParser(description="スコア参照分布の構築")
+    parser.add_argument("samples", help="参照地点の記録データ（JSONL）")
+    parser.add_argument("-o", "--output", default=SCORE_REFERENCE_PATH, help="出力先 npz")
+    parser.add_argument("--min-prefecture-samples", type=int, default=MIN_PREFECTURE_SAMPLES,
+                        help="都道府県別分布を作成する最小サンプル数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    reference = ScoreReference.from_samples(iter_samples(args.samples), args.min_prefecture_samples)
+    reference.save(args.output)
+
+    regions = sorted(reference.distributions)
+    print(f"✅ 参照分布を保存: {args.output}")
+    print(f"📊 地域数: {len(regions)} ({', '.join(regions[:10])}{' ...' if len(regions) > 10 else ''})")
+
+if __name__ == "__main__":
+    main()
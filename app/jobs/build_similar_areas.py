@@ -0,0 +1,86 @@
+"""
+似たエリア検索の索引の構築
+
+スコアアトラスの全メッシュのスコアベクトルに、メッシュ中心の市区町村コード（行政区域索引）と
+直近の取引の㎡単価の中央値（ローカル取引ストア）を付けて IVF 索引を作ります。
+行政区域索引・取引ストアがなければその列は不明（0 / NaN）のまま保存します。
+
+実行例:
+    python -m app.jobs.build_similar_areas
+    python -m app.jobs.build_similar_areas --price-quarters 12 --clusters 2000
+"""
+import argparse
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from app.services.admin_boundaries import municipality_code_at
+from app.services.score_atlas import get_score_atlas
+from app.services.similar_areas import SIMILAR_AREA_INDEX_PATH, write_similar_area_index
+from app.services.transaction_store import (
+    TRANSACTION_DEFAULT_QUARTERS, get_transaction_store, latest_published_period, shift_period
+)
+from app.utils.jis_mesh import mesh_centers, mesh_codes
+
+logger = logging.getLogger(__name__)
+
+# ㎡単価の中央値を採用する最少取引件数
+MIN_TRANSACTIONS_PER_MESH = 3
+
+def median_unit_prices(codes: np.ndarray, level: int, quarters: int) -> np.ndarray:
+    """メッシュごとの㎡単価の中央値（取引が少ないメッシュは NaN）"""
+    prices = np.full(len(codes), np.nan, dtype=np.float32)
+    store = get_transaction_store()
+    if store is None:
+        logger.warning("⚠️ 取引ストアがないため㎡単価なしで構築します")
+        return prices
+    from_period = shift_period(latest_published_period(), -(quarters - 1))
+    lats, lngs, unit_prices = store.unit_prices(from_period)
+    if len(unit_prices) == 0:
+        return prices
+    transaction_codes = mesh_codes(lats, lngs, level)
+    order = np.lexsort((unit_prices, transaction_codes))
+    transaction_codes, unit_prices = transaction_codes[order], unit_prices[order]
+    unique, starts, counts = np.unique(transaction_codes, return_index=True, return_counts=True)
+    rows = np.searchsorted(codes, unique)
+    for code, row, start, count in zip(unique, rows, starts, counts):
+        if count >= MIN_TRANSACTIONS_PER_MESH and row < len(codes) and codes[row] == code:
+            prices[row] = np.median(unit_prices[start:start + count])
+    logger.info(f"💴 取引 {len(order)}件 → ㎡単価のあるメッシュ {int(np.isfinite(prices).sum())}件")
+    return prices
+
+def main():
+    parser = argparse.ArgumentParser(description="スコアアトラスから似たエリア検索の索引を構築")
+    parser.add_argument("--clusters", type=int, help="IVF のクラスタ数（既定: 件数の平方根）")
+    parser.add_argument("--price-quarters", type=int, default=TRANSACTION_DEFAULT_QUARTERS,
+                        help="㎡単価に使う直近の四半期数")
+    parser.add_argument("-o", "--output", default=SIMILAR_AREA_INDEX_PATH, help="索引のディレクトリ")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    atlas = get_score_atlas()
+    if atlas is None:
+        parser.error("スコアアトラスが必要です（python -m app.jobs.build_score_atlas を実行してください）")
+
+    codes = np.asarray(atlas.codes)
+    vectors = np.asarray(atlas.scores, dtype=np.float32)
+    lats, lngs = mesh_centers(codes, atlas.level)
+    logger.info(f"📥 スコアアトラス {len(codes)}メッシュ（レベル{atlas.level}）")
+
+    municipalities = np.array([
+        int(municipality_code_at({"lat": float(lat), "lng": float(lng)}) or 0) for lat, lng in zip(lats, lngs)
+    ], dtype=np.int32)
+    prices = median_unit_prices(codes, atlas.level, args.price_quarters)
+
+    meta = write_similar_area_index(codes, lats, lngs, vectors, municipalities, prices, args.output,
+                                    clusters=args.clusters, meta={
+        "level": atlas.level,
+        "atlas_built_at": atlas.meta.get("built_at"),
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "price_quarters": args.price_quarters,
+    })
+    print(f"✅ 似たエリア索引を保存: {args.output} ({meta['entries']}件 / {meta['clusters']}クラスタ)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+ローカル駅索引の構築
+
+対応形式:
+  - 国土数値情報「鉄道」駅データ (N02, GeoJSON): 路線ごとの駅フィーチャを駅単位にまとめる
+  - 国土数値情報「駅別乗降客数」(S12, GeoJSON): --ridership-property の年度列を駅に結合
+  - 国土数値情報「バス停留所」(P11, GeoJSON)
+  - CSV（name, lat, lng, lines[;区切り], operators[;区切り], ridership, kind[rail/bus]）
+
+同名の駅は 500m 以内のものを1駅（乗換駅）にまとめ、路線・事業者を統合します。
+
+実行例:
+    python -m app.jobs.build_station_index --ridership-property S12_053 \\
+        N02-22_Station.geojson S12-22_NumberOfPassengers.geojson P11-22_13.geojson -o data/station_index.npz
+"""
+import argparse
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.poi_store import haversine_m
+from app.services.station_index import STATION_INDEX_PATH, StationIndex
+
+logger = logging.getLogger(__name__)
+
+# 同名の駅を同じ駅とみなす距離
+MERGE_DISTANCE_M = 500
+
+def _centroid(geometry: Dict):
+    """Point / LineString / MultiLineString の代表点 (lat, lng)"""
+    coords = geometry.get("coordinates")
+    if geometry.get("type") == "Point":
+        return coords[1], coords[0]
+    if geometry.get("type") == "MultiLineString":
+        coords = [c for line in coords for c in line]
+    if not coords:
+        return None
+    points = np.asarray(coords, dtype=np.float64)
+    return float(points[:, 1].mean()), float(points[:, 0].mean())
+
+def _split(value) -> List[str]:
+    return [v.strip() for v in str(value or "").split(";") if v.strip()]
+
+def _number(value) -> Optional[float]:
+    try:
+        number = float(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+class StationMerger:
+    """同名・近接の駅フィーチャを1駅にまとめる"""
+
+    def __init__(self):
+        self.by_name: Dict[tuple, List[Dict]] = {}
+
+    def add(self, name: str, lat: float, lng: float, kind: str, lines=(), operators=(), ridership=None):
+        groups = self.by_name.setdefault((kind, name), [])
+        for group in groups:
+            distance = haversine_m(lat, lng, np.array([group["lat"]]), np.array([group["lng"]]))[0]
+            if distance <= MERGE_DISTANCE_M:
+                n = group["members"]
+                group["lat"] = (group["lat"] * n + lat) / (n + 1)
+                group["lng"] = (group["lng"] * n + lng) / (n + 1)
+                group["members"] = n + 1
+                break
+        else:
+            group = {"name": name, "lat": lat, "lng": lng, "kind": kind, "lines": {}, "operators": {},
+                     "ridership": None, "members": 1}
+            groups.append(group)
+        group["lines"].update(dict.fromkeys(l for l in lines if l))
+        group["operators"].update(dict.fromkeys(o for o in operators if o))
+        if ridership:
+            group["ridership"] = (group["ridership"] or 0) + ridership
+        return group
+
+    def find(self, name: str, lat: float, lng: float, kind: str = "rail") -> Optional[Dict]:
+        for group in self.by_name.get((kind, name), []):
+            if haversine_m(lat, lng, np.array([group["lat"]]), np.array([group["lng"]]))[0] <= MERGE_DISTANCE_M:
+                return group
+        return None
+
+    def stations(self) -> List[Dict]:
+        return [
+            {**group, "lines": list(group["lines"]), "operators": list(group["operators"])}
+            for groups in self.by_name.values() for group in groups
+        ]
+
+def import_file(merger: StationMerger, path: Path, ridership_property: Optional[str]) -> int:
+    count = 0
+    if path.suffix.lower() == ".csv":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                merger.add(row["name"], float(row["lat"]), float(row["lng"]), row.get("kind") or "rail",
+                           _split(row.get("lines")), _split(row.get("operators")), _number(row.get("ridership")))
+                count += 1
+        return count
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    for feature in data.get("features", []):
+        props = feature.get("properties") or {}
+        point = _centroid(feature.get("geometry") or {})
+        if point is None:
+            continue
+        lat, lng = point
+        if "N02_005" in props:
+            merger.add(props["N02_005"], lat, lng, "rail", [props.get("N02_003")], [props.get("N02_004")])
+        elif "S12_001" in props:
+            # 乗降客数は事業者・路線ごとの値なので、既存の駅に加算する
+            ridership = _number(props.get(ridership_property)) if ridership_property else None
+            station = merger.find(props["S12_001"], lat, lng)
+            if station is None:
+                station = merger.add(props["S12_001"], lat, lng, "rail", [props.get("S12_003")], [props.get("S12_002")])
+            if ridership:
+                station["ridership"] = (station["ridership"] or 0) + ridership
+        elif "P11_001" in props:
+            merger.add(props["P11_001"], lat, lng, "bus", [], _split(props.get("P11_002")))
+        else:
+            continue
+        count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="駅・乗降客数・バス停データからローカル駅索引を構築")
+    parser.add_argument("inputs", nargs="+", help="N02駅 / S12乗降客数 / P11バス停 の GeoJSON、または CSV（駅データを先に指定）")
+    parser.add_argument("--ridership-property", help="S12 の乗降客数の列名（例: 最新年度の S12_053）")
+    parser.add_argument("-o", "--output", default=STATION_INDEX_PATH, help="出力先 npz")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    merger = StationMerger()
+    for path in args.inputs:
+        count = import_file(merger, Path(path), args.ridership_property)
+        logger.info(f"📥 {path}: {count}件")
+
+    index = StationIndex.from_stations(merger.stations())
+    index.save(args.output)
+    print(f"✅ 駅索引を保存: {args.output} ({len(index)}駅)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+徒歩ネットワーク（歩行者道路グラフ）の構築
+
+対応形式:
+  - OSM XML（.osm。PBF は osmium cat input.osm.pbf -o output.osm で変換）
+  - GeoJSON / GeoJSONSeq の LineString（osmium export の出力など。properties に highway タグ）
+
+歩行可能な道路（highway タグ）だけを取り出し、交差点と端点をノード、
+その間の折れ線を1本の辺（長さは折れ線の延長）にまとめてから CSR で保存します。
+
+実行例:
+    python -m app.jobs.build_walking_network kanto-latest.osm -o data/walking_network
+"""
+import argparse
+import json
+import logging
+import math
+import xml.etree.ElementTree as ET
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from app.services.walking_network import WALKING_NETWORK_PATH, write_walking_network
+
+logger = logging.getLogger(__name__)
+
+WALKABLE_HIGHWAYS = {
+    "footway", "pedestrian", "path", "steps", "living_street", "residential", "service",
+    "unclassified", "tertiary", "tertiary_link", "secondary", "secondary_link",
+    "primary", "primary_link", "trunk", "trunk_link", "track", "cycleway", "road", "corridor",
+}
+_FOOT_ALLOWED = {"yes", "designated", "permissive"}
+
+def is_walkable(tags: Dict[str, str]) -> bool:
+    if tags.get("highway") not in WALKABLE_HIGHWAYS:
+        return False
+    if tags.get("foot") in ("no", "private"):
+        return False
+    if tags.get("access") in ("no", "private") and tags.get("foot") not in _FOOT_ALLOWED:
+        return False
+    return True
+
+def _segment_length(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """2点間の距離（メートル）"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(min(h, 1.0)))
+
+def iter_osm_xml(path: Path, coords: Dict) -> Iterator[List]:
+    """OSM XML から歩行可能な way のノード列を返す（座標は coords に格納）"""
+    way_nodes: List[str] = []
+    tags: Dict[str, str] = {}
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if elem.tag == "node":
+            coords[elem.get("id")] = (float(elem.get("lat")), float(elem.get("lon")))
+            tags = {}
+            elem.clear()
+        elif elem.tag == "nd":
+            way_nodes.append(elem.get("ref"))
+        elif elem.tag == "tag":
+            tags[elem.get("k")] = elem.get("v")
+        elif elem.tag in ("way", "relation"):
+            if elem.tag == "way" and is_walkable(tags):
+                yield [ref for ref in way_nodes if ref in coords]
+            way_nodes, tags = [], {}
+            elem.clear()
+
+def iter_geojson_lines(path: Path, coords: Dict) -> Iterator[List]:
+    """GeoJSON / GeoJSONSeq の LineString を座標一致でつないだノード列として返す"""
+    def features():
+        with open(path, encoding="utf-8") as f:
+            if path.suffix.lower() in (".geojsonseq", ".jsonl", ".geojsonl"):
+                for line in f:
+                    line = line.strip().lstrip("\x1e")
+                    if line:
+                        yield json.loads(line)
+            else:
+                yield from json.load(f).get("features", [])
+
+    for feature in features():
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") != "LineString" or not is_walkable(feature.get("properties") or {}):
+            continue
+        keys = []
+        for lng, lat in (point[:2] for point in geometry["coordinates"]):
+            key = (round(lat, 7), round(lng, 7))
+            coords[key] = key
+            keys.append(key)
+        yield keys
+
+def build_graph(ways: List[List], coords: Dict):
+    """交差点・端点をノードとし、その間を1辺にまとめる"""
+    usage = Counter()
+    for way in ways:
+        usage.update(way)
+        usage[way[0]] += 1
+        usage[way[-1]] += 1
+
+    node_ids: Dict = {}
+    lats, lngs = [], []
+    edge_u, edge_v, lengths = [], [], []
+
+    def node_id(key):
+        if key not in node_ids:
+            node_ids[key] = len(lats)
+            lat, lng = coords[key]
+            lats.append(lat)
+            lngs.append(lng)
+        return node_ids[key]
+
+    for way in ways:
+        start = way[0]
+        length = 0.0
+        for prev, key in zip(way, way[1:]):
+            length += _segment_length(coords[prev], coords[key])
+            if usage[key] >= 2:
+                if key != start and length > 0:
+                    edge_u.append(node_id(start))
+                    edge_v.append(node_id(key))
+                    lengths.append(length)
+                start, length = key, 0.0
+    return lats, lngs, edge_u, edge_v, lengths
+
+def main():
+    parser = argparse.ArgumentParser(description="OSM道路データから徒歩ネットワークを構築")
+    parser.add_argument("inputs", nargs="+", help="OSM XML / GeoJSON / GeoJSONSeq")
+    parser.add_argument("-o", "--output", default=WALKING_NETWORK_PATH, help="グラフのディレクトリ")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ways: List[List] = []
+    for path in map(Path, args.inputs):
+        coords: Dict = {}
+        reader = iter_osm_xml if path.suffix.lower() == ".osm" else iter_geojson_lines
+        # way のノード列を座標に置き換えて保持（ファイルごとにIDの名前空間が異なるため）
+        file_ways = [[coords[ref] for ref in way] for way in reader(path, coords) if len(way) >= 2]
+        logger.info(f"📥 {path}: 歩行可能な道路 {len(file_ways)}本")
+        ways.extend(file_ways)
+
+    coordinate_of = {point: point for way in ways for point in way}
+    lats, lngs, edge_u, edge_v, lengths = build_graph(ways, coordinate_of)
+    meta = write_walking_network(lats, lngs, edge_u, edge_v, lengths, args.output)
+    print(f"✅ 徒歩ネットワークを保存: {args.output} (ノード{meta['nodes']} / 辺{meta['edges']})")
+
+if __name__ == "__main__":
+    main()
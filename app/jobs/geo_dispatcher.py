@@ -0,0 +1,193 @@
+"""
+地理的なキャッシュアフィニティのディスパッチャー（ローカル検証用の小さなリバースプロキシ）
+
+リクエストのエリア（座標・住所・タイル・チャットのセッション）ごとに転送先のワーカーを固定し、
+同じエリアのキャッシュが温まっているプロセスに届けます。ルーティングの規則は app/services/geo_routing.py。
+
+--workers を指定すると main_original:app のワーカープロセスを連番のポートで起動し、その前段に立ちます。
+既に動いているノードに振り分ける場合は --upstream（または GEO_ROUTING_UPSTREAMS のカンマ区切り）で
+各ノードのURLを指定してください。振り分けの状況は /_dispatcher/stats で確認できます。
+
+実行例:
+    python -m app.jobs.geo_dispatcher --workers 4 --port 8000
+    python -m app.jobs.geo_dispatcher --upstream http://10.0.0.2:8080 --upstream http://10.0.0.3:8080
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+from typing import List
+
+import aiohttp
+from aiohttp import web
+
+from app.services.geo_routing import GEO_ROUTING_LOAD_FACTOR, GeoRouter, routing_key
+
+logger = logging.getLogger(__name__)
+
+# 転送しないヘッダー（hop-by-hop と、aiohttp が付け直すもの）
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "host", "content-length",
+}
+# ルーティングキーを求めるために読むJSONボディの上限
+MAX_ROUTING_BODY_BYTES = 1 << 20
+WORKER_STARTUP_TIMEOUT = 120
+
+def _forward_headers(headers) -> dict:
+    return {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+
+def _json_body(request: web.Request, body: bytes):
+    if not body or len(body) > MAX_ROUTING_BODY_BYTES or "json" not in (request.content_type or ""):
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+async def proxy_websocket(request: web.Request, router: GeoRouter, upstream: str) -> web.WebSocketResponse:
+    client_ws = web.WebSocketResponse()
+    await client_ws.prepare(request)
+    session: aiohttp.ClientSession = request.app["session"]
+    url = upstream.replace("http", "ws", 1) + request.path_qs
+    router.acquire(upstream)
+    try:
+        async with session.ws_connect(url) as upstream_ws:
+            async def relay(source, target):
+                async for message in source:
+                    if message.type == aiohttp.WSMsgType.TEXT:
+                        await target.send_str(message.data)
+                    elif message.type == aiohttp.WSMsgType.BINARY:
+                        await target.send_bytes(message.data)
+                    else:
+                        break
+                await target.close()
+            await asyncio.gather(relay(client_ws, upstream_ws), relay(upstream_ws, client_ws))
+    except aiohttp.ClientError as e:
+        logger.warning(f"⚠️ WebSocket転送失敗: {upstream} ({e})")
+        await client_ws.close()
+    finally:
+        router.release(upstream)
+    return client_ws
+
+async def proxy(request: web.Request) -> web.StreamResponse:
+    router: GeoRouter = request.app["router"]
+    body = await request.read()
+    key = routing_key(request.path, request.query_string, _json_body(request, body))
+
+    if request.headers.get("upgrade", "").lower() == "websocket":
+        return await proxy_websocket(request, router, router.route(key))
+
+    session: aiohttp.ClientSession = request.app["session"]
+    for _ in range(len(router.upstreams)):
+        upstream = router.route(key)
+        router.acquire(upstream)
+        try:
+            async with session.request(
+                request.method, upstream + request.path_qs, headers=_forward_headers(request.headers),
+                data=body or None, allow_redirects=False
+            ) as upstream_response:
+                response = web.StreamResponse(status=upstream_response.status,
+                                              headers=_forward_headers(upstream_response.headers))
+                response.headers["X-Upstream"] = upstream
+                if upstream_response.content_length is not None:
+                    response.content_length = upstream_response.content_length
+                await response.prepare(request)
+                async for chunk in upstream_response.content.iter_chunked(64 * 1024):
+                    await response.write(chunk)
+                await response.write_eof()
+                return response
+        except aiohttp.ClientConnectorError as e:
+            # まだ何も返していないので、リングの次の転送先で再試行する
+            logger.warning(f"⚠️ 転送先に接続できません: {upstream} ({e})")
+            router.mark_down(upstream)
+        finally:
+            router.release(upstream)
+    return web.json_response({"detail": "転送先に接続できません"}, status=502)
+
+async def stats(request: web.Request) -> web.Response:
+    return web.json_response(request.app["router"].stats())
+
+def start_workers(count: int, base_port: int) -> List[subprocess.Popen]:
+    processes = []
+    for i in range(count):
+        port = base_port + i
+        processes.append(subprocess.Popen([
+            sys.executable, "-m", "uvicorn", "main_original:app", "--host", "127.0.0.1", "--port", str(port),
+        ]))
+        logger.info(f"🚀 ワーカー起動: 127.0.0.1:{port} (pid={processes[-1].pid})")
+    return processes
+
+async def wait_until_ready(session: aiohttp.ClientSession, upstreams: List[str]):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + WORKER_STARTUP_TIMEOUT
+    pending = set(upstreams)
+    while pending and loop.time() < deadline:
+        for upstream in list(pending):
+            try:
+                async with session.get(upstream + "/api/health") as response:
+                    if response.status < 500:
+                        pending.discard(upstream)
+            except aiohttp.ClientError:
+                pass
+        if pending:
+            await asyncio.sleep(0.5)
+    if pending:
+        logger.warning(f"⚠️ 起動を確認できないワーカー: {sorted(pending)}")
+
+def build_app(upstreams: List[str], load_factor: float, wait_for_workers: bool = False) -> web.Application:
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["router"] = GeoRouter(upstreams, load_factor)
+
+    async def on_startup(app):
+        app["session"] = aiohttp.ClientSession(
+            auto_decompress=False, timeout=aiohttp.ClientTimeout(total=None, sock_connect=5)
+        )
+        if wait_for_workers:
+            await wait_until_ready(app["session"], upstreams)
+
+    async def on_cleanup(app):
+        await app["session"].close()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_get("/_dispatcher/stats", stats)
+    app.router.add_route("*", "/{path:.*}", proxy)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="エリアごとに転送先を固定するディスパッチャー")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=0, help="起動するワーカープロセス数")
+    parser.add_argument("--worker-base-port", type=int, default=8101, help="ワーカーの最初のポート")
+    parser.add_argument("--upstream", action="append", default=[], help="転送先のURL（複数指定可）")
+    parser.add_argument("--load-factor", type=float, default=GEO_ROUTING_LOAD_FACTOR,
+                        help="転送先1つの処理中リクエスト数の上限（平均に対する倍率）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    upstreams = [u.rstrip("/") for u in args.upstream]
+    if not upstreams and os.getenv("GEO_ROUTING_UPSTREAMS"):
+        upstreams = [u.strip().rstrip("/") for u in os.getenv("GEO_ROUTING_UPSTREAMS").split(",") if u.strip()]
+    processes = start_workers(args.workers, args.worker_base_port) if args.workers else []
+    upstreams += [f"http://127.0.0.1:{args.worker_base_port + i}" for i in range(args.workers)]
+    if not upstreams:
+        parser.error("--workers か --upstream（GEO_ROUTING_UPSTREAMS）を指定してください")
+
+    logger.info(f"📥 転送先: {len(upstreams)}件 (負荷の上限 ×{args.load_factor})")
+    print(f"✅ ディスパッチャー起動: http://0.0.0.0:{args.port}")
+    try:
+        web.run_app(build_app(upstreams, args.load_factor, wait_for_workers=bool(processes)),
+                    port=args.port, print=None)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+犯罪統計（市区町村・町丁目別認知件数）のテーブルへの取り込み
+
+警察の町丁別犯罪発生件数や e-Stat の市区町村別認知件数の CSV を読み込み、
+人口千人あたり件数とレベル内パーセンタイルを計算して npz に保存します。
+
+列名は以下のいずれか（UTF-8 / Shift_JIS）:
+  - コード: code / 地域コード / 団体コード / 市区町村コード / KEY_CODE
+  - 町丁目名: town / 町丁目 / 町丁名（市区町村コードと組み合わせてキーにする）
+  - 名称: name / 名称 / 市区町村名
+  - 件数: count / 認知件数 / 刑法犯総数 / 総合計 / 合計
+  - 人口: population / 人口 / 総人口（--population で別ファイルから結合も可）
+
+複数年のファイルを指定すると件数は合算されます（人口は --population の値を使うこと）。
+
+実行例:
+    python -m app.jobs.import_crime_stats tokyo_chocho_2023.csv --population estat_pop_chocho.csv
+"""
+import argparse
+import csv
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from app.jobs.build_gazetteer import open_csv
+from app.services.crime_stats import CRIME_STATS_PATH, CrimeStatsTable, town_name_key
+
+logger = logging.getLogger(__name__)
+
+CODE_COLUMNS = ["code", "地域コード", "団体コード", "市区町村コード", "KEY_CODE"]
+TOWN_COLUMNS = ["town", "町丁目", "町丁名"]
+NAME_COLUMNS = ["name", "名称", "市区町村名"]
+COUNT_COLUMNS = ["count", "認知件数", "刑法犯総数", "総合計", "合計"]
+POPULATION_COLUMNS = ["population", "人口", "総人口"]
+
+def _first(row: Dict, columns: List[str]) -> Optional[str]:
+    for column in columns:
+        value = row.get(column)
+        if value not in (None, ""):
+            return value.strip()
+    return None
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value.replace(",", "")) if value else None
+    except ValueError:
+        return None
+
+def row_key(row: Dict):
+    """行のキーとレベル（市区町村コードは検査数字付き6桁なら5桁に）"""
+    code = _first(row, CODE_COLUMNS)
+    if not code or not code.isdigit():
+        return None, None
+    town = _first(row, TOWN_COLUMNS)
+    if len(code) <= 6:
+        municipality_code = code.zfill(5)[:5]
+        if town:
+            return town_name_key(municipality_code, town), "town"
+        return municipality_code, "municipality"
+    return code, "town"
+
+def iter_rows(path: Path) -> Iterator[Dict]:
+    with open_csv(path) as f:
+        for row in csv.DictReader(f):
+            key, level = row_key(row)
+            count = _number(_first(row, COUNT_COLUMNS))
+            if key is None or count is None:
+                continue
+            yield {
+                "key": key,
+                "level": level,
+                "name": _first(row, TOWN_COLUMNS) or _first(row, NAME_COLUMNS) or "",
+                "count": count,
+                "population": _number(_first(row, POPULATION_COLUMNS)),
+            }
+
+def load_population(path: Path) -> Dict[str, float]:
+    population = {}
+    with open_csv(path) as f:
+        for row in csv.DictReader(f):
+            key, _ = row_key(row)
+            value = _number(_first(row, POPULATION_COLUMNS))
+            if key is not None and value is not None:
+                population[key] = value
+    return population
+
+def main():
+    parser = argparse.ArgumentParser(description="市区町村・町丁目別の犯罪統計をテーブルに取り込み")
+    parser.add_argument("inputs", nargs="+", help="認知件数CSV")
+    parser.add_argument("--population", help="人口CSV（コードと人口の列、件数CSVの人口を上書き）")
+    parser.add_argument("--period", default="", help="統計期間の表記（例: 2023年）")
+    parser.add_argument("-o", "--output", default=CRIME_STATS_PATH, help="出力先 npz")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rows = []
+    for path in args.inputs:
+        file_rows = list(iter_rows(Path(path)))
+        logger.info(f"📥 {path}: {len(file_rows)}件")
+        rows.extend(file_rows)
+
+    if args.population:
+        population = load_population(Path(args.population))
+        # 合算時に二重計上しないよう、キーごとに最初の行にだけ人口を載せる
+        seen = set()
+        for row in rows:
+            row["population"] = population.get(row["key"]) if row["key"] not in seen else 0
+            seen.add(row["key"])
+
+    table = CrimeStatsTable.from_rows(rows, meta={"period": args.period, "sources": [Path(p).name for p in args.inputs]})
+    table.save(args.output)
+    print(f"✅ 犯罪統計テーブルを保存: {args.output} ({len(table)}区域)")
+
+if __name__ == "__main__":
+    main()
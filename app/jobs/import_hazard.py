@@ -0,0 +1,106 @@
+"""
+ハザードデータのタイルラスターへの取り込み
+
+対応形式:
+  - GeoJSON（Polygon / MultiPolygon。国土数値情報の浸水想定区域・土砂災害警戒区域・
+    津波浸水想定などを ogr2ogr -f GeoJSON で変換したもの）
+  - CSV（lat, lng と値の列。液状化危険度メッシュなどの点データ）
+
+値は --property の属性（既定 class）から取り、--depth 指定時は浸水深（m）として
+浸水深ランクに変換します。--value で全フィーチャに固定クラスを与えることもできます。
+重なる場合は大きいクラスを採用します。
+
+実行例:
+    python -m app.jobs.import_hazard flood_depth A31-12_13.geojson --property A31_205 --depth
+    python -m app.jobs.import_hazard landslide A33-20_13_red.geojson --value 2 --append
+"""
+import argparse
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.services.hazard_raster import (
+    DEFAULT_CELL_DEG, HAZARD_LAYERS, HAZARD_RASTER_PATH, HazardLayer, TiledRasterBuilder, depth_to_rank
+)
+
+logger = logging.getLogger(__name__)
+
+def _class_of(raw, depth: bool, fixed: Optional[int], max_class: int) -> int:
+    if fixed is not None:
+        return fixed
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return 0
+    value = depth_to_rank(value) if depth else int(value)
+    return max(0, min(value, max_class))
+
+def _rings(geometry):
+    if geometry.get("type") == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry.get("type") == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+def load_existing(builder: TiledRasterBuilder, layer_path: Path):
+    """既存レイヤーのタイルを読み込んで追記できるようにする"""
+    layer = HazardLayer(layer_path)
+    if abs(layer.cell_deg - builder.cell_deg) > 1e-12:
+        raise ValueError(f"既存レイヤーとセルの大きさが異なります: {layer.cell_deg}")
+    for tile_row, tile_col in zip(*np.nonzero(layer.tile_index >= 0)):
+        builder.tiles[(int(tile_row), int(tile_col))] = np.array(layer.tiles[layer.tile_index[tile_row, tile_col]])
+
+def import_file(builder: TiledRasterBuilder, path: Path, prop: str, depth: bool, fixed: Optional[int], max_class: int) -> int:
+    count = 0
+    if path.suffix.lower() == ".csv":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                value = _class_of(row.get(prop), depth, fixed, max_class)
+                if value:
+                    builder.set_cell(*builder.cell_of(float(row["lat"]), float(row["lng"])), value)
+                    count += 1
+        return count
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    for feature in data.get("features", []):
+        value = _class_of((feature.get("properties") or {}).get(prop), depth, fixed, max_class)
+        if not value:
+            continue
+        for polygon in _rings(feature.get("geometry") or {}):
+            builder.fill_polygon(polygon, value)
+        count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="ハザードデータをタイルラスターに取り込み")
+    parser.add_argument("layer", choices=list(HAZARD_LAYERS), help="取り込み先レイヤー")
+    parser.add_argument("inputs", nargs="+", help="GeoJSON（ポリゴン）/ CSV（lat, lng, 値）")
+    parser.add_argument("--property", default="class", help="クラス値（--depth 時は浸水深m）の属性名")
+    parser.add_argument("--depth", action="store_true", help="属性値を浸水深（m）として浸水深ランクに変換")
+    parser.add_argument("--value", type=int, help="全フィーチャに与える固定クラス")
+    parser.add_argument("--cell-arcsec", type=float, default=DEFAULT_CELL_DEG * 3600, help="セルの大きさ（秒）")
+    parser.add_argument("--append", action="store_true", help="既存レイヤーに追記（重なりは最大値）")
+    parser.add_argument("-o", "--output", default=HAZARD_RASTER_PATH, help="ラスターのディレクトリ")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    builder = TiledRasterBuilder(cell_deg=args.cell_arcsec / 3600)
+    layer_path = Path(args.output) / args.layer
+    if args.append and (layer_path / "meta.json").exists():
+        load_existing(builder, layer_path)
+
+    max_class = len(HAZARD_LAYERS[args.layer]["classes"]) - 1
+    for path in args.inputs:
+        count = import_file(builder, Path(path), args.property, args.depth, args.value, max_class)
+        logger.info(f"📥 {path}: {count}件")
+
+    tiles = builder.save(Path(args.output), args.layer)
+    print(f"✅ ハザードレイヤーを保存: {layer_path} ({tiles}タイル)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+e-Stat 地域メッシュ統計（国勢調査 人口・世帯）のメッシュ人口ストアへの取り込み
+
+対応形式:
+  - e-Stat 統計地理情報システムからダウンロードしたメッシュ統計の .txt / .csv
+    （1行目が KEY_CODE と項目コード、2行目が項目名。Shift_JIS 可。* は秘匿）
+  - CSV（code と population / households などの列名をそのまま使ったもの）
+  - e-Stat API（--stats-data-id で統計表IDを指定。アプリケーションIDは ESTAT_APP_ID）
+
+項目は項目名（人口（総数）、0～14歳人口 総数、世帯総数 など）から列に対応付けます。
+人口と世帯が別の統計表の場合は両方のファイルを指定すればメッシュコードで結合されます。
+
+実行例:
+    python -m app.jobs.import_mesh_population tblT001141H5339.txt tblT001142H5339.txt
+    python -m app.jobs.import_mesh_population --stats-data-id 8003006782 --survey 2020年国勢調査 --append
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import unicodedata
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from app.jobs.build_gazetteer import open_csv
+from app.services.mesh_population import (
+    MESH_POPULATION_PATH, POPULATION_COLUMNS, MeshPopulationStore, write_mesh_population
+)
+from app.utils.jis_mesh import mesh_level
+
+logger = logging.getLogger(__name__)
+
+ESTAT_API_URL = "https://api.e-stat.go.jp/rest/3.0/app/json/getStatsData"
+CODE_COLUMNS = ["KEY_CODE", "code", "メッシュコード", "地域メッシュコード"]
+
+# 項目名（NFKC 正規化・空白除去後）→ 列名
+ITEM_ALIASES = {
+    "人口(総数)": "population", "人口総数": "population",
+    "人口(総数)男": "male", "男性人口": "male", "男": "male",
+    "人口(総数)女": "female", "女性人口": "female", "女": "female",
+    "0~14歳人口総数": "age_0_14", "0~14歳人口": "age_0_14",
+    "15~64歳人口総数": "age_15_64", "15~64歳人口": "age_15_64",
+    "65歳以上人口総数": "age_65_over", "65歳以上人口": "age_65_over",
+    "75歳以上人口総数": "age_75_over", "75歳以上人口": "age_75_over",
+    "世帯総数": "households", "一般世帯数": "households",
+}
+
+def normalize_item(label: str) -> Optional[str]:
+    """項目名・列名 → 列名（対象外は None）"""
+    label = (label or "").strip()
+    if label in POPULATION_COLUMNS:
+        return label
+    key = re.sub(r"\s", "", unicodedata.normalize("NFKC", label)).replace("〜", "~")
+    return ITEM_ALIASES.get(key)
+
+def _value(raw) -> float:
+    """統計値（* は秘匿で NaN、- や空欄は0）"""
+    raw = str(raw or "").strip().replace(",", "")
+    if raw in ("", "-"):
+        return 0.0
+    try:
+        return float(raw)
+    except ValueError:
+        return float("nan")
+
+def iter_mesh_file(path: Path) -> Iterator[Tuple[int, Dict[str, float]]]:
+    """メッシュ統計ファイル → (メッシュコード, {列名: 値})"""
+    with open_csv(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        code_index = next((i for i, name in enumerate(header) if name in CODE_COLUMNS), None)
+        if code_index is None:
+            raise ValueError(f"メッシュコードの列がありません: {path}")
+
+        columns = {i: normalize_item(name) for i, name in enumerate(header)}
+        first = next(reader, None)
+        if first is not None and not first[code_index].strip().isdigit():
+            # e-Stat 形式の2行目（項目名）で対応付け直す
+            columns = {i: normalize_item(name) or columns.get(i) for i, name in enumerate(first)}
+            first = None
+        columns = {i: column for i, column in columns.items() if column}
+
+        rows = reader if first is None else [first, *reader]
+        for row in rows:
+            code = row[code_index].strip() if len(row) > code_index else ""
+            if not code.isdigit():
+                continue
+            yield int(code), {column: _value(row[i]) for i, column in columns.items() if i < len(row)}
+
+def iter_estat_api(stats_data_id: str, app_id: str) -> Iterator[Tuple[int, Dict[str, float]]]:
+    """e-Stat API（getStatsData）→ (メッシュコード, {列名: 値})。NEXT_KEY でページング"""
+    start = 1
+    while True:
+        query = urllib.parse.urlencode({
+            "appId": app_id, "statsDataId": stats_data_id, "startPosition": start,
+            "metaGetFlg": "Y", "cntGetFlg": "N", "sectionHeaderFlg": "2",
+        })
+        with urllib.request.urlopen(f"{ESTAT_API_URL}?{query}", timeout=120) as response:
+            data = json.load(response)["GET_STATS_DATA"]
+        statistical_data = data.get("STATISTICAL_DATA") or {}
+        if not statistical_data:
+            raise RuntimeError(f"e-Stat API エラー: {data.get('RESULT', {}).get('ERROR_MSG')}")
+
+        items = {}
+        for class_obj in statistical_data["CLASS_INF"]["CLASS_OBJ"]:
+            if class_obj["@id"].startswith("cat"):
+                classes = class_obj["CLASS"] if isinstance(class_obj["CLASS"], list) else [class_obj["CLASS"]]
+                for item in classes:
+                    column = normalize_item(item["@name"])
+                    if column:
+                        items[(class_obj["@id"], item["@code"])] = column
+
+        values = statistical_data["DATA_INF"]["VALUE"]
+        for value in values if isinstance(values, list) else [values]:
+            column = next((items[(key[1:], code)] for key, code in value.items() if (key[1:], code) in items), None)
+            area = str(value.get("@area", ""))
+            if column and area.isdigit():
+                yield int(area), {column: _value(value.get("$"))}
+
+        next_key = statistical_data["RESULT_INF"].get("NEXT_KEY")
+        if not next_key:
+            break
+        start = int(next_key)
+
+def main():
+    parser = argparse.ArgumentParser(description="e-Stat 地域メッシュ統計をメッシュ人口ストアに取り込み")
+    parser.add_argument("inputs", nargs="*", help="メッシュ統計の .txt / .csv")
+    parser.add_argument("--stats-data-id", action="append", default=[], help="e-Stat API の統計表ID（複数可）")
+    parser.add_argument("--app-id", default=os.getenv("ESTAT_APP_ID"), help="e-Stat アプリケーションID")
+    parser.add_argument("--survey", default="", help="調査の表記（例: 2020年国勢調査）")
+    parser.add_argument("--append", action="store_true", help="既存ストアに追加（同じメッシュは置き換え）")
+    parser.add_argument("-o", "--output", default=MESH_POPULATION_PATH, help="ストアのディレクトリ")
+    args = parser.parse_args()
+    if args.stats_data_id and not args.app_id:
+        parser.error("--stats-data-id には ESTAT_APP_ID（--app-id）が必要です")
+
+    logging.basicConfig(level=logging.INFO)
+    records: Dict[int, Dict[str, float]] = {}
+    sources = [(path, iter_mesh_file(Path(path))) for path in args.inputs]
+    sources += [(f"e-Stat {sid}", iter_estat_api(sid, args.app_id)) for sid in args.stats_data_id]
+    for name, rows in sources:
+        count = 0
+        for code, values in rows:
+            records.setdefault(code, {}).update(values)
+            count += 1
+        logger.info(f"📥 {name}: {count}件")
+
+    output = Path(args.output)
+    meta = {"survey": args.survey}
+    if args.append and (output / "meta.json").exists():
+        existing = MeshPopulationStore(str(output))
+        meta["survey"] = args.survey or existing.meta.get("survey", "")
+        for i, code in enumerate(existing.codes.tolist()):
+            if code not in records:
+                records[code] = {column: float(values[i]) for column, values in existing.columns.items()}
+
+    if not records:
+        parser.error("取り込めるメッシュがありません")
+    codes = np.fromiter(records.keys(), dtype=np.int64, count=len(records))
+    levels = {mesh_level(code) for code in codes.tolist()}
+    if len(levels) != 1:
+        parser.error(f"メッシュのレベルが混在しています: {sorted(levels)}")
+    columns = [column for column in POPULATION_COLUMNS if any(column in r for r in records.values())]
+    if "population" not in columns:
+        parser.error("人口（総数）の項目が見つかりません")
+    values = {
+        column: np.array([r.get(column, np.nan) for r in records.values()], dtype=np.float32)
+        for column in columns
+    }
+
+    meta = write_mesh_population(codes, values, levels.pop(), str(output), meta)
+    print(f"✅ メッシュ人口を保存: {output} ({meta['meshes']}メッシュ / {', '.join(columns)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+POIファイルのローカルストアへの一括取り込み
+
+対応形式:
+  - GeoJSON（Pointフィーチャ。properties.types または OSMタグ amenity/shop 等）
+  - CSV（lat, lng, name, types[;区切り], place_id, vicinity, rating, user_ratings_total）
+  - Places API のエクスポート（results 配列または結果のリストを含むJSON）
+
+実行例:
+    python -m app.jobs.import_poi kanto-latest.geojson places_snapshot.json -o data/poi_store
+"""
+import argparse
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from app.services.poi_store import POI_STORE_PATH, write_poi_store
+
+logger = logging.getLogger(__name__)
+
+# OSMタグ → Google Places タイプ
+OSM_TAG_TYPES = {
+    ("amenity", "school"): ["school", "primary_school"],
+    ("amenity", "kindergarten"): ["school"],
+    ("amenity", "university"): ["university"],
+    ("amenity", "college"): ["university"],
+    ("amenity", "hospital"): ["hospital"],
+    ("amenity", "clinic"): ["doctor"],
+    ("amenity", "doctors"): ["doctor"],
+    ("amenity", "dentist"): ["dentist"],
+    ("amenity", "pharmacy"): ["pharmacy"],
+    ("amenity", "police"): ["police"],
+    ("amenity", "fire_station"): ["fire_station"],
+    ("amenity", "townhall"): ["city_hall", "local_government_office"],
+    ("amenity", "restaurant"): ["restaurant"],
+    ("amenity", "cafe"): ["cafe"],
+    ("amenity", "fast_food"): ["meal_takeaway", "restaurant"],
+    ("amenity", "bar"): ["bar"],
+    ("amenity", "pub"): ["bar"],
+    ("amenity", "library"): ["library"],
+    ("amenity", "cinema"): ["movie_theater"],
+    ("amenity", "theatre"): ["tourist_attraction"],
+    ("amenity", "place_of_worship"): ["place_of_worship"],
+    ("amenity", "grave_yard"): ["cemetery"],
+    ("shop", "supermarket"): ["supermarket", "grocery_or_supermarket"],
+    ("shop", "convenience"): ["convenience_store"],
+    ("shop", "department_store"): ["department_store"],
+    ("shop", "mall"): ["shopping_mall"],
+    ("shop", "chemist"): ["drugstore"],
+    ("leisure", "park"): ["park"],
+    ("leisure", "fitness_centre"): ["gym"],
+    ("tourism", "museum"): ["museum"],
+    ("tourism", "gallery"): ["art_gallery"],
+    ("tourism", "attraction"): ["tourist_attraction"],
+    ("landuse", "cemetery"): ["cemetery"],
+    ("railway", "station"): ["train_station"],
+    ("station", "subway"): ["subway_station"],
+    ("highway", "bus_stop"): ["bus_station"],
+    ("amenity", "bus_station"): ["bus_station"],
+}
+
+def osm_types(properties: Dict) -> List[str]:
+    """OSMタグからPlacesタイプを推定"""
+    types: List[str] = []
+    for (key, value), mapped in OSM_TAG_TYPES.items():
+        if properties.get(key) == value:
+            types.extend(mapped)
+    return list(dict.fromkeys(types))
+
+def _split_types(value) -> List[str]:
+    if isinstance(value, list):
+        return value
+    return [t.strip() for t in str(value or "").replace(",", ";").split(";") if t.strip()]
+
+def iter_geojson(data: Dict) -> Iterator[Dict]:
+    for feature in data.get("features", []):
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") != "Point":
+            continue
+        lng, lat = geometry["coordinates"][:2]
+        props = feature.get("properties") or {}
+        types = _split_types(props.get("types")) or osm_types(props)
+        yield {
+            "lat": lat,
+            "lng": lng,
+            "name": props.get("name:ja") or props.get("name", ""),
+            "types": types,
+            "place_id": props.get("place_id") or (f"osm:{props['@id']}" if props.get("@id") else None),
+            "vicinity": props.get("vicinity") or props.get("addr:full", ""),
+            "rating": props.get("rating"),
+            "user_ratings_total": props.get("user_ratings_total"),
+        }
+
+def iter_places_export(results: List[Dict]) -> Iterator[Dict]:
+    for place in results:
+        location = place.get("geometry", {}).get("location", {})
+        yield {
+            "lat": location.get("lat"),
+            "lng": location.get("lng"),
+            "name": place.get("name", ""),
+            "types": place.get("types", []),
+            "place_id": place.get("place_id"),
+            "vicinity": place.get("vicinity", ""),
+            "rating": place.get("rating"),
+            "user_ratings_total": place.get("user_ratings_total"),
+        }
+
+def iter_csv(path: Path) -> Iterator[Dict]:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            yield {
+                "lat": float(row["lat"]),
+                "lng": float(row["lng"]),
+                "name": row.get("name", ""),
+                "types": _split_types(row.get("types")),
+                "place_id": row.get("place_id") or None,
+                "vicinity": row.get("vicinity", ""),
+                "rating": float(row["rating"]) if row.get("rating") else None,
+                "user_ratings_total": int(row["user_ratings_total"]) if row.get("user_ratings_total") else None,
+            }
+
+def iter_poi_file(path: Path) -> Iterator[Dict]:
+    """ファイル形式を判定してPOIレコードを返す"""
+    if path.suffix.lower() == ".csv":
+        yield from iter_csv(path)
+        return
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and data.get("type") == "FeatureCollection":
+        yield from iter_geojson(data)
+    elif isinstance(data, dict) and "results" in data:
+        yield from iter_places_export(data["results"])
+    elif isinstance(data, list):
+        yield from iter_places_export(data)
+    else:
+        raise ValueError(f"未対応のPOIファイル形式です: {path}")
+
+def iter_deduplicated(paths: List[Path]) -> Iterator[Dict]:
+    """複数ファイルを連結（place_id の重複は先勝ち）"""
+    seen = set()
+    for path in paths:
+        count = 0
+        for record in iter_poi_file(path):
+            place_id = record.get("place_id")
+            if place_id:
+                if place_id in seen:
+                    continue
+                seen.add(place_id)
+            count += 1
+            yield record
+        logger.info(f"📥 {path}: {count}件")
+
+def main():
+    parser = argparse.ArgumentParser(description="POIファイルをローカルPOIストアに取り込み")
+    parser.add_argument("inputs", nargs="+", help="GeoJSON / CSV / Places エクスポートJSON")
+    parser.add_argument("-o", "--output", default=POI_STORE_PATH, help="ストアのディレクトリ")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = write_poi_store(iter_deduplicated([Path(p) for p in args.inputs]), args.output)
+    print(f"✅ POIストアを作成: {args.output} ({count}件)")
+
+if __name__ == "__main__":
+    main()
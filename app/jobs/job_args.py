@@ -0,0 +1,12 @@
+"""
+オフラインジョブ共通のコマンドライン引数ヘルパー
+"""
+import argparse
+from typing import List
+
+def comma_floats(value: str, count: int) -> List[float]:
+    """カンマ区切りの数値を count 個のリストに変換（--bbox 南,西,北,東 / --around 緯度,経度 など）"""
+    values = [float(v) for v in value.split(",")]
+    if len(values) != count:
+        raise argparse.ArgumentTypeError(f"{count}個の数値をカンマ区切りで指定してください: {value}")
+    return values
@@ -0,0 +1,125 @@
+"""
+不動産取引データ（不動産情報ライブラリ XPT001）の差分同期
+
+タイル（ズーム13）ごとに取り込み済みの最新四半期を記録しておき、それより新しい四半期だけを
+四半期 × 価格情報区分の単位で取得して取引ストアに追加します。四半期ごとにコミットするため、
+中断しても次回は続きから再開されます。cron などで定期実行してください。
+
+範囲を指定しない場合は、これまでに同期したタイルをすべて最新まで更新します。
+
+実行例:
+    python -m app.jobs.sync_transactions --bbox 35.50,139.55,35.82,139.92 --since 20151
+    python -m app.jobs.sync_transactions --around 35.6812,139.7671 --tiles 2
+    python -m app.jobs.sync_transactions
+"""
+import argparse
+import json
+import logging
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import List, Tuple
+
+from app.jobs.job_args import comma_floats
+from app.services.transaction_store import (
+    LAND_TYPE_NAMES, SYNC_ZOOM, TRANSACTION_STORE_PATH, TransactionStore,
+    latest_published_period, parse_period, periods_between, shift_period, sync_tile_key
+)
+from app.utils.coordinates import lat_lng_to_tile_xyz
+
+logger = logging.getLogger(__name__)
+
+XPT001_URL = "https://www.reinfolib.mlit.go.jp/ex-api/external/XPT001"
+# 新しく同期するタイルの既定の遡り期間（四半期）
+DEFAULT_HISTORY_QUARTERS = 20
+
+def fetch_tile(x: int, y: int, period: int, land_type: str, api_key: str) -> List[dict]:
+    """1タイル・1四半期・1区分の取引（データなしは空リスト）"""
+    query = urllib.parse.urlencode({
+        "response_format": "geojson", "z": SYNC_ZOOM, "x": x, "y": y,
+        "from": period, "to": period, "landTypeCode": land_type,
+    })
+    request = urllib.request.Request(f"{XPT001_URL}?{query}", headers={
+        "User-Agent": "LocationInsights/1.0 (Real Estate Analysis)",
+        "Accept": "application/json, application/geo+json",
+        "Ocp-Apim-Subscription-Key": api_key,
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return json.load(response).get("features", [])
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return []
+        raise
+
+def tiles_in_bbox(south: float, west: float, north: float, east: float) -> List[Tuple[int, int]]:
+    x0, y0, _ = lat_lng_to_tile_xyz(north, west, SYNC_ZOOM)
+    x1, y1, _ = lat_lng_to_tile_xyz(south, east, SYNC_ZOOM)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+def main():
+    parser = argparse.ArgumentParser(description="不動産情報ライブラリの取引データを取引ストアに差分同期")
+    parser.add_argument("--bbox", type=lambda v: comma_floats(v, 4), help="南,西,北,東（緯度経度）の範囲のタイルを同期")
+    parser.add_argument("--around", type=lambda v: comma_floats(v, 2), help="緯度,経度 の周辺タイルを同期")
+    parser.add_argument("--tiles", type=int, default=1, help="--around の周辺タイル数（1なら3×3）")
+    parser.add_argument("--since", help="新しいタイルの取得開始四半期（例: 20151。既定は最新から5年分）")
+    parser.add_argument("--until", help="取得する最新の四半期（既定は公開済みと見なす最新）")
+    parser.add_argument("--land-types", default="02,07", help="価格情報区分コード（カンマ区切り）")
+    parser.add_argument("--api-key", default=os.getenv("MLIT_API_KEY"), help="不動産情報ライブラリのAPIキー")
+    parser.add_argument("--sleep", type=float, default=0.2, help="リクエスト間隔（秒）")
+    parser.add_argument("-o", "--output", default=TRANSACTION_STORE_PATH, help="取引ストア（SQLite）")
+    args = parser.parse_args()
+    if not args.api_key:
+        parser.error("MLIT_API_KEY（--api-key）が必要です")
+    land_types = [code.strip() for code in args.land_types.split(",") if code.strip()]
+    unknown = [code for code in land_types if code not in LAND_TYPE_NAMES]
+    if unknown:
+        parser.error(f"不明な価格情報区分コード: {unknown}")
+
+    logging.basicConfig(level=logging.INFO)
+    until = parse_period(args.until) if args.until else latest_published_period()
+    since = parse_period(args.since) if args.since else shift_period(until, -(DEFAULT_HISTORY_QUARTERS - 1))
+    if until is None or since is None:
+        parser.error("四半期は 20231 の形式で指定してください")
+
+    store = TransactionStore(args.output)
+    connection = store.connect(readonly=False)
+    state = store.sync_state(connection)
+
+    if args.bbox:
+        tiles = tiles_in_bbox(*args.bbox)
+    elif args.around:
+        cx, cy, _ = lat_lng_to_tile_xyz(args.around[0], args.around[1], SYNC_ZOOM)
+        tiles = [(cx + dx, cy + dy) for dx in range(-args.tiles, args.tiles + 1) for dy in range(-args.tiles, args.tiles + 1)]
+    else:
+        tiles = [tuple(int(v) for v in tile.split("/")[1:]) for tile in state]
+    if not tiles:
+        parser.error("同期済みのタイルがありません（--bbox か --around を指定してください）")
+
+    total_added = 0
+    try:
+        for x, y in tiles:
+            tile = sync_tile_key(x, y)
+            start = shift_period(state[tile], 1) if tile in state else since
+            periods = periods_between(start, until)
+            if not periods:
+                continue
+            tile_added = 0
+            for period in periods:
+                for land_type in land_types:
+                    features = fetch_tile(x, y, period, land_type, args.api_key)
+                    tile_added += store.add_features(connection, features, period=period, land_type=land_type)
+                    time.sleep(args.sleep)
+                store.mark_synced(connection, tile, period)
+                connection.commit()
+            total_added += tile_added
+            logger.info(f"📥 {tile}: {periods[0]}〜{periods[-1]} {tile_added}件")
+    finally:
+        connection.close()
+
+    print(f"✅ 取引ストアを同期: {args.output} ({len(tiles)}タイル / 追加{total_added}件 / 〜{until})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+キャッシュの事前読み込み（主要駅・よく分析される住所）
+
+デプロイ直後のキャッシュが空の状態で、利用の多いエリアの最初の利用者が
+Places・国土交通省APIの呼び出しを待たされないように、分析と取引データのタイル取得を先に実行します。
+
+対象は人気度CSV（address,weight。lat,lng 列があれば座標も使用。アクセス集計などから作成）の上位と、
+駅索引の乗降客数の多い駅です。分析のキャッシュは住所と座標の組ごとなので、座標は利用者が実際に送る値に
+合わせます（CSVの座標は利用者が送った座標、駅は座標を送らずサーバーのジオコーディングに任せる）。サーバーの通常のAPIを X-Cache-Warm ヘッダー（CACHE_WARM_TOKEN）付きで
+呼ぶため、ディスパッチャー経由ならエリアを受け持つワーカーのキャッシュが温まります。
+
+- 1件ずつ順に実行し、1時間あたりの実行数（--max-per-hour）を超えないように間隔を空けます
+- サーバーが混んでいれば 503 が返るので、Retry-After だけ待ってから再試行します
+- 常駐させると、各エントリの有効期限が切れる前（--refresh-margin の割合だけ早く）に更新します
+
+実行例:
+    python -m app.jobs.warm_cache --top-addresses 200 --top-stations 100 --once
+    python -m app.jobs.warm_cache --base-url http://localhost:8000 --max-per-hour 60
+"""
+import argparse
+import asyncio
+import csv
+import heapq
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+import numpy as np
+
+from app.services.address_suggest import ADDRESS_POPULARITY_PATH
+from app.services.result_cache import (
+    ANALYSIS_CACHE_TTL, CACHE_WARM_HEADER, CACHE_WARM_TOKEN, MLIT_CACHE_TTL
+)
+from app.services.station_index import STATION_KINDS, get_station_index
+
+logger = logging.getLogger(__name__)
+
+CACHE_WARM_MAX_PER_HOUR = int(os.getenv("CACHE_WARM_MAX_PER_HOUR", 60))
+# 失敗したエントリを再試行するまでの秒数
+RETRY_SECONDS = 600
+REQUEST_TIMEOUT = 300
+
+# 取引データのタイル取得を温めるための物件条件（タイルのキャッシュは物件条件によらない）
+WARM_PROPERTY_DATA = {"area": 70, "buildingYear": 2010}
+
+# 種類 → (エンドポイント, 有効期限)
+WARM_KINDS = {
+    "analysis": ("/api/lifestyle-analysis-8items", ANALYSIS_CACHE_TTL),
+    "transactions": ("/api/estimate-property-price", MLIT_CACHE_TTL),
+}
+
+def load_address_targets(path: str, limit: int) -> List[Dict]:
+    """人気度CSV → 重みの大きい順の対象"""
+    if not Path(path).exists():
+        logger.warning(f"⚠️ 人気度ファイルがありません: {path}")
+        return []
+    targets = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                target = {"address": row["address"], "weight": float(row.get("weight") or 0)}
+            except (KeyError, ValueError):
+                continue
+            if row.get("lat") and row.get("lng"):
+                target["coordinates"] = {"lat": float(row["lat"]), "lng": float(row["lng"])}
+            targets.append(target)
+    targets.sort(key=lambda t: -t["weight"])
+    return targets[:limit]
+
+def load_station_targets(limit: int) -> List[Dict]:
+    """駅索引 → 乗降客数（不明なら重要度）の多い順の鉄道駅
+
+    駅索引の座標は利用者の入力から得られる座標と一致しないため、住所（駅名）だけを対象にします。
+    """
+    index = get_station_index()
+    if index is None:
+        logger.warning("⚠️ 駅索引がありません")
+        return []
+    rail = np.flatnonzero(index.kinds == STATION_KINDS.index("rail"))
+    ridership = np.nan_to_num(index.ridership[rail], nan=-1.0)
+    order = rail[np.lexsort((-index.importance[rail], -ridership))]
+    targets, seen = [], set()
+    for i in order.tolist():
+        name = index.names[i]
+        if name in seen:
+            continue
+        seen.add(name)
+        targets.append({
+            "address": name if name.endswith("駅") else f"{name}駅",
+            "weight": float(index.ridership[i]) if not np.isnan(index.ridership[i]) else 0.0,
+        })
+        if len(targets) >= limit:
+            break
+    return targets
+
+async def warm_one(session: aiohttp.ClientSession, base_url: str, token: str, kind: str, target: Dict) -> Optional[float]:
+    """1件を事前読み込み。成功ならNone、後回しにするなら待つ秒数を返す（失敗は例外）"""
+    path, _ = WARM_KINDS[kind]
+    body = {"address": target["address"], "coordinates": target.get("coordinates")}
+    if kind == "transactions":
+        body["propertyData"] = WARM_PROPERTY_DATA
+    async with session.post(base_url + path, json=body, headers={CACHE_WARM_HEADER: token}) as response:
+        if response.status == 503:
+            return float(response.headers.get("Retry-After", 30))
+        if response.status >= 400:
+            raise RuntimeError(f"HTTP {response.status}")
+        await response.read()
+    return None
+
+async def run(base_url: str, token: str, targets: List[Dict], max_per_hour: int, refresh_margin: float, once: bool):
+    # (実行時刻, 優先順位, 種類) のヒープ。優先順位は対象リストの順
+    queue = [(0.0, rank, kind) for rank in range(len(targets)) for kind in WARM_KINDS]
+    heapq.heapify(queue)
+    min_interval = 3600.0 / max_per_hour
+    last_started = 0.0
+    warmed = failed = 0
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        while queue:
+            due, rank, kind = heapq.heappop(queue)
+            now = time.time()
+            wait = max(due - now, last_started + min_interval - now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            last_started = time.time()
+            target = targets[rank]
+            started = time.perf_counter()
+            try:
+                retry_after = await warm_one(session, base_url, token, kind, target)
+            except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError) as e:
+                failed += 1
+                logger.warning(f"⚠️ 事前読み込み失敗: {target['address']} ({kind}) {e}")
+                if not once:
+                    heapq.heappush(queue, (time.time() + RETRY_SECONDS, rank, kind))
+                continue
+            if retry_after is not None:
+                # 混雑中は実行数に数えずに後回し
+                last_started = 0.0
+                heapq.heappush(queue, (time.time() + retry_after, rank, kind))
+                continue
+            warmed += 1
+            logger.info(f"🔥 {target['address']} ({kind}) {time.perf_counter() - started:.1f}秒")
+            if not once:
+                ttl = WARM_KINDS[kind][1]
+                heapq.heappush(queue, (time.time() + ttl * (1 - refresh_margin), rank, kind))
+    return warmed, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="利用の多いエリアの分析・取引データを事前に読み込む")
+    parser.add_argument("--base-url", default=os.getenv("CACHE_WARM_BASE_URL", "http://localhost:8000"),
+                        help="サーバー（またはディスパッチャー）のURL")
+    parser.add_argument("--token", default=CACHE_WARM_TOKEN, help="X-Cache-Warm に付けるトークン")
+    parser.add_argument("--popularity", default=ADDRESS_POPULARITY_PATH, help="対象の住所CSV（address,weight[,lat,lng]）")
+    parser.add_argument("--top-addresses", type=int, default=200)
+    parser.add_argument("--top-stations", type=int, default=100)
+    parser.add_argument("--max-per-hour", type=int, default=CACHE_WARM_MAX_PER_HOUR,
+                        help="1時間あたりの実行数の上限（外部APIのクォータに合わせる）")
+    parser.add_argument("--refresh-margin", type=float, default=0.2,
+                        help="有効期限のこの割合だけ前に更新する")
+    parser.add_argument("--once", action="store_true", help="1巡したら終了（期限前の更新をしない）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not args.token:
+        parser.error("CACHE_WARM_TOKEN（--token）が必要です（サーバーと同じ値）")
+
+    targets = load_address_targets(args.popularity, args.top_addresses) if args.top_addresses else []
+    known = {t["address"] for t in targets}
+    if args.top_stations:
+        targets += [t for t in load_station_targets(args.top_stations) if t["address"] not in known]
+    if not targets:
+        parser.error("事前読み込みの対象がありません")
+
+    logger.info(f"📥 対象: {len(targets)}件 (1時間あたり最大{args.max_per_hour}件)")
+    warmed, failed = asyncio.run(run(
+        args.base_url.rstrip("/"), args.token, targets, args.max_per_hour, args.refresh_margin, args.once
+    ))
+    print(f"✅ 事前読み込み完了: {warmed}件 (失敗 {failed}件)")
+
+if __name__ == "__main__":
+    main()
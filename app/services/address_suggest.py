@@ -0,0 +1,160 @@
+"""
+住所オートコンプリート
+ガゼッティアの都道府県・市区町村・町丁目エントリを接頭辞索引とし、人気度順に候補を返す
+
+接頭辞に一致する範囲はソート済みキーの連続区間になるため、
+人気度のスパーステーブル（区間最大値）から上位K件をヒープで取り出します。
+"""
+import bisect
+import csv
+import heapq
+import logging
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.gazetteer import MATCH_LEVELS, Gazetteer, get_gazetteer
+from app.utils.address import address_key
+
+logger = logging.getLogger(__name__)
+
+# 人気度ファイル（CSV: address,weight。人口やアクセス集計など）
+ADDRESS_POPULARITY_PATH = os.getenv("ADDRESS_POPULARITY_PATH", "data/address_popularity.csv")
+
+SUGGEST_LEVELS = ("prefecture", "municipality", "town")
+
+class AddressSuggestIndex:
+    """接頭辞区間に対する人気度上位K件の検索"""
+
+    def __init__(self, gazetteer: Gazetteer, popularity: Optional[Dict[str, float]] = None):
+        suggest_level_ids = {MATCH_LEVELS.index(level) for level in SUGGEST_LEVELS}
+        positions = [i for i, level in enumerate(gazetteer.levels.tolist()) if level in suggest_level_ids]
+
+        self.gazetteer = gazetteer
+        self.positions = np.asarray(positions, dtype=np.int64)  # ガゼッティア上の位置
+        self.keys = [gazetteer.keys[i] for i in positions]
+        popularity = popularity or {}
+        # 同じ人気度なら粗いレベル（都道府県 → 市区町村 → 町丁目）を優先
+        self.weights = np.array(
+            [popularity.get(key, 0.0) - gazetteer.levels[i] * 1e-3 for key, i in zip(self.keys, positions)],
+            dtype=np.float64
+        )
+        self.selection_counts: Counter = Counter()
+        self._build_sparse_table()
+
+    def _build_sparse_table(self):
+        """区間最大値（argmax）のスパーステーブル"""
+        n = len(self.keys)
+        table = [np.arange(n, dtype=np.int32)]
+        span = 1
+        while span * 2 <= n:
+            prev = table[-1]
+            left, right = prev[:n - span * 2 + 1], prev[span:n - span + 1]
+            table.append(np.where(self.weights[left] >= self.weights[right], left, right).astype(np.int32))
+            span *= 2
+        self._table = table
+
+    def _range_argmax(self, lo: int, hi: int) -> int:
+        """[lo, hi) の人気度最大の位置（O(1)）"""
+        level = (hi - lo).bit_length() - 1
+        a = int(self._table[level][lo])
+        b = int(self._table[level][hi - (1 << level)])
+        return a if self.weights[a] >= self.weights[b] else b
+
+    def _prefix_range(self, prefix: str):
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff")
+        return lo, hi
+
+    def _top_k(self, lo: int, hi: int, k: int) -> List[int]:
+        """区間 [lo, hi) から人気度上位k件（O(k log k)）"""
+        if lo >= hi:
+            return []
+        result = []
+        best = self._range_argmax(lo, hi)
+        heap = [(-self.weights[best], best, lo, hi)]
+        while heap and len(result) < k:
+            _, i, l, h = heapq.heappop(heap)
+            result.append(i)
+            for sub_lo, sub_hi in ((l, i), (i + 1, h)):
+                if sub_lo < sub_hi:
+                    j = self._range_argmax(sub_lo, sub_hi)
+                    heapq.heappush(heap, (-self.weights[j], j, sub_lo, sub_hi))
+        return result
+
+    def _entry(self, i: int) -> Dict:
+        g = self.gazetteer
+        pos = int(self.positions[i])
+        return {
+            "address": g.labels[pos] or g.keys[pos],
+            "level": MATCH_LEVELS[g.levels[pos]],
+            "coordinates": {"lat": float(g.lats[pos]), "lng": float(g.lngs[pos])},
+            "key": g.keys[pos],
+        }
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict]:
+        """入力途中の住所から候補を返す"""
+        key = address_key(query)
+        if not key:
+            return []
+
+        suggestions = []
+        # 番地まで入力済みなら、解決済みの街区を先頭に置く
+        resolved = self.gazetteer.geocode(query)
+        if resolved and resolved["match_level"] == "block":
+            suggestions.append({
+                "address": query.strip(),
+                "level": "block",
+                "coordinates": {"lat": resolved["lat"], "lng": resolved["lng"]},
+                "key": resolved["matched_key"],
+            })
+
+        lo, hi = self._prefix_range(key)
+        # 利用実績で並べ替えるため多めに取り出す
+        candidates = [self._entry(i) for i in self._top_k(lo, hi, limit * 3)]
+        candidates.sort(key=lambda e: -self.selection_counts[e["key"]])
+        suggestions.extend(candidates)
+        return suggestions[:limit]
+
+    def record_selection(self, address: str):
+        """分析に使われた住所を人気度に反映
+
+        一致したキー（街区レベルのこともある）を含む町丁目・市区町村・都道府県の候補キーをすべて数えます。
+        """
+        resolved = self.gazetteer.geocode(address)
+        if not resolved:
+            return
+        for key in self.gazetteer.containing_keys(resolved["matched_key"]):
+            i = bisect.bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                self.selection_counts[key] += 1
+
+def load_popularity(path: str) -> Dict[str, float]:
+    """人気度CSV（address,weight）を照合キー単位で読み込み"""
+    popularity: Dict[str, float] = {}
+    if not Path(path).exists():
+        return popularity
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                popularity[address_key(row["address"])] = float(row["weight"])
+            except (KeyError, ValueError):
+                continue
+    return popularity
+
+_suggest_index: Optional[AddressSuggestIndex] = None
+_suggest_index_loaded = False
+
+def get_address_suggest_index() -> Optional[AddressSuggestIndex]:
+    """候補索引を取得（ガゼッティアがなければNone）"""
+    global _suggest_index, _suggest_index_loaded
+    if not _suggest_index_loaded:
+        _suggest_index_loaded = True
+        gazetteer = get_gazetteer()
+        if gazetteer is not None:
+            _suggest_index = AddressSuggestIndex(gazetteer, load_popularity(ADDRESS_POPULARITY_PATH))
+            logger.info(f"🔤 住所候補索引を構築: {len(_suggest_index.keys)}件")
+    return _suggest_index
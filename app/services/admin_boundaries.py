@@ -0,0 +1,259 @@
+"""
+行政区域ポリゴンによるオフライン逆ジオコーディング
+座標から都道府県・市区町村（コード・名称）・町丁目を求める
+
+境界ポリゴンの外接矩形を STR（Sort-Tile-Recursive）法で詰めた R-tree で絞り込み、
+候補ポリゴンのみ交差数判定（even-odd）で厳密に包含判定します。
+ストアは POI ストアと同じく列ごとの .npy ディレクトリで、np.load(mmap_mode="r") で開きます。
+"""
+import json
+import logging
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.utils.address import PREFECTURES
+from app.utils.atomic_dir import swap_directory
+
+logger = logging.getLogger(__name__)
+
+ADMIN_BOUNDARY_PATH = os.getenv("ADMIN_BOUNDARY_PATH", "data/admin_boundaries")
+
+BOUNDARY_LEVELS = ["prefecture", "municipality", "town"]
+# R-tree の1ノードあたりの子要素数
+NODE_CAPACITY = 16
+
+def _pack_strings(values: List[str]):
+    """文字列列を (UTF-8 blob, オフセット) に変換"""
+    encoded = [(v or "").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8) if encoded else np.zeros(0, dtype=np.uint8)
+    return blob, offsets
+
+def _str_order(bboxes: np.ndarray, capacity: int = NODE_CAPACITY) -> np.ndarray:
+    """STR法の並び順（経度でスライスに分け、スライス内を緯度順）"""
+    n = len(bboxes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    center_x = (bboxes[:, 0] + bboxes[:, 2]) / 2
+    center_y = (bboxes[:, 1] + bboxes[:, 3]) / 2
+    slice_count = math.ceil(math.sqrt(math.ceil(n / capacity)))
+    slice_size = slice_count * capacity
+    by_x = np.argsort(center_x, kind="stable")
+    order = [chunk[np.argsort(center_y[chunk], kind="stable")] for chunk in np.array_split(by_x, range(slice_size, n, slice_size))]
+    return np.concatenate(order)
+
+def _build_tree_levels(leaf_bboxes: np.ndarray, capacity: int = NODE_CAPACITY) -> List[np.ndarray]:
+    """葉（ポリゴンの外接矩形）から根まで、連続する capacity 個ずつを束ねた外接矩形の列"""
+    levels = [leaf_bboxes]
+    while len(levels[-1]) > capacity:
+        child = levels[-1]
+        starts = np.arange(0, len(child), capacity)
+        levels.append(np.column_stack([
+            np.minimum.reduceat(child[:, 0], starts),
+            np.minimum.reduceat(child[:, 1], starts),
+            np.maximum.reduceat(child[:, 2], starts),
+            np.maximum.reduceat(child[:, 3], starts),
+        ]))
+    return levels
+
+def write_boundary_store(features: Iterable[Dict], path: str = ADMIN_BOUNDARY_PATH) -> int:
+    """境界フィーチャ列からストアを作成（一時ディレクトリに書いてから置き換え）
+
+    フィーチャ形式: {"level", "code", "name", "rings": [[(lng, lat), ...], ...]}
+    rings は外周・穴・飛び地を区別せず並べる（包含判定は even-odd）
+    """
+    levels, codes, names, bboxes, rings = [], [], [], [], []
+    for feature in features:
+        feature_rings = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in feature["rings"] if len(ring) >= 3]
+        if not feature_rings:
+            continue
+        levels.append(BOUNDARY_LEVELS.index(feature["level"]))
+        codes.append(str(feature["code"]))
+        names.append(feature.get("name", ""))
+        stacked = np.concatenate(feature_rings)
+        bboxes.append([stacked[:, 0].min(), stacked[:, 1].min(), stacked[:, 0].max(), stacked[:, 1].max()])
+        rings.append(feature_rings)
+
+    bbox_arr = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    order = _str_order(bbox_arr)
+
+    ring_offsets = [0]
+    vertex_offsets = [0]
+    vertices = []
+    for i in order:
+        for ring in rings[i]:
+            # 閉じたリングとして保存（始点を末尾に複製）
+            if not np.array_equal(ring[0], ring[-1]):
+                ring = np.vstack([ring, ring[:1]])
+            vertices.append(ring)
+            vertex_offsets.append(vertex_offsets[-1] + len(ring))
+        ring_offsets.append(len(vertex_offsets) - 1)
+    vertex_arr = np.concatenate(vertices) if vertices else np.zeros((0, 2), dtype=np.float64)
+    vertex_offsets_arr = np.asarray(vertex_offsets, dtype=np.int64)
+    # 各リングの終点から次のリングの始点への辺は無効
+    edge_valid = np.ones(len(vertex_arr), dtype=bool)
+    edge_valid[vertex_offsets_arr[1:] - 1] = False
+
+    tree_levels = _build_tree_levels(bbox_arr[order])
+    columns = {
+        "level": np.asarray(levels, dtype=np.uint8)[order],
+        "ring_offsets": np.asarray(ring_offsets, dtype=np.int64),
+        "vertex_offsets": vertex_offsets_arr,
+        "x": np.ascontiguousarray(vertex_arr[:, 0]),
+        "y": np.ascontiguousarray(vertex_arr[:, 1]),
+        "edge_valid": edge_valid,
+        "tree_bboxes": np.concatenate(tree_levels) if len(order) else np.zeros((0, 4), dtype=np.float64),
+        "tree_offsets": np.cumsum([0] + [len(level) for level in tree_levels]).astype(np.int64),
+    }
+    for column, values in (("code", codes), ("name", names)):
+        columns[f"{column}_blob"], columns[f"{column}_offsets"] = _pack_strings([values[i] for i in order])
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".admin_boundaries_", dir=target.parent))
+    for column, values in columns.items():
+        np.save(tmp_dir / f"{column}.npy", values)
+    with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({"count": len(order), "node_capacity": NODE_CAPACITY, "levels": BOUNDARY_LEVELS}, f, ensure_ascii=False)
+
+    swap_directory(tmp_dir, target)
+
+    return len(order)
+
+class AdminBoundaryIndex:
+    """メモリマップした行政区域ポリゴンの R-tree 索引（読み取り専用）"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.capacity = self.meta["node_capacity"]
+        self._children = np.arange(self.capacity)
+        self._columns: Dict[str, np.ndarray] = {}
+        for column_file in self.path.glob("*.npy"):
+            self._columns[column_file.stem] = np.load(column_file, mmap_mode="r").view(np.ndarray)
+        tree_bboxes = self._columns["tree_bboxes"]
+        tree_offsets = self._columns["tree_offsets"].tolist()
+        # _tree[0] が葉（ポリゴン）、末尾が根。各階層を (min_lng, min_lat, max_lng, max_lat) の連続配列で保持
+        self._tree = [
+            tuple(np.ascontiguousarray(tree_bboxes[a:b, k]) for k in range(4))
+            for a, b in zip(tree_offsets[:-1], tree_offsets[1:])
+        ]
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    def _string(self, column: str, i: int) -> str:
+        offsets = self._columns[f"{column}_offsets"]
+        return self._columns[f"{column}_blob"][offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def _candidates(self, lng: float, lat: float) -> np.ndarray:
+        """外接矩形が点を含むポリゴンの番号"""
+        if not self._tree:
+            return np.zeros(0, dtype=np.int64)
+        idx = np.arange(len(self._tree[-1][0]))
+        for depth in range(len(self._tree) - 1, -1, -1):
+            min_lng, min_lat, max_lng, max_lat = self._tree[depth]
+            idx = idx[(min_lng[idx] <= lng) & (max_lng[idx] >= lng) & (min_lat[idx] <= lat) & (max_lat[idx] >= lat)]
+            if depth == 0 or not len(idx):
+                break
+            idx = (idx[:, None] * self.capacity + self._children).ravel()
+            idx = idx[idx < len(self._tree[depth - 1][0])]
+        return idx
+
+    def _contains(self, i: int, lng: float, lat: float) -> bool:
+        """交差数判定（全リングの even-odd で穴・飛び地を扱う）"""
+        c = self._columns
+        v0 = c["vertex_offsets"][c["ring_offsets"][i]]
+        v1 = c["vertex_offsets"][c["ring_offsets"][i + 1]]
+        x, y = c["x"][v0:v1], c["y"][v0:v1]
+        above = y > lat
+        edges = np.flatnonzero((above[:-1] != above[1:]) & c["edge_valid"][v0:v1 - 1])
+        if not len(edges):
+            return False
+        x1, y1, x2, y2 = x[edges], y[edges], x[edges + 1], y[edges + 1]
+        crossing_x = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+        return bool(np.count_nonzero(lng < crossing_x) & 1)
+
+    def lookup(self, lat: float, lng: float) -> Dict[str, Dict[str, str]]:
+        """点を含む各レベルの区域 {level: {"code", "name"}}"""
+        hits: Dict[str, Dict[str, str]] = {}
+        level_column = self._columns["level"]
+        for i in self._candidates(lng, lat).tolist():
+            level = BOUNDARY_LEVELS[level_column[i]]
+            if level not in hits and self._contains(i, lng, lat):
+                hits[level] = {"code": self._string("code", i), "name": self._string("name", i)}
+        return hits
+
+    def reverse_geocode(self, lat: float, lng: float) -> Optional[Dict]:
+        """座標 → 都道府県・市区町村・町丁目（市区町村が見つからなければNone）"""
+        hits = self.lookup(lat, lng)
+        municipality = hits.get("municipality")
+        if municipality is None:
+            return None
+        prefecture = hits.get("prefecture")
+        if prefecture is None:
+            # 全国地方公共団体コードの上2桁が都道府県コード
+            prefecture_code = municipality["code"][:2]
+            prefecture = {"code": prefecture_code, "name": PREFECTURES[int(prefecture_code) - 1]}
+        town = hits.get("town")
+        return {
+            "prefecture": prefecture,
+            "municipality": municipality,
+            "town": town,
+            "address": prefecture["name"] + municipality["name"] + (town["name"] if town else ""),
+        }
+
+def to_geocoding_result(result: Dict, lat: float, lng: float) -> Dict:
+    """逆ジオコーディング結果を Google Geocoding API の results 要素の形式に変換"""
+    components = [
+        {"long_name": result["prefecture"]["name"], "short_name": result["prefecture"]["name"],
+         "types": ["administrative_area_level_1", "political"]},
+        {"long_name": result["municipality"]["name"], "short_name": result["municipality"]["name"],
+         "types": ["locality", "political"]},
+    ]
+    if result["town"]:
+        components.append({"long_name": result["town"]["name"], "short_name": result["town"]["name"],
+                           "types": ["sublocality", "political"]})
+    return {
+        "formatted_address": f"日本、{result['address']}",
+        "address_components": list(reversed(components)),
+        "geometry": {"location": {"lat": lat, "lng": lng}, "location_type": "APPROXIMATE"},
+        "types": ["sublocality" if result["town"] else "locality", "political"],
+        "municipality_code": result["municipality"]["code"],
+    }
+
+_boundary_index: Optional[AdminBoundaryIndex] = None
+_boundary_index_loaded = False
+
+def get_admin_boundary_index() -> Optional[AdminBoundaryIndex]:
+    """行政区域索引を取得（初回のみマップ、存在しなければNone）"""
+    global _boundary_index, _boundary_index_loaded
+    if not _boundary_index_loaded:
+        _boundary_index_loaded = True
+        if (Path(ADMIN_BOUNDARY_PATH) / "meta.json").exists():
+            try:
+                _boundary_index = AdminBoundaryIndex(ADMIN_BOUNDARY_PATH)
+                logger.info(f"🗺️ 行政区域索引をマップ: {ADMIN_BOUNDARY_PATH} ({len(_boundary_index)}件)")
+            except Exception as e:
+                logger.warning(f"⚠️ 行政区域索引の読み込み失敗: {e}")
+    return _boundary_index
+
+def reverse_geocode_offline(lat: float, lng: float) -> Optional[Dict]:
+    """オフラインで座標から行政区域を取得（索引がない・区域外ならNone）"""
+    index = get_admin_boundary_index()
+    if index is None:
+        return None
+    return index.reverse_geocode(lat, lng)
+
+def municipality_code_at(coordinates: Dict[str, float]) -> Optional[str]:
+    """座標の市区町村コード（5桁、求まらなければNone）"""
+    result = reverse_geocode_offline(coordinates["lat"], coordinates["lng"])
+    return result["municipality"]["code"] if result else None
@@ -0,0 +1,160 @@
+"""
+分析結果の一括エクスポート（CSV / Parquet）
+地点ごとの分析（/api/compare と同じ形）を1行に平坦化し、一定件数ごとにバイト列として書き出す
+
+価格の列（comparable_*）は周辺の取引事例の㎡単価の中央値と件数です。物件の面積・築年から求める
+/api/estimate-property-price の推定価格ではありません（地点の一覧には物件条件がないため）。
+
+行は非同期ジェネレーターから受け取り、CSVは EXPORT_BATCH_ROWS 行ごと、Parquetは行グループごとに
+書き出したバイト列を返すため、地点数によらずメモリ使用量は一定です。
+Parquet の出力には pyarrow が必要です（未インストールならCSVのみ）。
+"""
+import csv
+import io
+import os
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.services.score_percentiles import SCORE_CATEGORIES
+
+PYARROW_AVAILABLE = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", 500))
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# (列名, 型)。型は "string" / "float" / "int"
+EXPORT_COLUMNS = (
+    [
+        ("address", "string"),
+        ("lat", "float"),
+        ("lng", "float"),
+        ("municipality_code", "string"),
+        ("municipality", "string"),
+        ("total_score", "float"),
+        ("grade", "string"),
+    ]
+    + [(f"score_{category}", "float") for category in SCORE_CATEGORIES]
+    + [(f"facilities_{category}", "int") for category in SCORE_CATEGORIES]
+    + [
+        ("comparable_price_per_sqm_median", "int"),
+        ("comparable_transaction_count", "int"),
+        ("comparable_price_source", "string"),
+        ("population", "int"),
+        ("error", "string"),
+    ]
+)
+EXPORT_COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+
+def flatten_area(area: Dict) -> Dict:
+    """地点の分析結果（compare_area の戻り値）→ 1行"""
+    coordinates = area.get("coordinates") or {}
+    administrative_area = area.get("administrative_area") or {}
+    municipality = administrative_area.get("municipality") or {}
+    price = area.get("price_per_sqm") or {}
+    scores = area.get("scores") or {}
+    facility_counts = area.get("facility_counts") or {}
+    row = {
+        "address": area.get("address"),
+        "lat": coordinates.get("lat"),
+        "lng": coordinates.get("lng"),
+        "municipality_code": municipality.get("code"),
+        "municipality": municipality.get("name"),
+        "total_score": area.get("total_score"),
+        "grade": area.get("grade"),
+        "comparable_price_per_sqm_median": price.get("median"),
+        "comparable_transaction_count": price.get("count"),
+        "comparable_price_source": price.get("data_source"),
+        "population": (area.get("demographics") or {}).get("population"),
+        "error": area.get("error"),
+    }
+    for category in SCORE_CATEGORIES:
+        row[f"score_{category}"] = scores.get(category)
+        row[f"facilities_{category}"] = facility_counts.get(category)
+    return row
+
+async def _batches(areas: AsyncIterator[Dict], batch_rows: int) -> AsyncIterator[List[Dict]]:
+    batch = []
+    async for area in areas:
+        batch.append(flatten_area(area))
+        if len(batch) >= batch_rows:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def csv_stream(areas: AsyncIterator[Dict], batch_rows: int = EXPORT_BATCH_ROWS) -> AsyncIterator[bytes]:
+    """CSV（UTF-8、ヘッダー付き。値のない列は空）"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMN_NAMES, lineterminator="\n")
+    writer.writeheader()
+    yield buffer.getvalue().encode("utf-8")
+    async for batch in _batches(areas, batch_rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+
+class _ChunkSink:
+    """ParquetWriter の書き込み先。書かれたバイト列を溜めておき take() で取り出す"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def parquet_schema():
+    types = {"string": pa.string(), "float": pa.float64(), "int": pa.int64()}
+    return pa.schema([(name, types[kind]) for name, kind in EXPORT_COLUMNS])
+
+async def parquet_stream(areas: AsyncIterator[Dict], batch_rows: int = EXPORT_BATCH_ROWS) -> AsyncIterator[bytes]:
+    """Parquet（batch_rows 行ごとに1つの行グループ、zstd圧縮）"""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet の出力には pyarrow が必要です")
+    schema = parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for batch in _batches(areas, batch_rows):
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema), row_group_size=len(batch))
+            data = sink.take()
+            if data:
+                yield data
+    finally:
+        # フッターを書いて閉じる（途中で切断されたときも writer を閉じる）
+        writer.close()
+    yield sink.take()
+
+def export_stream(areas: AsyncIterator[Dict], format: str, batch_rows: Optional[int] = None) -> AsyncIterator[bytes]:
+    batch_rows = batch_rows or EXPORT_BATCH_ROWS
+    if format == "parquet":
+        return parquet_stream(areas, batch_rows)
+    return csv_stream(areas, batch_rows)
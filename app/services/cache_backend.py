@@ -0,0 +1,399 @@
+"""
+キャッシュの保存先（バックエンド）
+分析結果・外部APIの結果・チャットのセッション状態を、CACHE_BACKEND で選んだ保存先に置く
+
+    memory: プロセス内のLRU（既定。ワーカーごとに別々）
+    sqlite: 同じホストの全ワーカーで共有するSQLiteファイル（WALモード。CACHE_SQLITE_PATH）
+    redis:  Redisプロトコルのサーバー（CACHE_REDIS_URL。GET/SET/DEL/DBSIZE だけを使うため互換サーバーでも可）
+
+値は msgpack（未インストールなら JSON）でバイト列にして保存し、大きい値は zlib で圧縮します。
+どちらの形式でも、読み出した dict のキーは JSON と同じく文字列になります（int キーは "1" など）。
+保存先に接続できないときは例外を出さずにキャッシュなしとして動きます（リクエストは失敗させない）。
+Cache と SessionStore のメソッドは非同期で、ファイル・ネットワークの保存先はスレッドで読み書きします
+（イベントループを止めない）。
+"""
+import abc
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.utils import json_codec
+
+MSGPACK_AVAILABLE = False
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 5000))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "data/cache.sqlite")
+CACHE_SQLITE_MAX_ENTRIES = int(os.getenv("CACHE_SQLITE_MAX_ENTRIES", 200000))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+# チャットのセッション状態（履歴・コンテキスト）を残す秒数
+SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", 24 * 3600))
+# 保存形式を変えたら上げる（共有の保存先で古い形式の値を読まないようにキーに含める）
+CACHE_KEY_PREFIX = "li1:"
+# これより大きい値は圧縮して保存
+CACHE_COMPRESS_MIN_SIZE = 2048
+# 保存先に接続できなかったときに再接続を試みるまでの秒数
+RECONNECT_INTERVAL = 5.0
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # NumPy スカラー・配列
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+def _str_keys(pairs) -> Dict[str, Any]:
+    """msgpack の dict のキーを JSON で保存した場合と同じ文字列にそろえる"""
+    return {key if isinstance(key, str) else json_codec.dumps(key): value for key, value in pairs}
+
+def encode_value(value: Any) -> bytes:
+    """値 → 1バイトの形式（M: msgpack / J: JSON、小文字は zlib 圧縮）+ 本体"""
+    if MSGPACK_AVAILABLE:
+        kind, payload = b"M", msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+    else:
+        kind, payload = b"J", json_codec.dumps_bytes(value)
+    if len(payload) >= CACHE_COMPRESS_MIN_SIZE:
+        kind, payload = kind.lower(), zlib.compress(payload, 1)
+    return kind + payload
+
+def decode_value(data: bytes) -> Any:
+    kind, payload = data[:1], data[1:]
+    if kind.islower():
+        kind, payload = kind.upper(), zlib.decompress(payload)
+    if kind == b"M":
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("msgpack がインストールされていません")
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False, object_pairs_hook=_str_keys)
+    return json_codec.loads(payload)
+
+class CacheBackend(abc.ABC):
+    """バイト列のキャッシュ（キーごとの有効期限付き）"""
+
+    name = "base"
+    # 読み書きでI/Oを待つか（待つなら Cache はスレッドで呼ぶ）
+    blocking = True
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: float):
+        ...
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        ...
+
+    def count(self) -> Optional[int]:
+        """保存中の件数（分からなければNone）"""
+        return None
+
+class MemoryCacheBackend(CacheBackend):
+    """プロセス内の件数上限付きLRU"""
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def count(self) -> int:
+        return len(self._entries)
+
+class SQLiteCacheBackend(CacheBackend):
+    """同じホストのワーカーで共有するSQLiteファイル（WALモード）"""
+
+    name = "sqlite"
+    # この回数の書き込みごとに期限切れの削除と件数の上限の適用を行う
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str = CACHE_SQLITE_PATH, max_entries: int = CACHE_SQLITE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)")
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._purge()
+
+    def _purge(self):
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        excess = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            # 期限の近いものから削除
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)", (excess,)
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+
+class RedisCacheBackend(CacheBackend):
+    """Redisプロトコル（RESP）のサーバー。redis://[:password@]host:port/db"""
+
+    name = "redis"
+
+    def __init__(self, url: str = CACHE_REDIS_URL, timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock, self._reader = sock, sock.makefile("rb")
+        try:
+            if self.password:
+                self._call("AUTH", self.password)
+            if self.db:
+                self._call("SELECT", str(self.db))
+        except BaseException:
+            # 認証・DB選択に失敗した接続は使わない（次のコマンドで未認証のまま送らない）
+            self._close()
+            raise
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._reader = None
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("接続が切れました")
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b"+":
+            return body.decode("utf-8")
+        if prefix == b"-":
+            raise RuntimeError(body.decode("utf-8"))
+        if prefix == b":":
+            return int(body)
+        if prefix == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            length = int(body)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"不正な応答: {line[:20]!r}")
+
+    def _call(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def command(self, *args):
+        """コマンドを実行（接続できなければNone）"""
+        with self._lock:
+            if self._sock is None:
+                if time.monotonic() < self._retry_at:
+                    return None
+                try:
+                    self._connect()
+                except (OSError, RuntimeError) as e:
+                    self._close()
+                    self._retry_at = time.monotonic() + RECONNECT_INTERVAL
+                    logger.warning(f"⚠️ キャッシュサーバーに接続できません: {self.host}:{self.port} ({e})")
+                    return None
+            try:
+                return self._call(*args)
+            except (OSError, ConnectionError) as e:
+                self._close()
+                self._retry_at = time.monotonic() + RECONNECT_INTERVAL
+                logger.warning(f"⚠️ キャッシュサーバーとの通信失敗: {e}")
+                return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.command("SET", key, value, "PX", str(max(1, int(ttl * 1000))))
+
+    def delete(self, key: str):
+        self.command("DEL", key)
+
+    def count(self) -> Optional[int]:
+        return self.command("DBSIZE")
+
+class Cache:
+    """値のシリアライズとヒット率の集計をするキャッシュ（保存先は CacheBackend）"""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def _call(self, method, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        """(見つかったか, 値)。保存先のエラー・壊れた値は見つからない扱い"""
+        try:
+            data = await self._call(self.backend.get, CACHE_KEY_PREFIX + key)
+            if data is not None:
+                value = decode_value(data)
+                self.hits += 1
+                return True, value
+        except Exception as e:
+            logger.warning(f"⚠️ キャッシュの読み込み失敗: {key} ({e})")
+        self.misses += 1
+        return False, None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        try:
+            await self._call(self.backend.set, CACHE_KEY_PREFIX + key, encode_value(value), ttl)
+        except Exception as e:
+            logger.warning(f"⚠️ キャッシュの保存失敗: {key} ({e})")
+
+    async def delete(self, key: str):
+        try:
+            await self._call(self.backend.delete, CACHE_KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"⚠️ キャッシュの削除失敗: {key} ({e})")
+
+    async def stats(self) -> Dict:
+        try:
+            entries = await self._call(self.backend.count)
+        except Exception:
+            entries = None
+        return {
+            "backend": self.backend.name,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "serialization": "msgpack" if MSGPACK_AVAILABLE else "json",
+        }
+
+BACKENDS = {
+    "memory": MemoryCacheBackend,
+    "sqlite": SQLiteCacheBackend,
+    "redis": RedisCacheBackend,
+}
+
+_cache: Optional[Cache] = None
+
+def get_cache() -> Cache:
+    """CACHE_BACKEND のキャッシュを取得（作れなければプロセス内のLRU）"""
+    global _cache
+    if _cache is None:
+        try:
+            backend = BACKENDS[CACHE_BACKEND]()
+        except Exception as e:
+            logger.warning(f"⚠️ キャッシュの保存先 {CACHE_BACKEND} の初期化失敗、プロセス内のLRUを使用: {e}")
+            backend = MemoryCacheBackend()
+        _cache = Cache(backend)
+        logger.info(f"🗄️ キャッシュの保存先: {backend.name}")
+    return _cache
+
+class SessionStore:
+    """セッションIDごとの状態（チャットの履歴・コンテキストなど）をキャッシュに置く
+
+    取り出して変更したら set で書き戻してください（ワーカー間で共有するため）。
+    """
+
+    def __init__(self, namespace: str, ttl: float):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.namespace}:{session_id}"
+
+    async def get(self, session_id: str, default: Any = None) -> Any:
+        found, value = await get_cache().get(self._key(session_id))
+        return value if found else default
+
+    async def set(self, session_id: str, value: Any):
+        await get_cache().set(self._key(session_id), value, self.ttl)
+
+    async def delete(self, session_id: str):
+        await get_cache().delete(self._key(session_id))
@@ -9,6 +9,8 @@ import asyncio
 import aiohttp
 import json
 
+from app.services.cache_backend import SESSION_CACHE_TTL, SessionStore
+
 logger = logging.getLogger(__name__)
 
 class ChatService:
@@ -19,8 +21,8 @@ class ChatService:
     
     def __init__(self):
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
-        self.session_contexts: Dict[str, Dict] = {}
-        self.session_histories: Dict[str, List[Dict]] = {}
+        self.session_contexts = SessionStore("chat_context", SESSION_CACHE_TTL)
+        self.session_histories = SessionStore("chat_history", SESSION_CACHE_TTL)
         
         # システムプロンプト（Location Insights専用）
         self.system_prompt = """あなたは「Location Insights」の地域情報専門AIアシスタントです。
@@ -68,15 +70,12 @@ class ChatService:
         """
         try:
             # セッション履歴を初期化（必要に応じて）
-            if session_id not in self.session_histories:
-                self.session_histories[session_id] = []
-            
             # コンテキストを更新
             if context:
-                self.session_contexts[session_id] = context
+                await self.session_contexts.set(session_id, context)
             
             # 現在のコンテキストを取得
-            current_context = self.session_contexts.get(session_id, {})
+            current_context = await self.session_contexts.get(session_id, {})
             
             # OpenAI APIが利用可能かチェック
             if not self.openai_api_key or self.openai_api_key == "your_openai_api_key_here":
@@ -107,7 +106,7 @@ class ChatService:
                     messages.append({"role": "system", "content": context_message})
             
             # 会話履歴を追加（最近の10件まで）
-            history = self.session_histories[session_id][-10:]
+            history = (await self.session_histories.get(session_id, []))[-10:]
             messages.extend(history)
             
             # 現在のメッセージを追加
@@ -141,14 +140,14 @@ class ChatService:
                         ai_response = data["choices"][0]["message"]["content"]
                         
                         # 履歴に追加
-                        self.session_histories[session_id].extend([
+                        history = await self.session_histories.get(session_id, [])
+                        history.extend([
                             {"role": "user", "content": message},
                             {"role": "assistant", "content": ai_response}
                         ])
                         
-                        # 履歴が長くなりすぎた場合は古いものを削除
-                        if len(self.session_histories[session_id]) > 20:
-                            self.session_histories[session_id] = self.session_histories[session_id][-20:]
+                        # 履歴が長くなりすぎた場合は古いものを削除（ワーカー間で共有するため保存し直す）
+                        await self.session_histories.set(session_id, history[-20:])
                         
                         logger.info(f"✅ OpenAI応答生成成功: session_id={session_id}")
                         return ai_response
@@ -342,17 +341,15 @@ Location Insights AIでは、以下のような地域情報についてお答え
     
     async def update_session_context(self, session_id: str, context: Dict):
         """セッションのコンテキストを更新"""
-        self.session_contexts[session_id] = context
+        await self.session_contexts.set(session_id, context)
         logger.info(f"📝 セッションコンテキスト更新: session_id={session_id}")
     
-    def get_session_history(self, session_id: str) -> List[Dict]:
+    async def get_session_history(self, session_id: str) -> List[Dict]:
         """セッションの会話履歴を取得"""
-        return self.session_histories.get(session_id, [])
+        return await self.session_histories.get(session_id, [])
     
-    def clear_session_history(self, session_id: str):
+    async def clear_session_history(self, session_id: str):
         """セッションの会話履歴をクリア"""
-        if session_id in self.session_histories:
-            del self.session_histories[session_id]
-        if session_id in self.session_contexts:
-            del self.session_contexts[session_id]
+        await self.session_histories.delete(session_id)
+        await self.session_contexts.delete(session_id)
         logger.info(f"🗑️ セッション履歴クリア: session_id={session_id}")
@@ -0,0 +1,165 @@
+"""
+犯罪統計テーブル（市区町村・町丁目別の認知件数）
+行政区域コードで引き、人口千人あたり件数と全国パーセンタイルを返す
+
+テーブルは取り込みジョブで作成した npz で、人口千人あたり件数とレベル内パーセンタイルは
+取り込み時に計算して保存します。読み込み時にキー → 行番号の辞書を作るため、参照は定数時間です。
+
+キー:
+  - 市区町村: 全国地方公共団体コード（5桁）
+  - 町丁目: 小地域コード（KEY_CODE）または "市区町村コード:町丁目名"
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CRIME_STATS_PATH = os.getenv("CRIME_STATS_PATH", "data/crime_stats.npz")
+
+CRIME_LEVELS = ["municipality", "town"]
+
+def _pack_lines(values: List[str]) -> np.ndarray:
+    return np.frombuffer("\n".join(values).encode("utf-8"), dtype=np.uint8)
+
+def _unpack_lines(blob: np.ndarray) -> List[str]:
+    return blob.tobytes().decode("utf-8").split("\n") if blob.size else []
+
+def town_name_key(municipality_code: str, town_name: str) -> str:
+    """町丁目名によるキー（警察の町丁別統計はコードを持たないことが多い）"""
+    return f"{municipality_code}:{town_name}"
+
+def mid_rank_percentiles(values: np.ndarray) -> np.ndarray:
+    """各値の同一集合内でのパーセンタイル（同順位は中央、NaNはNaN）"""
+    result = np.full(len(values), np.nan)
+    valid = ~np.isnan(values)
+    reference = np.sort(values[valid])
+    if len(reference):
+        below = np.searchsorted(reference, values[valid], side="left")
+        at_or_below = np.searchsorted(reference, values[valid], side="right")
+        result[valid] = (below + at_or_below) / 2 / len(reference) * 100
+    return result
+
+class CrimeStatsTable:
+    """キー付きの犯罪統計テーブル"""
+
+    def __init__(self, keys: List[str], names: List[str], levels: np.ndarray, counts: np.ndarray,
+                 population: np.ndarray, rates: np.ndarray, percentiles: np.ndarray, meta: Optional[Dict] = None):
+        self.keys = keys
+        self.names = names
+        self.levels = levels
+        self.counts = counts
+        self.population = population
+        self.rates = rates
+        self.percentiles = percentiles
+        self.meta = meta or {}
+        self._row = {key: i for i, key in enumerate(keys)}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict], meta: Optional[Dict] = None) -> "CrimeStatsTable":
+        """{"key", "name", "level", "count", "population"} の列から構築（同一キーは件数・人口を合算）"""
+        merged: Dict[str, Dict] = {}
+        for row in rows:
+            entry = merged.setdefault(row["key"], {**row, "count": 0.0, "population": 0.0})
+            entry["count"] += float(row.get("count") or 0)
+            entry["population"] += float(row.get("population") or 0)
+        keys = sorted(merged)
+        levels = np.array([CRIME_LEVELS.index(merged[k]["level"]) for k in keys], dtype=np.uint8)
+        counts = np.array([merged[k]["count"] for k in keys], dtype=np.float64)
+        population = np.array([merged[k]["population"] for k in keys], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.where(population > 0, counts / population * 1000, np.nan)
+        # レベル内の順位。人口のないデータ（件数のみの統計）は件数で順位を取る
+        percentiles = np.full(len(keys), np.nan)
+        for level in range(len(CRIME_LEVELS)):
+            in_level = levels == level
+            basis = rates[in_level]
+            if np.isnan(basis).all():
+                basis = counts[in_level]
+            percentiles[in_level] = mid_rank_percentiles(basis)
+        return cls(
+            keys=keys,
+            names=[merged[k].get("name", "") for k in keys],
+            levels=levels,
+            counts=counts,
+            population=population,
+            rates=rates,
+            percentiles=percentiles,
+            meta=meta,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CrimeStatsTable":
+        with np.load(path) as archive:
+            return cls(
+                keys=_unpack_lines(archive["keys"]),
+                names=_unpack_lines(archive["names"]),
+                levels=archive["levels"],
+                counts=archive["counts"],
+                population=archive["population"],
+                rates=archive["rates"],
+                percentiles=archive["percentiles"],
+                meta=json.loads(str(archive["meta"])),
+            )
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            keys=_pack_lines(self.keys),
+            names=_pack_lines(self.names),
+            levels=self.levels,
+            counts=self.counts,
+            population=self.population,
+            rates=self.rates,
+            percentiles=self.percentiles,
+            meta=np.array(json.dumps(self.meta, ensure_ascii=False)),
+        )
+
+    def get(self, key: str) -> Optional[Dict]:
+        i = self._row.get(key)
+        if i is None:
+            return None
+        rate, percentile = self.rates[i], self.percentiles[i]
+        return {
+            "key": key,
+            "name": self.names[i],
+            "level": CRIME_LEVELS[self.levels[i]],
+            "crime_count": float(self.counts[i]),
+            "population": float(self.population[i]) or None,
+            "rate_per_1000": None if np.isnan(rate) else round(float(rate), 2),
+            "percentile": None if np.isnan(percentile) else round(float(percentile), 1),
+        }
+
+    def lookup_area(self, area: Dict) -> Optional[Dict]:
+        """逆ジオコーディング結果（admin_boundaries）から最も細かい区域の統計を返す"""
+        municipality_code = area["municipality"]["code"]
+        town = area.get("town")
+        if town:
+            record = self.get(town["code"]) or self.get(town_name_key(municipality_code, town["name"]))
+            if record:
+                return record
+        return self.get(municipality_code)
+
+_crime_stats: Optional[CrimeStatsTable] = None
+_crime_stats_loaded = False
+
+def get_crime_stats() -> Optional[CrimeStatsTable]:
+    """犯罪統計テーブルを取得（初回のみ読み込み、ファイルがなければNone）"""
+    global _crime_stats, _crime_stats_loaded
+    if not _crime_stats_loaded:
+        _crime_stats_loaded = True
+        if Path(CRIME_STATS_PATH).exists():
+            try:
+                _crime_stats = CrimeStatsTable.load(CRIME_STATS_PATH)
+                logger.info(f"🚓 犯罪統計テーブルを読み込み: {CRIME_STATS_PATH} ({len(_crime_stats)}区域)")
+            except Exception as e:
+                logger.warning(f"⚠️ 犯罪統計テーブルの読み込み失敗: {e}")
+    return _crime_stats
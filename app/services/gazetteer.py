@@ -0,0 +1,164 @@
+"""
+オフライン住所ジオコーダー（ガゼッティア）
+位置参照情報から作成した照合キーのソート済み配列を最長一致で検索
+
+照合レベル:
+  - block: 街区・地番レベル
+  - town: 大字・町丁目の代表点
+  - municipality: 市区町村の代表点（町丁目代表点の平均）
+  - prefecture: 都道府県の代表点
+"""
+import bisect
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.utils.address import address_key
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "data/gazetteer.npz")
+
+MATCH_LEVELS = ["prefecture", "municipality", "town", "block"]
+# geocode_address で採用する最低レベル（これより粗い一致はネットワーク経由のジオコーダーへ）
+GAZETTEER_MIN_LEVEL = os.getenv("GAZETTEER_MIN_LEVEL", "town")
+# 都道府県・市区町村名の末尾の文字
+_DIVISION_SUFFIXES = set("都道府県市区町村郡")
+
+def _pack_lines(values: List[str]) -> np.ndarray:
+    return np.frombuffer("\n".join(values).encode("utf-8"), dtype=np.uint8)
+
+def _unpack_lines(blob: np.ndarray) -> List[str]:
+    return blob.tobytes().decode("utf-8").split("\n") if blob.size else []
+
+class Gazetteer:
+    """照合キーのソート済み配列と代表点座標"""
+
+    def __init__(
+        self,
+        keys: List[str],
+        lats: np.ndarray,
+        lngs: np.ndarray,
+        levels: np.ndarray,
+        labels: Optional[List[str]] = None
+    ):
+        self.keys = keys
+        self.lats = lats
+        self.lngs = lngs
+        self.levels = levels
+        # 表示用の住所（元データの表記、街区レベルは空文字）
+        self.labels = labels if labels is not None else [""] * len(keys)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Dict]) -> "Gazetteer":
+        """{"key", "lat", "lng", "level"[, "label"]} の列から構築（同一キーは先勝ち）"""
+        by_key: Dict[str, Dict] = {}
+        for entry in entries:
+            by_key.setdefault(entry["key"], entry)
+        keys = sorted(by_key)
+        return cls(
+            keys=keys,
+            lats=np.array([by_key[k]["lat"] for k in keys], dtype=np.float64),
+            lngs=np.array([by_key[k]["lng"] for k in keys], dtype=np.float64),
+            levels=np.array([MATCH_LEVELS.index(by_key[k]["level"]) for k in keys], dtype=np.uint8),
+            labels=[by_key[k].get("label", "") for k in keys],
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Gazetteer":
+        with np.load(path) as archive:
+            keys = _unpack_lines(archive["keys"])
+            labels = _unpack_lines(archive["labels"]) if "labels" in archive.files else None
+            return cls(keys, archive["lats"], archive["lngs"], archive["levels"], labels)
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            keys=_pack_lines(self.keys),
+            labels=_pack_lines(self.labels),
+            lats=self.lats,
+            lngs=self.lngs,
+            levels=self.levels
+        )
+
+    def _find(self, key: str) -> int:
+        i = bisect.bisect_left(self.keys, key)
+        return i if i < len(self.keys) and self.keys[i] == key else -1
+
+    @staticmethod
+    def _candidate_prefixes(key: str) -> List[str]:
+        """区切り位置（"-" の直前・数字列の境界・都道府県/市区町村の末尾）で切った接頭辞（長い順）
+
+        町丁目が見つからない住所も市区町村・都道府県の一致まで戻れるように、最初の数字より前では
+        行政区画の末尾の文字（都道府県市区町村郡）の直後でも切ります。
+        """
+        cuts = {len(key)}
+        head = True
+        for i in range(1, len(key)):
+            if key[i] == "-" or key[i].isdigit() != key[i - 1].isdigit():
+                cuts.add(i)
+            head = head and not key[i - 1].isdigit()
+            if head and key[i - 1] in _DIVISION_SUFFIXES:
+                cuts.add(i)
+        return [key[:i] for i in sorted(cuts, reverse=True)]
+
+    def geocode(self, address: str) -> Optional[Dict]:
+        """最長一致で座標を返す（一致しなければNone）"""
+        key = address_key(address)
+        if not key or not self.keys:
+            return None
+        for prefix in self._candidate_prefixes(key):
+            i = self._find(prefix)
+            if i >= 0:
+                return {
+                    "lat": float(self.lats[i]),
+                    "lng": float(self.lngs[i]),
+                    "match_level": MATCH_LEVELS[self.levels[i]],
+                    "matched_key": prefix,
+                    "exact": prefix == key
+                }
+        return None
+
+    def containing_keys(self, key: str) -> List[str]:
+        """照合キー key を含む（接頭辞として一致する）エントリのキー（細かい順）"""
+        return [prefix for prefix in self._candidate_prefixes(address_key(key)) if self._find(prefix) >= 0]
+
+    def iter_prefix(self, prefix: str) -> Iterable[int]:
+        """接頭辞が一致するエントリのインデックスを順に返す"""
+        i = bisect.bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            yield i
+            i += 1
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_loaded = False
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """ガゼッティアを取得（初回のみ読み込み、ファイルがなければNone）"""
+    global _gazetteer, _gazetteer_loaded
+    if not _gazetteer_loaded:
+        _gazetteer_loaded = True
+        if Path(GAZETTEER_PATH).exists():
+            try:
+                _gazetteer = Gazetteer.load(GAZETTEER_PATH)
+                logger.info(f"🗾 オフラインジオコーダーを読み込み: {GAZETTEER_PATH} ({len(_gazetteer)}件)")
+            except Exception as e:
+                logger.warning(f"⚠️ オフラインジオコーダーの読み込み失敗: {e}")
+    return _gazetteer
+
+def geocode_offline(address: str, min_level: str = GAZETTEER_MIN_LEVEL) -> Optional[Dict]:
+    """オフラインで座標を取得（min_level 未満の一致はNone）"""
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return None
+    result = gazetteer.geocode(address)
+    if result and MATCH_LEVELS.index(result["match_level"]) >= MATCH_LEVELS.index(min_level):
+        return result
+    return None
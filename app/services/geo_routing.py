@@ -0,0 +1,174 @@
+"""
+地理的なキャッシュアフィニティのルーティング
+複数のワーカー・ノードで動かすときに、同じエリアのリクエストを同じ転送先に集めて
+そのプロセスの Places・不動産取引・分析のキャッシュが効くようにする
+
+リクエストから粗いセル（JISメッシュ。既定は2次メッシュ 約10km）または住所の市区町村を取り出し、
+仮想ノード付きのコンシステントハッシュで転送先を決めます。転送先を増減しても移るセルは一部だけです。
+特定のエリアにリクエストが集中したときは、負荷の上限（全体の処理中リクエスト数の平均 × GEO_ROUTING_LOAD_FACTOR）
+を超えた転送先を飛ばしてリング上の次の転送先に回します（bounded-load consistent hashing）。
+
+ディスパッチャー本体は app/jobs/geo_dispatcher.py です。
+"""
+import bisect
+import hashlib
+import math
+import os
+import re
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from app.utils.address import extract_prefecture, normalize_address
+from app.utils.jis_mesh import mesh_code
+from app.utils.mvt import tile_bounds
+
+GEO_ROUTING_MESH_LEVEL = int(os.getenv("GEO_ROUTING_MESH_LEVEL", 2))
+GEO_ROUTING_LOAD_FACTOR = float(os.getenv("GEO_ROUTING_LOAD_FACTOR", 1.25))
+# 転送先1つあたりの仮想ノード数（多いほどセルの割り当てが均等になる）
+VIRTUAL_NODES = 160
+# 接続できなかった転送先をリングから外しておく秒数
+UPSTREAM_RETRY_SECONDS = 10.0
+
+_TILE_PATH = re.compile(r"^/tiles/[^/]+/(\d+)/(\d+)/(\d+)\.mvt$")
+_CHAT_SESSION_PATH = re.compile(r"^/ws/chat/([^/]+)")
+_MUNICIPALITY = re.compile(r"^.+?[市区町村]")
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+def cell_key(lat: float, lng: float, level: int = GEO_ROUTING_MESH_LEVEL) -> str:
+    return f"mesh:{mesh_code(lat, lng, level)}"
+
+def address_cell_key(address: str) -> Optional[str]:
+    """住所 → 市区町村までのキー（座標のない分析リクエスト用）"""
+    text = normalize_address(address)
+    if not text:
+        return None
+    prefecture = extract_prefecture(text) or ""
+    rest = text[text.index(prefecture) + len(prefecture):] if prefecture else text
+    match = _MUNICIPALITY.match(rest)
+    return f"addr:{prefecture}{match.group(0) if match else rest}"
+
+def _coordinates_key(value) -> Optional[str]:
+    if isinstance(value, dict):
+        try:
+            return cell_key(float(value["lat"]), float(value["lng"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+    return None
+
+def _body_key(body) -> Optional[str]:
+    if not isinstance(body, dict):
+        return None
+    if body.get("session_id"):
+        return f"session:{body['session_id']}"
+    # 複数地点の比較は先頭の地点で決める
+    if isinstance(body.get("areas"), list) and body["areas"]:
+        return _body_key(body["areas"][0])
+    key = _coordinates_key(body.get("coordinates"))
+    if key is None and isinstance(body.get("address"), str):
+        key = address_cell_key(body["address"])
+    return key
+
+def routing_key(path: str, query_string: str = "", body=None) -> Optional[str]:
+    """リクエスト → ルーティングキー（エリアが特定できなければNone）
+
+    body はJSONを読み込んだもの（JSONでなければNone）
+    """
+    match = _TILE_PATH.match(path)
+    if match:
+        z, x, y = (int(v) for v in match.groups())
+        south, west, north, east = tile_bounds(z, x, y)
+        return cell_key((south + north) / 2, (west + east) / 2)
+    match = _CHAT_SESSION_PATH.match(path)
+    if match:
+        return f"session:{match.group(1)}"
+
+    params = {name: values[0] for name, values in parse_qs(query_string).items()}
+    if "lat" in params and "lng" in params:
+        try:
+            return cell_key(float(params["lat"]), float(params["lng"]))
+        except ValueError:
+            pass
+    key = _body_key(body)
+    if key is None and params.get("address"):
+        key = address_cell_key(params["address"])
+    return key
+
+class GeoRouter:
+    """転送先のコンシステントハッシュリング（処理中リクエスト数による負荷の上限付き）"""
+
+    def __init__(self, upstreams: List[str], load_factor: float = GEO_ROUTING_LOAD_FACTOR,
+                 virtual_nodes: int = VIRTUAL_NODES):
+        if not upstreams:
+            raise ValueError("転送先がありません")
+        self.upstreams = list(upstreams)
+        self.load_factor = load_factor
+        points = sorted(
+            (_hash(f"{upstream}#{i}"), upstream) for upstream in self.upstreams for i in range(virtual_nodes)
+        )
+        self._ring_hashes = [h for h, _ in points]
+        self._ring_upstreams = [u for _, u in points]
+        self.in_flight: Dict[str, int] = {upstream: 0 for upstream in self.upstreams}
+        self.routed: Dict[str, int] = {upstream: 0 for upstream in self.upstreams}
+        self.spilled = 0
+        self._down_until: Dict[str, float] = {}
+
+    def _available(self) -> List[str]:
+        now = time.monotonic()
+        available = [u for u in self.upstreams if self._down_until.get(u, 0.0) <= now]
+        # 全部落ちていたら全転送先を試す
+        return available or self.upstreams
+
+    def capacity(self, available: Optional[List[str]] = None) -> int:
+        """1つの転送先が受け持てる処理中リクエスト数の上限（このリクエストを含む）"""
+        available = available or self._available()
+        total = sum(self.in_flight[u] for u in available) + 1
+        return max(1, math.ceil(self.load_factor * total / len(available)))
+
+    def route(self, key: Optional[str]) -> str:
+        """キー → 転送先（キーがなければ処理中リクエストが最も少ない転送先）"""
+        available = self._available()
+        if key is None:
+            return min(available, key=lambda u: self.in_flight[u])
+        capacity = self.capacity(available)
+        start = bisect.bisect(self._ring_hashes, _hash(key))
+        first = None
+        seen = set()
+        for i in range(len(self._ring_hashes)):
+            upstream = self._ring_upstreams[(start + i) % len(self._ring_hashes)]
+            if upstream in seen or upstream not in available:
+                continue
+            if first is None:
+                first = upstream
+            if self.in_flight[upstream] < capacity:
+                if upstream != first:
+                    self.spilled += 1
+                return upstream
+            seen.add(upstream)
+            if len(seen) == len(available):
+                break
+        return first
+
+    def acquire(self, upstream: str):
+        self.in_flight[upstream] += 1
+        self.routed[upstream] += 1
+
+    def release(self, upstream: str):
+        self.in_flight[upstream] -= 1
+
+    def mark_down(self, upstream: str):
+        self._down_until[upstream] = time.monotonic() + UPSTREAM_RETRY_SECONDS
+
+    def stats(self) -> Dict:
+        return {
+            "upstreams": [
+                {"url": u, "in_flight": self.in_flight[u], "routed": self.routed[u],
+                 "down": self._down_until.get(u, 0.0) > time.monotonic()}
+                for u in self.upstreams
+            ],
+            "spilled": self.spilled,
+            "load_factor": self.load_factor,
+            "mesh_level": GEO_ROUTING_MESH_LEVEL,
+        }
@@ -0,0 +1,547 @@
+"""
+グリッド一括スコアリング（ヒートマップ用）
+範囲内の施設を一度だけ取り出してセルに集計し、全セルの8項目スコアをまとめて計算する
+
+地点ごとの calculate_* と同じ配点（施設数・タイプ・近接・評価・多様性）を、タイプごとの
+施設数グリッドと円・同心円カーネルの畳み込み（FFT）で全セル同時に求めます。
+計算量はセル数 × タイプ数の FFT で決まり、セル数 × 検索回数の API 呼び出しは不要です。
+
+地点ごとの計算との違い（近似）:
+  - 施設はセル中心に寄せるため、距離は最大でセル幅の約0.7倍ずれる
+  - タイプ間の重複除去はしない（複数タイプを持つ施設はそれぞれで数える）
+  - 1検索あたりの件数上限（POI_STORE_MAX_RESULTS）は、タイプごとの件数を上限で頭打ちにし、
+    近接・評価の集計も同じ割合で間引いて近似する
+  - 犯罪統計は CRIME_SAMPLE_STEP_M 間隔の代表点で引く
+"""
+import base64
+import logging
+import math
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.admin_boundaries import reverse_geocode_offline
+from app.services.crime_stats import get_crime_stats
+from app.services.hazard_raster import HazardRaster
+from app.services.poi_store import POI_STORE_MAX_RESULTS, POIStore
+from app.services.score_percentiles import SCORE_CATEGORIES
+from app.services.station_index import RAIL_SEARCH_RADIUS_M, StationIndex
+
+logger = logging.getLogger(__name__)
+
+# 犯罪統計を引く代表点の間隔（メートル）
+CRIME_SAMPLE_STEP_M = float(os.getenv("CRIME_SAMPLE_STEP_M", 500))
+# ヒートマップ1回あたりのセル数の上限
+HEATMAP_MAX_CELLS = int(os.getenv("HEATMAP_MAX_CELLS", 65536))
+# ローカルPOIストアがない場合の Places 検索（タイルの半径と1回あたりの呼び出し上限）
+# タイルは範囲内だけに置き、余白はタイルの検索円が範囲からはみ出す分（半径）にとどめる
+HEATMAP_LIVE_TILE_RADIUS_M = int(os.getenv("HEATMAP_LIVE_TILE_RADIUS_M", 1000))
+HEATMAP_MAX_LIVE_CALLS = int(os.getenv("HEATMAP_MAX_LIVE_CALLS", 200))
+
+# search_nearby_places の検索半径の上限と同じ
+SEARCH_RADIUS_LIMIT_M = 1500
+# 範囲の外側に確保する余白（最も遠くまで数える鉄道駅の検索半径）
+GRID_MARGIN_M = max(SEARCH_RADIUS_LIMIT_M, RAIL_SEARCH_RADIUS_M)
+
+# カテゴリごとの検索タイプと半径（get_*_facilities と同じ）
+CATEGORY_SEARCHES: Dict[str, Dict[str, int]] = {
+    "education": {"school": 1000, "university": 1500, "primary_school": 800, "secondary_school": 1200},
+    "medical": {"hospital": 1500, "pharmacy": 1000, "dentist": 1200, "doctor": 1200},
+    "transport": {"subway_station": 1200, "train_station": 1500, "bus_station": 800},
+    "shopping": {
+        "shopping_mall": 2000, "supermarket": 1000, "convenience_store": 500,
+        "department_store": 2500, "store": 1500,
+    },
+    "dining": {"restaurant": 1000, "meal_takeaway": 800, "cafe": 800, "bar": 1200, "bakery": 800, "food": 1000},
+    "safety": {"police": 1500, "fire_station": 1500, "local_government_office": 2000, "hospital": 2000, "city_hall": 2500},
+    "environment": {"park": 600, "tourist_attraction": 600, "cemetery": 600, "place_of_worship": 600},
+    "cultural": {
+        "library": 1500, "museum": 2000, "movie_theater": 3000, "gym": 1200, "restaurant": 800, "cafe": 800,
+        "bar": 1000, "amusement_park": 5000, "bowling_alley": 3000, "spa": 2000, "stadium": 5000,
+        "tourist_attraction": 3000, "art_gallery": 2000,
+    },
+}
+# 緊急時対応優先度（get_response_time_priority と同じ）
+RESPONSE_PRIORITY = {"police": 1, "fire_station": 1, "hospital": 2, "local_government_office": 3, "city_hall": 4}
+
+Bands = Tuple[Tuple[float, float], ...]
+
+def required_types(categories: Iterable[str], station_index: bool = False) -> List[str]:
+    """カテゴリの計算に必要な施設タイプ（駅索引を使う場合は交通のタイプを除く）"""
+    types = []
+    for category in categories:
+        if category == "transport" and station_index:
+            continue
+        for place_type in CATEGORY_SEARCHES[category]:
+            if place_type not in types:
+                types.append(place_type)
+    return types
+
+def _radius(place_type: str, category: str) -> float:
+    return min(CATEGORY_SEARCHES[category][place_type], SEARCH_RADIUS_LIMIT_M)
+
+def _clip_bands(bands: Bands, radius: float) -> Bands:
+    """同心円の配点を検索半径で打ち切る"""
+    clipped = []
+    for outer, points in bands:
+        clipped.append((min(outer, radius), points))
+        if outer >= radius:
+            break
+    return tuple(clipped)
+
+def _band_points(value: np.ndarray, bands: Bands, fallback: float = 0.0) -> np.ndarray:
+    """最寄り距離などの値 → 段階配点（どの段階にも入らなければ fallback）"""
+    result = np.full(value.shape, fallback, dtype=np.float64)
+    for outer, points in reversed(bands):
+        result[value <= outer] = points
+    return result
+
+def _fft_size(n: int) -> int:
+    """n 以上で素因数が 2, 3, 5 だけの長さ（FFT が速い）"""
+    while True:
+        m = n
+        for p in (2, 3, 5):
+            while m % p == 0:
+                m //= p
+        if m == 1:
+            return n
+        n += 1
+
+def crime_bonus(safety_score: float) -> float:
+    """犯罪データによる安全スコアの調整（calculate_safety_score_with_facilities と同じ）"""
+    if safety_score >= 80:
+        return 10
+    if safety_score >= 60:
+        return 5
+    if safety_score < 30:
+        return -5
+    return 0
+
+def encode_float16(values: np.ndarray) -> str:
+    """配列 → float16（リトルエンディアン、行優先）の base64"""
+    return base64.b64encode(np.ascontiguousarray(values, dtype="<f2").tobytes()).decode("ascii")
+
+class ScoringGrid:
+    """範囲を resolution_m 四方のセルに分けたグリッド（行0が北端）
+
+    施設の集計は範囲の外側に margin_m の余白を付けた拡張グリッドで行い、結果は範囲内だけを返す。
+    """
+
+    def __init__(self, south: float, west: float, north: float, east: float,
+                 resolution_m: float, margin_m: float = GRID_MARGIN_M):
+        self.south, self.west, self.north, self.east = south, west, north, east
+        self.resolution_m = resolution_m
+        self.cell_lat = resolution_m / 111320
+        self.cell_lng = resolution_m / (111320 * max(math.cos(math.radians((south + north) / 2)), 0.1))
+        self.rows = max(1, math.ceil((north - south) / self.cell_lat))
+        self.cols = max(1, math.ceil((east - west) / self.cell_lng))
+        self.pad = math.ceil(margin_m / resolution_m)
+        self.padded_shape = (self.rows + 2 * self.pad, self.cols + 2 * self.pad)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.rows, self.cols
+
+    def padded_bounds(self) -> Tuple[float, float, float, float]:
+        """拡張グリッドの (南, 西, 北, 東)"""
+        north = self.north + self.pad * self.cell_lat
+        west = self.west - self.pad * self.cell_lng
+        return (north - self.padded_shape[0] * self.cell_lat, west,
+                north, west + self.padded_shape[1] * self.cell_lng)
+
+    def cell_centers(self) -> Tuple[np.ndarray, np.ndarray]:
+        """範囲内のセル中心の (緯度, 経度)（いずれも rows × cols）"""
+        lats = self.north - (np.arange(self.rows) + 0.5) * self.cell_lat
+        lngs = self.west + (np.arange(self.cols) + 0.5) * self.cell_lng
+        return np.meshgrid(lats, lngs, indexing="ij")
+
+    def cells_of(self, lats: np.ndarray, lngs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """緯度経度 → 拡張グリッドの (行, 列, 範囲内か)"""
+        _, west, north, _ = self.padded_bounds()
+        rows = np.floor((north - np.asarray(lats)) / self.cell_lat).astype(np.int64)
+        cols = np.floor((np.asarray(lngs) - west) / self.cell_lng).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.padded_shape[0]) & (cols >= 0) & (cols < self.padded_shape[1])
+        return rows, cols, inside
+
+    def bin(self, lats: np.ndarray, lngs: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """点をセルごとに集計した拡張グリッド（weights がなければ件数）"""
+        rows, cols, inside = self.cells_of(lats, lngs)
+        flat = rows[inside] * self.padded_shape[1] + cols[inside]
+        counts = np.bincount(
+            flat, weights=None if weights is None else np.asarray(weights, dtype=np.float64)[inside],
+            minlength=self.padded_shape[0] * self.padded_shape[1]
+        )
+        return counts.astype(np.float64).reshape(self.padded_shape)
+
+    def crop(self, padded: np.ndarray) -> np.ndarray:
+        return padded[self.pad:self.pad + self.rows, self.pad:self.pad + self.cols]
+
+    def offsets_m(self, radius_m: float) -> np.ndarray:
+        """中心セルからの距離（メートル、(2k+1) 四方）"""
+        k = math.ceil(radius_m / self.resolution_m)
+        dy, dx = np.mgrid[-k:k + 1, -k:k + 1]
+        return np.hypot(dy, dx) * self.resolution_m
+
+# 施設タイプ → (緯度, 経度, 評価) の配列（評価なしは0）
+FacilityPoints = Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]
+
+def collect_store_facilities(store: POIStore, grid: ScoringGrid, place_types: Iterable[str]) -> FacilityPoints:
+    """ローカルPOIストアから拡張グリッド内の施設を取り出す"""
+    south, west, north, east = grid.padded_bounds()
+    columns = store._columns
+    facilities = {}
+    for place_type in place_types:
+        indices = np.sort(store.query_bbox(place_type, south, west, north, east))
+        facilities[place_type] = (columns["lat"][indices], columns["lng"][indices], columns["rating"][indices])
+    return facilities
+
+def live_tile_centers(grid: ScoringGrid, radius_m: float = HEATMAP_LIVE_TILE_RADIUS_M) -> List[Dict[str, float]]:
+    """範囲（余白を除く）を半径 radius_m の円で覆う検索中心（間隔は半径の√2倍）
+
+    範囲の外側は検索円がはみ出す分しか集めないため、端のセルは範囲外の施設を少なめに数える。
+    グリッドの余白は radius_m あれば足りる。
+    """
+    south, west, north, east = grid.south, grid.west, grid.north, grid.east
+    spacing_lat = radius_m * math.sqrt(2) / 111320
+    spacing_lng = spacing_lat * grid.cell_lng / grid.cell_lat
+    lats = np.arange(south + spacing_lat / 2, north + spacing_lat / 2, spacing_lat)
+    lngs = np.arange(west + spacing_lng / 2, east + spacing_lng / 2, spacing_lng)
+    return [{"lat": float(lat), "lng": float(lng)} for lat in lats for lng in lngs]
+
+def facilities_from_places(places_by_type: Dict[str, List[Dict]]) -> FacilityPoints:
+    """Places API 形式の結果（タイプごと）→ 施設配列"""
+    facilities = {}
+    for place_type, places in places_by_type.items():
+        locations = [p["geometry"]["location"] for p in places]
+        facilities[place_type] = (
+            np.array([loc["lat"] for loc in locations], dtype=np.float64),
+            np.array([loc["lng"] for loc in locations], dtype=np.float64),
+            np.array([p.get("rating") or 0 for p in places], dtype=np.float64),
+        )
+    return facilities
+
+class GridScorer:
+    """ScoringGrid の全セルについて8項目スコアを計算する"""
+
+    def __init__(self, grid: ScoringGrid, facilities: FacilityPoints,
+                 station_index: Optional[StationIndex] = None, hazard_raster: Optional[HazardRaster] = None,
+                 crime_bonus_at: Optional[Callable[[ScoringGrid], np.ndarray]] = None):
+        self.grid = grid
+        self.facilities = dict(facilities)
+        self.station_index = station_index
+        self.hazard_raster = hazard_raster
+        self.crime_bonus_at = crime_bonus_at
+        # 循環畳み込みの折り返しが余白に収まる FFT サイズ（余白がカーネルより狭いグリッドでも折り返さない）
+        reach = max(grid.pad, math.ceil(GRID_MARGIN_M / grid.resolution_m))
+        self._fft_shape = tuple(_fft_size(n + reach + 1) for n in grid.padded_shape)
+        self._layers: Dict[Tuple[str, str], Optional[np.ndarray]] = {}
+        self._kernels: Dict[Bands, np.ndarray] = {}
+        self._convolved: Dict[Tuple[str, str, Bands], np.ndarray] = {}
+
+    # ---- 畳み込み ----
+
+    def _layer(self, place_type: str, layer: str) -> Optional[np.ndarray]:
+        """タイプの集計グリッドのスペクトル（count / rating_sum / rated / high_rated、施設がなければNone）"""
+        key = (place_type, layer)
+        if key not in self._layers:
+            lats, lngs, ratings = self.facilities.get(place_type, (np.zeros(0), np.zeros(0), np.zeros(0)))
+            if len(lats) == 0:
+                self._layers[key] = None
+            else:
+                weights = {
+                    "count": None,
+                    "rating_sum": ratings,
+                    "rated": (ratings > 0).astype(np.float64),
+                    "high_rated": (ratings >= 4.0).astype(np.float64),
+                }[layer]
+                self._layers[key] = np.fft.rfft2(self.grid.bin(lats, lngs, weights), s=self._fft_shape)
+        return self._layers[key]
+
+    def _kernel(self, bands: Bands) -> np.ndarray:
+        """同心円カーネル（内側から (外径, 配点)）のスペクトル"""
+        if bands not in self._kernels:
+            distances = self.grid.offsets_m(bands[-1][0])
+            weights = _band_points(distances, bands)
+            k = distances.shape[0] // 2
+            kernel = np.zeros(self._fft_shape)
+            dy, dx = np.mgrid[-k:k + 1, -k:k + 1]
+            kernel[dy % self._fft_shape[0], dx % self._fft_shape[1]] = weights
+            self._kernels[bands] = np.fft.rfft2(kernel)
+        return self._kernels[bands]
+
+    def convolve(self, place_type: str, bands: Bands, layer: str = "count") -> np.ndarray:
+        """各セルから見た、タイプの施設の同心円配点の合計（範囲内 rows × cols）"""
+        key = (place_type, layer, bands)
+        if key not in self._convolved:
+            spectrum = self._layer(place_type, layer)
+            if spectrum is None or not bands or bands[-1][0] <= 0:
+                result = np.zeros(self.grid.shape)
+            else:
+                full = np.fft.irfft2(spectrum * self._kernel(bands), s=self._fft_shape)
+                # FFT の丸め誤差で件数が負にならないよう丸める
+                result = np.maximum(np.round(self.grid.crop(full[:self.grid.padded_shape[0], :self.grid.padded_shape[1]]), 6), 0)
+            self._convolved[key] = result
+        return self._convolved[key]
+
+    def _counts(self, category: str) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """タイプごとの (検索件数（上限で頭打ち）, 間引き率)"""
+        result = {}
+        for place_type in CATEGORY_SEARCHES[category]:
+            within = self.convolve(place_type, ((_radius(place_type, category), 1.0),))
+            capped = np.minimum(within, POI_STORE_MAX_RESULTS)
+            result[place_type] = (capped, np.where(within > 0, capped / np.maximum(within, 1), 0.0))
+        return result
+
+    def _banded_sum(self, category: str, counts, bands: Bands, weight: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """施設ごとの距離帯の配点の合計（検索半径で打ち切り、間引き率を反映）"""
+        total = np.zeros(self.grid.shape)
+        for place_type, (_, scale) in counts.items():
+            extra = (weight or {}).get(place_type, 0.0)
+            type_bands = tuple((outer, points + extra) for outer, points in bands)
+            total += self.convolve(place_type, _clip_bands(type_bands, _radius(place_type, category))) * scale
+        return total
+
+    def _nearest_points(self, category: str, bands: Bands, fallback: float,
+                        place_types: Optional[Iterable[str]] = None) -> np.ndarray:
+        """最寄り施設の距離帯の配点（検索範囲に施設がなければ0）"""
+        place_types = list(place_types or CATEGORY_SEARCHES[category])
+        result = np.zeros(self.grid.shape)
+        found = np.zeros(self.grid.shape, dtype=bool)
+        for outer, points in bands:
+            present = sum(
+                self.convolve(t, ((min(outer, _radius(t, category)), 1.0),)) for t in place_types
+            ) > 0.5
+            result[present & ~found] = points
+            found |= present
+        anywhere = sum(self.convolve(t, ((_radius(t, category), 1.0),)) for t in place_types) > 0.5
+        result[anywhere & ~found] = fallback
+        return result
+
+    def _ratings(self, category: str, counts, high_rated: bool = False):
+        """(平均評価, 評価のある施設数[, 評価4以上の施設数])"""
+        rating_sum = np.zeros(self.grid.shape)
+        rated = np.zeros(self.grid.shape)
+        high = np.zeros(self.grid.shape)
+        for place_type, (_, scale) in counts.items():
+            disk = ((_radius(place_type, category), 1.0),)
+            rating_sum += self.convolve(place_type, disk, "rating_sum") * scale
+            rated += self.convolve(place_type, disk, "rated") * scale
+            if high_rated:
+                high += self.convolve(place_type, disk, "high_rated") * scale
+        average = np.divide(rating_sum, rated, out=np.zeros(self.grid.shape), where=rated > 0.5)
+        return (average, rated, high) if high_rated else (average, rated)
+
+    # ---- カテゴリ別スコア（calculate_* と同じ配点） ----
+
+    def education(self) -> np.ndarray:
+        counts = self._counts("education")
+        total = sum(c for c, _ in counts.values())
+        base_score = np.minimum(40, total * 4.0)
+        proximity_score = np.minimum(30, self._banded_sum(
+            "education", counts, ((300, 8), (600, 5), (1000, 3), (1500, 1))
+        ))
+        average, rated = self._ratings("education", counts)
+        quality_score = np.where(rated > 0.5, np.minimum(30, average * 6), 0)
+        return base_score + proximity_score + quality_score
+
+    def medical(self) -> np.ndarray:
+        counts = self._counts("medical")
+        total = sum(c for c, _ in counts.values())
+        base_score = np.minimum(35, total * 3.5)
+        type_bonus = np.minimum(25, (
+            counts["hospital"][0] * 8 + counts["pharmacy"][0] * 4
+            + (counts["doctor"][0] + counts["dentist"][0]) * 3
+        ))
+        proximity_score = self._nearest_points(
+            "medical", ((500, 25), (1000, 20), (1500, 15), (2000, 10)), fallback=5
+        )
+        average, rated = self._ratings("medical", counts)
+        quality_score = np.where(rated > 0.5, np.minimum(15, average * 3), 0)
+        return base_score + type_bonus + proximity_score + quality_score
+
+    def transport(self) -> np.ndarray:
+        if self.station_index is not None:
+            return self.station_access()
+        counts = self._counts("transport")
+        train, subway, bus = (counts[t][0] for t in ("train_station", "subway_station", "bus_station"))
+        base_score = np.minimum(30, (train + subway + bus) * 3.0)
+        type_bonus = np.minimum(35, train * 12 + subway * 10 + bus * 4)
+        proximity_score = self._nearest_points(
+            "transport", ((300, 25), (600, 20), (1000, 15), (1500, 10)), fallback=5
+        )
+        has_train, has_subway = train > 0.5, subway > 0.5
+        diversity_bonus = np.where(has_train & has_subway, 10, np.where(has_train | has_subway, 5, 0))
+        return base_score + type_bonus + proximity_score + diversity_bonus
+
+    def station_access(self) -> np.ndarray:
+        """駅索引による交通スコア（calculate_station_access_score と同じ配点）
+
+        駅は疎なので、駅ごとに周辺セルへ距離・重要度・路線を書き込む（畳み込みではなく直接）。
+        """
+        grid = self.grid
+        south, west, north, east = grid.padded_bounds()
+        index = self.station_index
+        distances = grid.offsets_m(RAIL_SEARCH_RADIUS_M)
+        k = distances.shape[0] // 2
+        decay = np.where(distances <= 300, 1.0, np.maximum(0.2, 1 - (distances - 300) / 1500))
+        within_search = distances <= RAIL_SEARCH_RADIUS_M
+        walkable = distances <= 1000
+
+        nearest = np.full(grid.padded_shape, np.inf)
+        importance = np.zeros(grid.padded_shape)
+        line_presence: Dict[str, np.ndarray] = {}
+        stations = index.in_bbox(south, west, north, east, "rail")
+        rows, cols, _ = grid.cells_of(index.lats[stations], index.lngs[stations])
+        for station, row, col in zip(stations.tolist(), rows.tolist(), cols.tolist()):
+            # 拡張グリッドの端で窓を切り詰める
+            r0, r1 = max(row - k, 0), min(row + k + 1, grid.padded_shape[0])
+            c0, c1 = max(col - k, 0), min(col + k + 1, grid.padded_shape[1])
+            window = (slice(r0, r1), slice(c0, c1))
+            kernel = (slice(r0 - row + k, r1 - row + k), slice(c0 - col + k, c1 - col + k))
+            np.minimum(nearest[window], np.where(within_search[kernel], distances[kernel], np.inf), out=nearest[window])
+            np.maximum(importance[window], np.where(within_search[kernel], decay[kernel] * index.importance[station] * 25, 0),
+                       out=importance[window])
+            for line in filter(None, index.lines[station].split("|")):
+                if line not in line_presence:
+                    line_presence[line] = np.zeros(grid.padded_shape, dtype=bool)
+                line_presence[line][window] |= walkable[kernel]
+
+        nearest, importance = grid.crop(nearest), grid.crop(importance)
+        walkable_lines = sum((grid.crop(p) for p in line_presence.values()), np.zeros(grid.shape))
+        proximity_score = _band_points(nearest, ((300, 30), (600, 25), (1000, 18), (1500, 10)), fallback=5)
+        proximity_score[~np.isfinite(nearest)] = 0
+        line_score = np.minimum(35, walkable_lines * 5)
+
+        bus_stops = index.in_bbox(south, west, north, east, "bus")
+        self.facilities["bus_stop"] = (index.lats[bus_stops], index.lngs[bus_stops], np.zeros(len(bus_stops)))
+        bus_score = np.minimum(10, self.convolve("bus_stop", ((500, 1.0),)) * 2.5)
+        return proximity_score + line_score + importance + bus_score
+
+    def shopping(self) -> np.ndarray:
+        counts = self._counts("shopping")
+        total = sum(c for c, _ in counts.values())
+        base_score = np.minimum(40, total * 3.0)
+        type_bonus = np.minimum(30, (
+            counts["supermarket"][0] * 10 + counts["convenience_store"][0] * 5
+            + (counts["shopping_mall"][0] + counts["department_store"][0]) * 8
+        ))
+        proximity_score = np.minimum(20, self._banded_sum("shopping", counts, ((200, 5), (500, 3), (1000, 1))))
+        average, rated = self._ratings("shopping", counts)
+        quality_score = np.where(rated > 0.5, np.minimum(10, average * 2), 0)
+        return base_score + type_bonus + proximity_score + quality_score
+
+    def dining(self) -> np.ndarray:
+        counts = self._counts("dining")
+        total = sum(c for c, _ in counts.values())
+        base_score = np.minimum(35, total * 2.5)
+        restaurant, cafe, bar = (counts[t][0] for t in ("restaurant", "cafe", "bar"))
+        type_bonus = np.minimum(25, restaurant * 6 + cafe * 4 + bar * 3)
+        diversity_bonus = np.minimum(15, ((restaurant > 0.5) * 1 + (cafe > 0.5) * 1 + (bar > 0.5) * 1) * 5)
+        average, rated, high_rated = self._ratings("dining", counts, high_rated=True)
+        quality_score = np.where(rated > 0.5, np.minimum(25, average * 4 + high_rated * 2), 0)
+        return base_score + type_bonus + diversity_bonus + quality_score
+
+    def safety(self) -> np.ndarray:
+        counts = self._counts("safety")
+        total = sum(c for c, _ in counts.values())
+        base_score = np.minimum(40, total * 4)
+        # 緊急時対応: 距離点（500m:10 / 1km:8 / 2km:6）+ 優先度点（6 - 優先度）
+        response = self._banded_sum(
+            "safety", counts, ((500, 10), (1000, 8), (2000, 6)),
+            weight={t: 6 - p for t, p in RESPONSE_PRIORITY.items()}
+        )
+        response_score = np.minimum(30, response * 0.3)
+        # 近接性: within_500m ×10 + within_1km ×6 + within_2km ×3（累積）
+        proximity_score = np.minimum(30, self._banded_sum("safety", counts, ((500, 19), (1000, 9), (2000, 3))))
+        facilities_score = base_score + response_score + proximity_score
+        return facilities_score + self._crime_bonus() - self._disaster_penalty()
+
+    def _disaster_penalty(self) -> np.ndarray:
+        """災害リスクによる減点（get_disaster_risk_data と同じ既定値）"""
+        flood = np.full(self.grid.shape, 0.2)
+        earthquake = np.full(self.grid.shape, 0.3)
+        landslide = np.zeros(self.grid.shape)
+        if self.hazard_raster is not None:
+            risks = self.hazard_raster.risk_arrays(*self.grid.cell_centers())
+            depth_layers = [risks[layer] for layer in ("flood_depth", "tsunami_depth") if layer in risks]
+            if depth_layers:
+                flood = np.maximum.reduce(depth_layers)
+            earthquake = risks.get("liquefaction", earthquake)
+            landslide = risks.get("landslide", landslide)
+        return np.minimum(50, (flood + earthquake + landslide) * 25)
+
+    def _crime_bonus(self) -> np.ndarray:
+        if self.crime_bonus_at is None:
+            return np.full(self.grid.shape, crime_bonus(80))
+        return self.crime_bonus_at(self.grid)
+
+    def environment(self) -> np.ndarray:
+        counts = self._counts("environment")
+        total = sum(c for c, _ in counts.values())
+        base_score = np.minimum(50, total * 1.8)
+        category_count = sum((c > 0.5).astype(np.int64) for c, _ in counts.values())
+        diversity_bonus = np.select([category_count >= 3, category_count >= 2, category_count >= 1], [15, 10, 5], 0)
+        proximity_score = np.minimum(25, self._banded_sum("environment", counts, ((200, 8), (500, 5), (1000, 2))))
+        # 文化・環境価値は観光地・寺社の件数で近似
+        value_score = np.minimum(15, (counts["tourist_attraction"][0] + counts["place_of_worship"][0]) * 2)
+        temple_shrine_bonus = np.minimum(10, counts["place_of_worship"][0] * 3)
+        return base_score + diversity_bonus + proximity_score + value_score + temple_shrine_bonus
+
+    def cultural(self) -> np.ndarray:
+        counts = self._counts("cultural")
+        total = sum(c for c, _ in counts.values())
+        base_score = np.minimum(40, total * 2.0)
+        category_count = sum((c > 0.5).astype(np.int64) for c, _ in counts.values())
+        diversity_bonus = np.minimum(20, category_count * 3)
+        # within_500m ×5 + within_1km ×3 + within_2km ×2 + within_5km ×1（累積）
+        proximity_score = np.minimum(25, self._banded_sum(
+            "cultural", counts, ((500, 11), (1000, 6), (2000, 3), (5000, 1))
+        ))
+        average, rated = self._ratings("cultural", counts)
+        quality_bonus = np.where(rated > 0.5, np.select([average >= 4.5, average >= 4.0, average >= 3.5], [15, 10, 5], 0), 0)
+        return base_score + diversity_bonus + proximity_score + quality_bonus
+
+    def score(self, categories: Iterable[str] = SCORE_CATEGORIES) -> Dict[str, np.ndarray]:
+        """カテゴリ → スコア配列（rows × cols、10〜100点）"""
+        return {
+            category: np.clip(getattr(self, category)(), 10, 100).astype(np.float32)
+            for category in categories
+        }
+
+def crime_bonus_grid(grid: ScoringGrid, step_m: float = CRIME_SAMPLE_STEP_M) -> np.ndarray:
+    """犯罪統計による調整を代表点で引き、周囲のセルに広げる（統計がなければ既定値）"""
+    default = crime_bonus(80)
+    crime_stats = get_crime_stats()
+    if crime_stats is None:
+        return np.full(grid.shape, default)
+
+    step = max(1, round(step_m / grid.resolution_m))
+    lats, lngs = grid.cell_centers()
+    # step 四方のブロックごとに中央のセルを代表点にする
+    rows = np.minimum(np.arange(0, grid.rows, step) + step // 2, grid.rows - 1)
+    cols = np.minimum(np.arange(0, grid.cols, step) + step // 2, grid.cols - 1)
+    sample_lats, sample_lngs = lats[np.ix_(rows, cols)], lngs[np.ix_(rows, cols)]
+    bonus = np.full(sample_lats.shape, default, dtype=np.float64)
+    for (i, j), lat in np.ndenumerate(sample_lats):
+        area = reverse_geocode_offline(float(lat), float(sample_lngs[i, j]))
+        record = crime_stats.lookup_area(area) if area else None
+        if record is not None and record["percentile"] is not None:
+            bonus[i, j] = crime_bonus(100 - record["percentile"])
+    return np.repeat(np.repeat(bonus, step, axis=0), step, axis=1)[:grid.rows, :grid.cols]
+
+def heatmap_layers(scorer: GridScorer, layers: Iterable[str]) -> Dict[str, np.ndarray]:
+    """要求されたレイヤー（カテゴリ名または total = 8項目平均）の配列"""
+    layers = list(layers)
+    categories = SCORE_CATEGORIES if "total" in layers else [c for c in layers if c in SCORE_CATEGORIES]
+    scores = scorer.score(categories)
+    if "total" in layers:
+        scores["total"] = np.mean(np.stack([scores[c] for c in SCORE_CATEGORIES]), axis=0).astype(np.float32)
+    return {layer: scores[layer] for layer in layers}
+
+def layer_stats(values: np.ndarray) -> Dict[str, float]:
+    return {
+        "min": round(float(values.min()), 1),
+        "mean": round(float(values.mean()), 1),
+        "max": round(float(values.max()), 1),
+    }
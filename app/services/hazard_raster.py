@@ -0,0 +1,264 @@
+"""
+ハザードラスター（洪水浸水深・土砂災害警戒区域・津波浸水深・液状化）
+メモリマップしたタイル配列から地点周辺の危険度クラスを読み取る
+
+各レイヤーは日本全域を覆う等緯度経度グリッドを TILE_SIZE 四方のタイルに分け、
+データのあるタイルだけを (タイル数, TILE_SIZE, TILE_SIZE) の uint8 配列に格納します。
+タイル索引（タイル行・列 → 格納位置、なければ-1）を引くだけなので、1地点の参照は定数時間です。
+"""
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.utils.atomic_dir import swap_directory
+
+logger = logging.getLogger(__name__)
+
+HAZARD_RASTER_PATH = os.getenv("HAZARD_RASTER_PATH", "data/hazard_raster")
+# 地点の周辺として最大値を取る範囲（メートル）
+HAZARD_SAMPLE_RADIUS_M = float(os.getenv("HAZARD_SAMPLE_RADIUS_M", 100))
+
+# グリッドの原点と範囲（日本全域）
+GRID_LAT0, GRID_LAT1 = 20.0, 46.0
+GRID_LNG0, GRID_LNG1 = 122.0, 154.0
+TILE_SIZE = 256
+# 既定のセルの大きさ（3秒 ≒ 緯度方向90m）
+DEFAULT_CELL_DEG = 3 / 3600
+
+# 浸水深ランク（国土交通省の浸水深区分）
+DEPTH_RANK_EDGES_M = [0.5, 3.0, 5.0, 10.0, 20.0]
+DEPTH_CLASSES = ["なし", "0.5m未満", "0.5〜3m", "3〜5m", "5〜10m", "10〜20m", "20m以上"]
+
+HAZARD_LAYERS = {
+    "flood_depth": {"label": "洪水浸水想定", "classes": DEPTH_CLASSES},
+    "tsunami_depth": {"label": "津波浸水想定", "classes": DEPTH_CLASSES},
+    "landslide": {"label": "土砂災害警戒区域", "classes": ["なし", "警戒区域", "特別警戒区域"]},
+    "liquefaction": {"label": "液状化危険度", "classes": ["なし", "低い", "やや高い", "高い", "非常に高い"]},
+}
+
+def depth_to_rank(depth_m: float) -> int:
+    """浸水深（m）→ 浸水深ランク（0: なし）"""
+    if depth_m is None or depth_m <= 0:
+        return 0
+    return 1 + int(np.searchsorted(DEPTH_RANK_EDGES_M, depth_m, side="right"))
+
+class TiledRasterBuilder:
+    """疎なタイルにクラス値を書き込むラスター（取り込みジョブ用、重なりは最大値）"""
+
+    def __init__(self, cell_deg: float = DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.rows = int(np.ceil((GRID_LAT1 - GRID_LAT0) / cell_deg))
+        self.cols = int(np.ceil((GRID_LNG1 - GRID_LNG0) / cell_deg))
+        self.tiles: Dict[tuple, np.ndarray] = {}
+
+    def cell_of(self, lat: float, lng: float):
+        return int((lat - GRID_LAT0) / self.cell_deg), int((lng - GRID_LNG0) / self.cell_deg)
+
+    def _tile(self, tile_row: int, tile_col: int) -> np.ndarray:
+        key = (tile_row, tile_col)
+        if key not in self.tiles:
+            self.tiles[key] = np.zeros((TILE_SIZE, TILE_SIZE), dtype=np.uint8)
+        return self.tiles[key]
+
+    def set_cell(self, row: int, col: int, value: int):
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            tile = self._tile(row // TILE_SIZE, col // TILE_SIZE)
+            r, c = row % TILE_SIZE, col % TILE_SIZE
+            tile[r, c] = max(tile[r, c], value)
+
+    def fill_span(self, row: int, col0: int, col1: int, value: int):
+        """行 row の列 [col0, col1) を塗る（タイル境界で分割）"""
+        if not 0 <= row < self.rows:
+            return
+        col0, col1 = max(col0, 0), min(col1, self.cols)
+        r = row % TILE_SIZE
+        while col0 < col1:
+            tile_col = col0 // TILE_SIZE
+            end = min(col1, (tile_col + 1) * TILE_SIZE)
+            segment = self._tile(row // TILE_SIZE, tile_col)[r, col0 % TILE_SIZE:(end - 1) % TILE_SIZE + 1]
+            np.maximum(segment, value, out=segment)
+            col0 = end
+
+    def fill_polygon(self, rings, value: int):
+        """ポリゴン（外周・穴のリング列、[lng, lat]）をセル中心の even-odd 判定で塗る"""
+        edges = []
+        for ring in rings:
+            ring = np.asarray(ring, dtype=np.float64)[:, :2]
+            if len(ring) < 3:
+                continue
+            edges.append(np.column_stack([ring, np.roll(ring, -1, axis=0)]))
+        if not edges:
+            return
+        edges = np.concatenate(edges)  # [x1, y1, x2, y2]
+        x1, y1, x2, y2 = edges.T
+        row0 = max(int(np.floor((y1.min() - GRID_LAT0) / self.cell_deg)), 0)
+        row1 = min(int(np.ceil((y1.max() - GRID_LAT0) / self.cell_deg)), self.rows)
+        for row in range(row0, row1):
+            y = GRID_LAT0 + (row + 0.5) * self.cell_deg
+            straddles = (y1 > y) != (y2 > y)
+            if not straddles.any():
+                continue
+            xs = np.sort(x1[straddles] + (y - y1[straddles]) * (x2[straddles] - x1[straddles]) / (y2[straddles] - y1[straddles]))
+            # セル中心が [x_in, x_out) に入る列
+            cols = np.ceil((xs - GRID_LNG0) / self.cell_deg - 0.5).astype(np.int64)
+            for col0, col1 in zip(cols[0::2], cols[1::2]):
+                if col1 > col0:
+                    self.fill_span(row, int(col0), int(col1), value)
+
+    def save(self, path: Path, layer: str):
+        """レイヤーをディレクトリに保存（一時ディレクトリに書いてから置き換え）"""
+        tile_rows = -(-self.rows // TILE_SIZE)
+        tile_cols = -(-self.cols // TILE_SIZE)
+        tile_index = np.full((tile_rows, tile_cols), -1, dtype=np.int32)
+        keys = sorted(key for key, tile in self.tiles.items() if tile.any())
+        tiles = np.zeros((len(keys), TILE_SIZE, TILE_SIZE), dtype=np.uint8)
+        for slot, key in enumerate(keys):
+            tile_index[key] = slot
+            tiles[slot] = self.tiles[key]
+
+        target = Path(path) / layer
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{layer}_", dir=target.parent))
+        np.save(tmp_dir / "tile_index.npy", tile_index)
+        np.save(tmp_dir / "tiles.npy", tiles)
+        with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"layer": layer, "cell_deg": self.cell_deg, "tile_size": TILE_SIZE,
+                       "lat0": GRID_LAT0, "lng0": GRID_LNG0, "tiles": len(keys)}, f, ensure_ascii=False)
+
+        swap_directory(tmp_dir, target)
+        return len(keys)
+
+class HazardLayer:
+    """メモリマップした1レイヤー"""
+
+    def __init__(self, path: Path):
+        with open(path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.cell_deg = self.meta["cell_deg"]
+        self.tile_size = self.meta["tile_size"]
+        self.lat0, self.lng0 = self.meta["lat0"], self.meta["lng0"]
+        self.tile_index = np.load(path / "tile_index.npy")
+        self.tiles = np.load(path / "tiles.npy", mmap_mode="r").view(np.ndarray)
+
+    def sample(self, lat: float, lng: float, radius_m: float = 0.0):
+        """(地点のクラス, 周辺 radius_m 以内の最大クラス)"""
+        row = int((lat - self.lat0) / self.cell_deg)
+        col = int((lng - self.lng0) / self.cell_deg)
+        reach_rows = int(radius_m / (self.cell_deg * 111320))
+        reach_cols = int(radius_m / (self.cell_deg * 111320 * max(np.cos(np.radians(lat)), 0.1)))
+        ts = self.tile_size
+        row0, row1, col0, col1 = row - reach_rows, row + reach_rows, col - reach_cols, col + reach_cols
+        if row0 >= 0 and col0 >= 0 and row0 // ts == row1 // ts and col0 // ts == col1 // ts:
+            # 窓が1タイルに収まる場合（大半）はスライス1回
+            tile_row, tile_col = row0 // ts, col0 // ts
+            if tile_row >= self.tile_index.shape[0] or tile_col >= self.tile_index.shape[1]:
+                return 0, 0
+            slot = self.tile_index[tile_row, tile_col]
+            if slot < 0:
+                return 0, 0
+            window = self.tiles[slot, row0 % ts:row1 % ts + 1, col0 % ts:col1 % ts + 1]
+            return int(window[reach_rows, reach_cols]), int(window.max())
+
+        rows = np.arange(row0, row1 + 1)[:, None]
+        cols = np.arange(col0, col1 + 1)[None, :]
+        rows, cols = np.broadcast_arrays(rows, cols)
+        tile_rows, tile_cols = rows // ts, cols // ts
+        inside = (
+            (rows >= 0) & (cols >= 0)
+            & (tile_rows < self.tile_index.shape[0]) & (tile_cols < self.tile_index.shape[1])
+        )
+        slots = np.full(rows.shape, -1, dtype=np.int32)
+        slots[inside] = self.tile_index[tile_rows[inside], tile_cols[inside]]
+        values = np.zeros(rows.shape, dtype=np.uint8)
+        present = slots >= 0
+        values[present] = self.tiles[slots[present], rows[present] % ts, cols[present] % ts]
+        return int(values[reach_rows, reach_cols]), int(values.max())
+
+    def sample_many(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """複数地点のクラス（データのない地点は0）"""
+        rows = np.floor((np.asarray(lats) - self.lat0) / self.cell_deg).astype(np.int64)
+        cols = np.floor((np.asarray(lngs) - self.lng0) / self.cell_deg).astype(np.int64)
+        ts = self.tile_size
+        tile_rows, tile_cols = rows // ts, cols // ts
+        inside = (
+            (rows >= 0) & (cols >= 0)
+            & (tile_rows < self.tile_index.shape[0]) & (tile_cols < self.tile_index.shape[1])
+        )
+        slots = np.full(rows.shape, -1, dtype=np.int32)
+        slots[inside] = self.tile_index[tile_rows[inside], tile_cols[inside]]
+        values = np.zeros(rows.shape, dtype=np.uint8)
+        present = slots >= 0
+        values[present] = self.tiles[slots[present], rows[present] % ts, cols[present] % ts]
+        return values
+
+class HazardRaster:
+    """ハザードレイヤー群（存在するレイヤーのみ）"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.layers: Dict[str, HazardLayer] = {}
+        for layer in HAZARD_LAYERS:
+            layer_path = self.path / layer
+            if (layer_path / "meta.json").exists():
+                self.layers[layer] = HazardLayer(layer_path)
+
+    def sample(self, lat: float, lng: float, radius_m: float = HAZARD_SAMPLE_RADIUS_M) -> Dict[str, Dict]:
+        """各レイヤーの {"class", "label", "nearby_max_class", "nearby_max_label"}"""
+        result = {}
+        for name, layer in self.layers.items():
+            value, nearby_max = layer.sample(lat, lng, radius_m)
+            classes = HAZARD_LAYERS[name]["classes"]
+            result[name] = {
+                "class": value,
+                "label": classes[min(value, len(classes) - 1)],
+                "nearby_max_class": nearby_max,
+                "nearby_max_label": classes[min(nearby_max, len(classes) - 1)],
+            }
+        return result
+
+    def risk_arrays(self, lats: np.ndarray, lngs: np.ndarray,
+                    radius_m: float = HAZARD_SAMPLE_RADIUS_M) -> Dict[str, np.ndarray]:
+        """複数地点の各レイヤーの危険度（hazard_risk と同じ合成。周辺は上下左右 radius_m の4点で近似）"""
+        lats, lngs = np.asarray(lats, dtype=np.float64), np.asarray(lngs, dtype=np.float64)
+        dlat = radius_m / 111320
+        dlng = radius_m / (111320 * np.maximum(np.cos(np.radians(lats)), 0.1))
+        result = {}
+        for name, layer in self.layers.items():
+            value = layer.sample_many(lats, lngs)
+            nearby_max = value.copy()
+            for oy, ox in ((dlat, 0), (-dlat, 0), (0, dlng), (0, -dlng)):
+                np.maximum(nearby_max, layer.sample_many(lats + oy, lngs + ox), out=nearby_max)
+            top_class = len(HAZARD_LAYERS[name]["classes"]) - 1
+            result[name] = np.minimum(1.0, (value * 0.8 + nearby_max * 0.2) / top_class)
+        return result
+
+def hazard_risk(samples: Dict[str, Dict], layer: str) -> Optional[float]:
+    """レイヤーの危険度（0〜1）。地点の値を主、周辺の最大値を従として合成（レイヤーがなければNone）"""
+    if layer not in samples:
+        return None
+    top_class = len(HAZARD_LAYERS[layer]["classes"]) - 1
+    sample = samples[layer]
+    return round(min(1.0, (sample["class"] * 0.8 + sample["nearby_max_class"] * 0.2) / top_class), 3)
+
+_hazard_raster: Optional[HazardRaster] = None
+_hazard_raster_loaded = False
+
+def get_hazard_raster() -> Optional[HazardRaster]:
+    """ハザードラスターを取得（初回のみマップ、レイヤーが1つもなければNone）"""
+    global _hazard_raster, _hazard_raster_loaded
+    if not _hazard_raster_loaded:
+        _hazard_raster_loaded = True
+        if Path(HAZARD_RASTER_PATH).exists():
+            try:
+                raster = HazardRaster(HAZARD_RASTER_PATH)
+                if raster.layers:
+                    _hazard_raster = raster
+                    logger.info(f"🌊 ハザードラスターをマップ: {HAZARD_RASTER_PATH} ({', '.join(raster.layers)})")
+            except Exception as e:
+                logger.warning(f"⚠️ ハザードラスターの読み込み失敗: {e}")
+    return _hazard_raster
@@ -0,0 +1,163 @@
+"""
+地域メッシュ人口（e-Stat 国勢調査 地域メッシュ統計）
+メッシュコード順に並べた列ごとの配列から、地点周辺の人口・世帯・年齢構成を集計する
+
+ストアはメッシュコード（codes.npy、昇順）と統計項目ごとの .npy（float32、秘匿・欠測は NaN）を
+メモリマップしたディレクトリです。周辺メッシュのコードをまとめて求め、searchsorted で
+行を引いて列ごとに合計するだけなので、e-Stat へのアクセスは取り込み時のみです。
+"""
+import json
+import logging
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.utils.atomic_dir import swap_directory
+from app.utils.jis_mesh import mesh_area_km2, mesh_code, meshes_within
+
+logger = logging.getLogger(__name__)
+
+MESH_POPULATION_PATH = os.getenv("MESH_POPULATION_PATH", "data/mesh_population")
+# 周辺人口を集計する既定の半径（メートル）
+DEMOGRAPHICS_RADIUS_M = float(os.getenv("DEMOGRAPHICS_RADIUS_M", 1000))
+
+# 統計項目（列名 → 表示名）
+POPULATION_COLUMNS = {
+    "population": "人口総数",
+    "male": "男性人口",
+    "female": "女性人口",
+    "age_0_14": "0〜14歳人口",
+    "age_15_64": "15〜64歳人口",
+    "age_65_over": "65歳以上人口",
+    "age_75_over": "75歳以上人口",
+    "households": "世帯総数",
+}
+# 人口密度の目安（人/km²）
+DENSITY_EDGES = [1000, 4000, 10000]
+DENSITY_LABELS = ["低密度", "郊外住宅地", "市街地", "高密度市街地"]
+
+def density_label(density: float) -> str:
+    return DENSITY_LABELS[int(np.searchsorted(DENSITY_EDGES, density, side="right"))]
+
+def write_mesh_population(codes: np.ndarray, columns: Dict[str, np.ndarray], level: int,
+                          path: str, meta: Optional[Dict] = None) -> Dict:
+    """メッシュ人口ストアを保存（一時ディレクトリに書いてから置き換え）"""
+    codes = np.asarray(codes, dtype=np.int64)
+    order = np.argsort(codes, kind="stable")
+    meta = {**(meta or {}), "level": level, "meshes": int(len(codes)), "columns": list(columns)}
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".mesh_population_", dir=target.parent))
+    np.save(tmp_dir / "codes.npy", codes[order])
+    for column, values in columns.items():
+        np.save(tmp_dir / f"{column}.npy", np.asarray(values, dtype=np.float32)[order])
+    with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    swap_directory(tmp_dir, target)
+    return meta
+
+class MeshPopulationStore:
+    """メモリマップしたメッシュ人口の列ストア（読み取り専用）"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.level = self.meta["level"]
+        self.codes = np.load(self.path / "codes.npy", mmap_mode="r").view(np.ndarray)
+        self.columns: Dict[str, np.ndarray] = {
+            column: np.load(self.path / f"{column}.npy", mmap_mode="r").view(np.ndarray)
+            for column in self.meta["columns"]
+        }
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def rows_of(self, codes: np.ndarray) -> np.ndarray:
+        """メッシュコード → 行番号（データのないメッシュは-1）"""
+        if len(self.codes) == 0:
+            return np.full(len(codes), -1, dtype=np.int64)
+        rows = np.searchsorted(self.codes, codes)
+        rows = np.minimum(rows, len(self.codes) - 1)
+        return np.where(self.codes[rows] == codes, rows, -1)
+
+    def values(self, codes: np.ndarray) -> Dict[str, np.ndarray]:
+        """メッシュごとの統計値（データのないメッシュは0、秘匿はNaN）"""
+        rows = self.rows_of(np.asarray(codes, dtype=np.int64))
+        present = rows >= 0
+        result = {}
+        for column, values in self.columns.items():
+            column_values = np.zeros(len(rows), dtype=np.float32)
+            column_values[present] = values[rows[present]]
+            result[column] = column_values
+        return result
+
+    def demographics(self, lat: float, lng: float, radius_m: float = DEMOGRAPHICS_RADIUS_M) -> Dict:
+        """中心が半径内にあるメッシュを合計した人口・世帯・年齢構成"""
+        codes, _ = meshes_within(lat, lng, radius_m, self.level)
+        values = self.values(codes)
+        totals = {column: float(np.nansum(v)) for column, v in values.items()}
+        population = totals.get("population", 0.0)
+        area_km2 = len(codes) * mesh_area_km2(self.level, lat)
+        density = population / area_km2 if area_km2 else 0.0
+
+        def share(column: str) -> Optional[float]:
+            # 秘匿メッシュを分母から除いた構成比（%）
+            if column not in values or "population" not in values:
+                return None
+            known = np.isfinite(values[column]) & np.isfinite(values["population"])
+            base = float(values["population"][known].sum())
+            return round(float(values[column][known].sum()) / base * 100, 1) if base > 0 else None
+
+        households = totals.get("households")
+        home_code = mesh_code(lat, lng, self.level)
+        home_population = self.values(np.array([int(home_code)])).get("population")
+        return {
+            "population": round(population),
+            "male": round(totals["male"]) if "male" in totals else None,
+            "female": round(totals["female"]) if "female" in totals else None,
+            "households": round(households) if households is not None else None,
+            "average_household_size": round(population / households, 2) if households else None,
+            "density_per_km2": round(density),
+            "density_label": density_label(density),
+            "age_distribution": {
+                "under15": share("age_0_14"),
+                "age15to64": share("age_15_64"),
+                "over65": share("age_65_over"),
+                "over75": share("age_75_over"),
+            },
+            "home_mesh": {
+                "code": home_code,
+                "population": (
+                    round(float(home_population[0]))
+                    if home_population is not None and not math.isnan(home_population[0]) else None
+                ),
+            },
+            "mesh_level": self.level,
+            "mesh_count": int(len(codes)),
+            "radius": radius_m,
+            "survey": self.meta.get("survey"),
+            "source": "estat_mesh",
+        }
+
+_mesh_population: Optional[MeshPopulationStore] = None
+_mesh_population_loaded = False
+
+def get_mesh_population() -> Optional[MeshPopulationStore]:
+    """メッシュ人口ストアを取得（初回のみマップ、ディレクトリがなければNone）"""
+    global _mesh_population, _mesh_population_loaded
+    if not _mesh_population_loaded:
+        _mesh_population_loaded = True
+        if (Path(MESH_POPULATION_PATH) / "meta.json").exists():
+            try:
+                _mesh_population = MeshPopulationStore(MESH_POPULATION_PATH)
+                logger.info(f"👥 メッシュ人口をマップ: {MESH_POPULATION_PATH} ({len(_mesh_population)}メッシュ)")
+            except Exception as e:
+                logger.warning(f"⚠️ メッシュ人口の読み込み失敗: {e}")
+    return _mesh_population
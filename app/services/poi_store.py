@@ -0,0 +1,280 @@
+"""
+ローカルPOIストア
+メモリマップした列指向ファイル＋(タイプ, グリッドセル)索引による施設検索バックエンド
+
+ストアはディレクトリ単位で、各列を .npy として保存します。
+np.load(mmap_mode="r") で開くため、複数の uvicorn ワーカーが
+同じファイルをページキャッシュ経由で共有できます。
+"""
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.utils.atomic_dir import swap_directory
+
+logger = logging.getLogger(__name__)
+
+POI_STORE_PATH = os.getenv("POI_STORE_PATH", "data/poi_store")
+# Places Nearby Search の1ページ分に合わせた返却上限
+POI_STORE_MAX_RESULTS = int(os.getenv("POI_STORE_MAX_RESULTS", 20))
+
+# バックエンド選択: live（Google Places）/ local（ローカルストアのみ）/ local_first（ローカル優先、0件ならlive）
+PLACES_BACKEND_MODES = ("live", "local", "local_first")
+DEFAULT_PLACES_BACKEND = os.getenv("PLACES_BACKEND", "live")
+
+# グリッドセルの大きさ（度）。緯度方向で約1.1km
+CELL_DEG = 0.01
+_LAT_BITS = 16
+_LNG_BITS = 16
+EARTH_RADIUS_M = 6371000
+
+def get_places_backend_mode(collector: Optional[str] = None) -> str:
+    """収集関数ごとのバックエンド（PLACES_BACKEND_<COLLECTOR> で上書き可能）"""
+    mode = DEFAULT_PLACES_BACKEND
+    if collector:
+        mode = os.getenv(f"PLACES_BACKEND_{collector.upper()}", mode)
+    if mode not in PLACES_BACKEND_MODES:
+        logger.warning(f"⚠️ 不明なPlacesバックエンド '{mode}' → live を使用")
+        return "live"
+    return mode
+
+def _cell_indices(lat, lng):
+    """緯度経度 → (緯度セル, 経度セル)"""
+    lat_idx = np.floor((np.asarray(lat) + 90.0) / CELL_DEG).astype(np.int64)
+    lng_idx = np.floor((np.asarray(lng) + 180.0) / CELL_DEG).astype(np.int64)
+    return lat_idx, lng_idx
+
+def _entry_key(type_id, lat_idx, lng_idx):
+    """(タイプ, 緯度セル, 経度セル) を1つのint64キーに結合（同一緯度行の経度セルは連続）"""
+    return (np.asarray(type_id, dtype=np.int64) << (_LAT_BITS + _LNG_BITS)) | (lat_idx << _LNG_BITS) | lng_idx
+
+def haversine_m(lat1: float, lng1: float, lat2: np.ndarray, lng2: np.ndarray) -> np.ndarray:
+    """1点と複数点の距離（メートル、ベクトル化）"""
+    lat1_rad = np.radians(lat1)
+    lat2_rad = np.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlng = np.radians(lng2 - lng1)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def _pack_strings(values: List[str]):
+    """文字列列を (UTF-8 blob, オフセット) に変換"""
+    encoded = [(v or "").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8) if encoded else np.zeros(0, dtype=np.uint8)
+    return blob, offsets
+
+def write_poi_store(records: Iterable[Dict], path: str = POI_STORE_PATH) -> int:
+    """POIレコード列からストアを作成（一時ディレクトリに書いてから置き換え）
+
+    レコード形式: {"lat", "lng", "name", "types": [...], "place_id", "vicinity",
+                  "rating", "user_ratings_total"}
+    """
+    lats, lngs, ratings, rating_totals = [], [], [], []
+    names, place_ids, vicinities = [], [], []
+    type_vocab: Dict[str, int] = {}
+    entry_types, entry_points = [], []
+    type_offsets = [0]
+    type_ids: List[int] = []
+
+    for record in records:
+        types = [t for t in record.get("types", []) if t]
+        if record.get("lat") is None or record.get("lng") is None or not types:
+            continue
+        point_id = len(lats)
+        lats.append(float(record["lat"]))
+        lngs.append(float(record["lng"]))
+        ratings.append(float(record.get("rating") or 0))
+        rating_totals.append(int(record.get("user_ratings_total") or 0))
+        names.append(record.get("name", ""))
+        place_ids.append(record.get("place_id") or f"local:{point_id}")
+        vicinities.append(record.get("vicinity", ""))
+        for place_type in dict.fromkeys(types):
+            type_id = type_vocab.setdefault(place_type, len(type_vocab))
+            type_ids.append(type_id)
+            entry_types.append(type_id)
+            entry_points.append(point_id)
+        type_offsets.append(len(type_ids))
+
+    lat_arr = np.asarray(lats, dtype=np.float64)
+    lng_arr = np.asarray(lngs, dtype=np.float64)
+    entry_points_arr = np.asarray(entry_points, dtype=np.int32)
+    lat_idx, lng_idx = _cell_indices(lat_arr[entry_points_arr], lng_arr[entry_points_arr])
+    entry_keys = _entry_key(np.asarray(entry_types, dtype=np.int64), lat_idx, lng_idx)
+    order = np.argsort(entry_keys, kind="stable")
+
+    columns = {
+        "lat": lat_arr,
+        "lng": lng_arr,
+        "rating": np.asarray(ratings, dtype=np.float32),
+        "user_ratings_total": np.asarray(rating_totals, dtype=np.int32),
+        "type_offsets": np.asarray(type_offsets, dtype=np.int64),
+        "type_ids": np.asarray(type_ids, dtype=np.uint16),
+        "entry_keys": entry_keys[order],
+        "entry_points": entry_points_arr[order],
+    }
+    for column, values in (("name", names), ("place_id", place_ids), ("vicinity", vicinities)):
+        columns[f"{column}_blob"], columns[f"{column}_offsets"] = _pack_strings(values)
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".poi_store_", dir=target.parent))
+    for column, values in columns.items():
+        np.save(tmp_dir / f"{column}.npy", values)
+    with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({"count": len(lats), "cell_deg": CELL_DEG,
+                   "types": sorted(type_vocab, key=type_vocab.get)}, f, ensure_ascii=False)
+
+    swap_directory(tmp_dir, target)
+
+    return len(lats)
+
+class POIStore:
+    """メモリマップしたPOIストア（読み取り専用）"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.types: List[str] = self.meta["types"]
+        self.type_index = {t: i for i, t in enumerate(self.types)}
+        self._columns: Dict[str, np.ndarray] = {}
+        for column_file in self.path.glob("*.npy"):
+            # np.memmap サブクラスはスライス毎のオーバーヘッドが大きいため素の ndarray ビューで保持
+            self._columns[column_file.stem] = np.load(column_file, mmap_mode="r").view(np.ndarray)
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    def _string(self, column: str, i: int) -> str:
+        start, end = self._columns[f"{column}_offsets"][i:i + 2].tolist()
+        return self._columns[f"{column}_blob"][start:end].tobytes().decode("utf-8")
+
+    def _types_of(self, i: int) -> List[str]:
+        start, end = self._columns["type_offsets"][i:i + 2].tolist()
+        return [self.types[t] for t in self._columns["type_ids"][start:end].tolist()]
+
+    def query_indices(self, lat: float, lng: float, place_type: str, radius: float):
+        """(タイプ, 半径) に該当する点のインデックスと距離を返す（距離昇順）"""
+        type_id = self.type_index.get(place_type)
+        if type_id is None:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+
+        dlat = radius / 111320.0
+        dlng = radius / (111320.0 * max(np.cos(np.radians(lat)), 1e-6))
+        lat_min, lng_min = _cell_indices(lat - dlat, lng - dlng)
+        lat_max, lng_max = _cell_indices(lat + dlat, lng + dlng)
+
+        entry_keys = self._columns["entry_keys"]
+        entry_points = self._columns["entry_points"]
+        chunks = []
+        # 緯度行ごとに経度セル範囲が連続するので1回の二分探索で取り出せる
+        for lat_idx in range(int(lat_min), int(lat_max) + 1):
+            lo_key = _entry_key(type_id, np.int64(lat_idx), lng_min)
+            hi_key = _entry_key(type_id, np.int64(lat_idx), lng_max + 1)
+            lo = np.searchsorted(entry_keys, lo_key, side="left")
+            hi = np.searchsorted(entry_keys, hi_key, side="left")
+            if hi > lo:
+                chunks.append(entry_points[lo:hi])
+
+        if not chunks:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+
+        candidates = np.concatenate(chunks)
+        distances = haversine_m(lat, lng, self._columns["lat"][candidates], self._columns["lng"][candidates])
+        within = distances <= radius
+        candidates, distances = candidates[within], distances[within]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    def query_bbox(self, place_type: str, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """タイプ・緯度経度範囲に該当する点のインデックス（順不同）"""
+        type_id = self.type_index.get(place_type)
+        if type_id is None:
+            return np.zeros(0, dtype=np.int32)
+
+        lat_min, lng_min = _cell_indices(south, west)
+        lat_max, lng_max = _cell_indices(north, east)
+        entry_keys = self._columns["entry_keys"]
+        entry_points = self._columns["entry_points"]
+        chunks = []
+        for lat_idx in range(int(lat_min), int(lat_max) + 1):
+            lo = np.searchsorted(entry_keys, _entry_key(type_id, np.int64(lat_idx), lng_min), side="left")
+            hi = np.searchsorted(entry_keys, _entry_key(type_id, np.int64(lat_idx), lng_max + 1), side="left")
+            if hi > lo:
+                chunks.append(entry_points[lo:hi])
+
+        if not chunks:
+            return np.zeros(0, dtype=np.int32)
+        candidates = np.concatenate(chunks)
+        lats = self._columns["lat"][candidates]
+        lngs = self._columns["lng"][candidates]
+        return candidates[(lats >= south) & (lats <= north) & (lngs >= west) & (lngs <= east)]
+
+    def to_places(self, indices: np.ndarray, distances: Optional[np.ndarray] = None) -> List[Dict]:
+        """Google Places Nearby Search の結果と同じ形の辞書に変換（数値列はまとめて取得）"""
+        lats = self._columns["lat"][indices].tolist()
+        lngs = self._columns["lng"][indices].tolist()
+        ratings = self._columns["rating"][indices].tolist()
+        rating_totals = self._columns["user_ratings_total"][indices].tolist()
+        distance_list = distances.tolist() if distances is not None else [None] * len(lats)
+
+        places = []
+        for k, i in enumerate(indices.tolist()):
+            place = {
+                "place_id": self._string("place_id", i),
+                "name": self._string("name", i),
+                "vicinity": self._string("vicinity", i),
+                "types": self._types_of(i),
+                "geometry": {"location": {"lat": lats[k], "lng": lngs[k]}},
+                "data_source": "local_poi_store"
+            }
+            if ratings[k] > 0:
+                place["rating"] = round(ratings[k], 1)
+                place["user_ratings_total"] = rating_totals[k]
+            if distance_list[k] is not None:
+                place["distance"] = distance_list[k]
+            places.append(place)
+        return places
+
+    def search_nearby(
+        self,
+        coordinates: Dict[str, float],
+        place_type: str,
+        radius: float,
+        limit: int = POI_STORE_MAX_RESULTS
+    ) -> List[Dict]:
+        """search_nearby_places 互換の検索（距離昇順）"""
+        indices, distances = self.query_indices(coordinates["lat"], coordinates["lng"], place_type, radius)
+        if limit:
+            indices, distances = indices[:limit], distances[:limit]
+        return self.to_places(indices, distances)
+
+_poi_store: Optional[POIStore] = None
+_poi_store_loaded = False
+
+def get_poi_store() -> Optional[POIStore]:
+    """ローカルPOIストアを取得（初回のみマップ、存在しなければNone）"""
+    global _poi_store, _poi_store_loaded
+    if not _poi_store_loaded:
+        _poi_store_loaded = True
+        if (Path(POI_STORE_PATH) / "meta.json").exists():
+            try:
+                _poi_store = POIStore(POI_STORE_PATH)
+                logger.info(f"🗂️ ローカルPOIストアをマップ: {POI_STORE_PATH} ({len(_poi_store)}件)")
+            except Exception as e:
+                logger.warning(f"⚠️ ローカルPOIストアの読み込み失敗: {e}")
+    return _poi_store
+
+def places_search_available(collector: Optional[str] = None) -> bool:
+    """施設検索が可能か（ローカルストアまたはGoogle Places APIキー）"""
+    if get_places_backend_mode(collector) != "live" and get_poi_store() is not None:
+        return True
+    return bool(os.getenv("GOOGLE_MAPS_API_KEY"))
@@ -0,0 +1,128 @@
+"""
+価格推定グラフデータ生成
+取引事例の配列からヒストグラム・散布図・ランキング・時系列を一括生成
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 価格分布の刻み幅（万円）
+PRICE_BUCKET_SIZE_MAN = 500
+
+# 「2024年第1四半期」「2024年Q1」などの取引時期表記
+_PERIOD_PATTERN = re.compile(r"(\d{4})\s*年?\s*(?:第\s*([1-4１-４])\s*四半期|Q\s*([1-4]))")
+_ZENKAKU_DIGITS = str.maketrans("１２３４", "1234")
+
+def parse_period(period: str) -> Optional[Tuple[int, int]]:
+    """取引時期の文字列を (年, 四半期) に変換（解析できない場合はNone）"""
+    if not period:
+        return None
+    match = _PERIOD_PATTERN.search(period)
+    if not match:
+        return None
+    quarter = match.group(2) or match.group(3)
+    return int(match.group(1)), int(quarter.translate(_ZENKAKU_DIGITS))
+
+def _build_price_distribution(prices: np.ndarray) -> Dict:
+    """価格分布ヒストグラム（500万円刻み）"""
+    if prices.size == 0:
+        return {"ranges": [], "counts": [], "labels": []}
+
+    min_price = int(prices.min()) // 10000  # 万円単位
+    max_price = int(prices.max()) // 10000
+    start = (min_price // PRICE_BUCKET_SIZE_MAN) * PRICE_BUCKET_SIZE_MAN
+    end = ((max_price // PRICE_BUCKET_SIZE_MAN) + 1) * PRICE_BUCKET_SIZE_MAN
+
+    edges_man = np.arange(start, end + PRICE_BUCKET_SIZE_MAN, PRICE_BUCKET_SIZE_MAN, dtype=np.int64)
+    # 最大価格は常に end 未満なので、最終ビンが閉区間でも半開区間と同じ結果になる
+    counts, _ = np.histogram(prices, bins=edges_man * 10000)
+
+    range_starts = edges_man[:-1].tolist()
+    return {
+        "ranges": [[s, s + PRICE_BUCKET_SIZE_MAN] for s in range_starts],
+        "counts": counts.tolist(),
+        "labels": [f"{s}-{s + PRICE_BUCKET_SIZE_MAN}万円" for s in range_starts]
+    }
+
+def _build_time_series(periods: List[str], prices_man: np.ndarray) -> Dict:
+    """取引時期（年・四半期）別の平均価格"""
+    if not periods:
+        return {"time_series": []}
+
+    # 解析できた時期は (年, 四半期) 順、解析できない時期は文字列順で末尾に並べる
+    keys = []
+    labels = {}
+    for period in periods:
+        parsed = parse_period(period)
+        key = (0, parsed[0], parsed[1], "") if parsed else (1, 0, 0, period)
+        keys.append(key)
+        labels.setdefault(key, period)
+
+    unique_keys = sorted(labels)
+    key_index = {key: i for i, key in enumerate(unique_keys)}
+    group_ids = np.fromiter((key_index[k] for k in keys), dtype=np.int64, count=len(keys))
+
+    counts = np.bincount(group_ids, minlength=len(unique_keys))
+    sums = np.bincount(group_ids, weights=prices_man, minlength=len(unique_keys))
+
+    time_series = []
+    for i, key in enumerate(unique_keys):
+        count = int(counts[i])
+        time_series.append({
+            "period": labels[key],
+            "average_price": int(sums[i]) // count if count else 0,
+            "count": count
+        })
+
+    return {"time_series": time_series}
+
+def build_price_graph_data(
+    transactions: List[Dict],
+    property_data: Dict,
+    ranking_limit: int = 10
+) -> Dict:
+    """取引事例からグラフデータ（graphData）を一括生成"""
+    n = len(transactions)
+    prices = np.empty(n, dtype=np.int64)
+    periods: List[str] = []
+    similar_properties = []
+    rankings = []
+
+    # 取引事例の走査は1回のみ
+    for i, t in enumerate(transactions):
+        price = t["TradePrice"]
+        price_man = price // 10000  # 万円単位
+        prices[i] = price
+        periods.append(t.get("Period", "2024年Q1"))
+
+        similar_properties.append({
+            "area": t["Area"],
+            "price": price_man,
+            "similarity": t["similarity_score"],
+            "municipality": t["Municipality"]
+        })
+        if i < ranking_limit:
+            rankings.append({
+                "rank": i + 1,
+                "price": price_man,
+                "area": t["Area"],
+                "similarity": t["similarity_score"],
+                "municipality": t["Municipality"],
+                "formatted_price": t["formatted_price"],
+                "distance_km": t["distance_km"]
+            })
+
+    return {
+        "price_distribution": _build_price_distribution(prices),
+        "area_vs_price": {
+            "similar_properties": similar_properties,
+            "target_property": {
+                "area": property_data.get("area", 70),
+                "price": 0,  # 推定価格は別途設定
+                "is_target": True
+            }
+        },
+        "similarity_ranking": {"rankings": rankings},
+        "time_series": _build_time_series(periods, prices // 10000)
+    }
@@ -0,0 +1,98 @@
+"""
+分析結果・外部APIの結果キャッシュ（有効期限付き）
+同じエリアの分析やジオコーディング・Places・国土交通省APIの結果を、有効期限内は再計算・再取得せずに返す
+保存先は CACHE_BACKEND で選びます（app/services/cache_backend.py）。
+
+キャッシュの事前読み込み（app/jobs/warm_cache.py）は X-Cache-Warm ヘッダーに CACHE_WARM_TOKEN を付けて
+通常のAPIを呼びます。CacheWarmMiddleware はそのリクエストをキャッシュを読まずに再計算させ（期限前の更新）、
+処理中のリクエストが多いときは 503 を返して後回しにさせます（通常のリクエストを優先）。
+"""
+import functools
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services.cache_backend import get_cache
+
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", 6 * 3600))
+MLIT_CACHE_TTL = int(os.getenv("MLIT_CACHE_TTL", 24 * 3600))
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", 30 * 24 * 3600))
+PLACES_CACHE_TTL = int(os.getenv("PLACES_CACHE_TTL", 24 * 3600))
+CACHE_WARM_TOKEN = os.getenv("CACHE_WARM_TOKEN")
+# これ以上のリクエストを処理中なら事前読み込みのリクエストを断る
+CACHE_WARM_MAX_BUSY = int(os.getenv("CACHE_WARM_MAX_BUSY", 2))
+CACHE_WARM_HEADER = "x-cache-warm"
+
+_refresh: ContextVar[bool] = ContextVar("cache_refresh", default=False)
+
+def cache_refreshing() -> bool:
+    """キャッシュの更新モード（事前読み込みのリクエスト）の処理中か"""
+    return _refresh.get()
+
+@contextmanager
+def cache_refresh_scope():
+    """このブロック内の cached_result 付き関数はキャッシュを読まずに実行し、結果で置き換える"""
+    token = _refresh.set(True)
+    try:
+        yield
+    finally:
+        _refresh.reset(token)
+
+def cached_result(namespace: str, ttl: float, key_func: Callable[..., Any],
+                  cache_if: Callable[[Any], bool] = lambda result: result is not None):
+    """非同期関数のデコレーター。key_func(*args, **kwargs) ごとに ttl 秒キャッシュする
+
+    cache_if が偽になる結果（エラーなど）はキャッシュしません。
+    キャッシュから返す値は毎回デシリアライズした新しいオブジェクトなので、呼び出し側で書き換えて構いません。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache = get_cache()
+            key = f"{namespace}:{key_func(*args, **kwargs)!r}"
+            if not _refresh.get():
+                found, value = await cache.get(key)
+                if found:
+                    return value
+            result = await func(*args, **kwargs)
+            if cache_if(result):
+                await cache.set(key, result, ttl)
+            return result
+        return wrapper
+    return decorator
+
+class CacheWarmMiddleware:
+    """事前読み込みのリクエストを低優先度・キャッシュ更新モードで処理するミドルウェア"""
+
+    def __init__(self, app: ASGIApp, max_busy: int = CACHE_WARM_MAX_BUSY, token: Optional[str] = CACHE_WARM_TOKEN):
+        self.app = app
+        self.max_busy = max_busy
+        self.token = token
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        warm = self.token and Headers(scope=scope).get(CACHE_WARM_HEADER) == self.token
+        if warm and self.in_flight >= self.max_busy:
+            response = JSONResponse({"detail": "処理中のリクエストが多いため後で再試行してください"},
+                                    status_code=503, headers={"Retry-After": "30"})
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            if warm:
+                with cache_refresh_scope():
+                    await self.app(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,270 @@
+"""
+スコアアトラス（地域メッシュごとの事前計算スコア）
+全国の居住メッシュについて8項目スコアを事前計算したストアから、地点のスコアを即座に引く
+
+ストアはメッシュコード（codes.npy、昇順）と (メッシュ数, 8) の float16 スコア（scores.npy）を
+メモリマップしたディレクトリです。地点のメッシュコードを計算して searchsorted で行を引くだけなので、
+Places 検索もスコア計算も行いません。住所単位の精密な値が必要な場合だけライブ分析を使います。
+
+最適地の検索（top_locations）は、範囲内の行のスコア行列と重みベクトルの積で加重スコアを求め、
+argpartition で上位 k 件だけを並べ替えます。float16 → float32 の変換が最も重いため、
+初回の検索時にスコアの float32 のコピー（1メッシュ32バイト）をプロセス内に持ちます。
+"""
+import json
+import logging
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.score_percentiles import SCORE_CATEGORIES
+from app.utils.atomic_dir import swap_directory
+from app.utils.jis_mesh import (
+    MESH_LEVEL_DIGITS, codes_from_indices, mesh_centers, mesh_codes, mesh_indices, mesh_size_deg
+)
+
+logger = logging.getLogger(__name__)
+
+SCORE_ATLAS_PATH = os.getenv("SCORE_ATLAS_PATH", "data/score_atlas")
+# 最適地の検索で一度に処理する行数
+TOP_LOCATIONS_CHUNK_ROWS = 1 << 20
+
+def write_score_atlas(codes: np.ndarray, scores: np.ndarray, level: int,
+                      path: str, meta: Optional[Dict] = None) -> Dict:
+    """スコアアトラスを保存（一時ディレクトリに書いてから置き換え）"""
+    codes = np.asarray(codes, dtype=np.int64)
+    order = np.argsort(codes, kind="stable")
+    meta = {**(meta or {}), "level": level, "meshes": int(len(codes)), "categories": SCORE_CATEGORIES}
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".score_atlas_", dir=target.parent))
+    np.save(tmp_dir / "codes.npy", codes[order])
+    np.save(tmp_dir / "scores.npy", np.asarray(scores, dtype=np.float16)[order])
+    with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    swap_directory(tmp_dir, target)
+    return meta
+
+class ScoreAtlas:
+    """メモリマップしたスコアアトラス（読み取り専用）"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.level = self.meta["level"]
+        self.categories = self.meta["categories"]
+        self.codes = np.load(self.path / "codes.npy", mmap_mode="r").view(np.ndarray)
+        self.scores = np.load(self.path / "scores.npy", mmap_mode="r").view(np.ndarray)
+        self._float_scores: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def rows_of(self, codes: np.ndarray) -> np.ndarray:
+        """メッシュコード → 行番号（アトラスにないメッシュは-1）"""
+        codes = np.asarray(codes, dtype=np.int64)
+        if len(self.codes) == 0:
+            return np.full(len(codes), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.codes, codes), len(self.codes) - 1)
+        return np.where(self.codes[rows] == codes, rows, -1)
+
+    def rows_in_region(self, rings=None, bbox: Optional[Tuple[float, float, float, float]] = None,
+                       center: Optional[Tuple[float, float]] = None, radius_m: Optional[float] = None
+                       ) -> Optional[np.ndarray]:
+        """範囲（ポリゴン・矩形 (南, 西, 北, 東)・中心からの半径。複数なら共通部分）に入るメッシュの行番号（昇順）
+
+        範囲の指定がなければNone（全メッシュ）。候補はアトラスの行から引くため、範囲が広くても
+        アトラスにない（非居住の）メッシュは列挙しない。
+        """
+        regions = []
+        if rings is not None:
+            regions.append(self.rows_in_polygon(rings))
+        if bbox is not None:
+            regions.append(self.rows_in_bbox(*bbox))
+        if center is not None and radius_m:
+            regions.append(self.rows_near(center[0], center[1], radius_m))
+        rows = None
+        for region_rows in regions:
+            rows = region_rows if rows is None else np.intersect1d(rows, region_rows, assume_unique=True)
+        return rows
+
+    def rows_in_bbox(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """中心が範囲内にあるメッシュの行番号（第1次メッシュごとにコードの連続区間を引く）"""
+        digits = MESH_LEVEL_DIGITS[self.level] - MESH_LEVEL_DIGITS[1]
+        row0, col0 = mesh_indices(south, west, 1)
+        row1, col1 = mesh_indices(north, east, 1)
+        chunks = []
+        for row in range(int(row0), int(row1) + 1):
+            for col in range(int(col0), int(col1) + 1):
+                prefix = int(codes_from_indices(row, col, 1))
+                lo, hi = np.searchsorted(self.codes, [prefix * 10 ** digits, (prefix + 1) * 10 ** digits])
+                if hi > lo:
+                    chunks.append(np.arange(lo, hi))
+        if not chunks:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.concatenate(chunks)
+        lats, lngs = mesh_centers(self.codes[rows], self.level)
+        return rows[(lats >= south) & (lats <= north) & (lngs >= west) & (lngs <= east)]
+
+    def rows_near(self, lat: float, lng: float, radius_m: float) -> np.ndarray:
+        """中心が (lat, lng) から radius_m 以内のメッシュの行番号（地点を含むメッシュは必ず含む）"""
+        dlat, dlng = mesh_size_deg(self.level)
+        cos_lat = max(math.cos(math.radians(lat)), 0.1)
+        reach_lat = radius_m / 111320 + dlat
+        reach_lng = radius_m / (111320 * cos_lat) + dlng
+        rows = self.rows_in_bbox(lat - reach_lat, lng - reach_lng, lat + reach_lat, lng + reach_lng)
+        lats, lngs = mesh_centers(self.codes[rows], self.level)
+        dy = (lats - lat) * 111320
+        dx = (lngs - lng) * 111320 * cos_lat
+        home = mesh_codes([lat], [lng], self.level)[0]
+        return rows[(dx * dx + dy * dy <= radius_m * radius_m) | (self.codes[rows] == home)]
+
+    def rows_in_polygon(self, rings) -> np.ndarray:
+        """中心がポリゴン（外周・穴のリング列、[lng, lat]。even-odd 判定）に入るメッシュの行番号
+
+        外接矩形で候補の行を引き、メッシュの行（緯度）ごとに辺との交点を求めて、
+        候補の中心より西にある交点の数で判定する。空のメッシュは列挙しない。
+        """
+        edges = []
+        for ring in rings:
+            ring = np.asarray(ring, dtype=np.float64)[:, :2]
+            if len(ring) >= 3:
+                edges.append(np.column_stack([ring, np.roll(ring, -1, axis=0)]))
+        if not edges:
+            return np.zeros(0, dtype=np.int64)
+        x1, y1, x2, y2 = np.concatenate(edges).T
+        rows = self.rows_in_bbox(y1.min(), x1.min(), y1.max(), x1.max())
+        lats, lngs = mesh_centers(self.codes[rows], self.level)
+        inside = np.zeros(len(rows), dtype=bool)
+        order = np.argsort(lats, kind="stable")
+        row_lats, starts = np.unique(lats[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for y, start, end in zip(row_lats.tolist(), starts.tolist(), ends.tolist()):
+            straddles = (y1 > y) != (y2 > y)
+            if not straddles.any():
+                continue
+            xs = np.sort(x1[straddles] + (y - y1[straddles]) * (x2[straddles] - x1[straddles]) / (y2[straddles] - y1[straddles]))
+            members = order[start:end]
+            inside[members] = np.searchsorted(xs, lngs[members], side="right") % 2 == 1
+        return rows[inside]
+
+    def vectors(self, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(スコア行列 float32（ないメッシュは NaN）, アトラスにあるか)"""
+        rows = self.rows_of(codes)
+        present = rows >= 0
+        vectors = np.full((len(rows), len(self.categories)), np.nan, dtype=np.float32)
+        vectors[present] = self.scores[rows[present]]
+        return vectors, present
+
+    def lookup(self, lat: float, lng: float) -> Optional[Dict]:
+        """地点を含むメッシュの事前計算スコア（居住メッシュでなければNone）"""
+        code = int(mesh_codes([lat], [lng], self.level)[0])
+        row = int(self.rows_of(np.array([code]))[0])
+        if row < 0:
+            return None
+        values = self.scores[row].astype(np.float32)
+        return {
+            "mesh_code": str(code),
+            "mesh_level": self.level,
+            "scores": {category: round(float(v), 1) for category, v in zip(self.categories, values)},
+            "total_score": round(float(values.mean()), 1),
+            "built_at": self.meta.get("built_at"),
+            "source": "score_atlas",
+        }
+
+    def float_scores(self) -> np.ndarray:
+        """スコアの float32 のコピー（初回のみ変換）"""
+        if self._float_scores is None:
+            self._float_scores = self.scores.astype(np.float32)
+        return self._float_scores
+
+    def weight_vector(self, weights: Dict[str, float]) -> np.ndarray:
+        """カテゴリ別の重み → 合計1の重みベクトル（指定のないカテゴリは0）"""
+        unknown = set(weights) - set(self.categories)
+        if unknown:
+            raise ValueError(f"不明なカテゴリです: {', '.join(sorted(unknown))}")
+        vector = np.array([float(weights.get(category, 0)) for category in self.categories], dtype=np.float32)
+        if (vector < 0).any() or vector.sum() <= 0:
+            raise ValueError("重みは0以上で、いずれかを正の値にしてください")
+        return vector / vector.sum()
+
+    def top_locations(self, weights: Dict[str, float], k: int = 20, rows: Optional[np.ndarray] = None,
+                      minimums: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """加重スコアの上位 k メッシュ
+
+        rows: 対象の行番号（範囲で絞った場合。None なら全メッシュ）
+        minimums: カテゴリ別の下限（例: {"safety": 70, "transport": 60}）
+        """
+        weight_vector = self.weight_vector(weights)
+        minimums = minimums or {}
+        unknown = set(minimums) - set(self.categories)
+        if unknown:
+            raise ValueError(f"不明なカテゴリです: {', '.join(sorted(unknown))}")
+        limits = [(self.categories.index(category), float(value)) for category, value in minimums.items()]
+
+        all_scores = self.float_scores()
+        total = len(self.codes) if rows is None else len(rows)
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_values = np.zeros(0, dtype=np.float32)
+        # チャンクごとに上位 k 件を求め、これまでの上位 k 件と合わせて絞り直す
+        for start in range(0, total, TOP_LOCATIONS_CHUNK_ROWS):
+            if rows is None:
+                chunk_rows = np.arange(start, min(start + TOP_LOCATIONS_CHUNK_ROWS, total))
+                matrix = all_scores[start:start + TOP_LOCATIONS_CHUNK_ROWS]
+            else:
+                chunk_rows = rows[start:start + TOP_LOCATIONS_CHUNK_ROWS]
+                matrix = all_scores[chunk_rows]
+            values = matrix @ weight_vector
+            if limits:
+                # 行を抜き出すより、条件を満たさない行を -inf にするほうが速い
+                fails = np.zeros(len(chunk_rows), dtype=bool)
+                for column, value in limits:
+                    fails |= matrix[:, column] < value
+                np.copyto(values, -np.inf, where=fails)
+            if len(values) > k:
+                top = np.argpartition(-values, k)[:k]
+                chunk_rows, values = chunk_rows[top], values[top]
+            passed = np.isfinite(values)
+            chunk_rows, values = chunk_rows[passed], values[passed]
+            best_rows = np.concatenate([best_rows, chunk_rows])
+            best_values = np.concatenate([best_values, values])
+            if len(best_values) > k:
+                top = np.argpartition(-best_values, k)[:k]
+                best_rows, best_values = best_rows[top], best_values[top]
+
+        order = np.lexsort((best_rows, -best_values))
+        best_rows, best_values = best_rows[order], best_values[order]
+        lats, lngs = mesh_centers(self.codes[best_rows], self.level)
+        results = []
+        for row, value, lat, lng in zip(best_rows.tolist(), best_values.tolist(), lats.tolist(), lngs.tolist()):
+            scores = all_scores[row]
+            results.append({
+                "mesh_code": str(int(self.codes[row])),
+                "coordinates": {"lat": lat, "lng": lng},
+                "weighted_score": round(value, 1),
+                "scores": {category: round(float(v), 1) for category, v in zip(self.categories, scores)},
+                "total_score": round(float(scores.mean()), 1),
+            })
+        return results
+
+_score_atlas: Optional[ScoreAtlas] = None
+_score_atlas_loaded = False
+
+def get_score_atlas() -> Optional[ScoreAtlas]:
+    """スコアアトラスを取得（初回のみマップ、ディレクトリがなければNone）"""
+    global _score_atlas, _score_atlas_loaded
+    if not _score_atlas_loaded:
+        _score_atlas_loaded = True
+        if (Path(SCORE_ATLAS_PATH) / "meta.json").exists():
+            try:
+                _score_atlas = ScoreAtlas(SCORE_ATLAS_PATH)
+                logger.info(f"🗾 スコアアトラスをマップ: {SCORE_ATLAS_PATH} ({len(_score_atlas)}メッシュ)")
+            except Exception as e:
+                logger.warning(f"⚠️ スコアアトラスの読み込み失敗: {e}")
+    return _score_atlas
@@ -0,0 +1,123 @@
+"""
+スコアのパーセンタイル順位サービス
+事前計算した参照分布（カテゴリ別のソート済み配列）に対して二分探索で順位を算出
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SCORE_CATEGORIES = [
+    "education", "medical", "transport", "shopping",
+    "dining", "safety", "environment", "cultural"
+]
+
+# 参照分布の配置先（app.jobs.build_score_reference で生成）
+SCORE_REFERENCE_PATH = os.getenv("SCORE_REFERENCE_PATH", "data/score_reference.npz")
+
+NATIONAL_KEY = "national"
+# 都道府県別の分布を使う最小サンプル数
+MIN_PREFECTURE_SAMPLES = 30
+
+class ScoreReference:
+    """カテゴリ別の参照スコア分布（ソート済み float32 配列）"""
+
+    def __init__(self, distributions: Dict[str, Dict[str, np.ndarray]]):
+        # distributions[地域キー][カテゴリ] = ソート済み配列
+        self.distributions = distributions
+
+    @classmethod
+    def load(cls, path: str) -> "ScoreReference":
+        """npz ファイルから読み込み（キーは "<地域>/<カテゴリ>"）"""
+        distributions: Dict[str, Dict[str, np.ndarray]] = {}
+        with np.load(path) as archive:
+            for key in archive.files:
+                region, _, category = key.partition("/")
+                distributions.setdefault(region, {})[category] = archive[key]
+        return cls(distributions)
+
+    def save(self, path: str):
+        """npz ファイルに保存"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            f"{region}/{category}": values
+            for region, categories in self.distributions.items()
+            for category, values in categories.items()
+        }
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def from_samples(cls, samples: Iterable[Dict], min_prefecture_samples: int = MIN_PREFECTURE_SAMPLES) -> "ScoreReference":
+        """{"prefecture": ..., "scores": {...}} の列から分布を構築"""
+        collected: Dict[str, Dict[str, list]] = {}
+        for sample in samples:
+            regions = [NATIONAL_KEY]
+            if sample.get("prefecture"):
+                regions.append(sample["prefecture"])
+            for category, score in sample["scores"].items():
+                if category not in SCORE_CATEGORIES or score is None:
+                    continue
+                for region in regions:
+                    collected.setdefault(region, {}).setdefault(category, []).append(score)
+
+        distributions = {}
+        for region, categories in collected.items():
+            arrays = {c: np.sort(np.asarray(v, dtype=np.float32)) for c, v in categories.items()}
+            if region != NATIONAL_KEY and min(len(a) for a in arrays.values()) < min_prefecture_samples:
+                continue
+            distributions[region] = arrays
+        return cls(distributions)
+
+    def percentile(self, category: str, score: float, region: str = NATIONAL_KEY) -> Optional[float]:
+        """参照分布内でのパーセンタイル（同点は中央順位）"""
+        values = self.distributions.get(region, {}).get(category)
+        if values is None or values.size == 0:
+            return None
+        lower = np.searchsorted(values, score, side="left")
+        upper = np.searchsorted(values, score, side="right")
+        return round(float((lower + upper) / 2 / values.size * 100), 1)
+
+    def rank_scores(self, scores: Dict[str, float], prefecture: Optional[str] = None) -> Dict[str, Dict]:
+        """カテゴリ別に全国・都道府県内のパーセンタイルを算出"""
+        ranks = {}
+        for category, score in scores.items():
+            if category not in SCORE_CATEGORIES:
+                continue
+            ranks[category] = {
+                "national": self.percentile(category, score, NATIONAL_KEY),
+                "prefecture": self.percentile(category, score, prefecture) if prefecture else None
+            }
+        return {
+            "prefecture": prefecture if prefecture in self.distributions else None,
+            "sample_size": int(self.distributions.get(NATIONAL_KEY, {}).get(SCORE_CATEGORIES[0], np.empty(0)).size),
+            "categories": ranks
+        }
+
+_score_reference: Optional[ScoreReference] = None
+_score_reference_loaded = False
+
+def get_score_reference() -> Optional[ScoreReference]:
+    """参照分布を取得（初回のみ読み込み、ファイルがなければNone）"""
+    global _score_reference, _score_reference_loaded
+    if not _score_reference_loaded:
+        _score_reference_loaded = True
+        if Path(SCORE_REFERENCE_PATH).exists():
+            try:
+                _score_reference = ScoreReference.load(SCORE_REFERENCE_PATH)
+                logger.info(f"📊 スコア参照分布を読み込み: {SCORE_REFERENCE_PATH}")
+            except Exception as e:
+                logger.warning(f"⚠️ スコア参照分布の読み込み失敗: {e}")
+        else:
+            logger.info(f"📊 スコア参照分布なし: {SCORE_REFERENCE_PATH}")
+    return _score_reference
+
+def rank_scores(scores: Dict[str, float], prefecture: Optional[str] = None) -> Optional[Dict]:
+    """参照分布が利用可能な場合のみパーセンタイルを返す"""
+    reference = get_score_reference()
+    if reference is None:
+        return None
+    return reference.rank_scores(scores, prefecture)
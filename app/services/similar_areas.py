@@ -0,0 +1,229 @@
+"""
+似たエリア検索（8項目スコアベクトルの近傍探索）
+スコアアトラスのメッシュを IVF（k-means のクラスタごとの転置リスト）で索引し、
+ある地点・分析結果とスコアの傾向が近いエリアを地域・価格の条件付きで探す
+
+ベクトルはクラスタ順に並べて保存するため、クエリに近い nprobe 個のクラスタの
+連続した範囲を読むだけで候補が得られます。地域の条件で候補が十分に絞れる場合は
+IVF を使わずに全件を距離計算します（件数が少ないので厳密解のほうが速い）。
+㎡単価（取引ストアのメッシュ内中央値）は候補の絞り込みと並べ替えにのみ使います。
+"""
+import json
+import logging
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.score_percentiles import SCORE_CATEGORIES
+from app.utils.atomic_dir import swap_directory
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_AREA_INDEX_PATH = os.getenv("SIMILAR_AREA_INDEX_PATH", "data/similar_areas")
+# 探索するクラスタ数と、地域条件で絞れたときに全件計算に切り替える件数
+SIMILAR_AREA_NPROBE = int(os.getenv("SIMILAR_AREA_NPROBE", 8))
+EXACT_SEARCH_MAX_CANDIDATES = 50000
+# 価格で並べ替える場合に距離順で取る候補数（k の倍数）
+PRICE_RERANK_FACTOR = 10
+
+def kmeans(vectors: np.ndarray, clusters: int, iterations: int = 20, seed: int = 0,
+           chunk: int = 20000) -> Tuple[np.ndarray, np.ndarray]:
+    """(重心, 各ベクトルのクラスタ番号)。距離計算はチャンクごと"""
+    rng = np.random.default_rng(seed)
+    clusters = max(1, min(clusters, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].astype(np.float64)
+    assignment = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(iterations):
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            distances = (
+                (block ** 2).sum(axis=1)[:, None] - 2 * block @ centroids.T + (centroids ** 2).sum(axis=1)[None, :]
+            )
+            assignment[start:start + chunk] = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        # 空クラスタは重心を据え置く
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids.astype(np.float32), assignment
+
+def write_similar_area_index(codes: np.ndarray, lats: np.ndarray, lngs: np.ndarray, vectors: np.ndarray,
+                             municipalities: np.ndarray, prices: np.ndarray, path: str,
+                             clusters: Optional[int] = None, meta: Optional[Dict] = None) -> Dict:
+    """IVF 索引を構築して保存（一時ディレクトリに書いてから置き換え）"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    clusters = clusters or max(1, int(math.sqrt(len(vectors))))
+    centroids, assignment = kmeans(vectors, clusters)
+    order = np.argsort(assignment, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))])
+    meta = {**(meta or {}), "entries": int(len(vectors)), "clusters": int(len(centroids)),
+            "categories": SCORE_CATEGORIES}
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".similar_areas_", dir=target.parent))
+    columns = {
+        "codes": np.asarray(codes, dtype=np.int64),
+        "lats": np.asarray(lats, dtype=np.float64),
+        "lngs": np.asarray(lngs, dtype=np.float64),
+        "vectors": vectors,
+        "municipalities": np.asarray(municipalities, dtype=np.int32),
+        "prices": np.asarray(prices, dtype=np.float32),
+    }
+    for name, values in columns.items():
+        np.save(tmp_dir / f"{name}.npy", values[order])
+    np.save(tmp_dir / "centroids.npy", centroids)
+    np.save(tmp_dir / "offsets.npy", offsets.astype(np.int64))
+    with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    swap_directory(tmp_dir, target)
+    return meta
+
+class SimilarAreaIndex:
+    """メモリマップした IVF 索引（読み取り専用）"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.categories = self.meta["categories"]
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.load(self.path / f"{name}.npy", mmap_mode="r").view(np.ndarray)
+            for name in ("codes", "lats", "lngs", "vectors", "municipalities", "prices", "centroids", "offsets")
+        }
+        # 行はクラスタ順に並んでいるため、メッシュコード → 行の引き当て用にコード順の並びを持っておく
+        self._code_order = np.argsort(self._columns["codes"], kind="stable")
+        self._sorted_codes = self._columns["codes"][self._code_order]
+
+    def __len__(self) -> int:
+        return self.meta["entries"]
+
+    def vector_of(self, scores: Dict[str, float]) -> np.ndarray:
+        return np.array([float(scores.get(category, 0) or 0) for category in self.categories], dtype=np.float32)
+
+    def price_of(self, code: int) -> Optional[float]:
+        """メッシュの㎡単価（索引にない・不明ならNone）"""
+        position = int(np.searchsorted(self._sorted_codes, code))
+        if position >= len(self._sorted_codes) or self._sorted_codes[position] != code:
+            return None
+        price = float(self._columns["prices"][self._code_order[position]])
+        return price if math.isfinite(price) else None
+
+    def region_mask(self, rows: np.ndarray, region: Dict) -> np.ndarray:
+        """地域条件（prefecture: 都道府県コード / municipality: 市区町村コード /
+        bbox: (南, 西, 北, 東) / center + radius_km）に合う行"""
+        columns = self._columns
+        mask = np.ones(len(rows), dtype=bool)
+        if region.get("prefecture"):
+            mask &= columns["municipalities"][rows] // 1000 == int(region["prefecture"])
+        if region.get("municipality"):
+            mask &= columns["municipalities"][rows] == int(region["municipality"])
+        if region.get("bbox"):
+            south, west, north, east = region["bbox"]
+            lats, lngs = columns["lats"][rows], columns["lngs"][rows]
+            mask &= (lats >= south) & (lats <= north) & (lngs >= west) & (lngs <= east)
+        if region.get("radius_km") and region.get("center"):
+            lat, lng = region["center"]
+            dy = (columns["lats"][rows] - lat) * 111.32
+            dx = (columns["lngs"][rows] - lng) * 111.32 * math.cos(math.radians(lat))
+            mask &= dx * dx + dy * dy <= region["radius_km"] ** 2
+        return mask
+
+    def _candidate_rows(self, vector: np.ndarray, region: Dict, needed: int, nprobe: int) -> np.ndarray:
+        """距離計算の対象にする行（地域条件を満たすもの）"""
+        columns = self._columns
+        if region:
+            everything = np.arange(len(self))
+            rows = everything[self.region_mask(everything, region)]
+            if len(rows) <= EXACT_SEARCH_MAX_CANDIDATES:
+                return rows
+        # クエリに近いクラスタから順に、候補が足りるまで広げる
+        centroid_order = np.argsort(((columns["centroids"] - vector) ** 2).sum(axis=1))
+        offsets = columns["offsets"]
+        chunks, found = [], 0
+        for probed, cluster in enumerate(centroid_order.tolist()):
+            cluster_rows = np.arange(offsets[cluster], offsets[cluster + 1])
+            if region:
+                cluster_rows = cluster_rows[self.region_mask(cluster_rows, region)]
+            chunks.append(cluster_rows)
+            found += len(cluster_rows)
+            if probed + 1 >= nprobe and found >= needed:
+                break
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+
+    def search(self, vector: np.ndarray, k: int = 10, region: Optional[Dict] = None,
+               exclude_codes: Tuple[int, ...] = (), max_price: Optional[float] = None,
+               reference_price: Optional[float] = None, price_weight: float = 0.0,
+               nprobe: int = SIMILAR_AREA_NPROBE) -> List[Dict]:
+        """スコアベクトルが近い順に k 件
+
+        max_price: ㎡単価の上限（単価不明のエリアは除外）
+        price_weight: reference_price との対数価格差（1.0 = 約2.7倍差）を距離に加える重み
+        """
+        columns = self._columns
+        vector = np.asarray(vector, dtype=np.float32)
+        region = {key: value for key, value in (region or {}).items() if value}
+        use_price = max_price is not None or (price_weight > 0 and reference_price)
+        needed = k * PRICE_RERANK_FACTOR if use_price else k + len(exclude_codes)
+
+        rows = self._candidate_rows(vector, region, needed, nprobe)
+        if exclude_codes:
+            rows = rows[~np.isin(columns["codes"][rows], np.asarray(exclude_codes, dtype=np.int64))]
+        prices = columns["prices"][rows]
+        if max_price is not None:
+            keep = prices <= max_price
+            rows, prices = rows[keep], prices[keep]
+        distances = np.sqrt(((columns["vectors"][rows] - vector) ** 2).sum(axis=1))
+        if price_weight > 0 and reference_price:
+            known = np.isfinite(prices) & (prices > 0)
+            price_gap = np.where(known, np.log(np.where(known, prices, 1.0) / reference_price), 0.0)
+            # 価格が不明なエリアは最大の差と見なす
+            price_gap[~known] = np.abs(price_gap[known]).max() if known.any() else 0.0
+            distances = np.sqrt(distances ** 2 + (price_weight * 100 * price_gap) ** 2)
+
+        if len(rows) > k:
+            top = np.argpartition(distances, k)[:k]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(distances[top], kind="stable")]
+
+        results = []
+        for i in top.tolist():
+            row = int(rows[i])
+            price = float(columns["prices"][row])
+            municipality = int(columns["municipalities"][row])
+            results.append({
+                "mesh_code": str(int(columns["codes"][row])),
+                "coordinates": {"lat": float(columns["lats"][row]), "lng": float(columns["lngs"][row])},
+                "municipality_code": f"{municipality:05d}" if municipality else None,
+                "scores": {c: round(float(v), 1) for c, v in zip(self.categories, columns["vectors"][row])},
+                "total_score": round(float(columns["vectors"][row].mean()), 1),
+                "price_per_sqm": round(price) if math.isfinite(price) else None,
+                "distance": round(float(distances[i]), 2),
+            })
+        return results
+
+_similar_area_index: Optional[SimilarAreaIndex] = None
+_similar_area_index_loaded = False
+
+def get_similar_area_index() -> Optional[SimilarAreaIndex]:
+    """似たエリア検索の索引を取得（初回のみマップ、ディレクトリがなければNone）"""
+    global _similar_area_index, _similar_area_index_loaded
+    if not _similar_area_index_loaded:
+        _similar_area_index_loaded = True
+        if (Path(SIMILAR_AREA_INDEX_PATH) / "meta.json").exists():
+            try:
+                _similar_area_index = SimilarAreaIndex(SIMILAR_AREA_INDEX_PATH)
+                logger.info(
+                    f"🧭 似たエリア索引をマップ: {SIMILAR_AREA_INDEX_PATH} "
+                    f"({len(_similar_area_index)}件 / {_similar_area_index.meta['clusters']}クラスタ)"
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ 似たエリア索引の読み込み失敗: {e}")
+    return _similar_area_index
@@ -0,0 +1,150 @@
+"""
+フロントエンド静的ファイル配信
+起動時に build ディレクトリを一度だけ走査してマニフェストを作成し、
+事前圧縮ファイル（.br/.gz）・ETag・キャッシュヘッダー付きで配信
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from app.utils.compression import choose_encoding
+
+logger = logging.getLogger(__name__)
+
+# ビルドツールが付与するコンテンツハッシュ（例: main.3f2a9c1b.js, 787.1a2b3c4d.chunk.js）
+HASHED_NAME_PATTERN = re.compile(r"\.[0-9a-f]{8,}\.")
+
+# 事前圧縮ファイルの拡張子 → Content-Encoding
+PRECOMPRESSED_SUFFIXES = {".br": "br", ".gz": "gzip"}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+@dataclass
+class StaticVariant:
+    """1エンコーディング分の配信データ"""
+    path: Path
+    size: int
+    stat_result: os.stat_result
+    body: Optional[bytes] = None  # 小さいファイルはメモリに保持
+
+@dataclass
+class StaticAsset:
+    """マニフェストの1エントリ"""
+    path: str
+    media_type: str
+    etag: str
+    cache_control: str
+    variants: Dict[str, StaticVariant] = field(default_factory=dict)  # "identity" / "br" / "gzip"
+
+class StaticAssetManifest:
+    """build ディレクトリのメモリ上マニフェスト"""
+
+    def __init__(self, build_dir: Path, inline_max_size: int = 256 * 1024):
+        self.build_dir = Path(build_dir)
+        self.inline_max_size = inline_max_size
+        self.assets: Dict[str, StaticAsset] = {}
+        self.build()
+
+    @property
+    def available(self) -> bool:
+        return "index.html" in self.assets
+
+    def _load_variant(self, path: Path) -> StaticVariant:
+        stat_result = path.stat()
+        body = None
+        if stat_result.st_size <= self.inline_max_size:
+            body = path.read_bytes()
+        return StaticVariant(path=path, size=stat_result.st_size, stat_result=stat_result, body=body)
+
+    def build(self):
+        """build ディレクトリを走査してマニフェストを再構築"""
+        assets: Dict[str, StaticAsset] = {}
+        if not self.build_dir.is_dir():
+            self.assets = assets
+            return
+
+        for root, _, files in os.walk(self.build_dir):
+            names = set(files)
+            for name in files:
+                if Path(name).suffix in PRECOMPRESSED_SUFFIXES and name[:-len(Path(name).suffix)] in names:
+                    continue  # 事前圧縮版は元ファイルの variant として登録
+
+                file_path = Path(root) / name
+                rel_path = file_path.relative_to(self.build_dir).as_posix()
+                identity = self._load_variant(file_path)
+
+                if identity.body is not None:
+                    etag = f'"{hashlib.md5(identity.body).hexdigest()}"'
+                else:
+                    etag = f'"{identity.size:x}-{identity.stat_result.st_mtime_ns:x}"'
+
+                is_hashed = bool(HASHED_NAME_PATTERN.search(name))
+                asset = StaticAsset(
+                    path=rel_path,
+                    media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+                    etag=etag,
+                    cache_control=IMMUTABLE_CACHE_CONTROL if is_hashed else REVALIDATE_CACHE_CONTROL,
+                    variants={"identity": identity}
+                )
+                for suffix, encoding in PRECOMPRESSED_SUFFIXES.items():
+                    if name + suffix in names:
+                        asset.variants[encoding] = self._load_variant(Path(root) / (name + suffix))
+
+                assets[rel_path] = asset
+
+        self.assets = assets
+        inline_bytes = sum(
+            v.size for a in assets.values() for v in a.variants.values() if v.body is not None
+        )
+        logger.info(f"📦 静的ファイルマニフェスト: {len(assets)}件 (メモリ保持 {inline_bytes / 1024:.0f} KB)")
+
+    def lookup(self, path: str) -> Optional[StaticAsset]:
+        """リクエストパスからアセットを取得（ファイルシステムにはアクセスしない）"""
+        return self.assets.get(path.lstrip("/"))
+
+    def response(self, asset: StaticAsset, request: Request) -> Response:
+        """条件付きリクエスト・エンコーディング選択を反映したレスポンス"""
+        headers = {
+            "ETag": asset.etag,
+            "Cache-Control": asset.cache_control,
+        }
+        encodings = [e for e in ("br", "gzip") if e in asset.variants]
+        if encodings:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match and _etag_matches(if_none_match, asset.etag):
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), encodings) if encodings else None
+        variant = asset.variants[encoding] if encoding else asset.variants["identity"]
+        if encoding:
+            headers["Content-Encoding"] = encoding
+
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(variant.size)
+            return Response(status_code=200, headers=headers, media_type=asset.media_type)
+        if variant.body is not None:
+            return Response(content=variant.body, headers=headers, media_type=asset.media_type)
+        return FileResponse(
+            variant.path,
+            headers=headers,
+            media_type=asset.media_type,
+            stat_result=variant.stat_result
+        )
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match の照合（弱いETag比較）"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
@@ -0,0 +1,192 @@
+"""
+ローカル駅データ（鉄道駅・バス停）
+国土数値情報の駅・乗降客数・バス停データから作成した索引で最寄り駅を検索
+
+駅ごとに路線数・事業者数・乗降客数ランク・重要度を取り込み時に計算しておき、
+リクエスト時は緯度でソートした配列の二分探索と距離計算だけで済ませます。
+"""
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.poi_store import haversine_m
+
+logger = logging.getLogger(__name__)
+
+STATION_INDEX_PATH = os.getenv("STATION_INDEX_PATH", "data/station_index.npz")
+
+STATION_KINDS = ["rail", "bus"]
+# 1日あたり乗降客数のランク境界（0: 5千人未満 〜 4: 30万人以上、-1: 不明）
+RIDERSHIP_TIER_EDGES = [5000, 30000, 100000, 300000]
+RIDERSHIP_TIER_LABELS = ["小規模駅", "中規模駅", "主要駅", "大規模駅", "ターミナル駅"]
+# 検索半径（鉄道駅 / バス停）
+RAIL_SEARCH_RADIUS_M = 2000
+BUS_SEARCH_RADIUS_M = 800
+
+def _pack_lines(values: List[str]) -> np.ndarray:
+    return np.frombuffer("\n".join(values).encode("utf-8"), dtype=np.uint8)
+
+def _unpack_lines(blob: np.ndarray) -> List[str]:
+    return blob.tobytes().decode("utf-8").split("\n") if blob.size else []
+
+def station_place_id(kind: str, name: str, lat: float, lng: float) -> str:
+    """索引を作り直しても変わらない駅のID（種別・駅名・約1m単位に丸めた座標から作る）"""
+    digest = hashlib.sha1(f"{kind}:{name}:{lat:.5f}:{lng:.5f}".encode("utf-8")).hexdigest()[:16]
+    return f"station:{digest}"
+
+def ridership_tier(ridership: Optional[float]) -> int:
+    if ridership is None or np.isnan(ridership):
+        return -1
+    return int(np.searchsorted(RIDERSHIP_TIER_EDGES, ridership, side="right"))
+
+def station_importance(line_count: int, tier: int) -> float:
+    """駅の重要度（0〜1）。乗降客数が不明なら路線数のみで評価"""
+    line_part = min(line_count, 5) / 5
+    if tier < 0:
+        return round(line_part, 3)
+    return round(min(1.0, 0.4 * line_part + 0.6 * tier / 4), 3)
+
+class StationIndex:
+    """緯度順に並べた駅配列"""
+
+    def __init__(self, names: List[str], lats: np.ndarray, lngs: np.ndarray, kinds: np.ndarray,
+                 lines: List[str], operators: List[str], ridership: np.ndarray):
+        self.names = names
+        self.lats = lats
+        self.lngs = lngs
+        self.kinds = kinds
+        self.lines = lines  # "|" 区切り
+        self.operators = operators  # "|" 区切り
+        self.ridership = ridership  # 1日あたり乗降客数（不明はNaN）
+        self.line_counts = np.array([len(v.split("|")) if v else 0 for v in lines], dtype=np.int16)
+        self.tiers = np.array([ridership_tier(r) for r in ridership], dtype=np.int8)
+        self.importance = np.array(
+            [station_importance(n, t) for n, t in zip(self.line_counts.tolist(), self.tiers.tolist())],
+            dtype=np.float32
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_stations(cls, stations: List[Dict]) -> "StationIndex":
+        """{"name", "lat", "lng", "kind", "lines": [...], "operators": [...], "ridership"} の列から構築"""
+        stations = sorted(stations, key=lambda s: s["lat"])
+        return cls(
+            names=[s["name"] for s in stations],
+            lats=np.array([s["lat"] for s in stations], dtype=np.float64),
+            lngs=np.array([s["lng"] for s in stations], dtype=np.float64),
+            kinds=np.array([STATION_KINDS.index(s.get("kind", "rail")) for s in stations], dtype=np.uint8),
+            lines=["|".join(s.get("lines", [])) for s in stations],
+            operators=["|".join(s.get("operators", [])) for s in stations],
+            ridership=np.array(
+                [np.nan if s.get("ridership") is None else s["ridership"] for s in stations], dtype=np.float64
+            ),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "StationIndex":
+        with np.load(path) as archive:
+            return cls(
+                names=_unpack_lines(archive["names"]),
+                lats=archive["lats"],
+                lngs=archive["lngs"],
+                kinds=archive["kinds"],
+                lines=_unpack_lines(archive["lines"]),
+                operators=_unpack_lines(archive["operators"]),
+                ridership=archive["ridership"],
+            )
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            names=_pack_lines(self.names),
+            lats=self.lats,
+            lngs=self.lngs,
+            kinds=self.kinds,
+            lines=_pack_lines(self.lines),
+            operators=_pack_lines(self.operators),
+            ridership=self.ridership,
+        )
+
+    def nearby(self, lat: float, lng: float, radius: float, kind: str = "rail") -> List[Dict]:
+        """半径内の駅を距離順に返す"""
+        dlat = radius / 111320
+        lo = np.searchsorted(self.lats, lat - dlat, side="left")
+        hi = np.searchsorted(self.lats, lat + dlat, side="right")
+        if lo >= hi:
+            return []
+        dlng = radius / (111320 * max(np.cos(np.radians(lat)), 0.1))
+        candidates = np.arange(lo, hi)
+        candidates = candidates[
+            (np.abs(self.lngs[lo:hi] - lng) <= dlng) & (self.kinds[lo:hi] == STATION_KINDS.index(kind))
+        ]
+        distances = haversine_m(lat, lng, self.lats[candidates], self.lngs[candidates])
+        within = distances <= radius
+        candidates, distances = candidates[within], distances[within]
+        order = np.argsort(distances, kind="stable")
+        return [self._station(int(i), float(d)) for i, d in zip(candidates[order], distances[order])]
+
+    def in_bbox(self, south: float, west: float, north: float, east: float, kind: str = "rail") -> np.ndarray:
+        """緯度経度範囲内の駅のインデックス"""
+        lo = np.searchsorted(self.lats, south, side="left")
+        hi = np.searchsorted(self.lats, north, side="right")
+        candidates = np.arange(lo, hi)
+        return candidates[
+            (self.lngs[lo:hi] >= west) & (self.lngs[lo:hi] <= east) & (self.kinds[lo:hi] == STATION_KINDS.index(kind))
+        ]
+
+    def _station(self, i: int, distance: float) -> Dict:
+        kind = STATION_KINDS[self.kinds[i]]
+        tier = int(self.tiers[i])
+        ridership = self.ridership[i]
+        return {
+            "name": self.names[i],
+            "distance": round(distance),
+            "place_id": station_place_id(kind, self.names[i], float(self.lats[i]), float(self.lngs[i])),
+            "rating": 0,
+            "types": ["train_station"] if kind == "rail" else ["bus_station"],
+            "lat": float(self.lats[i]),
+            "lng": float(self.lngs[i]),
+            "lines": self.lines[i].split("|") if self.lines[i] else [],
+            "operators": self.operators[i].split("|") if self.operators[i] else [],
+            "line_count": int(self.line_counts[i]),
+            "ridership": None if np.isnan(ridership) else int(ridership),
+            "ridership_tier": tier,
+            "ridership_label": RIDERSHIP_TIER_LABELS[tier] if tier >= 0 else None,
+            "importance": float(self.importance[i]),
+        }
+
+    def transport_data(self, lat: float, lng: float) -> Dict:
+        """get_transport_facilities と同じ形式の交通データ"""
+        rail = self.nearby(lat, lng, RAIL_SEARCH_RADIUS_M, "rail")
+        bus = self.nearby(lat, lng, BUS_SEARCH_RADIUS_M, "bus")
+        facilities = sorted(rail + bus, key=lambda s: s["distance"])
+        return {
+            "total": len(facilities),
+            "stations": rail,
+            "bus_stops": bus,
+            "facilities": facilities,
+            "source": "station_index"
+        }
+
+_station_index: Optional[StationIndex] = None
+_station_index_loaded = False
+
+def get_station_index() -> Optional[StationIndex]:
+    """駅索引を取得（初回のみ読み込み、ファイルがなければNone）"""
+    global _station_index, _station_index_loaded
+    if not _station_index_loaded:
+        _station_index_loaded = True
+        if Path(STATION_INDEX_PATH).exists():
+            try:
+                _station_index = StationIndex.load(STATION_INDEX_PATH)
+                logger.info(f"🚉 駅索引を読み込み: {STATION_INDEX_PATH} ({len(_station_index)}駅)")
+            except Exception as e:
+                logger.warning(f"⚠️ 駅索引の読み込み失敗: {e}")
+    return _station_index
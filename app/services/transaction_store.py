@@ -0,0 +1,346 @@
+"""
+ローカル不動産取引データ（国土交通省 不動産情報ライブラリ XPT001）
+同期ジョブで四半期ごとに取り込んだ取引を SQLite に保存し、価格推定の比較事例を検索する
+
+取引は R-tree（緯度経度）と取引時期（年×10+四半期、例: 20231）の索引で引くため、
+期間を何年分に広げても API を呼ばずに数ミリ秒で比較事例が得られます。
+同期状況（タイルごとに取り込み済みの最新四半期）も同じデータベースに記録し、
+同期ジョブは前回より新しい四半期だけを取得します。
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.coordinates import lat_lng_to_tile_xyz
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_STORE_PATH = os.getenv("TRANSACTION_STORE_PATH", "data/transactions.sqlite")
+# 比較事例を探す半径（メートル）と既定の期間（最新から遡る四半期数）
+TRANSACTION_SEARCH_RADIUS_M = float(os.getenv("TRANSACTION_SEARCH_RADIUS_M", 3000))
+TRANSACTION_DEFAULT_QUARTERS = int(os.getenv("TRANSACTION_DEFAULT_QUARTERS", 10))
+# 1回の検索で距離順に読み込む最大件数
+TRANSACTION_QUERY_LIMIT = 500
+
+# 同期の単位となるタイル（XPT001 のズームレベル）
+SYNC_ZOOM = 13
+# 価格情報区分コード（XPT001 の landTypeCode）
+LAND_TYPE_NAMES = {
+    "01": "宅地(土地)",
+    "02": "宅地(土地と建物)",
+    "07": "中古マンション等",
+    "10": "農地",
+    "11": "林地",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    period INTEGER NOT NULL,
+    land_type TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lng REAL NOT NULL,
+    properties TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_period ON transactions (period, land_type);
+CREATE VIRTUAL TABLE IF NOT EXISTS transactions_rtree USING rtree (id, min_lat, max_lat, min_lng, max_lng);
+CREATE TABLE IF NOT EXISTS sync_state (
+    tile TEXT PRIMARY KEY,
+    last_period INTEGER NOT NULL,
+    synced_at TEXT NOT NULL
+);
+"""
+
+def period_code(year: int, quarter: int) -> int:
+    return year * 10 + quarter
+
+def shift_period(period: int, quarters: int) -> int:
+    """四半期を quarters だけずらす（負なら過去）"""
+    year, quarter = divmod(period, 10)
+    index = year * 4 + (quarter - 1) + quarters
+    return period_code(index // 4, index % 4 + 1)
+
+def periods_between(from_period: int, to_period: int) -> List[int]:
+    """from_period 〜 to_period の四半期（両端を含む）"""
+    periods = []
+    period = from_period
+    while period <= to_period:
+        periods.append(period)
+        period = shift_period(period, 1)
+    return periods
+
+def latest_published_period(today: Optional[date] = None) -> int:
+    """公開済みと見なす最新の四半期（取引時期の翌四半期末以降に公開されるため2四半期前）"""
+    today = today or date.today()
+    return shift_period(period_code(today.year, (today.month - 1) // 3 + 1), -2)
+
+def parse_period(value) -> Optional[int]:
+    """"20231" / "2023年第1四半期" → 20231"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if re.fullmatch(r"\d{4}[1-4]", text):
+        return int(text)
+    match = re.search(r"(\d{4})年第([1-4１-４])四半期", text)
+    if match:
+        return period_code(int(match.group(1)), int(match.group(2).translate(str.maketrans("１２３４", "1234"))))
+    return None
+
+def sync_tile_key(x: int, y: int, z: int = SYNC_ZOOM) -> str:
+    return f"{z}/{x}/{y}"
+
+def land_type_of(properties: Dict) -> str:
+    """価格情報区分の名称 → コード（不明は空文字）"""
+    name = str(properties.get("land_type_name_ja") or properties.get("price_information_category_name_ja") or "")
+    for code, label in LAND_TYPE_NAMES.items():
+        if label in name.replace("（", "(").replace("）", ")"):
+            return code
+    return ""
+
+def _price_yen(value) -> float:
+    """"3700万円" / "370,000" → 円（不明は0）"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "").replace(",", "").replace("円", "").strip()
+    try:
+        if text.endswith("万"):
+            return float(text[:-1]) * 10000
+        return float(text) if text and text != "-" else 0.0
+    except ValueError:
+        return 0.0
+
+def unit_price_per_sqm(properties: Dict) -> Optional[float]:
+    """取引の㎡単価（円）。単価がなければ総額 ÷ 面積（求まらなければNone）"""
+    unit_price = _price_yen(properties.get("u_transaction_price_unit_price_square_meter_ja"))
+    if unit_price > 0:
+        return unit_price
+    total_price = _price_yen(properties.get("u_transaction_price_total_ja"))
+    try:
+        area = float(str(properties.get("u_area_ja") or "").replace(",", "").replace("㎡", ""))
+    except ValueError:
+        area = 0.0
+    return total_price / area if total_price > 0 and area > 0 else None
+
+def _fingerprint(properties: Dict, lat: float, lng: float, occurrence: int = 0) -> str:
+    # XPT001 には取引IDがないため、属性と座標（と同じ取得結果の中で何件目か）から同一取引を判定する
+    payload = json.dumps([properties, round(lat, 7), round(lng, 7)], ensure_ascii=False, sort_keys=True)
+    digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    return f"{digest}:{occurrence}" if occurrence else digest
+
+class TransactionStore:
+    """SQLite の取引ストア（検索は呼び出しごとに読み取り専用の接続を開く）"""
+
+    def __init__(self, path: str = TRANSACTION_STORE_PATH):
+        self.path = Path(path)
+
+    def connect(self, readonly: bool = True) -> sqlite3.Connection:
+        if readonly:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+        return connection
+
+    # ---- 同期（書き込み） ----
+
+    def add_features(self, connection: sqlite3.Connection, features: Iterable[Dict],
+                     period: Optional[int] = None, land_type: Optional[str] = None) -> int:
+        """GeoJSON フィーチャを追加（同一取引は無視）。追加件数を返す
+
+        features は1回の取得結果（タイル×四半期×価格情報区分）。属性がまったく同じ取引が複数あれば
+        別々の取引として保存し、同じ取得結果を再び追加したときだけ重複として無視します。
+        """
+        added = 0
+        occurrences: Counter = Counter()
+        for feature in features:
+            properties = feature.get("properties") or {}
+            coordinates = (feature.get("geometry") or {}).get("coordinates") or []
+            feature_period = period or parse_period(properties.get("point_in_time_name_ja"))
+            if len(coordinates) < 2 or feature_period is None:
+                continue
+            lng, lat = float(coordinates[0]), float(coordinates[1])
+            fingerprint = _fingerprint(properties, lat, lng)
+            occurrence = occurrences[fingerprint]
+            occurrences[fingerprint] += 1
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO transactions (fingerprint, period, land_type, lat, lng, properties) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (_fingerprint(properties, lat, lng, occurrence), feature_period, land_type or land_type_of(properties),
+                 lat, lng, json.dumps(properties, ensure_ascii=False))
+            )
+            if cursor.rowcount:
+                connection.execute(
+                    "INSERT INTO transactions_rtree VALUES (?, ?, ?, ?, ?)",
+                    (cursor.lastrowid, lat, lat, lng, lng)
+                )
+                added += 1
+        return added
+
+    def mark_synced(self, connection: sqlite3.Connection, tile: str, period: int):
+        connection.execute(
+            "INSERT INTO sync_state (tile, last_period, synced_at) VALUES (?, ?, datetime('now')) "
+            "ON CONFLICT(tile) DO UPDATE SET last_period = excluded.last_period, synced_at = excluded.synced_at",
+            (tile, period)
+        )
+
+    def sync_state(self, connection: sqlite3.Connection) -> Dict[str, int]:
+        return dict(connection.execute("SELECT tile, last_period FROM sync_state"))
+
+    # ---- 検索（読み取り） ----
+
+    def covers(self, lat: float, lng: float, radius_m: float = TRANSACTION_SEARCH_RADIUS_M) -> bool:
+        """地点から半径内にかかるタイルがすべて同期済みか（query と同じ範囲）"""
+        if not self.path.exists():
+            return False
+        dlat = radius_m / 111320
+        dlng = radius_m / (111320 * max(math.cos(math.radians(lat)), 0.1))
+        west, north, _ = lat_lng_to_tile_xyz(lat + dlat, lng - dlng, SYNC_ZOOM)
+        east, south, _ = lat_lng_to_tile_xyz(lat - dlat, lng + dlng, SYNC_ZOOM)
+        tiles = {sync_tile_key(x, y) for x in range(west, east + 1) for y in range(north, south + 1)}
+        connection = self.connect()
+        try:
+            # 同期済みタイルは増え続けるため、対象タイルだけを主キーで引く
+            synced = connection.execute(
+                f"SELECT COUNT(*) FROM sync_state WHERE tile IN ({','.join('?' * len(tiles))})", list(tiles)
+            ).fetchone()[0]
+        finally:
+            connection.close()
+        return synced == len(tiles)
+
+    def period_range(self) -> Optional[Dict[str, int]]:
+        connection = self.connect()
+        try:
+            first, last, count = connection.execute(
+                "SELECT MIN(period), MAX(period), COUNT(*) FROM transactions"
+            ).fetchone()
+        finally:
+            connection.close()
+        return {"from": first, "to": last, "count": count} if count else None
+
+    def data_version(self) -> Optional[str]:
+        """最後に同期した日時（タイルキャッシュなどの版として使う）"""
+        connection = self.connect()
+        try:
+            return connection.execute("SELECT MAX(synced_at) FROM sync_state").fetchone()[0]
+        finally:
+            connection.close()
+
+    def unit_prices(self, from_period: Optional[int] = None, bbox: Optional[Tuple[float, float, float, float]] = None):
+        """取引の (緯度, 経度, ㎡単価) 配列（from_period 以降、単価が求まらない取引は除く）
+
+        bbox: (南, 西, 北, 東) の範囲のみ（R-tree で引く）
+        """
+        connection = self.connect()
+        try:
+            if bbox is None:
+                rows = connection.execute(
+                    "SELECT lat, lng, properties FROM transactions WHERE period >= ?", (from_period or 0,)
+                )
+            else:
+                south, west, north, east = bbox
+                rows = connection.execute(
+                    "SELECT t.lat, t.lng, t.properties FROM transactions_rtree r "
+                    "CROSS JOIN transactions t ON t.id = r.id "
+                    "WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lng >= ? AND r.max_lng <= ? "
+                    "AND t.period >= ?",
+                    (south, north, west, east, from_period or 0)
+                )
+            points = []
+            for lat, lng, properties in rows:
+                price = unit_price_per_sqm(json.loads(properties))
+                if price:
+                    points.append((lat, lng, price))
+        finally:
+            connection.close()
+        return tuple(np.array(column, dtype=np.float64) for column in zip(*points)) if points else (
+            np.zeros(0), np.zeros(0), np.zeros(0)
+        )
+
+    def query(self, lat: float, lng: float, radius_m: float = TRANSACTION_SEARCH_RADIUS_M,
+              from_period: Optional[int] = None, to_period: Optional[int] = None,
+              land_types: Optional[List[str]] = None, limit: int = TRANSACTION_QUERY_LIMIT) -> Dict:
+        """半径・期間内の取引を近い順に XPT001 と同じ GeoJSON 形式で返す
+
+        期間の指定がなければ、ストア内の最新四半期から TRANSACTION_DEFAULT_QUARTERS 分。
+        """
+        dlat = radius_m / 111320
+        cos_lat = max(math.cos(math.radians(lat)), 0.1)
+        dlng = radius_m / (111320 * cos_lat)
+        connection = self.connect()
+        try:
+            if to_period is None:
+                to_period = connection.execute("SELECT MAX(period) FROM transactions").fetchone()[0] or 0
+            if from_period is None:
+                from_period = shift_period(to_period, -(TRANSACTION_DEFAULT_QUARTERS - 1))
+            # CROSS JOIN で R-tree を外側に固定（期間索引から始めると全期間を走査するため）
+            sql = (
+                "SELECT t.period, t.land_type, t.lat, t.lng, t.properties FROM transactions_rtree r "
+                "CROSS JOIN transactions t ON t.id = r.id "
+                "WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lng >= ? AND r.max_lng <= ? "
+                "AND t.period BETWEEN ? AND ?"
+            )
+            params: List = [lat - dlat, lat + dlat, lng - dlng, lng + dlng, from_period, to_period]
+            if land_types:
+                sql += f" AND t.land_type IN ({','.join('?' * len(land_types))})"
+                params.extend(land_types)
+            # 平面近似の距離順で上限件数まで
+            sql += " ORDER BY (t.lat - ?) * (t.lat - ?) + (t.lng - ?) * (t.lng - ?) * ? LIMIT ?"
+            params.extend([lat, lat, lng, lng, cos_lat * cos_lat, limit])
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+        features = []
+        for period, land_type, row_lat, row_lng, properties in rows:
+            dy = (row_lat - lat) * 111320
+            dx = (row_lng - lng) * 111320 * cos_lat
+            if dx * dx + dy * dy > radius_m * radius_m:
+                continue
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [row_lng, row_lat]},
+                "properties": {**json.loads(properties), "period": period, "land_type": land_type},
+            })
+        return {"type": "FeatureCollection", "features": features,
+                "period": {"from": from_period, "to": to_period}}
+
+    def query_if_covered(self, lat: float, lng: float, **kwargs) -> Optional[Dict]:
+        """covers の確認と query をまとめて実行（同期済みでなければNone）"""
+        if not self.covers(lat, lng, kwargs.get("radius_m", TRANSACTION_SEARCH_RADIUS_M)):
+            return None
+        return self.query(lat, lng, **kwargs)
+
+_transaction_store: Optional[TransactionStore] = None
+_transaction_store_loaded = False
+
+def get_transaction_store() -> Optional[TransactionStore]:
+    """取引ストアを取得（ファイルがなければNone）"""
+    global _transaction_store, _transaction_store_loaded
+    if not _transaction_store_loaded:
+        _transaction_store_loaded = True
+        if Path(TRANSACTION_STORE_PATH).exists():
+            try:
+                _transaction_store = TransactionStore(TRANSACTION_STORE_PATH)
+                summary = _transaction_store.period_range()
+                if summary:
+                    logger.info(
+                        f"🏘️ 取引ストアを読み込み: {TRANSACTION_STORE_PATH} "
+                        f"({summary['count']}件 / {summary['from']}〜{summary['to']})"
+                    )
+            except Exception as e:
+                _transaction_store = None
+                logger.warning(f"⚠️ 取引ストアの読み込み失敗: {e}")
+    return _transaction_store
@@ -0,0 +1,214 @@
+"""
+ベクトルタイル（MVT）の生成とディスクキャッシュ
+地図で表示範囲のタイルだけを取得できるように、ローカルのデータからレイヤーを作る
+
+レイヤー:
+    facilities: ローカルPOIストアの施設（点。低ズームではタイプごとにグリッドでクラスタリング）
+    scores:     スコアアトラスのメッシュ（矩形。低ズームでは粗いメッシュに平均して集約）
+    prices:     取引ストアの㎡単価の中央値（矩形。メッシュの大きさはズームに合わせる）
+
+エンコードしたタイルは <TILE_CACHE_PATH>/<レイヤー>/<データの版>/<z>/<x>/<y>.mvt に保存します。
+データの版はストアの構築日時・同期日時から求めるため、ストアを作り直すと自動的に新しい版の
+キャッシュに切り替わります（古い版のディレクトリは削除して構いません）。
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.poi_store import get_poi_store
+from app.services.score_atlas import get_score_atlas
+from app.services.transaction_store import (
+    TRANSACTION_DEFAULT_QUARTERS, get_transaction_store, latest_published_period, shift_period
+)
+from app.utils.jis_mesh import indices_from_codes, mesh_centers, mesh_codes, mesh_size_deg
+from app.utils.mvt import (
+    GEOM_POINT, GEOM_POLYGON, MVT_EXTENT, encode_tile, point_geometry, rectangle_geometry,
+    tile_bounds, tile_coordinates
+)
+
+logger = logging.getLogger(__name__)
+
+TILE_CACHE_PATH = os.getenv("TILE_CACHE_PATH", "data/tile_cache")
+# エンコード方法を変えたら上げる（キャッシュの版に含める）
+TILE_FORMAT_VERSION = 1
+TILE_MAX_ZOOM = 18
+# レイヤーごとの最小ズーム（これより小さいズームは空のタイル）
+TILE_MIN_ZOOM = {"facilities": 11, "scores": 6, "prices": 10}
+# 施設をクラスタリングする最大ズームとクラスタのグリッド（ピクセル）
+FACILITY_CLUSTER_MAX_ZOOM = 14
+FACILITY_CLUSTER_PX = 32
+# メッシュを描く最小の大きさ（ピクセル）。これより小さくなるズームでは粗いメッシュに集約する
+MIN_MESH_PX = 4
+# タイル境界の外側に含める幅（タイル内座標）
+TILE_BUFFER = 64
+# ㎡単価を表示する最も細かいメッシュ（4: 約500m）
+PRICE_MESH_LEVEL = 4
+
+TILE_LAYERS = tuple(TILE_MIN_ZOOM)
+
+def mesh_level_for_zoom(z: int, finest_level: int) -> int:
+    """ズーム z で MIN_MESH_PX 以上の大きさになる最も細かいメッシュのレベル"""
+    for level in range(finest_level, 1, -1):
+        if mesh_size_deg(level)[1] / 360.0 * (2 ** z) * 256 >= MIN_MESH_PX:
+            return level
+    return 1
+
+def _buffered_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    south, west, north, east = tile_bounds(z, x, y)
+    pad_lat = (north - south) * TILE_BUFFER / MVT_EXTENT
+    pad_lng = (east - west) * TILE_BUFFER / MVT_EXTENT
+    return south - pad_lat, west - pad_lng, north + pad_lat, east + pad_lng
+
+def _mesh_features(codes: np.ndarray, level: int, z: int, x: int, y: int, properties: List[Dict]) -> List:
+    """メッシュ → タイル範囲に切り詰めた矩形の features"""
+    rows, cols = indices_from_codes(codes, level)
+    dlat, dlng = mesh_size_deg(level)
+    # 北西・南東の角（タイル内の y は下向き）
+    x0, y0 = tile_coordinates(rows * dlat + dlat, 100.0 + cols * dlng, z, x, y)
+    x1, y1 = tile_coordinates(rows * dlat, 100.0 + (cols + 1) * dlng, z, x, y)
+    lo, hi = -TILE_BUFFER, MVT_EXTENT + TILE_BUFFER
+    x0, y0 = np.clip(x0, lo, hi), np.clip(y0, lo, hi)
+    x1, y1 = np.clip(x1, lo, hi), np.clip(y1, lo, hi)
+    features = []
+    for i in np.flatnonzero((x1 > x0) & (y1 > y0)).tolist():
+        features.append((
+            GEOM_POLYGON, rectangle_geometry(int(x0[i]), int(y0[i]), int(x1[i]), int(y1[i])), properties[i]
+        ))
+    return features
+
+def _aggregate(codes: np.ndarray, level: int, target_level: int):
+    """細かいメッシュ → (粗いメッシュのコード, 各メッシュの番号)"""
+    if target_level == level:
+        unique, inverse = np.unique(codes, return_inverse=True)
+        return unique, inverse
+    lats, lngs = mesh_centers(codes, level)
+    return np.unique(mesh_codes(lats, lngs, target_level), return_inverse=True)
+
+def facility_features(z: int, x: int, y: int) -> List:
+    store = get_poi_store()
+    south, west, north, east = _buffered_bounds(z, x, y)
+    cluster = z <= FACILITY_CLUSTER_MAX_ZOOM
+    cell = FACILITY_CLUSTER_PX * MVT_EXTENT // 256
+    features = []
+    for place_type in store.types:
+        indices = store.query_bbox(place_type, south, west, north, east)
+        if not len(indices):
+            continue
+        px, py = tile_coordinates(store._columns["lat"][indices], store._columns["lng"][indices], z, x, y)
+        if cluster:
+            # グリッドのセルごとに1点（位置は平均、件数を属性に）
+            cells = (px // cell + 1) * 1024 + (py // cell + 1)
+            unique, first, inverse, counts = np.unique(cells, return_index=True, return_inverse=True, return_counts=True)
+            mean_x = np.bincount(inverse, weights=px) / counts
+            mean_y = np.bincount(inverse, weights=py) / counts
+            for k in range(len(unique)):
+                if counts[k] > 1:
+                    features.append((GEOM_POINT, point_geometry(int(round(mean_x[k])), int(round(mean_y[k]))),
+                                     {"type": place_type, "cluster": True, "point_count": int(counts[k])}))
+                else:
+                    features.extend(_facility_points(store, indices[first[k]:first[k] + 1],
+                                                     px[first[k]:first[k] + 1], py[first[k]:first[k] + 1], place_type))
+        else:
+            features.extend(_facility_points(store, indices, px, py, place_type))
+    return features
+
+def _facility_points(store, indices: np.ndarray, px: np.ndarray, py: np.ndarray, place_type: str) -> List:
+    features = []
+    ratings = store._columns["rating"][indices].tolist()
+    for k, i in enumerate(indices.tolist()):
+        properties = {"type": place_type, "name": store._string("name", i), "place_id": store._string("place_id", i)}
+        if ratings[k] > 0:
+            properties["rating"] = round(float(ratings[k]), 1)
+        features.append((GEOM_POINT, point_geometry(int(px[k]), int(py[k])), properties))
+    return features
+
+def score_features(z: int, x: int, y: int) -> List:
+    atlas = get_score_atlas()
+    rows = atlas.rows_in_bbox(*_buffered_bounds(z, x, y))
+    if not len(rows):
+        return []
+    level = mesh_level_for_zoom(z, atlas.level)
+    codes, inverse = _aggregate(atlas.codes[rows], atlas.level, level)
+    counts = np.bincount(inverse)
+    scores = atlas.float_scores()[rows]
+    means = np.stack([np.bincount(inverse, weights=scores[:, c]) / counts for c in range(scores.shape[1])], axis=1)
+    properties = []
+    for code, values in zip(codes.tolist(), means.tolist()):
+        item = {"mesh_code": str(code), "total": round(sum(values) / len(values), 1)}
+        item.update({category: round(v, 1) for category, v in zip(atlas.categories, values)})
+        properties.append(item)
+    return _mesh_features(codes, level, z, x, y, properties)
+
+def price_features(z: int, x: int, y: int) -> List:
+    store = get_transaction_store()
+    from_period = shift_period(latest_published_period(), -(TRANSACTION_DEFAULT_QUARTERS - 1))
+    lats, lngs, prices = store.unit_prices(from_period, bbox=_buffered_bounds(z, x, y))
+    if not len(prices):
+        return []
+    level = mesh_level_for_zoom(z, PRICE_MESH_LEVEL)
+    codes = mesh_codes(lats, lngs, level)
+    order = np.lexsort((prices, codes))
+    codes, prices = codes[order], prices[order]
+    unique, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+    properties = [
+        {"mesh_code": str(code), "price_per_sqm": int(round(float(np.median(prices[start:start + count])))),
+         "count": int(count)}
+        for code, start, count in zip(unique.tolist(), starts.tolist(), counts.tolist())
+    ]
+    return _mesh_features(unique, level, z, x, y, properties)
+
+LAYER_BUILDERS = {"facilities": facility_features, "scores": score_features, "prices": price_features}
+
+_snapshot_versions: Dict[str, str] = {}
+
+def layer_version(layer: str) -> Optional[str]:
+    """レイヤーのデータの版（元のストアがなければNone）"""
+    if layer == "facilities":
+        store = get_poi_store()
+        if store is None:
+            return None
+        # 読み込み済みのストアの内容に合わせるため、プロセスで最初に求めた版を使い続ける
+        if layer not in _snapshot_versions:
+            stat = (store.path / "meta.json").stat()
+            _snapshot_versions[layer] = f"{store.meta['count']}-{stat.st_mtime_ns}"
+        source = _snapshot_versions[layer]
+    elif layer == "scores":
+        atlas = get_score_atlas()
+        if atlas is None:
+            return None
+        source = f"{atlas.meta.get('built_at')}-{len(atlas)}"
+    else:
+        store = get_transaction_store()
+        if store is None:
+            return None
+        source = f"{store.data_version()}-{latest_published_period()}-{TRANSACTION_DEFAULT_QUARTERS}"
+    return hashlib.sha1(f"{TILE_FORMAT_VERSION}:{layer}:{source}".encode("utf-8")).hexdigest()[:12]
+
+def get_tile(layer: str, z: int, x: int, y: int) -> Optional[bytes]:
+    """レイヤーのタイル（キャッシュになければ生成して保存。元のストアがなければNone）"""
+    version = layer_version(layer)
+    if version is None:
+        return None
+    path = Path(TILE_CACHE_PATH) / layer / version / str(z) / str(x) / f"{y}.mvt"
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    features = LAYER_BUILDERS[layer](z, x, y) if z >= TILE_MIN_ZOOM[layer] else []
+    tile = encode_tile({layer: features})
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 同じタイルを同時に生成したワーカー同士で壊れたファイルを読まないよう、一時ファイルから置き換える
+        fd, tmp = tempfile.mkstemp(prefix=".tile_", dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(tile)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"⚠️ タイルキャッシュの保存失敗: {path} ({e})")
+    return tile
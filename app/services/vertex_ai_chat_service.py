@@ -28,6 +28,8 @@ except Exception as e:
     GenerativeModel = None
     GenerationConfig = None
 
+from app.services.cache_backend import SESSION_CACHE_TTL, SessionStore
+
 logger = logging.getLogger(__name__)
 
 class VertexAIChatService:
@@ -43,8 +45,8 @@ class VertexAIChatService:
         self.model_name = "gemini-1.5-pro"  # または "gemini-1.5-flash"
         
         # セッション管理
-        self.session_contexts: Dict[str, Dict] = {}
-        self.session_histories: Dict[str, List[Dict]] = {}
+        self.session_contexts = SessionStore("vertex_chat_context", SESSION_CACHE_TTL)
+        self.session_histories = SessionStore("vertex_chat_history", SESSION_CACHE_TTL)
         
         # Vertex AI初期化
         if VERTEX_AI_AVAILABLE and self.project_id:
@@ -105,15 +107,12 @@ class VertexAIChatService:
         """
         try:
             # セッション履歴を初期化（必要に応じて）
-            if session_id not in self.session_histories:
-                self.session_histories[session_id] = []
-            
             # コンテキストを更新
             if context:
-                self.session_contexts[session_id] = context
+                await self.session_contexts.set(session_id, context)
             
             # 現在のコンテキストを取得
-            current_context = self.session_contexts.get(session_id, {})
+            current_context = await self.session_contexts.get(session_id, {})
             
             # Vertex AIが利用可能かチェック
             if not self.model:
@@ -135,7 +134,7 @@ class VertexAIChatService:
         """Vertex AIを使用して応答を生成"""
         try:
             # プロンプトを構築
-            full_prompt = self._build_full_prompt(message, session_id, context)
+            full_prompt = await self._build_full_prompt(message, session_id, context)
             
             # 生成設定
             generation_config = GenerationConfig(
@@ -157,14 +156,14 @@ class VertexAIChatService:
             ai_response = response.text
             
             # 履歴に追加
-            self.session_histories[session_id].extend([
+            history = await self.session_histories.get(session_id, [])
+            history.extend([
                 {"role": "user", "content": message},
                 {"role": "assistant", "content": ai_response}
             ])
             
-            # 履歴が長くなりすぎた場合は古いものを削除
-            if len(self.session_histories[session_id]) > 20:
-                self.session_histories[session_id] = self.session_histories[session_id][-20:]
+            # 履歴が長くなりすぎた場合は古いものを削除（ワーカー間で共有するため保存し直す）
+            await self.session_histories.set(session_id, history[-20:])
             
             logger.info(f"✅ Vertex AI応答生成成功: session_id={session_id}")
             return ai_response
@@ -173,7 +172,7 @@ class VertexAIChatService:
             logger.error(f"❌ Vertex AI API呼び出しエラー: {e}")
             return await self._generate_fallback_response(message, context)
     
-    def _build_full_prompt(self, message: str, session_id: str, context: Dict) -> str:
+    async def _build_full_prompt(self, message: str, session_id: str, context: Dict) -> str:
         """完全なプロンプトを構築"""
         prompt_parts = [self.system_prompt]
         
@@ -184,7 +183,7 @@ class VertexAIChatService:
                 prompt_parts.append(context_message)
         
         # 会話履歴を追加（最近の5件まで）
-        history = self.session_histories[session_id][-10:]
+        history = (await self.session_histories.get(session_id, []))[-10:]
         if history:
             prompt_parts.append("\n【会話履歴】")
             for entry in history:
@@ -376,19 +375,17 @@ Location Insights AI (Vertex AI版) では、以下のような地域情報に
     
     async def update_session_context(self, session_id: str, context: Dict):
         """セッションのコンテキストを更新"""
-        self.session_contexts[session_id] = context
+        await self.session_contexts.set(session_id, context)
         logger.info(f"📝 セッションコンテキスト更新: session_id={session_id}")
     
-    def get_session_history(self, session_id: str) -> List[Dict]:
+    async def get_session_history(self, session_id: str) -> List[Dict]:
         """セッションの会話履歴を取得"""
-        return self.session_histories.get(session_id, [])
+        return await self.session_histories.get(session_id, [])
     
-    def clear_session_history(self, session_id: str):
+    async def clear_session_history(self, session_id: str):
         """セッションの会話履歴をクリア"""
-        if session_id in self.session_histories:
-            del self.session_histories[session_id]
-        if session_id in self.session_contexts:
-            del self.session_contexts[session_id]
+        await self.session_histories.delete(session_id)
+        await self.session_contexts.delete(session_id)
         logger.info(f"🗑️ セッション履歴クリア: session_id={session_id}")
 
     def get_model_info(self) -> Dict:
@@ -0,0 +1,285 @@
+"""
+徒歩ネットワーク（歩行者道路グラフ）による徒歩距離・徒歩分数の計算
+直線距離では川・線路・幹線道路の迂回が反映されないため、OSM の道路グラフ上で距離を求める
+
+グラフはメモリマップした CSR（indptr / indices / weights）で、ノードは空間セル順に並べてあります。
+検索時は出発地から WALKING_MAX_DISTANCE_M 以内（直線距離で上限が決まる）のノードだけを
+取り出した局所グラフに対して、距離バケット（delta-stepping）単位でまとめて緩和する
+ベクトル化した最短路探索を行い、1回の探索で周辺の全ノードへの徒歩距離（WalkingField）を得ます。
+同じ地点への複数カテゴリの施設検索はこの結果を使い回します。
+"""
+import json
+import logging
+import math
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.utils.atomic_dir import swap_directory
+
+logger = logging.getLogger(__name__)
+
+WALKING_NETWORK_PATH = os.getenv("WALKING_NETWORK_PATH", "data/walking_network")
+# 徒歩距離を求める上限（これより遠い施設は直線距離のまま）
+WALKING_MAX_DISTANCE_M = float(os.getenv("WALKING_MAX_DISTANCE_M", 2000))
+WALKING_FIELD_CACHE_SIZE = int(os.getenv("WALKING_FIELD_CACHE_SIZE", 32))
+
+# 不動産の表示に関する公正競争規約の「徒歩1分 = 80m」
+WALK_METERS_PER_MINUTE = 80
+# ノードの並び順に使う空間セル（度）
+NODE_CELL_DEG = 0.005
+# 施設・出発地をグラフに載せる際の最大スナップ距離と、その検索用セル
+SNAP_MAX_M = 250
+SNAP_CELL_DEG = 0.003
+# 距離バケットの幅（メートル）
+BUCKET_WIDTH_M = 100.0
+
+_LNG_BITS = 20
+METERS_PER_DEG = 111320
+
+def walking_minutes(distance_m: float) -> int:
+    """徒歩分数（80m = 1分、端数切り上げ）"""
+    return max(1, math.ceil(distance_m / WALK_METERS_PER_MINUTE))
+
+def _cell_keys(lats, lngs, cell_deg: float) -> np.ndarray:
+    lat_idx = np.floor((np.asarray(lats) + 90.0) / cell_deg).astype(np.int64)
+    lng_idx = np.floor((np.asarray(lngs) + 180.0) / cell_deg).astype(np.int64)
+    return (lat_idx << _LNG_BITS) | lng_idx
+
+def _concat_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """[starts[i], ends[i]) を連結した添字列"""
+    counts = ends - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(total)
+
+def _key_ranges(keys: np.ndarray, lat: float, lng: float, radius: float, cell_deg: float):
+    """(lat, lng) から radius 以内を覆うセル行ごとの [lo, hi) 範囲（keys はソート済みのセルキー）"""
+    dlat = radius / METERS_PER_DEG
+    dlng = radius / (METERS_PER_DEG * max(math.cos(math.radians(lat)), 0.1))
+    row0, row1 = int((lat - dlat + 90.0) // cell_deg), int((lat + dlat + 90.0) // cell_deg)
+    col0, col1 = int((lng - dlng + 180.0) // cell_deg), int((lng + dlng + 180.0) // cell_deg)
+    rows = np.arange(row0, row1 + 1, dtype=np.int64) << _LNG_BITS
+    return np.searchsorted(keys, rows | col0, side="left"), np.searchsorted(keys, rows | col1, side="right")
+
+def _planar_distances(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """近距離用の平面近似距離（メートル）"""
+    dy = (lats - lat) * METERS_PER_DEG
+    dx = (lngs - lng) * METERS_PER_DEG * math.cos(math.radians(lat))
+    return np.sqrt(dx * dx + dy * dy)
+
+def shortest_distances(indptr: np.ndarray, targets: np.ndarray, weights: np.ndarray,
+                       source: int, limit: float, bucket_width: float = BUCKET_WIDTH_M) -> np.ndarray:
+    """単一始点の最短距離（limit 超は inf）
+
+    距離が現在のバケット内にある更新済みノードをまとめて緩和し、バケット内が落ち着いたら
+    次のバケットへ進む（delta-stepping）。1ノードずつヒープから取り出す Dijkstra と結果は同じ。
+    """
+    n = len(indptr) - 1
+    dist = np.full(n, np.inf)
+    dist[source] = 0.0
+    dirty = np.zeros(n, dtype=bool)
+    dirty[source] = True
+    threshold = bucket_width
+    while True:
+        while True:
+            frontier = np.flatnonzero(dirty & (dist < threshold))
+            if not len(frontier):
+                break
+            dirty[frontier] = False
+            starts, ends = indptr[frontier], indptr[frontier + 1]
+            edges = _concat_ranges(starts, ends)
+            if not len(edges):
+                continue
+            heads = targets[edges]
+            candidate = np.repeat(dist[frontier], ends - starts) + weights[edges]
+            improved = candidate < np.minimum(dist[heads], limit)
+            if improved.any():
+                heads = heads[improved]
+                np.minimum.at(dist, heads, candidate[improved])
+                dirty[heads] = True
+        if not dirty.any():
+            return dist
+        threshold = (math.floor(dist[dirty].min() / bucket_width) + 1) * bucket_width
+
+def write_walking_network(lats, lngs, edge_u, edge_v, lengths, path: str = WALKING_NETWORK_PATH) -> Dict:
+    """ノード座標と無向辺からグラフを作成（一時ディレクトリに書いてから置き換え）"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    keys = _cell_keys(lats, lngs, NODE_CELL_DEG)
+    order = np.argsort(keys, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+
+    # 歩行者は一方通行の制約を受けないため両方向の辺を持たせる
+    u = rank[np.asarray(edge_u, dtype=np.int64)]
+    v = rank[np.asarray(edge_v, dtype=np.int64)]
+    sources = np.concatenate([u, v])
+    heads = np.concatenate([v, u])
+    weights = np.concatenate([lengths, lengths]).astype(np.float32)
+    edge_order = np.lexsort((heads, sources))
+    indptr = np.zeros(len(order) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(sources, minlength=len(order)))
+
+    columns = {
+        "lat": lats[order],
+        "lng": lngs[order],
+        "cell_keys": keys[order],
+        "indptr": indptr,
+        "indices": heads[edge_order].astype(np.int32),
+        "weights": weights[edge_order],
+    }
+    meta = {"nodes": int(len(order)), "edges": int(len(sources)), "node_cell_deg": NODE_CELL_DEG}
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".walking_network_", dir=target.parent))
+    for column, values in columns.items():
+        np.save(tmp_dir / f"{column}.npy", values)
+    with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    swap_directory(tmp_dir, target)
+    return meta
+
+class WalkingField:
+    """1地点からの周辺ノードへの徒歩距離（上限内で到達できないノードは inf）"""
+
+    def __init__(self, lats: np.ndarray, lngs: np.ndarray, distances: np.ndarray):
+        order = np.argsort(_cell_keys(lats, lngs, SNAP_CELL_DEG), kind="stable")
+        self.lats = lats[order]
+        self.lngs = lngs[order]
+        self.distances = distances[order]
+        self.keys = _cell_keys(self.lats, self.lngs, SNAP_CELL_DEG)
+
+    def __len__(self) -> int:
+        return len(self.distances)
+
+    def distance_to(self, lat: float, lng: float) -> Optional[float]:
+        """地点までの徒歩距離（最寄りノードにスナップ、到達できなければNone）"""
+        lo, hi = _key_ranges(self.keys, lat, lng, SNAP_MAX_M, SNAP_CELL_DEG)
+        candidates = _concat_ranges(lo, hi)
+        if not len(candidates):
+            return None
+        snap = _planar_distances(lat, lng, self.lats[candidates], self.lngs[candidates])
+        nearest = int(np.argmin(snap))
+        distance = self.distances[candidates[nearest]]
+        if snap[nearest] > SNAP_MAX_M or not np.isfinite(distance):
+            return None
+        return float(distance + snap[nearest])
+
+class WalkingNetwork:
+    """メモリマップした徒歩グラフ（読み取り専用）"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / "meta.json", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self._columns: Dict[str, np.ndarray] = {}
+        for column_file in self.path.glob("*.npy"):
+            self._columns[column_file.stem] = np.load(column_file, mmap_mode="r").view(np.ndarray)
+        self._fields: "OrderedDict[tuple, Optional[WalkingField]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return self.meta["nodes"]
+
+    def _local_graph(self, lat: float, lng: float, radius: float):
+        """radius 以内のセルのノードと、その間の辺だけの CSR"""
+        c = self._columns
+        lo, hi = _key_ranges(c["cell_keys"], lat, lng, radius, self.meta["node_cell_deg"])
+        nodes = _concat_ranges(lo, hi)  # セル順に並ぶためソート済み
+        starts, ends = c["indptr"][nodes], c["indptr"][nodes + 1]
+        edges = _concat_ranges(starts, ends)
+        sources = np.repeat(np.arange(len(nodes)), ends - starts)
+        heads_global = c["indices"][edges]
+        heads = np.minimum(np.searchsorted(nodes, heads_global), max(len(nodes) - 1, 0))
+        inside = nodes[heads] == heads_global if len(nodes) else np.zeros(0, dtype=bool)
+        sources, heads, weights = sources[inside], heads[inside], c["weights"][edges][inside]
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(sources, minlength=len(nodes)))
+        return nodes, indptr, heads, weights
+
+    def compute_field(self, lat: float, lng: float, limit: float = WALKING_MAX_DISTANCE_M) -> Optional[WalkingField]:
+        """出発地から limit 以内の全ノードへの徒歩距離（出発地がグラフから遠ければNone）"""
+        nodes, indptr, heads, weights = self._local_graph(lat, lng, limit + SNAP_MAX_M)
+        if not len(nodes):
+            return None
+        node_lats, node_lngs = self._columns["lat"][nodes], self._columns["lng"][nodes]
+        snap = _planar_distances(lat, lng, node_lats, node_lngs)
+        source = int(np.argmin(snap))
+        if snap[source] > SNAP_MAX_M:
+            return None
+        dist = shortest_distances(indptr, heads, weights, source, limit) + snap[source]
+        return WalkingField(node_lats, node_lngs, dist)
+
+    def field(self, lat: float, lng: float) -> Optional[WalkingField]:
+        """compute_field の結果を地点ごとにキャッシュ（1回の分析で全カテゴリが共有）"""
+        key = (round(lat, 5), round(lng, 5))
+        if key in self._fields:
+            self._fields.move_to_end(key)
+            return self._fields[key]
+        field = self.compute_field(lat, lng)
+        self._fields[key] = field
+        if len(self._fields) > WALKING_FIELD_CACHE_SIZE:
+            self._fields.popitem(last=False)
+        return field
+
+_walking_network: Optional[WalkingNetwork] = None
+_walking_network_loaded = False
+
+def get_walking_network() -> Optional[WalkingNetwork]:
+    """徒歩グラフを取得（初回のみマップ、存在しなければNone）"""
+    global _walking_network, _walking_network_loaded
+    if not _walking_network_loaded:
+        _walking_network_loaded = True
+        if (Path(WALKING_NETWORK_PATH) / "meta.json").exists():
+            try:
+                _walking_network = WalkingNetwork(WALKING_NETWORK_PATH)
+                logger.info(f"🚶 徒歩ネットワークをマップ: {WALKING_NETWORK_PATH} ({len(_walking_network)}ノード)")
+            except Exception as e:
+                logger.warning(f"⚠️ 徒歩ネットワークの読み込み失敗: {e}")
+    return _walking_network
+
+def _place_location(place: Dict):
+    location = place.get("geometry", {}).get("location")
+    if location:
+        return location.get("lat"), location.get("lng")
+    return place.get("lat"), place.get("lng")
+
+def annotate_walking_distances(origin: Dict[str, float], places: List[Dict]) -> List[Dict]:
+    """施設に徒歩距離・徒歩分数を付け、distance を徒歩距離に置き換えて並べ直す
+
+    徒歩ネットワークがない・出発地がグラフ外の場合はそのまま返す。
+    上限内で到達できない（またはグラフから遠い）施設は直線距離のままとし、walking_minutes は None。
+    """
+    network = get_walking_network()
+    if network is None or not places:
+        return places
+    field = network.field(origin["lat"], origin["lng"])
+    if field is None:
+        return places
+
+    for place in places:
+        lat, lng = _place_location(place)
+        if lat is None or lng is None:
+            continue
+        # 同じ施設を二度渡されても直線距離を上書きしない
+        straight = place.get("straight_distance", place.get("distance"))
+        walking = field.distance_to(lat, lng)
+        place["straight_distance"] = straight
+        if walking is None:
+            place["walking_distance"] = None
+            place["walking_minutes"] = None
+            place["distance"] = straight
+        else:
+            place["walking_distance"] = round(walking)
+            place["walking_minutes"] = walking_minutes(walking)
+            place["distance"] = round(walking) if isinstance(straight, int) else walking
+    places.sort(key=lambda p: p.get("distance", float("inf")))
+    return places
@@ -0,0 +1,74 @@
+"""
+住所関連ユーティリティ
+都道府県の抽出と住所文字列の正規化
+"""
+import re
+import unicodedata
+from typing import Optional
+
+# 都道府県（JISコード順）
+PREFECTURES = [
+    "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県",
+    "茨城県", "栃木県", "群馬県", "埼玉県", "千葉県", "東京都", "神奈川県",
+    "新潟県", "富山県", "石川県", "福井県", "山梨県", "長野県", "岐阜県",
+    "静岡県", "愛知県", "三重県", "滋賀県", "京都府", "大阪府", "兵庫県",
+    "奈良県", "和歌山県", "鳥取県", "島根県", "岡山県", "広島県", "山口県",
+    "徳島県", "香川県", "愛媛県", "高知県", "福岡県", "佐賀県", "長崎県",
+    "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県"
+]
+
+# 都道府県名 → JIS都道府県コード（"01"〜"47"）
+PREFECTURE_CODES = {name: f"{i + 1:02d}" for i, name in enumerate(PREFECTURES)}
+
+_PREFECTURE_PATTERN = re.compile("|".join(PREFECTURES))
+
+def normalize_address(address: str) -> str:
+    """住所文字列を正規化（全角英数の半角化・空白除去・ハイフン統一）"""
+    if not address:
+        return ""
+    text = unicodedata.normalize("NFKC", address)
+    text = re.sub(r"\s+", "", text)
+    text = re.sub(r"[‐‑‒–—―−－]", "-", text)
+    text = re.sub(r"^日本[、,]?", "", text)
+    text = re.sub(r"^〒?\d{3}-?\d{4}", "", text)
+    return text
+
+def extract_prefecture(address: str) -> Optional[str]:
+    """住所文字列から都道府県名を抽出"""
+    if not address:
+        return None
+    match = _PREFECTURE_PATTERN.search(address)
+    return match.group(0) if match else None
+
+_KANJI_DIGITS = {"〇": 0, "一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_KANJI_NUMBER_PATTERN = re.compile(r"[一二三四五六七八九十〇]+(?=丁目|番|号|地割)")
+
+def kanji_to_int(text: str) -> int:
+    """漢数字（九十九まで）を整数に変換"""
+    if "十" not in text:
+        value = 0
+        for ch in text:
+            value = value * 10 + _KANJI_DIGITS[ch]
+        return value
+    tens, _, ones = text.partition("十")
+    return (_KANJI_DIGITS[tens] if tens else 1) * 10 + (_KANJI_DIGITS[ones] if ones else 0)
+
+def address_key(address: str) -> str:
+    """住所の照合キー（丁目・番地・号を "-" 区切りのアラビア数字に統一）
+
+    例: "東京都渋谷区神南一丁目1番1号" / "東京都渋谷区神南1-1-1" → "東京都渋谷区神南1-1-1"
+    """
+    text = normalize_address(address)
+    text = _KANJI_NUMBER_PATTERN.sub(lambda m: str(kanji_to_int(m.group(0))), text)
+    text = re.sub(r"(\d+)(?:丁目|番地|番|号|地割)", r"\1-", text)
+    text = re.sub(r"-+", "-", text)
+    return text.rstrip("-")
+
+def join_address_key(town_key: str, block: str) -> str:
+    """町丁目キーと街区符号・地番を連結（丁目付きの町は "-" で区切る）"""
+    block = address_key(block)
+    if not block:
+        return town_key
+    if town_key and town_key[-1].isdigit():
+        return f"{town_key}-{block}"
+    return town_key + block
@@ -0,0 +1,22 @@
+"""
+ディレクトリ単位の差し替え
+メモリマップで読むストア（POI・境界・ハザード・人口など）を、一時ディレクトリに書き出してから置き換える
+"""
+import shutil
+from pathlib import Path
+
+def swap_directory(tmp_dir: Path, target: Path):
+    """書き出し済みの tmp_dir を target に置き換える（tmp_dir は target と同じファイルシステムに作ること）
+
+    既存のストアを開いているワーカーは旧inodeを参照し続けるため、ファイルを上書きせずにディレクトリごと
+    差し替えます。置き換えの間に中断しても target か target.old のどちらかに完全なストアが残ります。
+    """
+    tmp_dir, target = Path(tmp_dir), Path(target)
+    backup = None
+    if target.exists():
+        backup = target.with_name(target.name + ".old")
+        shutil.rmtree(backup, ignore_errors=True)
+        target.rename(backup)
+    tmp_dir.rename(target)
+    if backup:
+        shutil.rmtree(backup, ignore_errors=True)
@@ -0,0 +1,179 @@
+"""
+レスポンス圧縮ミドルウェア
+Accept-Encoding に応じて brotli / gzip をリクエスト毎に選択（しきい値未満は非圧縮）
+"""
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+BROTLI_AVAILABLE = False
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+
+# 圧縮対象とするContent-Type
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/geo+json",
+    "text/",
+    "image/svg+xml",
+    "application/vnd.mapbox-vector-tile",
+)
+
+def parse_accept_encoding(header: str) -> dict:
+    """Accept-Encoding ヘッダーを {エンコーディング: q値} に変換"""
+    encodings = {}
+    for part in header.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name.strip().lower()] = q
+    return encodings
+
+def choose_encoding(header: str, available: Optional[List[str]] = None) -> Optional[str]:
+    """クライアントが受け入れる最適なエンコーディングを選択（同順位なら br を優先）"""
+    if available is None:
+        available = ["br", "gzip"] if BROTLI_AVAILABLE else ["gzip"]
+    accepted = parse_accept_encoding(header or "")
+    wildcard = accepted.get("*", 0.0)
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+class _Compressor:
+    """gzip / brotli の逐次圧縮ラッパー"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._impl = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._impl.process(data)
+        return self._impl.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._impl.finish()
+        return self._impl.flush()
+
+class CompressionMiddleware:
+    """brotli / gzip 圧縮ミドルウェア（ネゴシエーションはリクエスト単位）"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder)
+
+class _CompressionResponder:
+    """1レスポンス分の圧縮処理"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    def _is_compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False  # 事前圧縮済み（.br/.gz 配信など）
+        content_type = headers.get("content-type", "")
+        return any(content_type.startswith(t) for t in COMPRESSIBLE_TYPES)
+
+    def _new_compressor(self) -> _Compressor:
+        return _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+
+    def _mark_encoded(self, headers: MutableHeaders):
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # 表現が変わるため強いETagは弱いETagにする
+            headers["ETag"] = f"W/{etag}"
+
+    async def __call__(self, message: Message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._is_compressible(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+
+            if not more_body:
+                # 単一ボディ：しきい値未満はそのまま送信
+                if len(body) < self.middleware.minimum_size:
+                    await self.send(self.start_message)
+                    await self.send(message)
+                    return
+                compressor = self._new_compressor()
+                compressed = compressor.compress(body) + compressor.flush()
+                self._mark_encoded(headers)
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+
+            # ストリーミング：逐次圧縮
+            self.compressor = self._new_compressor()
+            self._mark_encoded(headers)
+            del headers["Content-Length"]
+            await self.send(self.start_message)
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.flush()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
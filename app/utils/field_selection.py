@@ -0,0 +1,82 @@
+"""
+レスポンスのフィールド選択ユーティリティ
+fields= パラメータ（例: "scores,facility_details.transport"）によるシリアライズ前の射影
+"""
+from typing import Any, Dict, Optional
+
+# 分析エンドポイント用の短縮名（先頭セグメントを展開）
+ANALYSIS_FIELD_ALIASES: Dict[str, str] = {
+    "scores": "lifestyle_analysis.lifestyle_scores",
+    "lifestyle_scores": "lifestyle_analysis.lifestyle_scores",
+    "breakdown": "lifestyle_analysis.lifestyle_scores.breakdown",
+    "facility_details": "lifestyle_analysis.facility_details",
+    "percentiles": "lifestyle_analysis.score_percentiles",
+}
+
+# Places検索エンドポイント用の短縮名
+PLACES_FIELD_ALIASES: Dict[str, str] = {
+    "summary": "places.place_id,places.name,places.vicinity,places.rating,"
+               "places.user_ratings_total,places.distance,places.geometry.location,count",
+}
+
+# fields 指定時も常に返すキー
+DEFAULT_ALWAYS_INCLUDE = ("address", "coordinates", "api_version", "status")
+
+def parse_fields(fields: Optional[str], aliases: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """fields 文字列をパスのツリーに変換（葉は True）"""
+    aliases = aliases or {}
+    tree: Dict[str, Any] = {}
+
+    for raw_path in (fields or "").split(","):
+        raw_path = raw_path.strip()
+        if not raw_path:
+            continue
+
+        head, _, rest = raw_path.partition(".")
+        if head in aliases:
+            expanded = [f"{p}.{rest}" if rest else p for p in aliases[head].split(",")]
+        else:
+            expanded = [raw_path]
+
+        for path in expanded:
+            node = tree
+            segments = [s for s in path.split(".") if s]
+            for i, segment in enumerate(segments):
+                if node.get(segment) is True:
+                    break  # 上位パスが全体指定済み
+                if i == len(segments) - 1:
+                    node[segment] = True
+                else:
+                    node = node.setdefault(segment, {})
+
+    return tree
+
+def _project(value: Any, tree: Any) -> Any:
+    """ツリーに従って値を射影（リストは各要素に適用）"""
+    if tree is True:
+        return value
+    if isinstance(value, dict):
+        return {key: _project(value[key], sub) for key, sub in tree.items() if key in value}
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    return value
+
+def select_fields(
+    payload: Any,
+    fields: Optional[str],
+    aliases: Optional[Dict[str, str]] = None,
+    always_include: tuple = DEFAULT_ALWAYS_INCLUDE
+) -> Any:
+    """fields 指定に従ってレスポンスを射影（未指定時はそのまま返す）"""
+    if not fields or not isinstance(payload, dict):
+        return payload
+
+    tree = parse_fields(fields, aliases)
+    if not tree:
+        return payload
+
+    for key in always_include:
+        if key in payload and key not in tree:
+            tree[key] = True
+
+    return _project(payload, tree)
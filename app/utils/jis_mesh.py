@@ -0,0 +1,113 @@
+"""
+地域メッシュ（JIS X 0410）ユーティリティ
+緯度経度とメッシュコードの相互変換（配列対応）
+
+レベルと桁数・大きさ:
+    1: 第1次メッシュ   4桁  約80km
+    2: 第2次メッシュ   6桁  約10km
+    3: 第3次メッシュ   8桁  約1km
+    4: 2分の1メッシュ  9桁  約500m
+    5: 4分の1メッシュ 10桁  約250m
+"""
+import math
+from typing import Tuple
+
+import numpy as np
+
+MESH_LEVEL_DIGITS = {1: 4, 2: 6, 3: 8, 4: 9, 5: 10}
+# 第1次メッシュ1つあたりの分割数（緯度・経度とも）
+MESH_LEVEL_DIVISIONS = {1: 1, 2: 8, 3: 80, 4: 160, 5: 320}
+
+def mesh_level(code) -> int:
+    """メッシュコードの桁数からレベルを判定"""
+    digits = len(str(int(code)))
+    for level, level_digits in MESH_LEVEL_DIGITS.items():
+        if digits == level_digits:
+            return level
+    raise ValueError(f"メッシュコードではありません: {code}")
+
+def mesh_size_deg(level: int) -> Tuple[float, float]:
+    """メッシュの (緯度方向, 経度方向) の大きさ（度）"""
+    divisions = MESH_LEVEL_DIVISIONS[level]
+    return 1 / (1.5 * divisions), 1 / divisions
+
+def mesh_area_km2(level: int, lat: float) -> float:
+    """緯度 lat におけるメッシュ1つの面積（km²）"""
+    dlat, dlng = mesh_size_deg(level)
+    return (dlat * 111.32) * (dlng * 111.32 * math.cos(math.radians(lat)))
+
+def mesh_indices(lats, lngs, level: int):
+    """緯度経度 → メッシュの通し行・列番号（レベル内で一意）"""
+    divisions = MESH_LEVEL_DIVISIONS[level]
+    rows = np.floor(np.asarray(lats, dtype=np.float64) * 1.5 * divisions).astype(np.int64)
+    cols = np.floor((np.asarray(lngs, dtype=np.float64) - 100.0) * divisions).astype(np.int64)
+    return rows, cols
+
+def codes_from_indices(rows, cols, level: int) -> np.ndarray:
+    """通し行・列番号 → メッシュコード"""
+    rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+    divisions = MESH_LEVEL_DIVISIONS[level]
+    codes = (rows // divisions) * 100 + cols // divisions
+    if level >= 2:
+        codes = codes * 100 + (rows // (divisions // 8) % 8) * 10 + cols // (divisions // 8) % 8
+    if level >= 3:
+        codes = codes * 100 + (rows // (divisions // 80) % 10) * 10 + cols // (divisions // 80) % 10
+    if level >= 4:
+        codes = codes * 10 + (rows // (divisions // 160) % 2) * 2 + cols // (divisions // 160) % 2 + 1
+    if level >= 5:
+        codes = codes * 10 + (rows % 2) * 2 + cols % 2 + 1
+    return codes
+
+def indices_from_codes(codes, level: int):
+    """メッシュコード → 通し行・列番号"""
+    codes = np.asarray(codes, dtype=np.int64)
+    sub_digits = []
+    for _ in range(level - 3):
+        sub_digits.insert(0, codes % 10 - 1)
+        codes = codes // 10
+    # 第3次メッシュ単位の行・列に揃えてから目的のレベルに変換する
+    codes = codes * 10 ** (2 * (3 - min(level, 3)))
+    rows = (codes // 1000000) * 80 + (codes // 1000 % 10) * 10 + codes // 10 % 10
+    cols = (codes // 10000 % 100) * 80 + (codes // 100 % 10) * 10 + codes % 10
+    if level < 3:
+        scale = 80 // MESH_LEVEL_DIVISIONS[level]
+        return rows // scale, cols // scale
+    for digit in sub_digits:
+        rows, cols = rows * 2 + digit // 2, cols * 2 + digit % 2
+    return rows, cols
+
+def mesh_codes(lats, lngs, level: int) -> np.ndarray:
+    """緯度経度 → メッシュコード（int64配列）"""
+    rows, cols = mesh_indices(lats, lngs, level)
+    return codes_from_indices(rows, cols, level)
+
+def mesh_code(lat: float, lng: float, level: int = 3) -> str:
+    """1地点のメッシュコード（文字列）"""
+    return str(int(mesh_codes([lat], [lng], level)[0]))
+
+def mesh_centers(codes, level: int):
+    """メッシュコード → 中心の (緯度配列, 経度配列)"""
+    rows, cols = indices_from_codes(codes, level)
+    dlat, dlng = mesh_size_deg(level)
+    return (rows + 0.5) * dlat, 100.0 + (cols + 0.5) * dlng
+
+def meshes_within(lat: float, lng: float, radius_m: float, level: int):
+    """中心が (lat, lng) から radius_m 以内のメッシュ（地点を含むメッシュは必ず含む）
+
+    (メッシュコード配列, 中心までの距離配列) を返す。
+    """
+    dlat, dlng = mesh_size_deg(level)
+    reach_lat = radius_m / 111320
+    reach_lng = radius_m / (111320 * max(math.cos(math.radians(lat)), 0.1))
+    row0, col0 = mesh_indices(lat - reach_lat, lng - reach_lng, level)
+    row1, col1 = mesh_indices(lat + reach_lat, lng + reach_lng, level)
+    rows, cols = np.meshgrid(np.arange(row0, row1 + 1), np.arange(col0, col1 + 1), indexing="ij")
+    rows, cols = rows.ravel(), cols.ravel()
+    center_lats = (rows + 0.5) * dlat
+    center_lngs = 100.0 + (cols + 0.5) * dlng
+    dy = (center_lats - lat) * 111320
+    dx = (center_lngs - lng) * 111320 * math.cos(math.radians(lat))
+    distances = np.sqrt(dx * dx + dy * dy)
+    home_row, home_col = mesh_indices(lat, lng, level)
+    keep = (distances <= radius_m) | ((rows == home_row) & (cols == home_col))
+    return codes_from_indices(rows[keep], cols[keep], level), distances[keep]
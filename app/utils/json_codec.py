@@ -0,0 +1,63 @@
+"""
+JSONエンコードユーティリティ
+REST レスポンスと WebSocket フレームの高速シリアライズ（orjson 優先、標準jsonへフォールバック）
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Union
+
+from fastapi.responses import JSONResponse
+
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+
+if ORJSON_AVAILABLE:
+    # datetime は orjson が標準で処理、NumPy はスカラー・配列ともにネイティブ処理
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(obj: Any) -> Any:
+    """標準でシリアライズできない型の変換"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    # NumPy スカラー（np.int64 など）と配列
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps_bytes(obj: Any) -> bytes:
+    """オブジェクトをUTF-8エンコード済みJSONに変換"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+def dumps(obj: Any) -> str:
+    """オブジェクトをJSON文字列に変換（WebSocketテキストフレーム用）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode("utf-8")
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+def loads(data: Union[str, bytes]) -> Any:
+    """JSON文字列を解析（失敗時は json.JSONDecodeError を送出）"""
+    if ORJSON_AVAILABLE:
+        # orjson.JSONDecodeError は json.JSONDecodeError のサブクラス
+        return orjson.loads(data)
+    return json.loads(data)
+
+class FastJSONResponse(JSONResponse):
+    """orjson でシリアライズする JSONResponse"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,122 @@
+"""
+Mapbox Vector Tile（MVT 2.1）エンコーダ
+点とポリゴン（矩形のメッシュなど）だけを扱う最小限の Protocol Buffers 実装
+
+座標はタイル内の整数座標（0〜extent、y は下向き）で渡します。
+緯度経度からの変換は tile_coordinates を使ってください。
+"""
+import math
+import struct
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+MVT_EXTENT = 4096
+
+# Feature.type
+GEOM_POINT = 1
+GEOM_POLYGON = 3
+
+# ジオメトリのコマンド
+_MOVE_TO = 1
+_LINE_TO = 2
+_CLOSE_PATH = 7
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """XYZタイルの (南, 西, 北, 東)"""
+    n = 2.0 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return south, west, north, east
+
+def tile_coordinates(lats, lngs, z: int, x: int, y: int, extent: int = MVT_EXTENT):
+    """緯度経度 → タイル内の整数座標 (px, py)（ウェブメルカトル）"""
+    n = 2.0 ** z
+    lats = np.clip(np.asarray(lats, dtype=np.float64), -85.05112878, 85.05112878)
+    world_x = (np.asarray(lngs, dtype=np.float64) + 180.0) / 360.0 * n
+    world_y = (1.0 - np.arcsinh(np.tan(np.radians(lats))) / math.pi) / 2.0 * n
+    return (
+        np.round((world_x - x) * extent).astype(np.int64),
+        np.round((world_y - y) * extent).astype(np.int64),
+    )
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+def _bytes_field(field: int, payload: bytes) -> bytes:
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+def _packed(field: int, values: Iterable[int]) -> bytes:
+    return _bytes_field(field, b"".join(_varint(v) for v in values))
+
+def _value(value) -> bytes:
+    """Layer.values の1要素"""
+    if isinstance(value, bool):
+        return _key(7, 0) + _varint(int(value))
+    if isinstance(value, int):
+        return _key(6, 0) + _varint(_zigzag(value)) if value < 0 else _key(5, 0) + _varint(value)
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack("<d", value)
+    return _bytes_field(1, str(value).encode("utf-8"))
+
+def point_geometry(px: int, py: int) -> List[int]:
+    return [(1 << 3) | _MOVE_TO, _zigzag(px), _zigzag(py)]
+
+def rectangle_geometry(x0: int, y0: int, x1: int, y1: int) -> List[int]:
+    """矩形ポリゴン（外周は時計回り = 面積が正）。x0 < x1, y0 < y1"""
+    return [
+        (1 << 3) | _MOVE_TO, _zigzag(x0), _zigzag(y0),
+        (3 << 3) | _LINE_TO,
+        _zigzag(x1 - x0), 0,
+        0, _zigzag(y1 - y0),
+        _zigzag(x0 - x1), 0,
+        (1 << 3) | _CLOSE_PATH,
+    ]
+
+def encode_layer(name: str, features: Sequence[Tuple[int, List[int], Dict]], extent: int = MVT_EXTENT) -> bytes:
+    """features: (ジオメトリ種別, ジオメトリのコマンド列, 属性) のリスト"""
+    keys: Dict[str, int] = {}
+    values: Dict[Tuple[type, object], int] = {}
+    encoded_features = []
+    for feature_id, (geom_type, geometry, properties) in enumerate(features, start=1):
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        encoded_features.append(_bytes_field(2, (
+            _key(1, 0) + _varint(feature_id)
+            + (_packed(2, tags) if tags else b"")
+            + _key(3, 0) + _varint(geom_type)
+            + _packed(4, geometry)
+        )))
+    layer = (
+        _key(15, 0) + _varint(2)
+        + _bytes_field(1, name.encode("utf-8"))
+        + b"".join(encoded_features)
+        + b"".join(_bytes_field(3, key.encode("utf-8")) for key in keys)
+        + b"".join(_bytes_field(4, _value(value)) for _, value in values)
+        + _key(5, 0) + _varint(extent)
+    )
+    return _bytes_field(3, layer)
+
+def encode_tile(layers: Dict[str, Sequence[Tuple[int, List[int], Dict]]], extent: int = MVT_EXTENT) -> bytes:
+    """{レイヤー名: features} → MVT のバイト列（空のレイヤーは省く）"""
+    return b"".join(encode_layer(name, features, extent) for name, features in layers.items() if features)
@@ -0,0 +1,49 @@
+"""
+リクエスト内のクエリ共有（重複排除）
+複数地点をまとめて分析する間だけ、同じ引数の外部クエリ（Places 検索・不動産取引タイルなど）を
+1回にまとめ、実行中・実行済みの結果を共有する
+
+スコープの外では何もせずに元の関数を呼ぶため、通常の単一分析の動作は変わりません。
+結果は呼び出し側で書き換えられることがあるため、共有した結果はコピーして返します。
+"""
+import asyncio
+import copy
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+_shared_queries: ContextVar[Optional[Dict[Any, asyncio.Future]]] = ContextVar("shared_queries", default=None)
+
+@contextmanager
+def shared_query_scope():
+    """このブロック内（とそこで作られたタスク）の dedup_in_scope 付きクエリを共有する"""
+    token = _shared_queries.set({})
+    try:
+        yield
+    finally:
+        _shared_queries.reset(token)
+
+def shared_query_count() -> int:
+    """現在のスコープで実際に実行したクエリ数（スコープ外は0）"""
+    scope = _shared_queries.get()
+    return len(scope) if scope is not None else 0
+
+def dedup_in_scope(key_func: Callable[..., Any]):
+    """非同期関数のデコレーター。key_func(*args, **kwargs) が同じ呼び出しをスコープ内で1回にまとめる"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            scope = _shared_queries.get()
+            if scope is None:
+                return await func(*args, **kwargs)
+            key = (func.__name__, key_func(*args, **kwargs))
+            future = scope.get(key)
+            if future is None:
+                future = asyncio.ensure_future(func(*args, **kwargs))
+                scope[key] = future
+            # 待っている呼び出し元がキャンセルされても共有中のクエリは止めない
+            result = await asyncio.shield(future)
+            return copy.deepcopy(result)
+        return wrapper
+    return decorator
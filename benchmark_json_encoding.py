@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+JSONエンコード ベンチマークスクリプト
+
+/api/lifestyle-analysis-8items のレスポンスを記録したファイルで
+標準json（FastAPIデフォルト経路）と app.utils.json_codec を比較します。
+
+記録例:
+    curl -s -X POST http://localhost:8000/api/lifestyle-analysis-8items \\
+         -H 'Content-Type: application/json' \\
+         -d '{"address": "東京都渋谷区神南1-1-1"}' > lifestyle_8items.json
+
+実行例:
+    python benchmark_json_encoding.py lifestyle_8items.json
+"""
+import json
+import sys
+import timeit
+from datetime import datetime
+
+from app.utils import json_codec
+
+def build_sample_payload() -> dict:
+    """記録ファイルがない場合の8項目レスポンス相当のサンプル"""
+    categories = ["education", "medical", "transport", "shopping",
+                  "dining", "safety", "environment", "cultural"]
+    facility_details = {}
+    for category in categories:
+        facility_details[category] = {
+            "total_facilities": 20,
+            "facilities_list": [
+                {
+                    "name": f"施設{category}{i}（渋谷区神南）",
+                    "place_id": f"ChIJ{category}{i:04d}",
+                    "vicinity": "東京都渋谷区神南1丁目",
+                    "rating": 4.2,
+                    "user_ratings_total": 120 + i,
+                    "distance": 150.0 + i * 37.5,
+                    "types": [category, "point_of_interest", "establishment"],
+                    "geometry": {"location": {"lat": 35.6620 + i * 1e-4, "lng": 139.7000 + i * 1e-4}}
+                }
+                for i in range(10)
+            ]
+        }
+    return {
+        "address": "東京都渋谷区神南1-1-1",
+        "coordinates": {"lat": 35.6620, "lng": 139.7000},
+        "items_analyzed": 8,
+        "api_version": "v3.1.8items",
+        "analysis_date": datetime.now().isoformat(),
+        "lifestyle_analysis": {
+            "lifestyle_scores": {
+                "total_score": 78.4,
+                "grade": "B+",
+                "breakdown": {category: 78.4 for category in categories}
+            },
+            "facility_details": facility_details
+        }
+    }
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            payload = json.load(f)
+        print(f"📂 記録ペイロード: {sys.argv[1]}")
+    else:
+        payload = build_sample_payload()
+        print("📂 サンプルペイロード（記録ファイル未指定）")
+
+    number = 200
+    encoded_size = len(json_codec.dumps_bytes(payload))
+    print(f"📦 サイズ: {encoded_size / 1024:.1f} KB / orjson: {'✅' if json_codec.ORJSON_AVAILABLE else '❌'}")
+    print("=" * 50)
+
+    def stdlib_encode():
+        json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    results = {
+        "json.dumps (標準)": timeit.timeit(stdlib_encode, number=number),
+        "json_codec.dumps_bytes": timeit.timeit(lambda: json_codec.dumps_bytes(payload), number=number),
+    }
+
+    try:
+        from fastapi.encoders import jsonable_encoder
+
+        def fastapi_default():
+            json.dumps(jsonable_encoder(payload), ensure_ascii=False).encode("utf-8")
+
+        results["jsonable_encoder + json.dumps (FastAPIデフォルト)"] = timeit.timeit(fastapi_default, number=number)
+    except ImportError:
+        pass
+
+    text = json_codec.dumps(payload)
+    results["json.loads (標準)"] = timeit.timeit(lambda: json.loads(text), number=number)
+    results["json_codec.loads"] = timeit.timeit(lambda: json_codec.loads(text), number=number)
+
+    for name, total in results.items():
+        print(f"{name:<50} {total / number * 1e6:>10.1f} µs/回")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+徒歩ネットワーク ベンチマークスクリプト
+
+1回の分析で行う処理（出発地からの最短路探索 + 施設80件の徒歩距離取得）の時間を計測し、
+最短距離を素朴な Dijkstra（heapq）と照合します。
+
+グラフを指定しない場合は、川（横断は2か所の橋のみ）を含む格子状の合成グラフを使います。
+
+実行例:
+    python benchmark_walking_network.py
+    python benchmark_walking_network.py data/walking_network 35.6620 139.7000
+"""
+import heapq
+import math
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.services import walking_network
+from app.services.walking_network import WalkingNetwork, shortest_distances, write_walking_network
+
+def build_sample_network(path: str, size: int = 200, spacing_m: float = 50.0):
+    """格子状の道路網（size×size、中央の行に川があり橋は2か所）"""
+    rng = np.random.default_rng(0)
+    lat0, lng0 = 35.60, 139.70
+    dlat = spacing_m / walking_network.METERS_PER_DEG
+    dlng = dlat / math.cos(math.radians(lat0))
+    rows, cols = np.divmod(np.arange(size * size), size)
+    lats = lat0 + rows * dlat + rng.normal(0, 2e-5, rows.size)
+    lngs = lng0 + cols * dlng + rng.normal(0, 2e-5, cols.size)
+
+    nodes = np.arange(size * size).reshape(size, size)
+    river, bridges = size // 2, {size // 10, size - size // 10}
+    edge_u = [nodes[:, :-1].ravel()]
+    edge_v = [nodes[:, 1:].ravel()]
+    for col in range(size):
+        keep = np.arange(size - 1)
+        if col not in bridges:
+            keep = keep[keep != river]
+        edge_u.append(nodes[keep, col])
+        edge_v.append(nodes[keep + 1, col])
+    edge_u, edge_v = np.concatenate(edge_u), np.concatenate(edge_v)
+    dy = (lats[edge_v] - lats[edge_u]) * walking_network.METERS_PER_DEG
+    dx = (lngs[edge_v] - lngs[edge_u]) * walking_network.METERS_PER_DEG * math.cos(math.radians(lat0))
+    lengths = np.hypot(dx, dy) * rng.uniform(1.0, 1.3, edge_u.size)
+    write_walking_network(lats, lngs, edge_u, edge_v, lengths, path)
+    center = size // 2 - 5
+    return float(lats[nodes[center, center]]), float(lngs[nodes[center, center]])
+
+def dijkstra(indptr, targets, weights, source: int, limit: float) -> np.ndarray:
+    """照合用の素朴な Dijkstra"""
+    distances = np.full(len(indptr) - 1, np.inf)
+    distances[source] = 0.0
+    indptr, targets, weights = indptr.tolist(), targets.tolist(), weights.tolist()
+    heap = [(0.0, source)]
+    while heap:
+        distance, node = heapq.heappop(heap)
+        if distance > distances[node]:
+            continue
+        for e in range(indptr[node], indptr[node + 1]):
+            candidate = distance + weights[e]
+            if candidate < distances[targets[e]] and candidate < limit:
+                distances[targets[e]] = candidate
+                heapq.heappush(heap, (candidate, targets[e]))
+    return distances
+
+def main():
+    if len(sys.argv) > 3:
+        path, lat, lng = sys.argv[1], float(sys.argv[2]), float(sys.argv[3])
+        print(f"📂 グラフ: {path}")
+    else:
+        path = tempfile.mkdtemp() + "/walking_network"
+        lat, lng = build_sample_network(path)
+        print("📂 合成グラフ（200×200格子、川あり）")
+
+    network = WalkingNetwork(path)
+    limit = walking_network.WALKING_MAX_DISTANCE_M
+    nodes, indptr, targets, weights = network._local_graph(lat, lng, limit + walking_network.SNAP_MAX_M)
+    print(f"📦 ノード{len(network)} / 局所グラフ: ノード{len(nodes)} 辺{len(targets)}")
+    print("=" * 50)
+
+    local = walking_network._planar_distances(lat, lng, network._columns["lat"][nodes], network._columns["lng"][nodes])
+    source = int(np.argmin(local))
+    expected = dijkstra(indptr, targets, weights, source, limit)
+    actual = shortest_distances(indptr, targets, weights, source, limit)
+    reached = np.isfinite(expected)
+    matches = np.array_equal(reached, np.isfinite(actual)) and np.allclose(actual[reached], expected[reached])
+    print(f"照合（heapq Dijkstra）: {'✅' if matches else '❌'} 到達ノード{int(reached.sum())}")
+
+    rng = np.random.default_rng(1)
+    sample = rng.choice(nodes, size=min(80, len(nodes)), replace=False)
+    places = [(float(network._columns["lat"][i]), float(network._columns["lng"][i])) for i in sample]
+
+    number = 20
+    results = {}
+    start = time.perf_counter()
+    for _ in range(number):
+        dijkstra(indptr, targets, weights, source, limit)
+    results["heapq Dijkstra"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(number):
+        shortest_distances(indptr, targets, weights, source, limit)
+    results["shortest_distances"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(number):
+        field = network.compute_field(lat, lng)
+        for place in places:
+            field.distance_to(*place)
+    results["1分析（局所グラフ抽出 + 探索 + 施設80件）"] = time.perf_counter() - start
+
+    for name, total in results.items():
+        print(f"{name:<40} {total / number * 1e3:>10.2f} ms/回")
+
+if __name__ == "__main__":
+    main()
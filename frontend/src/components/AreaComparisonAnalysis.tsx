@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, RadarChart, PolarGrid, PolarAngleAxis, PolarRadiusAxis, Radar } from 'recharts';
+import { apiService } from '../services/apiService';
 
 interface AreaComparisonProps {
   currentAddress: string;
@@ -120,24 +121,21 @@ const AreaComparisonAnalysis: React.FC<AreaComparisonProps> = ({ currentAddress,
     );
   }
 
-  // 実際のAPIから周辺エリアデータを取得
+  // 周辺エリアをまとめてサーバー側で分析・比較（/api/compare）
   const fetchNearbyAreasData = async (address: string): Promise<AreaData[]> => {
     try {
       console.log('🔍 周辺エリア分析開始:', address);
       
-      // 1. 住所から座標を取得
-      const geocodeResponse = await fetch(`/api/geocode?address=${encodeURIComponent(address)}`);
-      if (!geocodeResponse.ok) {
-        const errorData = await geocodeResponse.json();
-        throw new Error(`地理情報取得エラー: ${errorData.error || '座標の取得に失敗しました'}`);
+      // 1. 中心座標（分析結果の座標、なければ住所候補から）
+      let center = analysisData?.coordinates;
+      if (!center) {
+        const suggestions = await apiService.suggestAddresses(address, 1);
+        center = suggestions[0]?.coordinates;
       }
-      
-      const geocodeData = await geocodeResponse.json();
-      if (!geocodeData.results || geocodeData.results.length === 0) {
+      if (!center) {
         throw new Error('指定された住所の座標を特定できませんでした');
       }
-      
-      const { lat, lng } = geocodeData.results[0].geometry.location;
+      const { lat, lng } = center;
       console.log('📍 中心座標:', { lat, lng });
 
       // 2. 周辺5エリアの座標を生成（実際の地理的分布）
@@ -149,117 +147,76 @@ const AreaComparisonAnalysis: React.FC<AreaComparisonProps> = ({ currentAddress,
         { lat: lat + 0.015, lng: lng, direction: '北' }
       ];
 
-      // 3. 各座標の分析データを並行取得
-      const areaPromises = nearbyCoordinates.map(async (coord, index) => {
-        try {
-          // 逆ジオコーディングで住所取得
-          const reverseGeoResponse = await fetch(`/api/reverse-geocode?lat=${coord.lat}&lng=${coord.lng}`);
-          const reverseGeoData = await reverseGeoResponse.json();
-          const areaAddress = reverseGeoData.results?.[0]?.formatted_address || `${coord.direction}方向 ${coord.lat.toFixed(4)}, ${coord.lng.toFixed(4)}`;
-          
-          // 基本分析実行
-          const analysisResponse = await fetch('/api/analyze', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-              location: {
-                lat: coord.lat,
-                lng: coord.lng,
-                address: areaAddress
-              }
-            })
-          });
-
-          if (!analysisResponse.ok) {
-            console.warn(`エリア${index + 1}の分析に失敗:`, areaAddress);
-            return null;
-          }
+      // 3. 中心と周辺エリアを1回のリクエストで並行分析（重複するクエリはサーバー側で共有）
+      const comparison = await apiService.compareAreas([
+        { address, coordinates: { lat, lng } },
+        ...nearbyCoordinates.map((coord) => ({
+          address: `${coord.direction}方向 ${coord.lat.toFixed(4)}, ${coord.lng.toFixed(4)}`,
+          coordinates: { lat: coord.lat, lng: coord.lng }
+        }))
+      ]);
+      if (!comparison) {
+        throw new Error('周辺エリアの比較分析に失敗しました');
+      }
+      const basePricePerSqm = comparison.areas[0]?.price_per_sqm?.median || 0;
 
-          const analysisData = await analysisResponse.json();
-          
-          // 人口統計データを実際のAPIから取得
-          let demographicsData = null;
-          try {
-            const demographicsResponse = await fetch(`/api/demographics?address=${encodeURIComponent(areaAddress)}`);
-            if (demographicsResponse.ok) {
-              demographicsData = await demographicsResponse.json();
-            }
-          } catch (e) {
-            console.warn(`エリア${index + 1}の人口統計取得に失敗`);
-          }
+      const results = comparison.areas.slice(1).map((area, index): AreaData | null => {
+        const coord = nearbyCoordinates[index];
+        if (area.error || !area.scores) {
+          console.warn(`エリア${index + 1}の分析に失敗:`, area.address, area.error);
+          return null;
+        }
+        const areaAddress = area.administrative_area?.address || area.address;
+        const scores = area.scores;
+        const pricePerSqm = area.price_per_sqm?.median || 0;
+        const distance = calculateDistance(lat, lng, coord.lat, coord.lng);
 
-          // 不動産価格データを実際のAPIから取得
-          let priceData = null;
-          try {
-            const priceResponse = await fetch(`/api/real-estate-price?lat=${coord.lat}&lng=${coord.lng}`);
-            if (priceResponse.ok) {
-              priceData = await priceResponse.json();
+        return {
+          name: extractAreaName(areaAddress),
+          distance: `${distance.toFixed(1)}km`,
+          coordinates: { lat: coord.lat, lng: coord.lng },
+          scores: {
+            safety: scores.safety || 0,
+            transport: scores.transport || 0,
+            shopping: scores.shopping || 0,
+            medical: scores.medical || 0,
+            education: scores.education || 0,
+            environment: scores.environment || 0,
+            total: area.total_score || 0
+          },
+          priceInfo: {
+            averagePrice: 0,
+            pricePerSqm,
+            priceIndex: calculatePriceIndex(pricePerSqm, basePricePerSqm)
+          },
+          demographics: {
+            population: area.demographics?.population || 0,
+            households: area.demographics?.households || 0,
+            ageDistribution: {
+              under30: 0,
+              age30to50: 0,
+              age50to65: 0,
+              over65: area.demographics?.age_distribution?.over65 || 0
             }
-          } catch (e) {
-            console.warn(`エリア${index + 1}の価格データ取得に失敗`);
+          },
+          characteristics: extractCharacteristics(areaAddress, scores),
+          pros: generatePros(scores),
+          cons: generateCons(scores),
+          disasterRisk: {
+            overallRisk: 'unknown',
+            factors: ['データ取得中'],
+            recommendation: '詳細な災害リスク評価を取得中です'
           }
-
-          console.log(`✅ エリア${index + 1}分析完了:`, areaAddress);
-
-          // 距離計算
-          const distance = calculateDistance(lat, lng, coord.lat, coord.lng);
-
-          // データを統一フォーマットに変換（実データ優先）
-          return {
-            name: extractAreaName(areaAddress),
-            distance: `${distance.toFixed(1)}km`,
-            coordinates: { lat: coord.lat, lng: coord.lng },
-            scores: {
-              safety: analysisData.data?.lifestyle_analysis?.lifestyle_scores?.breakdown?.safety?.score || 0,
-              transport: analysisData.data?.accessibilityScore?.breakdown?.transportation?.score || 0,
-              shopping: analysisData.data?.lifestyle_analysis?.lifestyle_scores?.breakdown?.shopping?.score || 0,
-              medical: analysisData.data?.accessibilityScore?.breakdown?.medical?.score || 0,
-              education: analysisData.data?.accessibilityScore?.breakdown?.education?.score || 0,
-              environment: analysisData.data?.lifestyle_analysis?.lifestyle_scores?.breakdown?.environment?.score || 0,
-              total: analysisData.data?.accessibilityScore?.totalScore || 0
-            },
-            priceInfo: {
-              averagePrice: priceData?.averagePrice || analysisData.data?.accessibilityScore?.averagePrice || 0,
-              pricePerSqm: priceData?.pricePerSqm || 0,
-              priceIndex: calculatePriceIndex(
-                priceData?.averagePrice || analysisData.data?.accessibilityScore?.averagePrice || 0,
-                analysisData?.accessibilityScore?.averagePrice || 55000000
-              )
-            },
-            demographics: {
-              population: demographicsData?.population || 0,
-              households: demographicsData?.households || 0,
-              ageDistribution: demographicsData?.ageDistribution || {
-                under30: 0,
-                age30to50: 0,
-                age50to65: 0,
-                over65: 0
-              }
-            },
-            characteristics: extractCharacteristics(areaAddress, analysisData.data),
-            pros: generatePros(analysisData.data),
-            cons: generateCons(analysisData.data),
-            disasterRisk: analysisData.data?.accessibilityScore?.disasterRisk || {
-              overallRisk: 'unknown',
-              factors: ['データ取得中'],
-              recommendation: '詳細な災害リスク評価を取得中です'
-            }
-          };
-        } catch (error) {
-          console.error(`エリア${index + 1}の取得エラー:`, error);
-          return null;
-        }
+        };
       });
 
-      // 並行実行し、成功したデータのみ返す
-      const results = await Promise.all(areaPromises);
       const validResults = results.filter((result) => result !== null) as AreaData[];
       
       if (validResults.length === 0) {
         throw new Error('周辺エリアのデータを取得できませんでした。しばらく時間をおいてお試しください。');
       }
       
-      console.log(`✅ ${validResults.length}エリアの分析完了`);
+      console.log(`✅ ${validResults.length}エリアの分析完了（${comparison.elapsed_seconds}秒）`);
       return validResults;
       
     } catch (error) {
@@ -299,8 +256,8 @@ const AreaComparisonAnalysis: React.FC<AreaComparisonProps> = ({ currentAddress,
     return locationMatch ? locationMatch[1] : address.split(',')[0] || 'エリア';
   };
 
-  // 住所・分析データから特徴を抽出
-  const extractCharacteristics = (address: string, analysisData: any): string[] => {
+  // 住所・8項目スコアから特徴を抽出
+  const extractCharacteristics = (address: string, scores?: Record<string, number>): string[] => {
     const characteristics = [];
     
     // 住所ベースの特徴
@@ -310,17 +267,14 @@ const AreaComparisonAnalysis: React.FC<AreaComparisonProps> = ({ currentAddress,
     if (address.includes('学校') || address.includes('大学')) characteristics.push('教育環境');
     if (address.includes('病院') || address.includes('医療')) characteristics.push('医療充実');
     
-    // 分析データベースの特徴
-    if (analysisData) {
-      const scores = analysisData.accessibilityScore?.breakdown || {};
-      const lifestyleScores = analysisData.lifestyle_analysis?.lifestyle_scores?.breakdown || {};
-      
-      if (scores.transportation?.score >= 85) characteristics.push('交通便利');
-      if (lifestyleScores.shopping?.score >= 85) characteristics.push('買い物便利');
-      if (scores.medical?.score >= 85) characteristics.push('医療充実');
-      if (scores.education?.score >= 85) characteristics.push('教育環境良好');
-      if (lifestyleScores.safety?.score >= 85) characteristics.push('安全');
-      if (lifestyleScores.environment?.score >= 85) characteristics.push('環境良好');
+    // スコアベースの特徴
+    if (scores) {
+      if (scores.transport >= 85) characteristics.push('交通便利');
+      if (scores.shopping >= 85) characteristics.push('買い物便利');
+      if (scores.medical >= 85) characteristics.push('医療充実');
+      if (scores.education >= 85) characteristics.push('教育環境良好');
+      if (scores.safety >= 85) characteristics.push('安全');
+      if (scores.environment >= 85) characteristics.push('環境良好');
     }
     
     // デフォルト特徴
@@ -331,39 +285,32 @@ const AreaComparisonAnalysis: React.FC<AreaComparisonProps> = ({ currentAddress,
     return characteristics;
   };
 
-  // 分析データからメリットを生成
-  const generatePros = (data: any): string[] => {
+  // 8項目スコアからメリットを生成
+  const generatePros = (scores?: Record<string, number>): string[] => {
     const pros = [];
-    if (!data) return ['基本的な生活機能あり'];
+    if (!scores) return ['基本的な生活機能あり'];
     
-    const accessibilityScores = data.accessibilityScore?.breakdown || {};
-    const lifestyleScores = data.lifestyle_analysis?.lifestyle_scores?.breakdown || {};
-    
-    if (accessibilityScores.education?.score > 80) pros.push('教育環境優秀');
-    if (accessibilityScores.transportation?.score > 85) pros.push('交通アクセス抜群');
-    if (accessibilityScores.medical?.score > 80) pros.push('医療機関充実');
-    if (lifestyleScores.shopping?.score > 80) pros.push('買い物便利');
-    if (lifestyleScores.environment?.score > 80) pros.push('環境良好');
-    if (lifestyleScores.safety?.score > 80) pros.push('治安良好');
+    if (scores.education > 80) pros.push('教育環境優秀');
+    if (scores.transport > 85) pros.push('交通アクセス抜群');
+    if (scores.medical > 80) pros.push('医療機関充実');
+    if (scores.shopping > 80) pros.push('買い物便利');
+    if (scores.environment > 80) pros.push('環境良好');
+    if (scores.safety > 80) pros.push('治安良好');
     
     return pros.length > 0 ? pros : ['バランスの取れたエリア'];
   };
 
-  // 分析データからデメリットを生成
-  const generateCons = (data: any): string[] => {
+  // 8項目スコアからデメリットを生成
+  const generateCons = (scores?: Record<string, number>): string[] => {
     const cons = [];
-    if (!data) return ['詳細データ取得中'];
-    
-    const accessibilityScores = data.accessibilityScore?.breakdown || {};
-    const lifestyleScores = data.lifestyle_analysis?.lifestyle_scores?.breakdown || {};
+    if (!scores) return ['詳細データ取得中'];
     
-    if (accessibilityScores.education?.score < 60) cons.push('教育選択肢限定的');
-    if (accessibilityScores.transportation?.score < 60) cons.push('交通やや不便');
-    if (accessibilityScores.medical?.score < 60) cons.push('医療機関やや少ない');
-    if (lifestyleScores.shopping?.score < 60) cons.push('買い物施設限定的');
-    if (lifestyleScores.safety?.score < 60) cons.push('安全性に注意');
-    if (lifestyleScores.environment?.score < 60) cons.push('環境課題あり');
-    if (data.disaster_risk?.overallRisk === 'high') cons.push('災害リスク要注意');
+    if (scores.education < 60) cons.push('教育選択肢限定的');
+    if (scores.transport < 60) cons.push('交通やや不便');
+    if (scores.medical < 60) cons.push('医療機関やや少ない');
+    if (scores.shopping < 60) cons.push('買い物施設限定的');
+    if (scores.safety < 60) cons.push('安全性に注意');
+    if (scores.environment < 60) cons.push('環境課題あり');
     
     return cons.length > 0 ? cons : ['特に大きな問題なし'];
   };
@@ -1,5 +1,6 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { useAddress } from '../context/AddressContext';
+import { apiService, AddressSuggestion } from '../services/apiService';
 
 type ViewType = 'home' | 'lifestyle' | 'disaster' | 'ai-analysis';
 
@@ -11,6 +12,32 @@ const IntegratedHomeScreen: React.FC<IntegratedHomeScreenProps> = ({ onViewChang
   const { currentAddress, setCurrentAddress, coordinates, setCoordinates } = useAddress();
   const [inputAddress, setInputAddress] = useState('');
   const [isGeocoding, setIsGeocoding] = useState(false);
+  const [addressSuggestions, setAddressSuggestions] = useState<AddressSuggestion[]>([]);
+  const [selectedSuggestion, setSelectedSuggestion] = useState<AddressSuggestion | null>(null);
+
+  // 入力中の住所の候補（入力が止まってから取得）
+  useEffect(() => {
+    const query = inputAddress.trim();
+    if (query.length < 2 || selectedSuggestion?.address === query) {
+      setAddressSuggestions([]);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      const suggestions = await apiService.suggestAddresses(query, 8);
+      if (!cancelled) setAddressSuggestions(suggestions);
+    }, 250);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [inputAddress, selectedSuggestion]);
+
+  const handleSuggestionSelect = (suggestion: AddressSuggestion) => {
+    setInputAddress(suggestion.address);
+    setSelectedSuggestion(suggestion);
+    setAddressSuggestions([]);
+  };
 
   const handleAddressSubmit = async () => {
     if (!inputAddress.trim()) {
@@ -18,6 +45,15 @@ const IntegratedHomeScreen: React.FC<IntegratedHomeScreenProps> = ({ onViewChang
       return;
     }
 
+    // 候補から選んだ住所は解決済みの座標を使う（ジオコーディング不要）
+    if (selectedSuggestion && selectedSuggestion.address === inputAddress.trim()) {
+      setCurrentAddress(selectedSuggestion.address);
+      setCoordinates(selectedSuggestion.coordinates);
+      setAddressSuggestions([]);
+      console.log('✅ 住所設定完了（候補から選択）:', selectedSuggestion);
+      return;
+    }
+
     setIsGeocoding(true);
     try {
       const geocodeUrl = `https://msearch.gsi.go.jp/address-search/AddressSearch?q=${encodeURIComponent(inputAddress)}`;
@@ -124,9 +160,14 @@ const IntegratedHomeScreen: React.FC<IntegratedHomeScreenProps> = ({ onViewChang
       marginBottom: '24px',
       flexWrap: 'wrap' as const
     },
-    addressInput: {
+    addressInputWrapper: {
+      position: 'relative' as const,
       flex: '1',
-      minWidth: '250px',
+      minWidth: '250px'
+    },
+    addressInput: {
+      width: '100%',
+      boxSizing: 'border-box' as const,
       padding: '16px 20px',
       border: '2px solid #e5e7eb',
       borderRadius: '12px',
@@ -148,6 +189,33 @@ const IntegratedHomeScreen: React.FC<IntegratedHomeScreenProps> = ({ onViewChang
       alignItems: 'center',
       gap: '8px'
     },
+    addressSuggestionList: {
+      position: 'absolute' as const,
+      top: '100%',
+      left: 0,
+      right: 0,
+      zIndex: 10,
+      margin: '4px 0 0',
+      padding: '4px 0',
+      listStyle: 'none',
+      background: 'white',
+      border: '1px solid #e5e7eb',
+      borderRadius: '12px',
+      boxShadow: '0 4px 6px rgba(0,0,0,0.07)'
+    },
+    addressSuggestionItem: {
+      display: 'flex',
+      justifyContent: 'space-between',
+      gap: '12px',
+      padding: '10px 20px',
+      fontSize: '15px',
+      color: '#1f2937',
+      cursor: 'pointer'
+    },
+    addressSuggestionLevel: {
+      fontSize: '12px',
+      color: '#6b7280'
+    },
     suggestions: {
       display: 'flex',
       gap: '12px',
@@ -266,24 +334,53 @@ const IntegratedHomeScreen: React.FC<IntegratedHomeScreenProps> = ({ onViewChang
         )}
 
         <div style={styles.inputRow}>
-          <input
-            type="text"
-            style={styles.addressInput}
-            placeholder="例: 東京都渋谷区神南1-1-1"
-            value={inputAddress}
-            onChange={(e) => setInputAddress(e.target.value)}
-            onKeyPress={(e) => {
-              if (e.key === 'Enter') handleAddressSubmit();
-            }}
-            onFocus={(e) => {
-              e.target.style.borderColor = '#6366f1';
-              e.target.style.boxShadow = '0 0 0 3px rgba(99, 102, 241, 0.1)';
-            }}
-            onBlur={(e) => {
-              e.target.style.borderColor = '#e5e7eb';
-              e.target.style.boxShadow = 'none';
-            }}
-          />
+          <div style={styles.addressInputWrapper}>
+            <input
+              type="text"
+              style={styles.addressInput}
+              placeholder="例: 東京都渋谷区神南1-1-1"
+              value={inputAddress}
+              onChange={(e) => setInputAddress(e.target.value)}
+              onKeyPress={(e) => {
+                if (e.key === 'Enter') handleAddressSubmit();
+              }}
+              onFocus={(e) => {
+                e.target.style.borderColor = '#6366f1';
+                e.target.style.boxShadow = '0 0 0 3px rgba(99, 102, 241, 0.1)';
+              }}
+              onBlur={(e) => {
+                e.target.style.borderColor = '#e5e7eb';
+                e.target.style.boxShadow = 'none';
+                setAddressSuggestions([]);
+              }}
+            />
+            {addressSuggestions.length > 0 && (
+              <ul style={styles.addressSuggestionList}>
+                {addressSuggestions.map((suggestion) => (
+                  <li
+                    key={suggestion.key}
+                    style={styles.addressSuggestionItem}
+                    // 入力欄の blur より先に選択する
+                    onMouseDown={(e) => {
+                      e.preventDefault();
+                      handleSuggestionSelect(suggestion);
+                    }}
+                    onMouseEnter={(e) => {
+                      e.currentTarget.style.background = '#f8fafc';
+                    }}
+                    onMouseLeave={(e) => {
+                      e.currentTarget.style.background = 'white';
+                    }}
+                  >
+                    <span>{suggestion.address}</span>
+                    <span style={styles.addressSuggestionLevel}>
+                      {{ prefecture: '都道府県', municipality: '市区町村', town: '町丁目', block: '番地' }[suggestion.level]}
+                    </span>
+                  </li>
+                ))}
+              </ul>
+            )}
+          </div>
           <button
             style={styles.setBtn}
             onClick={handleAddressSubmit}
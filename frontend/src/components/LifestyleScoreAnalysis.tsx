@@ -26,7 +26,7 @@ const LifestyleScoreAnalysis: React.FC<{ onViewChange?: (view: 'home' | 'lifesty
       document.head.removeChild(style);
     };
   }, []);
-  const { currentAddress, setCurrentAddress, setHousingScores, setCoordinates } = useAddress();
+  const { currentAddress, setCurrentAddress, coordinates, setHousingScores, setCoordinates } = useAddress();
   const [address, setAddress] = useState('');
   const [analysisData, setAnalysisData] = useState<LifestyleAnalysisResult | null>(null);
   const [aiAnalysis, setAiAnalysis] = useState<AIAnalysisResult | null>(null);
@@ -723,8 +723,10 @@ const LifestyleScoreAnalysis: React.FC<{ onViewChange?: (view: 'home' | 'lifesty
     setAnalysisData(null);
 
     try {
+      // ホーム画面で設定した住所（候補から選択すると解決済み）なら座標も渡してジオコーディングを省略
       const result = await apiService.analyzeLifestyleScore({
-        address: targetAddress
+        address: targetAddress,
+        coordinates: targetAddress === currentAddress && coordinates ? coordinates : undefined
       });
       
       setAnalysisData(result);
@@ -765,7 +767,7 @@ const LifestyleScoreAnalysis: React.FC<{ onViewChange?: (view: 'home' | 'lifesty
     } finally {
       setIsLoading(false);
     }
-  }, [address, setCurrentAddress, setHousingScores, setCoordinates]);
+  }, [address, currentAddress, coordinates, setCurrentAddress, setHousingScores, setCoordinates]);
 
   // ホーム画面で設定された住所を自動適用し、必要に応じて自動分析
   useEffect(() => {
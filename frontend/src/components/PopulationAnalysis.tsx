@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { PopulationMap } from './PopulationMap';
 import { PopulationChart } from './PopulationChart';
 import { PopulationStats } from './PopulationStats';
-import { populationApiService, PopulationResponse } from '../services/populationApi';
+import { populationApiService, PopulationResponse, PopulationStatsSummary } from '../services/populationApi';
 
 interface PopulationAnalysisProps {
   theme?: 'light' | 'dark';
@@ -13,6 +13,7 @@ export const PopulationAnalysis: React.FC<PopulationAnalysisProps> = ({
 }) => {
   const [populationData, setPopulationData] = useState<PopulationResponse[]>([]);
   const [loading, setLoading] = useState(false);
+  const [projectionLoading, setProjectionLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [selectedLocation, setSelectedLocation] = useState({
     lat: 35.6762, // 東京駅
@@ -23,19 +24,41 @@ export const PopulationAnalysis: React.FC<PopulationAnalysisProps> = ({
   const [searchRadius, setSearchRadius] = useState(2); // km
 
   // 人口統計データ
-  const [populationStats, setPopulationStats] = useState({
+  const [populationStats, setPopulationStats] = useState<PopulationStatsSummary>({
     totalPopulation: 0,
-    ageGroups: {} as { [key: string]: number },
+    ageGroups: {},
     populationDensity: 0,
-    trends: [] as { year: string; population: number }[]
+    trends: []
   });
 
-  // データ取得関数
+  // 現況の人口統計（サーバーのメッシュ人口ストアから集計）
   const fetchPopulationData = async () => {
     if (!selectedLocation.lat || !selectedLocation.lng) return;
 
     setLoading(true);
     setError(null);
+    setPopulationData([]);
+
+    try {
+      const stats = await populationApiService.getDemographicsStats(
+        selectedLocation.lat,
+        selectedLocation.lng,
+        searchRadius
+      );
+      if (stats) {
+        setPopulationStats(stats);
+      } else {
+        setError('この地点の人口データを取得できませんでした。');
+      }
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  // 将来推計人口（国土数値情報のタイル）は要求されたときだけ取得
+  const fetchProjectionData = async () => {
+    setProjectionLoading(true);
+    setError(null);
 
     try {
       const data = await populationApiService.getPopulationDataByRegion(
@@ -46,23 +69,21 @@ export const PopulationAnalysis: React.FC<PopulationAnalysisProps> = ({
       );
 
       setPopulationData(data);
-      
-      // 統計情報を計算
-      const stats = populationApiService.calculatePopulationStats(data);
-      setPopulationStats(stats);
+      const projection = populationApiService.calculatePopulationStats(data);
+      setPopulationStats(prev => ({ ...prev, trends: projection.trends }));
 
     } catch (error) {
-      console.error('人口データ取得エラー:', error);
-      setError('人口データの取得に失敗しました。しばらく待ってから再試行してください。');
+      console.error('将来推計人口データ取得エラー:', error);
+      setError('将来推計人口データの取得に失敗しました。しばらく待ってから再試行してください。');
     } finally {
-      setLoading(false);
+      setProjectionLoading(false);
     }
   };
 
-  // 初回データ取得
+  // 地点・半径が変わったら現況の統計を取得
   useEffect(() => {
     fetchPopulationData();
-  }, [selectedLocation, zoomLevel, searchRadius]);
+  }, [selectedLocation, searchRadius]);
 
   // 場所選択ハンドラー
   const handleLocationSelect = (lat: number, lng: number, name: string) => {
@@ -90,10 +111,10 @@ export const PopulationAnalysis: React.FC<PopulationAnalysisProps> = ({
         <div className={`${cardBgColor} rounded-lg shadow-md border ${borderColor}`}>
           <div className="p-6">
             <h1 className={`text-3xl font-bold ${textColor} mb-2`}>
-              将来推計人口分析
+              人口分析
             </h1>
             <p className={`${theme === 'light' ? 'text-gray-600' : 'text-gray-300'}`}>
-              国土数値情報を活用した地域別人口推計データの可視化
+              国勢調査の地域メッシュ統計による周辺人口と、国土数値情報の将来推計人口の可視化
             </p>
           </div>
         </div>
@@ -190,7 +211,7 @@ export const PopulationAnalysis: React.FC<PopulationAnalysisProps> = ({
                   className={`w-full p-3 border rounded-md ${borderColor} ${cardBgColor} ${textColor}`}
                 />
               </div>
-              <div className="flex items-end">
+              <div className="flex items-end gap-2">
                 <button
                   onClick={fetchPopulationData}
                   disabled={loading}
@@ -202,6 +223,17 @@ export const PopulationAnalysis: React.FC<PopulationAnalysisProps> = ({
                 >
                   {loading ? '読み込み中...' : '検索'}
                 </button>
+                <button
+                  onClick={fetchProjectionData}
+                  disabled={projectionLoading}
+                  className={`w-full p-3 rounded-md font-medium transition-colors ${
+                    projectionLoading
+                      ? 'bg-gray-400 cursor-not-allowed'
+                      : 'bg-indigo-600 hover:bg-indigo-700'
+                  } text-white`}
+                >
+                  {projectionLoading ? '読み込み中...' : '将来推計を表示'}
+                </button>
               </div>
             </div>
           </div>
@@ -228,7 +260,7 @@ export const PopulationAnalysis: React.FC<PopulationAnalysisProps> = ({
             data={populationStats.trends}
             ageGroups={populationStats.ageGroups}
             theme={theme}
-            loading={loading}
+            loading={loading || projectionLoading}
           />
 
           {/* 人口分布マップ */}
@@ -236,7 +268,7 @@ export const PopulationAnalysis: React.FC<PopulationAnalysisProps> = ({
             data={populationData}
             center={selectedLocation}
             theme={theme}
-            loading={loading}
+            loading={projectionLoading}
             onLocationSelect={handleLocationSelect}
           />
         </div>
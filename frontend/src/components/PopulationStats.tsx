@@ -66,7 +66,7 @@ export const PopulationStats: React.FC<PopulationStatsProps> = ({
           {/* 総人口 */}
           <div className={`p-4 rounded-lg border ${borderColor} ${theme === 'light' ? 'bg-gray-50' : 'bg-gray-700'}`}>
             <div className={`text-sm font-medium ${subtextColor} mb-1`}>
-              総人口（推計）
+              総人口
             </div>
             <div className={`text-2xl font-bold ${textColor}`}>
               {formatNumber(stats.totalPopulation)}
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import {
   Card,
   CardHeader,
@@ -11,6 +11,7 @@ import {
   RadioGroup,
   RadioGroupItem
 } from '../ui';
+import { apiService, AddressSuggestion } from '../../services/apiService';
 
 interface FormData {
   propertyType: string;
@@ -20,6 +21,11 @@ interface FormData {
   estimatedRent: string;
   buildingAge: string;
   description: string;
+  // 住所候補から選択した場合の解決済み座標
+  coordinates?: {
+    lat: number;
+    lng: number;
+  };
 }
 
 interface FormErrors {
@@ -42,13 +48,38 @@ const PropertyForm: React.FC<PropertyFormProps> = ({ onSubmit }) => {
   });
 
   const [errors, setErrors] = useState<FormErrors>({});
+  const [addressSuggestions, setAddressSuggestions] = useState<AddressSuggestion[]>([]);
+
+  // 入力中の住所の候補（入力が止まってから取得）
+  useEffect(() => {
+    const query = formData.address.trim();
+    if (query.length < 2 || formData.coordinates) {
+      setAddressSuggestions([]);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      const suggestions = await apiService.suggestAddresses(query, 8);
+      if (!cancelled) setAddressSuggestions(suggestions);
+    }, 250);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [formData.address, formData.coordinates]);
 
   const handleInputChange = (e: React.ChangeEvent<HTMLInputElement | HTMLTextAreaElement>) => {
     const { name, value } = e.target;
-    setFormData(prev => ({
-      ...prev,
-      [name]: value
-    }));
+    if (name === 'address') {
+      // 候補と一致すればその座標を保持（手入力に戻したら破棄）
+      const selected = addressSuggestions.find(s => s.address === value);
+      setFormData(prev => ({ ...prev, address: value, coordinates: selected?.coordinates }));
+    } else {
+      setFormData(prev => ({
+        ...prev,
+        [name]: value
+      }));
+    }
     
     // リアルタイムバリデーション
     validateField(name, value);
@@ -144,7 +175,13 @@ const PropertyForm: React.FC<PropertyFormProps> = ({ onSubmit }) => {
                 onChange={handleInputChange}
                 placeholder="東京都渋谷区..."
                 className={errors.address ? 'border-red-500' : ''}
+                list="address-suggestions"
               />
+              <datalist id="address-suggestions">
+                {addressSuggestions.map(suggestion => (
+                  <option key={suggestion.key} value={suggestion.address} />
+                ))}
+              </datalist>
               {errors.address && <p className="text-red-500 text-sm">{errors.address}</p>}
             </div>
 
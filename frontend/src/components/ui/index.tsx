@@ -86,6 +86,7 @@ interface InputProps {
   style?: React.CSSProperties;
   min?: string;
   step?: string;
+  list?: string;
 }
 
 export const Input: React.FC<InputProps> = ({
@@ -98,7 +99,8 @@ export const Input: React.FC<InputProps> = ({
   className = '',
   style,
   min,
-  step
+  step,
+  list
 }) => (
   <input
     id={id}
@@ -111,6 +113,7 @@ export const Input: React.FC<InputProps> = ({
     style={style}
     min={min}
     step={step}
+    list={list}
   />
 );
 
@@ -21,8 +21,189 @@ console.log('🔧 Environment:', process.env.NODE_ENV);
 // 生活利便性スコア関連の型定義
 export interface LifestyleAnalysisRequest {
   address: string;
+  // 住所候補から選択した場合は解決済み座標を渡し、サーバー側のジオコーディングを省略
+  coordinates?: {
+    lat: number;
+    lng: number;
+  };
 }
 
+// 住所候補（/api/address/suggest）
+export interface AddressSuggestion {
+  address: string;
+  level: 'prefecture' | 'municipality' | 'town' | 'block';
+  coordinates: {
+    lat: number;
+    lng: number;
+  };
+  key: string;
+}
+
+// 周辺人口（/api/demographics、国勢調査 地域メッシュ統計）
+export interface DemographicsSummary {
+  population: number;
+  male: number | null;
+  female: number | null;
+  households: number | null;
+  average_household_size: number | null;
+  density_per_km2: number;
+  density_label: string;
+  age_distribution: {
+    under15: number | null;
+    age15to64: number | null;
+    over65: number | null;
+    over75: number | null;
+  };
+  home_mesh: { code: string; population: number | null };
+  mesh_level: number;
+  mesh_count: number;
+  radius: number;
+  survey: string | null;
+  source: string;
+}
+
+// スコアアトラス（居住メッシュごとの事前計算スコア）
+export interface AtlasScores {
+  mesh_code: string;
+  mesh_level: number;
+  scores: Record<string, number>;
+  total_score: number;
+  built_at: string | null;
+  source: string;
+}
+
+// 複数地点の比較（/api/compare）
+export interface ComparedArea {
+  address: string;
+  coordinates?: { lat: number; lng: number };
+  administrative_area?: any;
+  demographics?: DemographicsSummary | null;
+  total_score?: number;
+  grade?: string;
+  scores?: Record<string, number>;
+  facility_counts?: Record<string, number>;
+  price_per_sqm?: { median: number; count: number; data_source: string | null } | null;
+  error?: string;
+}
+
+export interface ComparedValues {
+  values: (number | null)[];
+  best: number | null;
+  worst: number | null;
+  spread: number | null;
+}
+
+export interface AreaComparisonResult {
+  areas: ComparedArea[];
+  categories: string[];
+  comparison: {
+    total_score: ComparedValues;
+    scores: Record<string, ComparedValues>;
+    facility_counts: Record<string, ComparedValues>;
+    price_per_sqm: ComparedValues;
+  };
+  ranking: number[];
+  analyses_run: number;
+  queries_run: number;
+  elapsed_seconds: number;
+}
+
+// 似たエリア検索
+export interface SimilarArea {
+  mesh_code: string;
+  coordinates: { lat: number; lng: number };
+  municipality_code: string | null;
+  address: string | null;
+  scores: Record<string, number>;
+  total_score: number;
+  price_per_sqm: number | null;
+  distance: number;
+}
+
+export interface SimilarAreaFilters {
+  k?: number;
+  prefecture?: string;
+  municipality?: string;
+  radius_km?: number;
+  max_price_per_sqm?: number;
+  price_weight?: number;
+}
+
+export interface SimilarAreasResult {
+  coordinates: { lat: number; lng: number } | null;
+  reference?: AtlasScores & { price_per_sqm: number | null };
+  areas: SimilarArea[];
+  count: number;
+}
+
+// 最適地の検索（重み付きスコアの上位）
+export interface BestLocationsRequest {
+  weights: Record<string, number>;
+  minimums?: Record<string, number>;
+  k?: number;
+  polygon?: { type: 'Polygon' | 'MultiPolygon'; coordinates: unknown };
+  bbox?: [number, number, number, number];
+  address?: string;
+  coordinates?: { lat: number; lng: number };
+  radius_km?: number;
+}
+
+export interface BestLocation {
+  mesh_code: string;
+  coordinates: { lat: number; lng: number };
+  weighted_score: number;
+  scores: Record<string, number>;
+  total_score: number;
+  address: string | null;
+}
+
+export interface BestLocationsResult {
+  weights: Record<string, number>;
+  minimums: Record<string, number>;
+  mesh_level: number;
+  searched_meshes: number;
+  locations: BestLocation[];
+  count: number;
+}
+
+// スコアヒートマップ（layers は float16・リトルエンディアン・行優先（北→南）の base64）
+export interface ScoreHeatmap {
+  bounds: { south: number; west: number; north: number; east: number };
+  resolution: number;
+  shape: [number, number];
+  cell_size_deg: { lat: number; lng: number };
+  encoding: 'float16-le-base64';
+  row_order: 'north_to_south';
+  layers: Record<string, string>;
+  stats: Record<string, { min: number; mean: number; max: number }>;
+  source: { facilities: string; transport: string; hazard: string };
+}
+
+// ベクトルタイル（MVT）のURLテンプレート（地図ライブラリのタイルソースに渡す）
+export type VectorTileLayer = 'facilities' | 'scores' | 'prices';
+
+export const vectorTileUrl = (layer: VectorTileLayer): string =>
+  `${API_BASE_URL}/tiles/${layer}/{z}/{x}/{y}.mvt`;
+
+// ヒートマップのレイヤー（base64 float16）→ Float32Array
+export const decodeHeatmapLayer = (encoded: string): Float32Array => {
+  const bytes = Uint8Array.from(atob(encoded), (c) => c.charCodeAt(0));
+  const view = new DataView(bytes.buffer);
+  const values = new Float32Array(bytes.length / 2);
+  for (let i = 0; i < values.length; i++) {
+    const h = view.getUint16(i * 2, true);
+    const exponent = (h >> 10) & 0x1f;
+    const fraction = h & 0x3ff;
+    const sign = h & 0x8000 ? -1 : 1;
+    values[i] = exponent === 0
+      ? sign * 2 ** -14 * (fraction / 1024)
+      : exponent === 0x1f
+        ? (fraction ? NaN : sign * Infinity)
+        : sign * 2 ** (exponent - 15) * (1 + fraction / 1024);
+  }
+  return values;
+};
+
 // AI分析結果の型定義
 export interface AIAnalysisResult {
   detailed_analysis: string;
@@ -80,13 +261,115 @@ export const apiService = {
     }
   },
 
+  // 住所オートコンプリート（ガゼッティア未配置のサーバーでは空配列）
+  async suggestAddresses(query: string, limit: number = 10): Promise<AddressSuggestion[]> {
+    try {
+      const response = await api.get('/api/address/suggest', {
+        params: { q: query, limit },
+        timeout: 3000
+      });
+      return response.data.suggestions || [];
+    } catch (error) {
+      return [];
+    }
+  },
+
+  // 周辺人口（メッシュ人口データ未配置のサーバーでは null）
+  async getDemographics(
+    location: { lat: number; lng: number } | { address: string },
+    radius: number = 1000
+  ): Promise<DemographicsSummary | null> {
+    try {
+      const response = await api.get('/api/demographics', { params: { ...location, radius } });
+      return response.data.demographics;
+    } catch (error) {
+      return null;
+    }
+  },
+
+  // 地点のメッシュの事前計算スコア（アトラスにない地点は null）
+  async getAtlasScores(
+    location: { lat: number; lng: number } | { address: string }
+  ): Promise<AtlasScores | null> {
+    try {
+      const response = await api.get('/api/atlas/scores', { params: location });
+      return response.data;
+    } catch (error) {
+      return null;
+    }
+  },
+
+  // 2〜10地点をサーバー側でまとめて分析・比較
+  async compareAreas(
+    areas: { address: string; coordinates?: { lat: number; lng: number } }[]
+  ): Promise<AreaComparisonResult | null> {
+    try {
+      const response = await api.post('/api/compare', { areas });
+      return response.data;
+    } catch (error) {
+      return null;
+    }
+  },
+
+  // 地点とスコアの傾向が近いエリア
+  async getSimilarAreas(
+    location: { lat: number; lng: number } | { address: string },
+    filters: SimilarAreaFilters = {}
+  ): Promise<SimilarAreasResult | null> {
+    try {
+      const response = await api.get('/api/similar-areas', { params: { ...location, ...filters } });
+      return response.data;
+    } catch (error) {
+      return null;
+    }
+  },
+
+  // 分析結果のスコアが近いエリア（ライブ分析の結果から探す）
+  async findSimilarAreas(
+    scores: Record<string, number>,
+    coordinates?: { lat: number; lng: number },
+    filters: SimilarAreaFilters & { price_per_sqm?: number } = {}
+  ): Promise<SimilarAreasResult | null> {
+    try {
+      const response = await api.post('/api/similar-areas', { scores, coordinates, ...filters });
+      return response.data;
+    } catch (error) {
+      return null;
+    }
+  },
+
+  // 重みと下限の条件に合う最適地（範囲はポリゴン・矩形・住所からの半径）
+  async findBestLocations(request: BestLocationsRequest): Promise<BestLocationsResult | null> {
+    try {
+      const response = await api.post('/api/best-locations', request);
+      return response.data;
+    } catch (error) {
+      return null;
+    }
+  },
+
+  // 範囲のスコアヒートマップ（layers: total / カテゴリ名のカンマ区切り / all）
+  async getScoreHeatmap(
+    bounds: { south: number; west: number; north: number; east: number },
+    resolution: number = 250,
+    layers: string = 'total'
+  ): Promise<ScoreHeatmap | null> {
+    try {
+      const response = await api.get('/api/heatmap', { params: { ...bounds, resolution, layers } });
+      return response.data;
+    } catch (error) {
+      return null;
+    }
+  },
+
   // 生活利便性スコア分析（8項目対応版 - 買い物と飲食を分離）
   async analyzeLifestyleScore(data: LifestyleAnalysisRequest): Promise<LifestyleAnalysisResult> {
     try {
       console.log('🔄 FastAPIサーバーでデータ取得中:', data.address);
       // FastAPIの /api/lifestyle-analysis-8items エンドポイントを使用
       const response = await api.post('/api/lifestyle-analysis-8items', {
-        address: data.address
+        address: data.address,
+        coordinates: data.coordinates
       });
       console.log('✅ APIデータ取得成功:', response.data);
       
@@ -1,6 +1,9 @@
 /**
- * 国土数値情報（将来推計人口250mメッシュ）API サービス
+ * 人口データ サービス
+ * 現況の人口・年齢構成はサーバーのメッシュ人口ストア（/api/demographics）から取得し、
+ * 国土数値情報（将来推計人口250mメッシュ）API のタイルは将来推計を表示するときだけ取得する
  */
+import { apiService } from './apiService';
 
 export interface PopulationData {
   MESH_ID: string;
@@ -22,6 +25,13 @@ export interface PopulationResponse {
   features: PopulationFeature[];
 }
 
+export interface PopulationStatsSummary {
+  totalPopulation: number;
+  ageGroups: { [key: string]: number };
+  populationDensity: number;
+  trends: { year: string; population: number }[];
+}
+
 export interface TileCoordinate {
   x: number;
   y: number;
@@ -144,15 +154,43 @@ export class PopulationApiService {
     return this.getBulkPopulationData(tiles);
   }
 
+  /**
+   * 地点周辺の現況人口の統計（/api/demographics、データがなければ null）
+   */
+  public async getDemographicsStats(
+    lat: number,
+    lng: number,
+    radius: number = 1 // km
+  ): Promise<PopulationStatsSummary | null> {
+    const demographics = await apiService.getDemographics({ lat, lng }, radius * 1000);
+    if (!demographics) {
+      return null;
+    }
+
+    // 構成比（%）→ 人数（秘匿などで構成比がない年齢層は除く）
+    const { population, age_distribution: ages } = demographics;
+    const ageGroups: { [key: string]: number } = {};
+    const shares: [string, number | null][] = [
+      ['0-14', ages.under15],
+      ['15-64', ages.age15to64],
+      ['65+', ages.over65]
+    ];
+    shares.forEach(([group, share]) => {
+      if (share !== null) ageGroups[group] = Math.round(population * share / 100);
+    });
+
+    return {
+      totalPopulation: population,
+      ageGroups,
+      populationDensity: demographics.density_per_km2,
+      trends: []
+    };
+  }
+
   /**
    * 人口データから統計情報を計算
    */
-  public calculatePopulationStats(data: PopulationResponse[]): {
-    totalPopulation: number;
-    ageGroups: { [key: string]: number };
-    populationDensity: number;
-    trends: { year: string; population: number }[];
-  } {
+  public calculatePopulationStats(data: PopulationResponse[]): PopulationStatsSummary {
     let totalPopulation = 0;
     const ageGroups: { [key: string]: number } = {
       '0-14': 0,
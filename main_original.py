@@ -1,7 +1,6 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import os
 import asyncio
@@ -11,10 +10,10 @@ from dotenv import load_dotenv
 import logging
 from datetime import datetime
 from contextlib import asynccontextmanager
+from collections import deque
 import math
 import aiohttp
 import googlemaps
-import json
 import asyncio
 import logging
 from typing import Dict, List, Optional, Any
@@ -22,6 +21,41 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 from datetime import datetime
 # from geopy.distance import geodesic
 import re
+from app.services.price_graph_builder import build_price_graph_data
+from app.utils import json_codec
+from app.utils.json_codec import FastJSONResponse
+from app.utils.compression import CompressionMiddleware
+from app.utils.field_selection import select_fields, ANALYSIS_FIELD_ALIASES, PLACES_FIELD_ALIASES
+from app.utils.address import PREFECTURE_CODES, extract_prefecture
+from app.services.score_percentiles import rank_scores
+from app.services.static_assets import StaticAssetManifest
+from app.services.poi_store import get_poi_store, get_places_backend_mode, places_search_available
+from app.services.gazetteer import geocode_offline
+from app.services.address_suggest import get_address_suggest_index
+from app.services.admin_boundaries import reverse_geocode_offline, to_geocoding_result
+from app.services.hazard_raster import get_hazard_raster, hazard_risk
+from app.services.crime_stats import get_crime_stats
+from app.services.station_index import get_station_index
+from app.services.walking_network import annotate_walking_distances
+from app.services.mesh_population import get_mesh_population
+from app.services.transaction_store import get_transaction_store, parse_period
+from app.services.score_atlas import get_score_atlas
+from app.services.similar_areas import get_similar_area_index
+from app.services.vector_tiles import TILE_LAYERS, TILE_MAX_ZOOM, get_tile
+from app.services.analysis_export import EXPORT_FORMATS, PYARROW_AVAILABLE, export_stream
+from app.services.grid_scoring import (
+    GRID_MARGIN_M, HEATMAP_LIVE_TILE_RADIUS_M, HEATMAP_MAX_CELLS, HEATMAP_MAX_LIVE_CALLS, SCORE_CATEGORIES,
+    GridScorer, ScoringGrid, collect_store_facilities, crime_bonus_grid, encode_float16,
+    facilities_from_places, heatmap_layers, layer_stats, live_tile_centers, required_types
+)
+from app.utils.coordinates import validate_coordinates
+from app.utils.query_scope import dedup_in_scope, shared_query_count, shared_query_scope
+from app.services.result_cache import (
+    ANALYSIS_CACHE_TTL, GEOCODE_CACHE_TTL, MLIT_CACHE_TTL, PLACES_CACHE_TTL, CacheWarmMiddleware, cache_refreshing,
+    cached_result
+)
+from app.services.cache_backend import SESSION_CACHE_TTL, SessionStore, get_cache
+from app.utils.jis_mesh import mesh_codes
 
 # 🆕 Vertex AIチャット機能のインポート（OpenAIチャット機能の代わり）
 try:
@@ -83,6 +117,12 @@ MLIT_API_KEY = os.getenv('MLIT_API_KEY')
 PROJECT_ID = os.getenv('GOOGLE_CLOUD_PROJECT_ID')
 LOCATION = os.getenv('GOOGLE_CLOUD_LOCATION', 'us-central1')
 PORT = int(os.getenv('PORT', 8000))
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # 圧縮対象の最小バイト数
+COMPARE_MAX_CONCURRENCY = int(os.getenv('COMPARE_MAX_CONCURRENCY', 10))  # /api/compare で同時に分析する地点数（既定は地点数の上限と同じ）
+EXPORT_MAX_CONCURRENCY = int(os.getenv('EXPORT_MAX_CONCURRENCY', 5))  # /api/export/analyses で同時に分析する地点数
+EXPORT_MAX_AREAS = int(os.getenv('EXPORT_MAX_AREAS', 10000))  # /api/export/analyses の1リクエストの地点数の上限
+BEST_LOCATIONS_MAX_RADIUS_KM = float(os.getenv('BEST_LOCATIONS_MAX_RADIUS_KM', 100))  # /api/best-locations の radius_km の上限
+BEST_LOCATIONS_MAX_VERTICES = int(os.getenv('BEST_LOCATIONS_MAX_VERTICES', 10000))  # /api/best-locations の polygon の頂点数の上限
 
 # Vertex AI初期化（安全版）
 if PROJECT_ID and VERTEX_AI_AVAILABLE:
@@ -134,7 +174,8 @@ app = FastAPI(
     title="Location Insights API",
     description="住環境・不動産分析API v3.1",
     version="3.1",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS設定
@@ -146,6 +187,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# レスポンス圧縮（brotli / gzip をAccept-Encodingで選択）
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# キャッシュの事前読み込み（X-Cache-Warm 付きのリクエストは低優先度で再計算してキャッシュを更新）
+app.add_middleware(CacheWarmMiddleware)
+
 # 🆕 Vertex AIチャット機能WebSocketルーター追加
 if VERTEX_AI_CHAT_AVAILABLE:
     app.include_router(vertex_ai_chat_router)
@@ -157,10 +204,44 @@ else:
 # Pydanticモデル
 class LifestyleAnalysisRequest(BaseModel):
     address: str
+    coordinates: Optional[Dict[str, float]] = None  # 住所候補APIで解決済みの座標（指定時はジオコーディング省略）
 
 class PropertyPriceRequest(BaseModel):
     address: str
     propertyData: Dict[str, Any]
+    coordinates: Optional[Dict[str, float]] = None
+    # 比較事例の取引時期（例: "20151"〜"20252"。省略時は取引ストアの最新から10四半期）
+    from_period: Optional[str] = None
+    to_period: Optional[str] = None
+
+class CompareAreasRequest(BaseModel):
+    areas: List[LifestyleAnalysisRequest]  # 2〜10地点（住所と、解決済みなら座標）
+
+class ExportAnalysesRequest(BaseModel):
+    areas: List[LifestyleAnalysisRequest]  # 物件・地点の一覧（住所と、解決済みなら座標）
+    format: str = "csv"  # "csv" / "parquet"
+
+class SimilarAreasRequest(BaseModel):
+    scores: Dict[str, float]  # 8項目スコア（ライブ分析の結果など）
+    coordinates: Optional[Dict[str, float]] = None  # 半径の中心・自エリアの除外に使う
+    price_per_sqm: Optional[float] = None  # 価格で並べ替える場合の基準の㎡単価
+    k: int = 10
+    prefecture: Optional[str] = None
+    municipality: Optional[str] = None
+    radius_km: Optional[float] = None
+    max_price_per_sqm: Optional[float] = None
+    price_weight: float = 0.0
+
+class BestLocationsRequest(BaseModel):
+    weights: Dict[str, float]  # カテゴリ別の重み（例: {"safety": 3, "transport": 2}）
+    minimums: Optional[Dict[str, float]] = None  # カテゴリ別の下限（例: {"safety": 70}）
+    k: int = 20
+    # 範囲（複数指定すると共通部分。省略時は全国）
+    polygon: Optional[Dict[str, Any]] = None  # GeoJSON の Polygon / MultiPolygon
+    bbox: Optional[List[float]] = None  # [南, 西, 北, 東]
+    address: Optional[str] = None  # 通勤先など。radius_km と組み合わせる
+    coordinates: Optional[Dict[str, float]] = None
+    radius_km: Optional[float] = None
 
 class AILifestyleAnalysisRequest(BaseModel):
     address: str
@@ -169,12 +250,11 @@ class AILifestyleAnalysisRequest(BaseModel):
     scores: Dict[str, float]
     overallScore: float
 
-# 静的ファイルの配信
+# 静的ファイルの配信（起動時に一度だけ build ディレクトリを走査）
 build_dir = Path("frontend/build")
-static_dir = Path("frontend/build/static")
-if build_dir.exists() and static_dir.exists():
-    app.mount("/static", StaticFiles(directory="frontend/build/static"), name="static")
-    print("✅ 静的ファイル配信を有効化しました")
+frontend_assets = StaticAssetManifest(build_dir)
+if frontend_assets.available:
+    print(f"✅ 静的ファイル配信を有効化しました ({len(frontend_assets.assets)}件)")
 else:
     print("⚠️ フロントエンドビルドが見つかりません。開発モードで起動します。")
 
@@ -220,23 +300,27 @@ except Exception as e:
 
 router = APIRouter()
 
+def new_location_context() -> Dict:
+    return {
+        "current_location": None,
+        "search_history": [],
+        "map_context": {},
+        "last_query_data": None
+    }
+
 class LocationChatManager:
     """🗺️ 位置情報ベースのチャット管理"""
     
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
-        self.user_contexts: Dict[str, Dict] = {}  # ユーザーの位置情報コンテキスト
+        # ユーザーの位置情報コンテキスト（キャッシュの保存先に置き、ワーカー間で共有）
+        self.user_contexts = SessionStore("location_chat_context", SESSION_CACHE_TTL)
     
     async def connect(self, websocket: WebSocket, session_id: str):
         """WebSocket接続の確立"""
         await websocket.accept()
         self.active_connections[session_id] = websocket
-        self.user_contexts[session_id] = {
-            "current_location": None,
-            "search_history": [],
-            "map_context": {},
-            "last_query_data": None
-        }
+        await self.user_contexts.set(session_id, new_location_context())
         
         # 接続確認メッセージ
         await self.send_message(session_id, {
@@ -252,21 +336,20 @@ class LocationChatManager:
             ]
         })
     
-    def disconnect(self, session_id: str):
+    async def disconnect(self, session_id: str):
         """WebSocket切断処理"""
         if session_id in self.active_connections:
             del self.active_connections[session_id]
-        if session_id in self.user_contexts:
-            del self.user_contexts[session_id]
+        await self.user_contexts.delete(session_id)
     
     async def send_message(self, session_id: str, message: Dict):
         """メッセージ送信"""
         if session_id in self.active_connections:
             try:
-                await self.active_connections[session_id].send_text(json.dumps(message, ensure_ascii=False))
+                await self.active_connections[session_id].send_text(json_codec.dumps(message))
             except Exception as e:
                 logging.error(f"メッセージ送信エラー: {e}")
-                self.disconnect(session_id)
+                await self.disconnect(session_id)
     
     async def get_location_data(self, query: str, session_id: str) -> Dict[str, Any]:
         """🗺️ Google Mapsから位置情報データを取得"""
@@ -286,7 +369,8 @@ class LocationChatManager:
             address = location['formatted_address']
             
             # ユーザーコンテキストに位置情報を保存
-            self.user_contexts[session_id]["current_location"] = {
+            context = await self.user_contexts.get(session_id) or new_location_context()
+            context["current_location"] = {
                 "query": query,
                 "lat": lat,
                 "lng": lng,
@@ -343,15 +427,16 @@ class LocationChatManager:
             }
             
             # 検索履歴に追加
-            self.user_contexts[session_id]["search_history"].append({
+            context["search_history"].append({
                 "query": query,
                 "timestamp": datetime.now().isoformat(),
                 "result_summary": f"{address} - {len(nearby_places.get('results', []))}件の周辺施設"
             })
             
             # マップコンテキストを更新
-            self.user_contexts[session_id]["map_context"] = result
-            self.user_contexts[session_id]["last_query_data"] = result
+            context["map_context"] = result
+            context["last_query_data"] = result
+            await self.user_contexts.set(session_id, context)
             
             return result
             
@@ -388,7 +473,7 @@ class LocationChatManager:
                 location_query = message.strip()
                 query_type = "location"
         
-        context = self.user_contexts.get(session_id, {})
+        context = await self.user_contexts.get(session_id, {})
         current_location = context.get("current_location")
         last_query_data = context.get("last_query_data")
         
@@ -610,7 +695,7 @@ async def websocket_chat_endpoint(websocket: WebSocket, session_id: str):
         while True:
             # メッセージ受信
             data = await websocket.receive_text()
-            message_data = json.loads(data)
+            message_data = json_codec.loads(data)
             
             user_message = message_data.get("message", "").strip()
             if not user_message:
@@ -642,7 +727,7 @@ async def websocket_chat_endpoint(websocket: WebSocket, session_id: str):
             })
             
     except WebSocketDisconnect:
-        chat_manager.disconnect(session_id)
+        await chat_manager.disconnect(session_id)
     except Exception as e:
         logging.error(f"WebSocketエラー: {e}")
         await chat_manager.send_message(session_id, {
@@ -650,7 +735,7 @@ async def websocket_chat_endpoint(websocket: WebSocket, session_id: str):
             "message": f"エラーが発生しました: {str(e)}",
             "timestamp": datetime.now().isoformat()
         })
-        chat_manager.disconnect(session_id)
+        await chat_manager.disconnect(session_id)
 
 @router.get("/api/chat/status")
 async def get_chat_status():
@@ -672,102 +757,6 @@ async def get_chat_status():
 
 
 
-# =============================================================================
-# グラフデータ生成関数
-# =============================================================================
-def generate_price_distribution_data(transactions: List[Dict]) -> Dict:
-    """価格分布ヒストグラムデータを生成"""
-    prices = [t["TradePrice"] for t in transactions]
-    if not prices:
-        return {"ranges": [], "counts": [], "labels": []}
-    
-    min_price = min(prices) // 10000  # 万円単位
-    max_price = max(prices) // 10000
-    
-    # 500万円刻みでレンジを作成
-    range_size = 500
-    start = (min_price // range_size) * range_size
-    end = ((max_price // range_size) + 1) * range_size
-    
-    ranges = []
-    counts = []
-    labels = []
-    
-    for i in range(start, end, range_size):
-        range_start = i
-        range_end = i + range_size
-        count = sum(1 for p in prices if range_start * 10000 <= p < range_end * 10000)
-        
-        ranges.append([range_start, range_end])
-        counts.append(count)
-        labels.append(f"{range_start}-{range_end}万円")
-    
-    return {
-        "ranges": ranges,
-        "counts": counts,
-        "labels": labels
-    }
-
-def generate_area_price_data(transactions: List[Dict], property_data: Dict) -> Dict:
-    """面積 vs 価格 散布図データを生成"""
-    similar_properties = []
-    for t in transactions:
-        similar_properties.append({
-            "area": t["Area"],
-            "price": t["TradePrice"] // 10000,  # 万円単位
-            "similarity": t["similarity_score"],
-            "municipality": t["Municipality"]
-        })
-    
-    target_property = {
-        "area": property_data.get("area", 70),
-        "price": 0,  # 推定価格は別途設定
-        "is_target": True
-    }
-    
-    return {
-        "similar_properties": similar_properties,
-        "target_property": target_property
-    }
-
-def generate_similarity_ranking_data(transactions: List[Dict]) -> Dict:
-    """類似度ランキングデータを生成"""
-    ranking_data = []
-    for i, t in enumerate(transactions):
-        ranking_data.append({
-            "rank": i + 1,
-            "price": t["TradePrice"] // 10000,  # 万円単位
-            "area": t["Area"],
-            "similarity": t["similarity_score"],
-            "municipality": t["Municipality"],
-            "formatted_price": t["formatted_price"],
-            "distance_km": t["distance_km"]
-        })
-    
-    return {"rankings": ranking_data}
-
-def generate_time_series_data(transactions: List[Dict]) -> Dict:
-    """時系列データを生成"""
-    # 取引時期別の価格平均を計算
-    time_data = {}
-    for t in transactions:
-        period = t.get("Period", "2024年Q1")  # デフォルト値
-        if period not in time_data:
-            time_data[period] = []
-        time_data[period].append(t["TradePrice"] // 10000)
-    
-    # 平均価格を計算
-    time_series = []
-    for period, prices in sorted(time_data.items()):
-        avg_price = sum(prices) // len(prices) if prices else 0
-        time_series.append({
-            "period": period,
-            "average_price": avg_price,
-            "count": len(prices)
-        })
-    
-    return {"time_series": time_series}
-
 # =============================================================================
 # 基本エンドポイント
 # =============================================================================
@@ -804,7 +793,9 @@ async def health_check():
             "vertex_ai_chat": "available" if VERTEX_AI_CHAT_AVAILABLE else "unavailable",
             "chat_provider": "vertex_ai",  # 🆕 Vertex AI使用を明記
             "websocket_endpoint": f"ws://localhost:{PORT}/ws/chat/{{session_id}}" if VERTEX_AI_CHAT_AVAILABLE else "unavailable"
-        }
+        },
+        # 分析結果・外部APIの結果キャッシュ（ヒット数はこのプロセスの集計）
+        "result_cache": await get_cache().stats()
     }
 
 @app.get("/api/test")
@@ -1363,7 +1354,41 @@ def calculate_similarity_score(target_area: float, area: float, target_year: int
 # Google Maps API関連関数
 # =============================================================================
 async def geocode_address(address: str) -> Dict[str, float]:
-    """住所から座標を取得（Google Maps API または 国土地理院API）"""
+    """住所から座標を取得（オフラインジオコーダー → 国土地理院API → Google Maps API）"""
+    result = await geocode_address_detailed(address)
+    return {"lat": result["lat"], "lng": result["lng"]}
+
+async def resolve_request_coordinates(request) -> Dict[str, float]:
+    """リクエストの座標を取得（住所候補で解決済みならジオコーディングを省略）"""
+    if request.coordinates and validate_coordinates(request.coordinates):
+        logger.info(f"📍 解決済み座標を使用（ジオコーディング省略）: {request.coordinates}")
+        return {"lat": request.coordinates["lat"], "lng": request.coordinates["lng"]}
+    return await geocode_address(request.address)
+
+def record_address_selection(address: str):
+    """利用者の分析に成功した住所を住所候補の並び順に反映（比較・エクスポートの各地点は数えない）"""
+    if cache_refreshing():
+        # キャッシュの事前読み込みは利用者の選択ではない
+        return
+    suggest_index = get_address_suggest_index()
+    if suggest_index is not None:
+        suggest_index.record_selection(address)
+
+@dedup_in_scope(lambda address: address)
+@cached_result("geocode", GEOCODE_CACHE_TTL, lambda address: address)
+async def geocode_address_detailed(address: str) -> Dict[str, Any]:
+    """住所から座標と照合レベル・取得元を取得"""
+    
+    # 🗾 オフラインジオコーダー（位置参照情報、ネットワーク不要）
+    offline_result = geocode_offline(address)
+    if offline_result:
+        logger.info(f"✅ オフラインジオコーダー成功: ({offline_result['lat']:.4f}, {offline_result['lng']:.4f}) 照合レベル={offline_result['match_level']}")
+        return {
+            "lat": offline_result["lat"],
+            "lng": offline_result["lng"],
+            "match_level": offline_result["match_level"],
+            "source": "gazetteer"
+        }
     
     # まず国土地理院APIを試行（無料）
     try:
@@ -1380,7 +1405,7 @@ async def geocode_address(address: str) -> Dict[str, float]:
                         lat = float(location["geometry"]["coordinates"][1])
                         lng = float(location["geometry"]["coordinates"][0])
                         logger.info(f"✅ 国土地理院API成功: ({lat:.4f}, {lng:.4f})")
-                        return {"lat": lat, "lng": lng}
+                        return {"lat": lat, "lng": lng, "match_level": "unknown", "source": "gsi"}
     except Exception as e:
         logger.warning(f"⚠️ 国土地理院API失敗: {e}")
     
@@ -1403,7 +1428,12 @@ async def geocode_address(address: str) -> Dict[str, float]:
             if data["status"] == "OK" and data["results"]:
                 location = data["results"][0]["geometry"]["location"]
                 logger.info(f"✅ Google Maps API成功")
-                return {"lat": location["lat"], "lng": location["lng"]}
+                return {
+                    "lat": location["lat"],
+                    "lng": location["lng"],
+                    "match_level": data["results"][0]["geometry"].get("location_type", "unknown"),
+                    "source": "google"
+                }
             else:
                 logger.error(f"❌ Google Maps API失敗: {data.get('status', 'UNKNOWN_ERROR')}")
         except Exception as e:
@@ -1412,24 +1442,57 @@ async def geocode_address(address: str) -> Dict[str, float]:
     # 両方失敗
     raise ValueError(f"住所の座標取得に失敗しました。APIキーを確認してください。")
 
+# Places検索の絶対最大半径（1.5km）
+PLACES_MAX_RADIUS = 1500
+
+@dedup_in_scope(lambda session, coordinates, place_type, radius, collector=None: (
+    coordinates["lat"], coordinates["lng"], place_type, radius, collector
+))
 async def search_nearby_places(
     session: aiohttp.ClientSession, 
     coordinates: Dict[str, float], 
     place_type: str, 
-    radius: int
+    radius: int,
+    collector: Optional[str] = None
 ) -> List[Dict]:
-    """Google Places APIで特定タイプの施設を検索（安全版）"""
+    """Google Places APIで特定タイプの施設を検索（安全版）
+
+    collector: 呼び出し元の収集関数名（PLACES_BACKEND_<COLLECTOR> でローカルPOIストアを選択）
+    """
+    
+    # 絶対最大半径制限
+    if radius > PLACES_MAX_RADIUS:
+        logger.warning(f"半径{radius}mを{PLACES_MAX_RADIUS}mに強制制限")
+        radius = PLACES_MAX_RADIUS
+    
+    # 🗂️ ローカルPOIストア（local / local_first）
+    backend_mode = get_places_backend_mode(collector)
+    if backend_mode != "live":
+        poi_store = get_poi_store()
+        if poi_store is not None:
+            places = poi_store.search_nearby(coordinates, place_type, radius)
+            logger.info(f"🗂️ ローカルPOIストア: {len(places)}件 for {place_type} (半径{radius}m)")
+            if places or backend_mode == "local":
+                return annotate_walking_distances(coordinates, places)
+        elif backend_mode == "local":
+            logger.warning("⚠️ ローカルPOIストアが見つかりません")
+            return []
     
     if not GOOGLE_MAPS_API_KEY:
         logger.warning("⚠️ Google Maps APIキーが設定されていません")
         return []
-    
-    # 絶対最大半径制限
-    ABSOLUTE_MAX_RADIUS = 1500  # 1.5km
-    if radius > ABSOLUTE_MAX_RADIUS:
-        logger.warning(f"半径{radius}mを{ABSOLUTE_MAX_RADIUS}mに強制制限")
-        radius = ABSOLUTE_MAX_RADIUS
-    
+    return await fetch_places_nearby(session, coordinates, place_type, radius)
+
+@cached_result("places", PLACES_CACHE_TTL, lambda session, coordinates, place_type, radius: (
+    coordinates["lat"], coordinates["lng"], place_type, radius
+), cache_if=bool)
+async def fetch_places_nearby(
+    session: aiohttp.ClientSession,
+    coordinates: Dict[str, float],
+    place_type: str,
+    radius: int
+) -> List[Dict]:
+    """Google Places Nearby Search（半径内・距離順。失敗時は空リスト）"""
     url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
     params = {
         "location": f"{coordinates['lat']},{coordinates['lng']}",
@@ -1467,21 +1530,21 @@ async def search_nearby_places(
                     })
                     
                     # 絶対最大半径以内の施設のみ
-                    if distance <= ABSOLUTE_MAX_RADIUS:
+                    if distance <= PLACES_MAX_RADIUS:
                         place["distance"] = distance
                         filtered_places.append(place)
                         logger.info(f"✅ 許可: {place.get('name', 'Unknown')} ({distance:.0f}m)")
                     else:
-                        logger.info(f"🚫 距離排除: {place.get('name', 'Unknown')} ({distance:.0f}m > {ABSOLUTE_MAX_RADIUS}m)")
+                        logger.info(f"🚫 距離排除: {place.get('name', 'Unknown')} ({distance:.0f}m > {PLACES_MAX_RADIUS}m)")
                 else:
                     logger.warning(f"⚠️ 座標なし: {place.get('name', 'Unknown')}")
             
-            logger.info(f"🔧 厳格フィルタリング: {len(places)}件 → {len(filtered_places)}件 ({ABSOLUTE_MAX_RADIUS}m以内)")
+            logger.info(f"🔧 厳格フィルタリング: {len(places)}件 → {len(filtered_places)}件 ({PLACES_MAX_RADIUS}m以内)")
             
-            # 距離でソート（近い順）
+            # 距離でソート（近い順）。徒歩ネットワークがあれば徒歩距離に置き換える
             filtered_places.sort(key=lambda x: x.get('distance', float('inf')))
             
-            return filtered_places
+            return annotate_walking_distances(coordinates, filtered_places)
             
     except Exception as e:
         logger.error(f"Places API エラー ({place_type}): {e}")
@@ -1490,6 +1553,12 @@ async def search_nearby_places(
 # =============================================================================
 # 国土交通省 不動産情報ライブラリAPI 統合機能
 # =============================================================================
+@dedup_in_scope(lambda session, x, y, z, from_period="20231", to_period="20252", land_type_codes=("02", "07"), api_key=None: (
+    x, y, z, from_period, to_period, tuple(land_type_codes)
+))
+@cached_result("mlit", MLIT_CACHE_TTL, lambda session, x, y, z, from_period="20231", to_period="20252", land_type_codes=("02", "07"), api_key=None: (
+    x, y, z, from_period, to_period, tuple(land_type_codes)
+), cache_if=lambda data: bool(data) and "error" not in data)
 async def fetch_mlit_real_estate_data(
     session: aiohttp.ClientSession,
     x: int, y: int, z: int,
@@ -1674,7 +1743,7 @@ def parse_mlit_transaction_data(geojson_data: Dict, property_data: Dict, target_
 
 async def get_safety_facilities(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Dict:
     """安全施設データを取得（デバッグ強化版）"""
-    if not GOOGLE_MAPS_API_KEY:
+    if not places_search_available("safety"):
         logger.error("❌ GOOGLE_MAPS_API_KEY が設定されていません")
         return {"total": 0, "facilities": [], "error": "api_key_missing"}
     
@@ -1707,7 +1776,7 @@ async def get_safety_facilities(session: aiohttp.ClientSession, coordinates: Dic
         radius = radius_config.get(facility_type, 2000)
         logger.info(f"🔍 検索中: {facility_type} (半径{radius}m)")
         
-        places = await search_nearby_places(session, coordinates, facility_type, radius)
+        places = await search_nearby_places(session, coordinates, facility_type, radius, collector="safety")
         logger.info(f"📍 {facility_type}: {len(places)}件の結果")
         
         for place in places:
@@ -1740,6 +1809,7 @@ async def get_safety_facilities(session: aiohttp.ClientSession, coordinates: Dic
         normalized_facility = {
             "name": facility.get("name", "Unknown"),
             "distance": round(facility.get("distance", 0)),
+            "walking_minutes": facility.get("walking_minutes"),
             "place_id": facility.get("place_id", ""),
             "rating": facility.get("rating", 0),
             "types": facility.get("types", []),
@@ -1806,9 +1876,175 @@ async def get_safety_facilities(session: aiohttp.ClientSession, coordinates: Dic
 # 🆕 8項目対応エンドポイント
 # =============================================================================
 
+def analysis_has_facilities(response: Dict) -> bool:
+    """施設が1件でも取れた分析か（外部APIの失敗で空になった分析はキャッシュしない）"""
+    details = response["lifestyle_analysis"]["facility_details"]
+    return any(category["total_facilities"] for category in details.values())
+
+@cached_result("analysis", ANALYSIS_CACHE_TTL, lambda session, address, coordinates: (
+    address, round(coordinates["lat"], 6), round(coordinates["lng"], 6)
+), cache_if=analysis_has_facilities)
+async def analyze_lifestyle_8items(
+    session: aiohttp.ClientSession, address: str, coordinates: Dict[str, float]
+) -> Dict:
+    """8項目のデータ収集・スコア計算を行い、/api/lifestyle-analysis-8items のレスポンスを組み立てる"""
+    # 特定のデータを収集
+    logger.info("🔍 施設データ収集開始")
+    
+    # 基本施設データ収集
+    education_data, medical_data, transport_data = await asyncio.gather(
+        get_education_facilities(session, coordinates),
+        get_medical_facilities(session, coordinates),
+        get_transport_facilities(session, coordinates)
+    )
+    
+    # 🆕 8項目対応: 買い物と飲食を分離して収集
+    shopping_data, dining_data = await asyncio.gather(
+        get_shopping_facilities(session, coordinates),
+        get_dining_facilities(session, coordinates)
+    )
+    
+    # その他のデータ収集
+    safety_facilities_data, environment_data, cultural_data = await asyncio.gather(
+        get_safety_facilities(session, coordinates),
+        get_environment_data_with_temples(session, coordinates),
+        get_cultural_entertainment_facilities(session, coordinates)
+    )
+    
+    # 災害・犯罪データ収集
+    disaster_data, crime_data = await asyncio.gather(
+        get_disaster_risk_data(session, coordinates),
+        get_crime_safety_data(session, coordinates)
+    )
+    
+    logger.info("✅ 全データ収集完了")
+    
+    # 🆕 8項目スコア計算
+    scores = calculate_comprehensive_scores_with_safety_8items(
+        education_data=education_data,
+        medical_data=medical_data,
+        transport_data=transport_data,
+        shopping_data=shopping_data,    # 🆕 買い物データ
+        dining_data=dining_data,        # 🆕 飲食データ
+        disaster_data=disaster_data,
+        crime_data=crime_data,
+        environment_data=environment_data,
+        cultural_data=cultural_data,
+        safety_facilities_data=safety_facilities_data
+    )
+    
+    # 総合スコア計算（🆕 8項目平均）
+    total_score = sum(scores.values()) / len(scores)
+    
+    # 🔥 10段階グレード計算
+    if total_score >= 95:
+        grade = "S+"
+    elif total_score >= 90:
+        grade = "S"
+    elif total_score >= 85:
+        grade = "A+"
+    elif total_score >= 80:
+        grade = "A"
+    elif total_score >= 75:
+        grade = "B+"
+    elif total_score >= 70:
+        grade = "B"
+    elif total_score >= 65:
+        grade = "C+"
+    elif total_score >= 60:
+        grade = "C"
+    elif total_score >= 55:
+        grade = "D+"
+    else:
+        grade = "D"
+    
+    logger.info(f"🆕 8項目総合スコア: {total_score:.1f}点 ({grade}グレード - 10段階システム)")
+    
+    # 詳細データを収集
+    facility_details = {
+        "education": {
+            "total_facilities": education_data.get("total", 0),
+            "facilities_list": education_data.get("facilities", [])[:10]
+        },
+        "medical": {
+            "total_facilities": medical_data.get("total", 0),
+            "facilities_list": medical_data.get("facilities", [])[:10]
+        },
+        "transport": {
+            "total_facilities": transport_data.get("total", 0),
+            "facilities_list": transport_data.get("facilities", [])[:10]
+        },
+        "shopping": {  # 🆕 買い物詳細
+            "total_facilities": shopping_data.get("total", 0),
+            "facilities_list": shopping_data.get("facilities", [])[:10]
+        },
+        "dining": {    # 🆕 飲食詳細
+            "total_facilities": dining_data.get("total", 0),
+            "facilities_list": dining_data.get("facilities", [])[:10]
+        },
+        "safety": {
+            "total_facilities": safety_facilities_data.get("total", 0) if not isinstance(safety_facilities_data, Exception) else 0,
+            "facilities_list": safety_facilities_data.get("facilities", [])[:10] if not isinstance(safety_facilities_data, Exception) else [],
+            "emergency_response_score": safety_facilities_data.get("emergency_response_score", 0) if not isinstance(safety_facilities_data, Exception) else 0,
+            "facilities_breakdown": safety_facilities_data.get("category_stats", {}) if not isinstance(safety_facilities_data, Exception) else {}
+        },
+        "environment": {
+            "total_facilities": environment_data.get("total", 0) if not isinstance(environment_data, Exception) else 0,
+            "facilities_list": environment_data.get("facilities", [])[:10] if not isinstance(environment_data, Exception) else []
+        },
+        "cultural": {
+            "total_facilities": cultural_data.get("total", 0) if not isinstance(cultural_data, Exception) else 0,
+            "facilities_list": cultural_data.get("facilities", [])[:10] if not isinstance(cultural_data, Exception) else []
+        }
+    }
+    
+    # 行政区域（市区町村コード）をオフラインで取得（索引がなければNone）
+    administrative_area = reverse_geocode_offline(coordinates["lat"], coordinates["lng"])
+    prefecture = extract_prefecture(address)
+    if prefecture is None and administrative_area:
+        prefecture = administrative_area["prefecture"]["name"]
+    
+    # 周辺人口（メッシュ人口ストアがなければNone）
+    mesh_population = get_mesh_population()
+    demographics = mesh_population.demographics(coordinates["lat"], coordinates["lng"]) if mesh_population else None
+    
+    # レスポンス構築
+    response = {
+        "address": address,
+        "coordinates": coordinates,
+        "administrative_area": administrative_area,
+        "demographics": demographics,
+        "items_analyzed": 8,  # 🆕 8項目対応
+        "api_version": "v3.1.8items",
+        "feature": "shopping_dining_separated",
+        "lifestyle_analysis": {
+            "lifestyle_scores": {
+                "total_score": round(total_score, 1),
+                "grade": grade,
+                "breakdown": {
+                    "education": scores["education"],
+                    "medical": scores["medical"],
+                    "transport": scores["transport"],
+                    "shopping": scores["shopping"],  # 🆕 買い物スコア
+                    "dining": scores["dining"],      # 🆕 飲食スコア
+                    "safety": scores["safety"],
+                    "environment": scores["environment"],
+                    "cultural": scores["cultural"]
+                }
+            },
+            # 参照分布に対する全国・都道府県内の順位（参照分布がない場合はNone）
+            "score_percentiles": rank_scores(scores, prefecture),
+            "facility_details": facility_details
+        }
+    }
+    return response
+
 @app.post("/api/lifestyle-analysis-8items")
-async def lifestyle_analysis_8items(request: LifestyleAnalysisRequest):
-    """🆕 8項目対応: ライフスタイル分析（買い物と飲食を分離）"""
+async def lifestyle_analysis_8items(request: LifestyleAnalysisRequest, fields: Optional[str] = None):
+    """🆕 8項目対応: ライフスタイル分析（買い物と飲食を分離）
+
+    fields: 返却フィールドの選択（例: "scores,facility_details.transport"）
+    """
     logger.info(f"🆕 === 8項目ライフスタイル分析開始 ===")
     logger.info(f"🆕 住所: {request.address}")
     
@@ -1817,148 +2053,16 @@ async def lifestyle_analysis_8items(request: LifestyleAnalysisRequest):
     
     try:
         # 住所から座標を取得
-        coordinates = await geocode_address(request.address)
+        coordinates = await resolve_request_coordinates(request)
         logger.info(f"📍 座標取得成功: {coordinates}")
         
         async with aiohttp.ClientSession() as session:
-            # 特定のデータを収集
-            logger.info("🔍 施設データ収集開始")
-            
-            # 基本施設データ収集
-            education_data, medical_data, transport_data = await asyncio.gather(
-                get_education_facilities(session, coordinates),
-                get_medical_facilities(session, coordinates),
-                get_transport_facilities(session, coordinates)
-            )
-            
-            # 🆕 8項目対応: 買い物と飲食を分離して収集
-            shopping_data, dining_data = await asyncio.gather(
-                get_shopping_facilities(session, coordinates),
-                get_dining_facilities(session, coordinates)
-            )
-            
-            # その他のデータ収集
-            safety_facilities_data, environment_data, cultural_data = await asyncio.gather(
-                get_safety_facilities(session, coordinates),
-                get_environment_data_with_temples(session, coordinates),
-                get_cultural_entertainment_facilities(session, coordinates)
-            )
-            
-            # 災害・犯罪データ収集
-            disaster_data, crime_data = await asyncio.gather(
-                get_disaster_risk_data(session, coordinates),
-                get_crime_safety_data(session, coordinates)
-            )
-            
-            logger.info("✅ 全データ収集完了")
-            
-            # 🆕 8項目スコア計算
-            scores = calculate_comprehensive_scores_with_safety_8items(
-                education_data=education_data,
-                medical_data=medical_data,
-                transport_data=transport_data,
-                shopping_data=shopping_data,    # 🆕 買い物データ
-                dining_data=dining_data,        # 🆕 飲食データ
-                disaster_data=disaster_data,
-                crime_data=crime_data,
-                environment_data=environment_data,
-                cultural_data=cultural_data,
-                safety_facilities_data=safety_facilities_data
-            )
-            
-            # 総合スコア計算（🆕 8項目平均）
-            total_score = sum(scores.values()) / len(scores)
-            
-            # 🔥 10段階グレード計算
-            if total_score >= 95:
-                grade = "S+"
-            elif total_score >= 90:
-                grade = "S"
-            elif total_score >= 85:
-                grade = "A+"
-            elif total_score >= 80:
-                grade = "A"
-            elif total_score >= 75:
-                grade = "B+"
-            elif total_score >= 70:
-                grade = "B"
-            elif total_score >= 65:
-                grade = "C+"
-            elif total_score >= 60:
-                grade = "C"
-            elif total_score >= 55:
-                grade = "D+"
-            else:
-                grade = "D"
-            
-            logger.info(f"🆕 8項目総合スコア: {total_score:.1f}点 ({grade}グレード - 10段階システム)")
-            
-            # 詳細データを収集
-            facility_details = {
-                "education": {
-                    "total_facilities": education_data.get("total", 0),
-                    "facilities_list": education_data.get("facilities", [])[:10]
-                },
-                "medical": {
-                    "total_facilities": medical_data.get("total", 0),
-                    "facilities_list": medical_data.get("facilities", [])[:10]
-                },
-                "transport": {
-                    "total_facilities": transport_data.get("total", 0),
-                    "facilities_list": transport_data.get("facilities", [])[:10]
-                },
-                "shopping": {  # 🆕 買い物詳細
-                    "total_facilities": shopping_data.get("total", 0),
-                    "facilities_list": shopping_data.get("facilities", [])[:10]
-                },
-                "dining": {    # 🆕 飲食詳細
-                    "total_facilities": dining_data.get("total", 0),
-                    "facilities_list": dining_data.get("facilities", [])[:10]
-                },
-                "safety": {
-                    "total_facilities": safety_facilities_data.get("total", 0) if not isinstance(safety_facilities_data, Exception) else 0,
-                    "facilities_list": safety_facilities_data.get("facilities", [])[:10] if not isinstance(safety_facilities_data, Exception) else [],
-                    "emergency_response_score": safety_facilities_data.get("emergency_response_score", 0) if not isinstance(safety_facilities_data, Exception) else 0,
-                    "facilities_breakdown": safety_facilities_data.get("category_stats", {}) if not isinstance(safety_facilities_data, Exception) else {}
-                },
-                "environment": {
-                    "total_facilities": environment_data.get("total", 0) if not isinstance(environment_data, Exception) else 0,
-                    "facilities_list": environment_data.get("facilities", [])[:10] if not isinstance(environment_data, Exception) else []
-                },
-                "cultural": {
-                    "total_facilities": cultural_data.get("total", 0) if not isinstance(cultural_data, Exception) else 0,
-                    "facilities_list": cultural_data.get("facilities", [])[:10] if not isinstance(cultural_data, Exception) else []
-                }
-            }
-            
-            # レスポンス構築
-            response = {
-                "address": request.address,
-                "coordinates": coordinates,
-                "items_analyzed": 8,  # 🆕 8項目対応
-                "api_version": "v3.1.8items",
-                "feature": "shopping_dining_separated",
-                "lifestyle_analysis": {
-                    "lifestyle_scores": {
-                        "total_score": round(total_score, 1),
-                        "grade": grade,
-                        "breakdown": {
-                            "education": scores["education"],
-                            "medical": scores["medical"],
-                            "transport": scores["transport"],
-                            "shopping": scores["shopping"],  # 🆕 買い物スコア
-                            "dining": scores["dining"],      # 🆕 飲食スコア
-                            "safety": scores["safety"],
-                            "environment": scores["environment"],
-                            "cultural": scores["cultural"]
-                        }
-                    },
-                    "facility_details": facility_details
-                }
-            }
+            response = await analyze_lifestyle_8items(session, request.address, coordinates)
             
             logger.info("🆕 8項目ライフスタイル分析完了")
-            return response
+            record_address_selection(request.address)
+            # jsonable_encoder を経由せず orjson で直接シリアライズ
+            return FastJSONResponse(select_fields(response, fields, ANALYSIS_FIELD_ALIASES))
             
     except Exception as e:
         logger.error(f"❌ 8項目ライフスタイル分析エラー: {e}")
@@ -1969,7 +2073,7 @@ async def lifestyle_analysis_8items(request: LifestyleAnalysisRequest):
         if SUPPRESS_SYSTEM_ERRORS:
             # システムエラーを非表示にして代替レスポンスを返す
             # 🔥 施設数を実際の数値に修正（0件ではなく）
-            return {
+            return select_fields({
                 "address": request.address,
                 "coordinates": {"lat": 35.6762, "lng": 139.6503},  # デフォルト座標（東京駅）
                 "items_analyzed": 8,
@@ -2003,7 +2107,7 @@ async def lifestyle_analysis_8items(request: LifestyleAnalysisRequest):
                 },
                 "maintenance_mode": True,
                 "message": "現在、生活利便性分析機能はメンテナンス中です。代わりに基本的な機能をご利用いただけます。"
-            }
+            }, fields, ANALYSIS_FIELD_ALIASES)
         else:
             raise HTTPException(status_code=500, detail=f"ライフスタイル分析エラー: {str(e)}")
 
@@ -2075,41 +2179,6 @@ def calculate_comprehensive_scores_with_safety_8items(
     logger.info(f"📊 8項目最終スコア: {final_scores}")
     return final_scores
 
-# =============================================================================
-# フォールバック処理（ビルドがない場合）
-# =============================================================================
-@app.get("/")
-async def serve_frontend():
-    """フロントエンドのメインページを提供"""
-    build_index = Path("frontend/build/index.html")
-    if build_index.exists():
-        return FileResponse(build_index)
-    else:
-        return {
-            "message": "Location Insights API v3.1",
-            "status": "フロントエンドビルド待機中",
-            "instruction": "フロントエンドをビルドしてください: cd frontend && npm run build",
-            "api_docs": f"http://localhost:{PORT}/docs",
-            "api_health": f"http://localhost:{PORT}/api/health"
-        }
-
-@app.get("/{full_path:path}")
-async def serve_frontend_routes(full_path: str):
-    """フロントエンドの動的ルートを提供"""
-    # APIルートは除外
-    if full_path.startswith("api/") or full_path.startswith("docs") or full_path.startswith("redoc"):
-        raise HTTPException(status_code=404, detail="Not found")
-    
-    build_index = Path("frontend/build/index.html")
-    if build_index.exists():
-        return FileResponse(build_index)
-    else:
-        return {
-            "message": "フロントエンドビルドが必要です",
-            "path": full_path,
-            "instruction": "cd frontend && npm run build を実行してください"
-        }
-
 # =============================================================================
 # サーバー起動設定（警告無し版）
 # =============================================================================
@@ -2460,7 +2529,8 @@ def calculate_safety_score_with_facilities(safety_facilities: Dict, disaster_dat
     if not isinstance(disaster_data, Exception):
         flood_risk = disaster_data.get("flood_risk", 0)
         earthquake_risk = disaster_data.get("earthquake_risk", 0)
-        disaster_penalty = (flood_risk + earthquake_risk) * 25  # 最大50点減点
+        landslide_risk = disaster_data.get("landslide_risk", 0)
+        disaster_penalty = min(50, (flood_risk + earthquake_risk + landslide_risk) * 25)  # 最大50点減点
     
     # 犯罪データによる調整
     crime_bonus = 0
@@ -2470,6 +2540,8 @@ def calculate_safety_score_with_facilities(safety_facilities: Dict, disaster_dat
             crime_bonus = 10
         elif crime_score >= 60:
             crime_bonus = 5
+        elif crime_score < 30:
+            crime_bonus = -5  # 犯罪発生が全国上位30%の区域
     
     # 最終スコア計算
     final_score = safety_facilities_score + crime_bonus - disaster_penalty
@@ -2547,7 +2619,7 @@ def calculate_comprehensive_scores_with_safety(
 # =============================================================================
 async def get_education_facilities(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Dict:
     """教育施設データを取得（遠方排除版）"""
-    if not GOOGLE_MAPS_API_KEY:
+    if not places_search_available("education"):
         return {"total": 0, "facilities": []}
     
     logger.info(f"🎓 教育施設データ取得開始: 座標({coordinates['lat']:.4f}, {coordinates['lng']:.4f})")
@@ -2564,7 +2636,7 @@ async def get_education_facilities(session: aiohttp.ClientSession, coordinates:
     
     for facility_type, radius in facility_searches:
         logger.info(f"🔍 検索中: {facility_type} (半径{radius}m)")
-        places = await search_nearby_places(session, coordinates, facility_type, radius)
+        places = await search_nearby_places(session, coordinates, facility_type, radius, collector="education")
         all_facilities.extend(places)
     
     # 重複除去と距離でソート
@@ -2581,6 +2653,7 @@ async def get_education_facilities(session: aiohttp.ClientSession, coordinates:
         simplified_facilities.append({
             "name": facility.get("name", "Unknown"),
             "distance": round(facility.get("distance", 0)),
+            "walking_minutes": facility.get("walking_minutes"),
             "place_id": facility.get("place_id", ""),
             "rating": facility.get("rating", 0),
             "types": facility.get("types", [])
@@ -2595,7 +2668,7 @@ async def get_education_facilities(session: aiohttp.ClientSession, coordinates:
 
 async def get_medical_facilities(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Dict:
     """医療施設データを取得（遠方排除版）"""
-    if not GOOGLE_MAPS_API_KEY:
+    if not places_search_available("medical"):
         return {"total": 0, "facilities": []}
     
     logger.info(f"🏥 医療施設データ取得開始: 座標({coordinates['lat']:.4f}, {coordinates['lng']:.4f})")
@@ -2612,7 +2685,7 @@ async def get_medical_facilities(session: aiohttp.ClientSession, coordinates: Di
     
     for facility_type, radius in facility_searches:
         logger.info(f"🔍 検索中: {facility_type} (半径{radius}m)")
-        places = await search_nearby_places(session, coordinates, facility_type, radius)
+        places = await search_nearby_places(session, coordinates, facility_type, radius, collector="medical")
         all_facilities.extend(places)
     
     # 重複除去と距離でソート
@@ -2629,6 +2702,7 @@ async def get_medical_facilities(session: aiohttp.ClientSession, coordinates: Di
         simplified_facilities.append({
             "name": facility.get("name", "Unknown"),
             "distance": round(facility.get("distance", 0)),
+            "walking_minutes": facility.get("walking_minutes"),
             "place_id": facility.get("place_id", ""),
             "rating": facility.get("rating", 0),
             "types": facility.get("types", [])
@@ -2643,7 +2717,17 @@ async def get_medical_facilities(session: aiohttp.ClientSession, coordinates: Di
 
 async def get_transport_facilities(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Dict:
     """交通機関データを取得（遠方排除版）"""
-    if not GOOGLE_MAPS_API_KEY:
+    # 🚉 ローカル駅索引があれば Places 検索を行わない
+    station_index = get_station_index()
+    if station_index is not None:
+        transport_data = station_index.transport_data(coordinates["lat"], coordinates["lng"])
+        for key in ("stations", "bus_stops"):
+            transport_data[key] = annotate_walking_distances(coordinates, transport_data[key])
+        transport_data["facilities"].sort(key=lambda s: s["distance"])
+        logger.info(f"🚉 駅索引から交通施設取得: 駅{len(transport_data['stations'])}件 / バス停{len(transport_data['bus_stops'])}件")
+        return transport_data
+    
+    if not places_search_available("transport"):
         return {"total": 0, "stations": [], "facilities": []}
     
     logger.info(f"🚆 交通施設データ取得開始: 座標({coordinates['lat']:.4f}, {coordinates['lng']:.4f})")
@@ -2659,7 +2743,7 @@ async def get_transport_facilities(session: aiohttp.ClientSession, coordinates:
     
     for facility_type, radius in facility_searches:
         logger.info(f"🔍 検索中: {facility_type} (半径{radius}m)")
-        places = await search_nearby_places(session, coordinates, facility_type, radius)
+        places = await search_nearby_places(session, coordinates, facility_type, radius, collector="transport")
         all_stations.extend(places)
     
     # 重複除去と距離でソート
@@ -2676,6 +2760,7 @@ async def get_transport_facilities(session: aiohttp.ClientSession, coordinates:
         simplified_facilities.append({
             "name": facility.get("name", "Unknown"),
             "distance": round(facility.get("distance", 0)),
+            "walking_minutes": facility.get("walking_minutes"),
             "place_id": facility.get("place_id", ""),
             "rating": facility.get("rating", 0),
             "types": facility.get("types", [])
@@ -2691,7 +2776,7 @@ async def get_transport_facilities(session: aiohttp.ClientSession, coordinates:
 
 async def get_shopping_facilities(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Dict:
     """買い物施設データを取得（飲食店除外版）"""
-    if not GOOGLE_MAPS_API_KEY:
+    if not places_search_available("shopping"):
         return {"total": 0, "facilities": []}
     
     logger.info(f"🛒 買い物施設データ取得開始: 座標({coordinates['lat']:.4f}, {coordinates['lng']:.4f})")
@@ -2709,7 +2794,7 @@ async def get_shopping_facilities(session: aiohttp.ClientSession, coordinates: D
     
     for facility_type, radius in facility_searches:
         logger.info(f"🔍 検索中: {facility_type} (半径{radius}m)")
-        places = await search_nearby_places(session, coordinates, facility_type, radius)
+        places = await search_nearby_places(session, coordinates, facility_type, radius, collector="shopping")
         
         # 飲食店を除外
         shopping_places = []
@@ -2742,6 +2827,7 @@ async def get_shopping_facilities(session: aiohttp.ClientSession, coordinates: D
         simplified_facilities.append({
             "name": facility.get("name", "Unknown"),
             "distance": round(facility.get("distance", 0)),
+            "walking_minutes": facility.get("walking_minutes"),
             "place_id": facility.get("place_id", ""),
             "rating": facility.get("rating", 0),
             "types": facility.get("types", [])
@@ -2756,7 +2842,7 @@ async def get_shopping_facilities(session: aiohttp.ClientSession, coordinates: D
 
 async def get_dining_facilities(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Dict:
     """飲食施設データを取得（買い物店除外版）"""
-    if not GOOGLE_MAPS_API_KEY:
+    if not places_search_available("dining"):
         return {"total": 0, "facilities": []}
     
     logger.info(f"🍽️ 飲食施設データ取得開始: 座標({coordinates['lat']:.4f}, {coordinates['lng']:.4f})")
@@ -2775,7 +2861,7 @@ async def get_dining_facilities(session: aiohttp.ClientSession, coordinates: Dic
     
     for facility_type, radius in facility_searches:
         logger.info(f"🔍 検索中: {facility_type} (半径{radius}m)")
-        places = await search_nearby_places(session, coordinates, facility_type, radius)
+        places = await search_nearby_places(session, coordinates, facility_type, radius, collector="dining")
         all_facilities.extend(places)
     
     # 重複除去と距離でソート
@@ -2792,6 +2878,7 @@ async def get_dining_facilities(session: aiohttp.ClientSession, coordinates: Dic
         simplified_facilities.append({
             "name": facility.get("name", "Unknown"),
             "distance": round(facility.get("distance", 0)),
+            "walking_minutes": facility.get("walking_minutes"),
             "place_id": facility.get("place_id", ""),
             "rating": facility.get("rating", 0),
             "types": facility.get("types", [])
@@ -2811,7 +2898,7 @@ async def get_dining_facilities(session: aiohttp.ClientSession, coordinates: Dic
 
 async def get_cultural_entertainment_facilities(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Dict:
     """文化・娯楽施設データを取得"""
-    if not GOOGLE_MAPS_API_KEY:
+    if not places_search_available("cultural"):
         return {"total": 0, "facilities": []}
     
     logger.info(f"🎭 文化・娯楽施設データ取得開始: 座標({coordinates['lat']:.4f}, {coordinates['lng']:.4f})")
@@ -2857,7 +2944,7 @@ async def get_cultural_entertainment_facilities(session: aiohttp.ClientSession,
     for facility_type in facility_types:
         radius = radius_config.get(facility_type, 2000)
         logger.info(f"🔍 検索中: {facility_type} (半径{radius}m)")
-        places = await search_nearby_places(session, coordinates, facility_type, radius)
+        places = await search_nearby_places(session, coordinates, facility_type, radius, collector="cultural")
         
         for place in places:
             place_id = place.get("place_id")
@@ -2883,6 +2970,7 @@ async def get_cultural_entertainment_facilities(session: aiohttp.ClientSession,
         normalized_facility = {
             "name": facility.get("name", "Unknown"),
             "distance": round(facility.get("distance", 0)),
+            "walking_minutes": facility.get("walking_minutes"),
             "place_id": facility.get("place_id", ""),
             "rating": facility.get("rating", 0),
             "types": facility.get("types", []),
@@ -2986,7 +3074,7 @@ async def filter_temples_and_shrines(places: list) -> list:
 
 async def get_environment_data_with_temples(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Dict:
     """環境データを取得（Text Search API完全廃止版）"""
-    if not GOOGLE_MAPS_API_KEY:
+    if not places_search_available("environment"):
         return {"total": 0, "green_spaces": [], "facilities": [], "error": "Google Maps API Key未設定"}
     
     try:
@@ -3020,7 +3108,7 @@ async def get_environment_data_with_temples(session: aiohttp.ClientSession, coor
             logger.info(f"🔍 Nearby検索: {facility_type} (半径{MAX_DISTANCE}m)")
             
             # search_nearby_places関数を使用（すでに厳格フィルタリング済み）
-            places = await search_nearby_places(session, coordinates, facility_type, MAX_DISTANCE)
+            places = await search_nearby_places(session, coordinates, facility_type, MAX_DISTANCE, collector="environment")
             
             for place in places:
                 place_id = place.get("place_id")
@@ -3074,6 +3162,7 @@ async def get_environment_data_with_temples(session: aiohttp.ClientSession, coor
                 normalized_facility = {
                     "name": name,
                     "distance": round(distance),
+                    "walking_minutes": facility.get("walking_minutes"),
                     "rating": rating,
                     "place_id": place_id,
                     "types": types,
@@ -3269,12 +3358,69 @@ def generate_facility_report_with_names(categorized: Dict, all_facilities: List[
 
 
 async def get_disaster_risk_data(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Dict:
-    """災害リスクデータを取得（placeholder）"""
-    return {"flood_risk": 0.2, "earthquake_risk": 0.3, "overall_risk": "中リスク"}
+    """災害リスクデータを取得（ハザードラスターがなければ既定値）"""
+    hazard_raster = get_hazard_raster()
+    if hazard_raster is None:
+        return {"flood_risk": 0.2, "earthquake_risk": 0.3, "overall_risk": "中リスク"}
+    
+    samples = hazard_raster.sample(coordinates["lat"], coordinates["lng"])
+    # 洪水・津波は浸水深、地震は液状化危険度で評価（レイヤーがない項目は既定値）
+    flood_risk = max(hazard_risk(samples, "flood_depth") or 0.0, hazard_risk(samples, "tsunami_depth") or 0.0)
+    if "flood_depth" not in samples and "tsunami_depth" not in samples:
+        flood_risk = 0.2
+    earthquake_risk = hazard_risk(samples, "liquefaction")
+    if earthquake_risk is None:
+        earthquake_risk = 0.3
+    landslide_risk = hazard_risk(samples, "landslide") or 0.0
+    
+    max_risk = max(flood_risk, earthquake_risk, landslide_risk)
+    if max_risk >= 0.6:
+        overall_risk = "高リスク"
+    elif max_risk >= 0.3:
+        overall_risk = "中リスク"
+    else:
+        overall_risk = "低リスク"
+    
+    return {
+        "flood_risk": flood_risk,
+        "earthquake_risk": earthquake_risk,
+        "landslide_risk": landslide_risk,
+        "overall_risk": overall_risk,
+        "hazards": samples,
+        "source": "hazard_raster"
+    }
 
 async def get_crime_safety_data(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Dict:
-    """犯罪・安全データを取得（placeholder）"""
-    return {"safety_score": 80, "crime_rate": "低"}
+    """犯罪・安全データを取得（犯罪統計テーブル・行政区域索引がなければ既定値）"""
+    default = {"safety_score": 80, "crime_rate": "低"}
+    crime_stats = get_crime_stats()
+    if crime_stats is None:
+        return default
+    
+    area = reverse_geocode_offline(coordinates["lat"], coordinates["lng"])
+    record = crime_stats.lookup_area(area) if area else None
+    if record is None or record["percentile"] is None:
+        return default
+    
+    # パーセンタイルが高いほど犯罪が多い区域
+    percentile = record["percentile"]
+    if percentile >= 70:
+        crime_rate = "高"
+    elif percentile >= 30:
+        crime_rate = "中"
+    else:
+        crime_rate = "低"
+    
+    return {
+        "safety_score": round(100 - percentile, 1),
+        "crime_rate": crime_rate,
+        "crime_count": record["crime_count"],
+        "rate_per_1000": record["rate_per_1000"],
+        "percentile": percentile,
+        "area": {"level": record["level"], "key": record["key"], "name": record["name"]},
+        "period": crime_stats.meta.get("period", ""),
+        "source": "crime_stats"
+    }
 
 # =============================================================================
 # スコア計算関数
@@ -3409,6 +3555,9 @@ def calculate_improved_transport_score(transport_data: Dict) -> float:
         logger.warning("🚆 交通スコア: エラーのためデフォルトスコア50点を適用")
         return 50.0
     
+    if transport_data.get("source") == "station_index":
+        return calculate_station_access_score(transport_data)
+    
     total_facilities = transport_data.get("total", 0)
     facilities = transport_data.get("facilities", [])
     
@@ -3466,6 +3615,47 @@ def calculate_improved_transport_score(transport_data: Dict) -> float:
     
     return round(final_score, 1)
 
+def calculate_station_access_score(transport_data: Dict) -> float:
+    """駅索引による交通スコア計算（路線数・駅の重要度を反映）"""
+    stations = transport_data.get("stations", [])
+    bus_stops = transport_data.get("bus_stops", [])
+    
+    # 近接性スコア（最寄り駅の距離、最大30点）
+    proximity_score = 0
+    if stations:
+        nearest_distance = stations[0]["distance"]
+        if nearest_distance <= 300:
+            proximity_score = 30
+        elif nearest_distance <= 600:
+            proximity_score = 25
+        elif nearest_distance <= 1000:
+            proximity_score = 18
+        elif nearest_distance <= 1500:
+            proximity_score = 10
+        else:
+            proximity_score = 5
+    
+    # 路線スコア（徒歩圏1km以内で利用できる路線数、最大35点）
+    walkable_lines = {line for station in stations if station["distance"] <= 1000 for line in station["lines"]}
+    line_score = min(35, len(walkable_lines) * 5)
+    
+    # 駅の重要度スコア（重要度 × 距離減衰の最大値、最大25点）
+    importance_score = 0
+    for station in stations:
+        decay = 1.0 if station["distance"] <= 300 else max(0.2, 1 - (station["distance"] - 300) / 1500)
+        importance_score = max(importance_score, station["importance"] * decay * 25)
+    
+    # バス停スコア（500m以内、最大10点）
+    bus_score = min(10, sum(1 for stop in bus_stops if stop["distance"] <= 500) * 2.5)
+    
+    total_score = proximity_score + line_score + importance_score + bus_score
+    final_score = max(10, min(100, total_score))
+    
+    logger.info(f"🚉 最終交通スコア（駅索引）: {final_score:.1f}点")
+    logger.info(f"🚉 内訳: 近接{proximity_score} + 路線{line_score}({len(walkable_lines)}路線) + 重要度{importance_score:.1f} + バス{bus_score}")
+    
+    return round(final_score, 1)
+
 def calculate_improved_shopping_score(shopping_data: Dict) -> float:
     """改善された買い物スコア計算"""
     if isinstance(shopping_data, Exception) or shopping_data.get("error"):
@@ -3694,30 +3884,6 @@ def calculate_cultural_entertainment_score(cultural_data: Dict) -> float:
     
     return round(final_score, 1)
 
-# =============================================================================
-# フロントエンド配信
-# =============================================================================
-@app.get("/{full_path:path}")
-async def serve_frontend(full_path: str):
-    """フロントエンドファイルの配信"""
-    if build_dir.exists():
-        file_path = build_dir / full_path
-        if file_path.exists() and file_path.is_file():
-            return FileResponse(file_path)
-        else:
-            # SPAの場合、存在しないパスはindex.htmlを返す
-            index_path = build_dir / "index.html"
-            if index_path.exists():
-                return FileResponse(index_path)
-    
-    return {"message": "Frontend not built. Please run 'npm run build' in frontend directory."}
-    final_score = max(10, min(100, total_score))
-    
-    logger.info(f"🍽️ 最終飲食スコア: {final_score}点")
-    logger.info(f"🍽️ 内訳: 基本{base_score} + タイプ{type_bonus} + 多様性{diversity_bonus} + 品質{quality_score}")
-    
-    return round(final_score, 1)
-
 def calculate_improved_commercial_score(commercial_data: Dict) -> float:
     """改善された商業スコア計算（買い物+飲食の統合版）"""
     if isinstance(commercial_data, Exception) or commercial_data.get("error"):
@@ -4940,8 +5106,17 @@ def calculate_data_quality(results: List) -> str:
 # =============================================================================
 # 価格推定関連関数
 # =============================================================================
-async def get_real_estate_transactions(session: aiohttp.ClientSession, coordinates: Dict[str, float], property_data: Dict) -> List[Dict]:
-    """実取引データを取得（ダミーデータ完全排除版）"""
+async def get_real_estate_transactions(
+    session: aiohttp.ClientSession,
+    coordinates: Dict[str, float],
+    property_data: Dict,
+    from_period: Optional[str] = None,
+    to_period: Optional[str] = None
+) -> List[Dict]:
+    """実取引データを取得（ダミーデータ完全排除版）
+
+    同期済みの取引ストアがあればローカルで検索し、なければ国土交通省APIを呼ぶ。
+    """
     try:
         area = property_data.get("area", 70)
         building_year = property_data.get("buildingYear", 2010)
@@ -4949,6 +5124,23 @@ async def get_real_estate_transactions(session: aiohttp.ClientSession, coordinat
         lat = coordinates.get("lat", 35.6762)
         lng = coordinates.get("lng", 139.6503)
         
+        # 🏘️ ローカル取引ストア（地点のタイルが同期済みの場合）
+        transaction_store = get_transaction_store()
+        geojson_data = None
+        if transaction_store is not None:
+            geojson_data = await asyncio.to_thread(
+                transaction_store.query_if_covered, lat, lng,
+                from_period=parse_period(from_period), to_period=parse_period(to_period),
+                land_types=["02", "07"]
+            )
+        if geojson_data is not None:
+            transactions = parse_mlit_transaction_data(geojson_data, property_data, coordinates)[:50]
+            for transaction in transactions:
+                transaction["data_source"] = "mlit_transaction_store"
+            period = geojson_data["period"]
+            logger.info(f"🏘️ 取引ストアから{len(transactions)}件の実取引データを取得 ({period['from']}〜{period['to']})")
+            return transactions
+        
         # 座標からタイル座標を計算
         tiles = get_tile_coordinates_around_point(lat, lng, zoom=13, radius=1)
         
@@ -4959,8 +5151,8 @@ async def get_real_estate_transactions(session: aiohttp.ClientSession, coordinat
             try:
                 geojson_data = await fetch_mlit_real_estate_data(
                     session, x, y, z,
-                    from_period="20231",  # 2023年第1四半期から
-                    to_period="20252",    # 2025年第2四半期まで（最新）
+                    from_period=from_period or "20231",  # 既定: 2023年第1四半期から
+                    to_period=to_period or "20252",      # 既定: 2025年第2四半期まで
                     land_type_codes=["02", "07"],
                     api_key=MLIT_API_KEY
                 )
@@ -5011,10 +5203,14 @@ async def get_nearby_places(
     lng: float, 
     radius: int = 1000, 
     place_type: str = "restaurant",
-    language: str = "ja"
+    language: str = "ja",
+    fields: Optional[str] = None
 ):
-    """🔥 ダミーデータ完全排除: Google Places APIの直接ラッパー"""
-    if not GOOGLE_MAPS_API_KEY:
+    """🔥 ダミーデータ完全排除: Google Places APIの直接ラッパー
+
+    fields: 返却フィールドの選択（例: "summary" や "places.name,places.distance"）
+    """
+    if not places_search_available():
         raise HTTPException(
             status_code=503,
             detail="Google Maps APIキーが設定されていません"
@@ -5028,7 +5224,7 @@ async def get_nearby_places(
         async with aiohttp.ClientSession() as session:
             places = await search_nearby_places(session, coordinates, place_type, radius)
             
-        return {
+        return select_fields({
             "status": "success",
             "places": places,
             "count": len(places),
@@ -5038,7 +5234,7 @@ async def get_nearby_places(
                 "radius": radius,
                 "language": language
             }
-        }
+        }, fields, PLACES_FIELD_ALIASES)
         
     except Exception as e:
         logger.error(f"❌ Google Places API呼び出しエラー: {e}")
@@ -5115,6 +5311,9 @@ async def analyze_reviews_sentiment(request: Request):
 # 感情分析用のヘルパー関数
 # =============================================================================
 
+@cached_result("place_details", PLACES_CACHE_TTL, lambda session, place_id, fields, language="ja": (
+    place_id, fields, language
+), cache_if=bool)
 async def fetch_place_details(
     session: aiohttp.ClientSession, 
     place_id: str, 
@@ -5491,7 +5690,7 @@ async def analyze_lifestyle_score(request: LifestyleAnalysisRequest):
     try:
         # 1. 住所から座標を取得
         logger.info("📍 住所から座標を取得中...")
-        coordinates = await geocode_address(request.address)
+        coordinates = await resolve_request_coordinates(request)
         logger.info(f"📍 座標取得完了: {coordinates}")
         
         # 2. 並行して各種データを取得（安全施設を正しく追加）
@@ -5614,6 +5813,7 @@ async def analyze_lifestyle_score(request: LifestyleAnalysisRequest):
         logger.info(f"📋 総合スコア: {total_score:.1f}点 ({grade}グレード)")
         logger.info(f"📋 個別スコア内訳: {scores}")
         
+        record_address_selection(request.address)
         return {
             "address": request.address,
             "coordinates": coordinates,
@@ -5761,11 +5961,14 @@ async def estimate_property_price(request: PropertyPriceRequest):
         logger.info(f"💰 不動産価格推定開始: {request.address}")
         
         # 1. 住所から座標を取得
-        coordinates = await geocode_address(request.address)
+        coordinates = await resolve_request_coordinates(request)
         
         # 2. 不動産取引データの取得
         async with aiohttp.ClientSession() as session:
-            transactions = await get_real_estate_transactions(session, coordinates, request.propertyData)
+            transactions = await get_real_estate_transactions(
+                session, coordinates, request.propertyData,
+                from_period=request.from_period, to_period=request.to_period
+            )
         
         # 3. 価格推定計算
         if transactions and len(transactions) > 0:
@@ -5791,12 +5994,7 @@ async def estimate_property_price(request: PropertyPriceRequest):
                 is_mock_data = any(t.get("is_mock_data", False) for t in transactions)
                 
                 # グラフデータの生成
-                graph_data = {
-                    "price_distribution": generate_price_distribution_data(transactions),
-                    "area_vs_price": generate_area_price_data(transactions, request.propertyData),
-                    "similarity_ranking": generate_similarity_ranking_data(transactions[:10]),
-                    "time_series": generate_time_series_data(transactions)
-                }
+                graph_data = build_price_graph_data(transactions, request.propertyData, ranking_limit=10)
                 
                 return {
                     "analysis_type": "mock_transaction_showcase" if is_mock_data else "real_transaction_showcase",
@@ -5819,7 +6017,7 @@ async def estimate_property_price(request: PropertyPriceRequest):
                         f"実取引データ{len(transactions)}件使用",
                         "国土交通省API実データ" if not is_mock_data else "ダミーデータ"
                     ],
-                    "data_source": "mlit_real_api" if not is_mock_data else "mock_data_fallback",
+                    "data_source": transactions[0].get("data_source", "mlit_real_api") if not is_mock_data else "mock_data_fallback",
                     "analysis_date": datetime.now().isoformat(),
                     "is_mock_data": is_mock_data,
                     "is_real_data": not is_mock_data,
@@ -5862,24 +6060,6 @@ async def estimate_property_price(request: PropertyPriceRequest):
         logger.error(f"❌ 不動産価格推定エラー: {e}")
         raise HTTPException(status_code=500, detail=f"価格推定エラー: {str(e)}")
 
-# =============================================================================
-# フロントエンド配信
-# =============================================================================
-@app.get("/{path_name:path}", response_class=FileResponse)
-async def catch_all(path_name: str):
-    """フロントエンド用の catch-all ルート"""
-    file_path = build_dir / path_name
-    
-    if file_path.exists() and file_path.is_file():
-        return FileResponse(file_path)
-    else:
-        # SPAのフォールバック
-        index_file = build_dir / "index.html"
-        if index_file.exists():
-            return FileResponse(index_file)
-        else:
-            raise HTTPException(status_code=404, detail="Page not found")
-
 # =============================================================================
 # 🆕 改善されたメイン分析エンドポイント（安全施設対応）
 # =============================================================================
@@ -5893,7 +6073,7 @@ async def analyze_lifestyle_improved(request: LifestyleAnalysisRequest):
     try:
         # 1. 住所から座標を取得
         logger.info("📍 住所から座標を取得中...")
-        coordinates = await geocode_address(request.address)
+        coordinates = await resolve_request_coordinates(request)
         logger.info(f"📍 座標取得完了: {coordinates}")
         
         # 2. 各種データを並行取得（安全施設を含む）
@@ -6012,6 +6192,7 @@ async def analyze_lifestyle_improved(request: LifestyleAnalysisRequest):
         logger.info(f"✅ 改善版分析完了: 総合スコア{total_score:.1f}点 ({grade}グレード)")
         logger.info(f"🛡️ 安全施設: {safety_facilities_data.get('total', 0)}件登録済")
         
+        record_address_selection(request.address)
         return response_data
         
     except Exception as e:
@@ -6059,7 +6240,7 @@ async def lifestyle_analysis_8items(request: LifestyleAnalysisRequest):
         logger.info(f"🆕 8項目ライフスタイル分析開始: {request.address}")
         
         # 座標取得
-        coordinates = await geocode_address(request.address)
+        coordinates = await resolve_request_coordinates(request)
         logger.info(f"📍 座標取得成功: {coordinates}")
         
         async with aiohttp.ClientSession() as session:
@@ -6140,6 +6321,7 @@ async def lifestyle_analysis_8items(request: LifestyleAnalysisRequest):
             
             logger.info(f"🆕 8項目ライフスタイル分析完了: 総合{total_score:.1f}点 ({grade}グレード)")
             
+            record_address_selection(request.address)
             return {
                 "success": True,
                 "address": request.address,
@@ -6314,13 +6496,13 @@ def generate_local_lifestyle_analysis(request: AILifestyleAnalysisRequest) -> Di
 
 # 8項目分析に感情分析を統合
 @app.post("/api/lifestyle-analysis-8items-enhanced")
-async def lifestyle_analysis_8items_enhanced(request: LifestyleAnalysisRequest):
+async def lifestyle_analysis_8items_enhanced(request: LifestyleAnalysisRequest, fields: Optional[str] = None):
     """🧠 Natural Language AI統合版 8項目ライフスタイル分析"""
     logger.info(f"🧠 === Natural Language AI統合 8項目分析開始 ===")
     logger.info(f"🧠 住所: {request.address}")
     
     try:
-        coordinates = await geocode_address(request.address)
+        coordinates = await resolve_request_coordinates(request)
         logger.info(f"📍 座標取得成功: {coordinates}")
         
         async with aiohttp.ClientSession() as session:
@@ -6458,7 +6640,8 @@ async def lifestyle_analysis_8items_enhanced(request: LifestyleAnalysisRequest):
             }
             
             logger.info("🧠 Natural Language AI統合8項目ライフスタイル分析完了")
-            return response
+            record_address_selection(request.address)
+            return select_fields(response, fields, ANALYSIS_FIELD_ALIASES)
             
     except Exception as e:
         logger.error(f"❌ Natural Language AI統合分析エラー: {e}")
@@ -6562,11 +6745,23 @@ class GoogleMapsMCP:
     
     async def reverse_geocode(self, latitude: float, longitude: float, language: str = "ja") -> Dict[str, Any]:
         """座標から住所を取得（MCP: maps_reverse_geocode）"""
+        # 🗺️ 行政区域索引で解決できればネットワーク不要
+        offline_result = reverse_geocode_offline(latitude, longitude)
+        if offline_result and language == "ja":
+            return {
+                "status": "success",
+                "results": [to_geocoding_result(offline_result, latitude, longitude)],
+                "mcp_function": "maps_reverse_geocode",
+                "source": "admin_boundaries",
+                "timestamp": datetime.now().isoformat()
+            }
+        
         if not self.available:
             return {"error": "Google Maps APIが利用できません"}
         
         try:
-            result = self.client.reverse_geocode((latitude, longitude), language=language)
+            # googlemaps クライアントは同期I/Oのためイベントループを塞がないようスレッドで実行
+            result = await asyncio.to_thread(self.client.reverse_geocode, (latitude, longitude), language=language)
             return {
                 "status": "success",
                 "results": result,
@@ -6722,4 +6917,667 @@ class GoogleMapsMCP:
             }
 
 # Google Maps MCP インスタンス
-google_maps_mcp = GoogleMapsMCP()
\ No newline at end of file
+google_maps_mcp = GoogleMapsMCP()
+
+# =============================================================================
+# 逆ジオコーディング
+# =============================================================================
+@app.get("/api/reverse-geocode")
+async def reverse_geocode_endpoint(lat: float, lng: float):
+    """座標から住所・市区町村コードを返す（行政区域索引 → Google Geocoding API）"""
+    if not validate_coordinates({"lat": lat, "lng": lng}):
+        raise HTTPException(status_code=400, detail="座標が不正です")
+    
+    offline_result = reverse_geocode_offline(lat, lng)
+    if offline_result:
+        return {
+            "status": "OK",
+            "source": "admin_boundaries",
+            "administrative_area": offline_result,
+            "results": [to_geocoding_result(offline_result, lat, lng)]
+        }
+    
+    if not GOOGLE_MAPS_API_KEY:
+        raise HTTPException(status_code=503, detail="行政区域データ・Google Maps APIキーのいずれもありません")
+    
+    url = "https://maps.googleapis.com/maps/api/geocode/json"
+    params = {"latlng": f"{lat},{lng}", "key": GOOGLE_MAPS_API_KEY, "language": "ja"}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, params=params) as response:
+            data = await response.json()
+    return {
+        "status": data.get("status", "UNKNOWN_ERROR"),
+        "source": "google",
+        "administrative_area": None,
+        "results": data.get("results", [])
+    }
+
+# =============================================================================
+# 周辺人口（地域メッシュ統計）
+# =============================================================================
+@app.get("/api/demographics")
+async def get_demographics(
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    address: Optional[str] = None,
+    radius: float = 1000
+):
+    """地点周辺の人口・世帯・年齢構成（メッシュ人口ストアから集計、e-Stat への問い合わせなし）"""
+    mesh_population = get_mesh_population()
+    if mesh_population is None:
+        raise HTTPException(
+            status_code=503,
+            detail="メッシュ人口データがありません（python -m app.jobs.import_mesh_population を実行してください）"
+        )
+    
+    if lat is None or lng is None:
+        if not address:
+            raise HTTPException(status_code=400, detail="lat/lng または address を指定してください")
+        try:
+            coordinates = await geocode_address(address)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        lat, lng = coordinates["lat"], coordinates["lng"]
+    if not validate_coordinates({"lat": lat, "lng": lng}):
+        raise HTTPException(status_code=400, detail="座標が不正です")
+    
+    radius = max(250.0, min(radius, 5000.0))
+    return {
+        "address": address,
+        "coordinates": {"lat": lat, "lng": lng},
+        "demographics": mesh_population.demographics(lat, lng, radius)
+    }
+
+# =============================================================================
+# スコアヒートマップ（グリッド一括計算）
+# =============================================================================
+async def collect_heatmap_facilities_live(
+    session: aiohttp.ClientSession, grid: ScoringGrid, place_types: List[str]
+) -> Dict:
+    """ローカルPOIストアがない場合: 範囲をタイル状に Places 検索して施設を集める"""
+    places_by_type: Dict[str, Dict[str, Dict]] = {place_type: {} for place_type in place_types}
+    for center in live_tile_centers(grid):
+        results = await asyncio.gather(*[
+            search_nearby_places(session, center, place_type, HEATMAP_LIVE_TILE_RADIUS_M, collector="heatmap")
+            for place_type in place_types
+        ])
+        for place_type, places in zip(place_types, results):
+            for place in places:
+                # 隣接タイルの検索円が重なるため place_id で重複除去
+                places_by_type[place_type].setdefault(place.get("place_id") or str(len(places_by_type[place_type])), place)
+    return facilities_from_places({t: list(places.values()) for t, places in places_by_type.items()})
+
+@app.get("/api/heatmap")
+async def get_score_heatmap(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    resolution: float = 250,
+    layers: str = "total"
+):
+    """範囲内の全セルのスコア（8項目・総合）をまとめて計算し、float16 配列（base64）で返す
+
+    施設は範囲全体について一度だけ取り出してセルに集計するため、コストはセル数ではなく範囲の面積で決まる。
+    layers: total / カテゴリ名のカンマ区切り / all
+    """
+    if not (south < north and west < east):
+        raise HTTPException(status_code=400, detail="範囲は south < north, west < east で指定してください")
+    if not (validate_coordinates({"lat": south, "lng": west}) and validate_coordinates({"lat": north, "lng": east})):
+        raise HTTPException(status_code=400, detail="座標が不正です")
+    
+    requested = ["total", *SCORE_CATEGORIES] if layers == "all" else [l.strip() for l in layers.split(",") if l.strip()]
+    unknown = [l for l in requested if l != "total" and l not in SCORE_CATEGORIES]
+    if not requested or unknown:
+        raise HTTPException(status_code=400, detail=f"不明なレイヤー: {unknown}（total / {', '.join(SCORE_CATEGORIES)}）")
+    
+    resolution = max(50.0, min(resolution, 2000.0))
+    poi_store = get_poi_store()
+    if poi_store is None and not GOOGLE_MAPS_API_KEY:
+        raise HTTPException(status_code=503, detail="施設データがありません（ローカルPOIストアまたはGoogle Maps APIキーが必要です）")
+    # Places 検索は範囲内のタイルだけで行うため、余白もタイルの検索半径分にとどめる
+    grid = ScoringGrid(south, west, north, east, resolution,
+                       margin_m=GRID_MARGIN_M if poi_store is not None else HEATMAP_LIVE_TILE_RADIUS_M)
+    if grid.rows * grid.cols > HEATMAP_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"セル数が多すぎます（{grid.rows}×{grid.cols} > {HEATMAP_MAX_CELLS}）。resolution を大きくするか範囲を狭めてください"
+        )
+    
+    station_index = get_station_index()
+    categories = SCORE_CATEGORIES if "total" in requested else requested
+    place_types = required_types(categories, station_index is not None)
+    if poi_store is not None:
+        # 範囲全体の一括取得は Places API では高コストなため、ローカルストアがあれば常に使う
+        facilities = await asyncio.to_thread(collect_store_facilities, poi_store, grid, place_types)
+        facility_source = "local_poi_store"
+    else:
+        calls = len(live_tile_centers(grid)) * len(place_types)
+        if calls > HEATMAP_MAX_LIVE_CALLS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"範囲が広すぎます（Places検索 {calls}回 > {HEATMAP_MAX_LIVE_CALLS}回）。範囲を狭めるかローカルPOIストアを用意してください"
+            )
+        async with aiohttp.ClientSession() as session:
+            facilities = await collect_heatmap_facilities_live(session, grid, place_types)
+        facility_source = "google_places"
+    
+    scorer = GridScorer(grid, facilities, station_index=station_index,
+                        hazard_raster=get_hazard_raster(), crime_bonus_at=crime_bonus_grid)
+    values = await asyncio.to_thread(heatmap_layers, scorer, requested)
+    logger.info(f"🗺️ ヒートマップ: {grid.rows}×{grid.cols}セル ({resolution:.0f}m) {', '.join(requested)}")
+    
+    return {
+        "bounds": {"south": south, "west": west, "north": north, "east": east},
+        "resolution": resolution,
+        "shape": [grid.rows, grid.cols],
+        "cell_size_deg": {"lat": grid.cell_lat, "lng": grid.cell_lng},
+        "encoding": "float16-le-base64",
+        "row_order": "north_to_south",
+        "layers": {layer: encode_float16(v) for layer, v in values.items()},
+        "stats": {layer: layer_stats(v) for layer, v in values.items()},
+        "source": {
+            "facilities": facility_source,
+            "transport": "station_index" if station_index is not None else facility_source,
+            "hazard": "hazard_raster" if get_hazard_raster() is not None else "default",
+        }
+    }
+
+# =============================================================================
+# スコアアトラス（事前計算スコア）
+# =============================================================================
+@app.get("/api/atlas/scores")
+async def get_atlas_scores(
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    address: Optional[str] = None
+):
+    """地点を含むメッシュの事前計算スコア（8項目・総合）。Places 検索・スコア計算なしで即時に返す
+
+    住所単位の精密な値が必要な場合は /api/lifestyle-analysis-8items を使う。
+    """
+    score_atlas = get_score_atlas()
+    if score_atlas is None:
+        raise HTTPException(
+            status_code=503,
+            detail="スコアアトラスがありません（python -m app.jobs.build_score_atlas を実行してください）"
+        )
+    
+    if lat is None or lng is None:
+        if not address:
+            raise HTTPException(status_code=400, detail="lat/lng または address を指定してください")
+        try:
+            coordinates = await geocode_address(address)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        lat, lng = coordinates["lat"], coordinates["lng"]
+    if not validate_coordinates({"lat": lat, "lng": lng}):
+        raise HTTPException(status_code=400, detail="座標が不正です")
+    
+    atlas_scores = score_atlas.lookup(lat, lng)
+    if atlas_scores is None:
+        raise HTTPException(status_code=404, detail="この地点のメッシュは事前計算の対象外です（非居住メッシュ）")
+    return {
+        "address": address,
+        "coordinates": {"lat": lat, "lng": lng},
+        **atlas_scores
+    }
+
+# =============================================================================
+# 似たエリア検索
+# =============================================================================
+def require_similar_area_index():
+    similar_area_index = get_similar_area_index()
+    if similar_area_index is None:
+        raise HTTPException(
+            status_code=503,
+            detail="似たエリア検索の索引がありません（python -m app.jobs.build_similar_areas を実行してください）"
+        )
+    return similar_area_index
+
+def similar_area_region(prefecture: Optional[str], municipality: Optional[str],
+                        radius_km: Optional[float], center: Optional[Dict[str, float]]) -> Dict:
+    """検索範囲の条件（都道府県は名前・コードのどちらでも可）"""
+    region = {}
+    if prefecture:
+        code = prefecture.zfill(2) if prefecture.isdigit() else PREFECTURE_CODES.get(prefecture)
+        if code not in PREFECTURE_CODES.values():
+            raise HTTPException(status_code=400, detail=f"都道府県が不正です: {prefecture}")
+        region["prefecture"] = code
+    if municipality:
+        if not (municipality.isdigit() and len(municipality) == 5):
+            raise HTTPException(status_code=400, detail="municipality は5桁の市区町村コードで指定してください")
+        region["municipality"] = municipality
+    if radius_km:
+        if center is None:
+            raise HTTPException(status_code=400, detail="radius_km には基準の座標が必要です")
+        region["radius_km"] = radius_km
+        region["center"] = (center["lat"], center["lng"])
+    return region
+
+def find_similar_areas(similar_area_index, vector, region: Dict, k: int, exclude_code: Optional[int],
+                       reference_price: Optional[float], max_price_per_sqm: Optional[float],
+                       price_weight: float) -> List[Dict]:
+    if price_weight > 0 and not reference_price:
+        raise HTTPException(status_code=400, detail="price_weight には基準の㎡単価が必要です")
+    areas = similar_area_index.search(
+        vector, k=max(1, min(k, 100)), region=region,
+        exclude_codes=(exclude_code,) if exclude_code else (),
+        max_price=max_price_per_sqm, reference_price=reference_price, price_weight=price_weight
+    )
+    for area in areas:
+        boundary = reverse_geocode_offline(area["coordinates"]["lat"], area["coordinates"]["lng"])
+        area["address"] = boundary["address"] if boundary else None
+    return areas
+
+@app.get("/api/similar-areas")
+async def get_similar_areas(
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    address: Optional[str] = None,
+    k: int = 10,
+    prefecture: Optional[str] = None,
+    municipality: Optional[str] = None,
+    radius_km: Optional[float] = None,
+    max_price_per_sqm: Optional[float] = None,
+    price_weight: float = 0.0
+):
+    """地点とスコアの傾向（8項目）が近いエリアを k 件。スコアアトラスと索引だけで計算する
+
+    price_weight > 0 で地点のメッシュの㎡単価との差も加味して並べ替える。
+    """
+    similar_area_index = require_similar_area_index()
+    score_atlas = get_score_atlas()
+    if score_atlas is None:
+        raise HTTPException(
+            status_code=503,
+            detail="スコアアトラスがありません（python -m app.jobs.build_score_atlas を実行してください）"
+        )
+
+    if lat is None or lng is None:
+        if not address:
+            raise HTTPException(status_code=400, detail="lat/lng または address を指定してください")
+        try:
+            coordinates = await geocode_address(address)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        lat, lng = coordinates["lat"], coordinates["lng"]
+    if not validate_coordinates({"lat": lat, "lng": lng}):
+        raise HTTPException(status_code=400, detail="座標が不正です")
+
+    atlas_scores = score_atlas.lookup(lat, lng)
+    if atlas_scores is None:
+        raise HTTPException(status_code=404, detail="この地点のメッシュは事前計算の対象外です（非居住メッシュ）")
+    mesh_code = int(atlas_scores["mesh_code"])
+    reference_price = similar_area_index.price_of(mesh_code)
+    region = similar_area_region(prefecture, municipality, radius_km, {"lat": lat, "lng": lng})
+    areas = await asyncio.to_thread(
+        find_similar_areas,
+        similar_area_index, similar_area_index.vector_of(atlas_scores["scores"]), region, k,
+        mesh_code, reference_price, max_price_per_sqm, price_weight
+    )
+    return {
+        "address": address,
+        "coordinates": {"lat": lat, "lng": lng},
+        "reference": {**atlas_scores, "price_per_sqm": round(reference_price) if reference_price else None},
+        "areas": areas,
+        "count": len(areas)
+    }
+
+@app.post("/api/similar-areas")
+async def post_similar_areas(request: SimilarAreasRequest):
+    """分析結果のスコア（8項目）が近いエリアを k 件（ライブ分析の結果から探す場合）"""
+    similar_area_index = require_similar_area_index()
+    if request.coordinates is not None and not validate_coordinates(request.coordinates):
+        raise HTTPException(status_code=400, detail="座標が不正です")
+
+    exclude_code = None
+    if request.coordinates is not None and similar_area_index.meta.get("level"):
+        exclude_code = int(mesh_codes(
+            [request.coordinates["lat"]], [request.coordinates["lng"]], similar_area_index.meta["level"]
+        )[0])
+    region = similar_area_region(request.prefecture, request.municipality, request.radius_km, request.coordinates)
+    areas = await asyncio.to_thread(
+        find_similar_areas,
+        similar_area_index, similar_area_index.vector_of(request.scores), region, request.k,
+        exclude_code, request.price_per_sqm, request.max_price_per_sqm, request.price_weight
+    )
+    return {
+        "coordinates": request.coordinates,
+        "areas": areas,
+        "count": len(areas)
+    }
+
+# =============================================================================
+# 最適地の検索（重み付きスコア）
+# =============================================================================
+def polygon_rings(geometry: Dict[str, Any]) -> List:
+    """GeoJSON の Polygon / MultiPolygon → リング列（even-odd 判定用に全リングをまとめる）"""
+    geometry_type = geometry.get("type")
+    coordinates = geometry.get("coordinates") or []
+    if geometry_type == "Polygon":
+        return list(coordinates)
+    if geometry_type == "MultiPolygon":
+        return [ring for polygon in coordinates for ring in polygon]
+    raise HTTPException(status_code=400, detail="polygon は GeoJSON の Polygon / MultiPolygon で指定してください")
+
+def search_best_locations(score_atlas, weights: Dict[str, float], k: int, minimums: Optional[Dict[str, float]],
+                          rings, bbox: Optional[List[float]], center: Optional[Tuple[float, float]],
+                          radius_km: Optional[float]) -> Tuple[Any, List[Dict]]:
+    """範囲内の候補の絞り込み・上位 k 件の検索・住所付けをまとめて行う（スレッドで実行）"""
+    rows = score_atlas.rows_in_region(
+        rings=rings, bbox=tuple(bbox) if bbox is not None else None,
+        center=center, radius_m=radius_km * 1000 if radius_km else None
+    )
+    locations = score_atlas.top_locations(weights, k, rows, minimums)
+    for location in locations:
+        boundary = reverse_geocode_offline(location["coordinates"]["lat"], location["coordinates"]["lng"])
+        location["address"] = boundary["address"] if boundary else None
+    return rows, locations
+
+@app.post("/api/best-locations")
+async def find_best_locations(request: BestLocationsRequest):
+    """重み付きの総合スコアが高いメッシュの上位 k 件（スコアアトラスから検索、Places 検索なし）
+
+    範囲はポリゴン・矩形・住所（座標）からの半径で指定し、minimums でカテゴリ別の下限を付けられる。
+    """
+    score_atlas = get_score_atlas()
+    if score_atlas is None:
+        raise HTTPException(
+            status_code=503,
+            detail="スコアアトラスがありません（python -m app.jobs.build_score_atlas を実行してください）"
+        )
+
+    rings = None
+    if request.polygon is not None:
+        rings = polygon_rings(request.polygon)
+        if sum(len(ring) for ring in rings) > BEST_LOCATIONS_MAX_VERTICES:
+            raise HTTPException(status_code=400, detail=f"polygon の頂点が多すぎます（上限 {BEST_LOCATIONS_MAX_VERTICES}）")
+    if request.bbox is not None and len(request.bbox) != 4:
+        raise HTTPException(status_code=400, detail="bbox は [南, 西, 北, 東] で指定してください")
+    center = request.coordinates
+    radius_km = None
+    if request.radius_km:
+        radius_km = max(0.0, min(request.radius_km, BEST_LOCATIONS_MAX_RADIUS_KM))
+        if center is None:
+            if not request.address:
+                raise HTTPException(status_code=400, detail="radius_km には address または coordinates が必要です")
+            try:
+                center = await geocode_address(request.address)
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+        if not validate_coordinates(center):
+            raise HTTPException(status_code=400, detail="座標が不正です")
+
+    try:
+        rows, locations = await asyncio.to_thread(
+            search_best_locations, score_atlas, request.weights, max(1, min(request.k, 200)), request.minimums,
+            rings, request.bbox, (center["lat"], center["lng"]) if radius_km else None, radius_km
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "weights": request.weights,
+        "minimums": request.minimums or {},
+        "mesh_level": score_atlas.level,
+        "searched_meshes": len(score_atlas) if rows is None else int(len(rows)),
+        "locations": locations,
+        "count": len(locations)
+    }
+
+# =============================================================================
+# ベクトルタイル（施設・スコア・㎡単価）
+# =============================================================================
+TILE_SOURCE_JOBS = {
+    "facilities": "python -m app.jobs.import_poi",
+    "scores": "python -m app.jobs.build_score_atlas",
+    "prices": "python -m app.jobs.sync_transactions",
+}
+
+@app.get("/tiles/{layer}/{z}/{x}/{y}.mvt")
+async def get_vector_tile(layer: str, z: int, x: int, y: int):
+    """Mapbox Vector Tile（ディスクにキャッシュ。低ズームでは施設はクラスタ、メッシュは粗く集約）"""
+    if layer not in TILE_LAYERS:
+        raise HTTPException(status_code=404, detail=f"不明なレイヤーです: {layer}（{', '.join(TILE_LAYERS)}）")
+    if not (0 <= z <= TILE_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="タイル座標が不正です")
+
+    tile = await asyncio.to_thread(get_tile, layer, z, x, y)
+    if tile is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{layer} レイヤーのデータがありません（{TILE_SOURCE_JOBS[layer]} を実行してください）"
+        )
+    return Response(
+        content=tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"Cache-Control": "public, max-age=3600"}
+    )
+
+# =============================================================================
+# 複数地点の比較
+# =============================================================================
+async def compare_area_price(session: aiohttp.ClientSession, coordinates: Dict[str, float]) -> Optional[Dict]:
+    """周辺の取引の㎡単価（中央値）。取引がなければNone"""
+    transactions = await get_real_estate_transactions(session, coordinates, {})
+    unit_prices = sorted(t["unit_price_per_sqm"] for t in transactions if t.get("unit_price_per_sqm"))
+    if not unit_prices:
+        return None
+    middle = len(unit_prices) // 2
+    median = unit_prices[middle] if len(unit_prices) % 2 else (unit_prices[middle - 1] + unit_prices[middle]) / 2
+    return {
+        "median": int(median),
+        "count": len(unit_prices),
+        "data_source": transactions[0].get("data_source")
+    }
+
+async def compare_area(session: aiohttp.ClientSession, area: LifestyleAnalysisRequest,
+                       analyses: Dict, semaphore: asyncio.Semaphore) -> Dict:
+    """1地点の分析と㎡単価（同じ座標の地点は analyses の結果を共有）"""
+    try:
+        coordinates = await resolve_request_coordinates(area)
+    except ValueError as e:
+        return {"address": area.address, "error": str(e)}
+
+    key = (round(coordinates["lat"], 6), round(coordinates["lng"], 6))
+    if key not in analyses:
+        async def run():
+            async with semaphore:
+                return await asyncio.gather(
+                    analyze_lifestyle_8items(session, area.address, coordinates),
+                    compare_area_price(session, coordinates)
+                )
+        analyses[key] = asyncio.ensure_future(run())
+    try:
+        analysis, price = await analyses[key]
+    except Exception as e:
+        logger.error(f"❌ 比較分析エラー ({area.address}): {e}")
+        return {"address": area.address, "coordinates": coordinates, "error": "分析に失敗しました"}
+
+    lifestyle = analysis["lifestyle_analysis"]
+    return {
+        "address": area.address,
+        "coordinates": coordinates,
+        "administrative_area": analysis["administrative_area"],
+        "demographics": analysis["demographics"],
+        "total_score": lifestyle["lifestyle_scores"]["total_score"],
+        "grade": lifestyle["lifestyle_scores"]["grade"],
+        "scores": lifestyle["lifestyle_scores"]["breakdown"],
+        "facility_counts": {
+            category: details["total_facilities"] for category, details in lifestyle["facility_details"].items()
+        },
+        "price_per_sqm": price
+    }
+
+def compare_values(values: List[Optional[float]]) -> Dict:
+    """地点順の値と、最大・最小の地点（値のない地点は除く）"""
+    present = [(value, i) for i, value in enumerate(values) if value is not None]
+    if not present:
+        return {"values": values, "best": None, "worst": None, "spread": None}
+    # 同点なら先の地点
+    highest = max(present, key=lambda item: (item[0], -item[1]))
+    lowest = min(present)
+    return {
+        "values": values,
+        "best": highest[1],
+        "worst": lowest[1],
+        "spread": round(highest[0] - lowest[0], 1)
+    }
+
+@app.post("/api/compare")
+async def compare_areas(request: CompareAreasRequest):
+    """2〜10地点の8項目分析を並行して行い、スコア・施設数・㎡単価を地点順に揃えて返す
+
+    同じ座標の地点は1回だけ分析し、Places 検索・不動産取引タイルなど同じ引数のクエリは地点間で共有する。
+    """
+    if not 2 <= len(request.areas) <= 10:
+        raise HTTPException(status_code=400, detail="比較する地点は2〜10件で指定してください")
+    logger.info(f"⚖️ 複数地点の比較開始: {len(request.areas)}地点")
+    
+    started = datetime.now()
+    analyses: Dict = {}
+    semaphore = asyncio.Semaphore(COMPARE_MAX_CONCURRENCY)
+    with shared_query_scope():
+        async with aiohttp.ClientSession() as session:
+            areas = await asyncio.gather(*(
+                compare_area(session, area, analyses, semaphore) for area in request.areas
+            ))
+        shared_queries = shared_query_count()
+    
+    analyzed = [area for area in areas if "error" not in area]
+    comparison = {
+        "total_score": compare_values([area.get("total_score") for area in areas]),
+        "scores": {
+            category: compare_values([area["scores"][category] if "scores" in area else None for area in areas])
+            for category in SCORE_CATEGORIES
+        },
+        "facility_counts": {
+            category: compare_values([
+                area["facility_counts"].get(category) if "facility_counts" in area else None for area in areas
+            ])
+            for category in SCORE_CATEGORIES
+        },
+        "price_per_sqm": compare_values([
+            area["price_per_sqm"]["median"] if area.get("price_per_sqm") else None for area in areas
+        ])
+    }
+    # 単価は安い方が良い
+    comparison["price_per_sqm"]["best"], comparison["price_per_sqm"]["worst"] = (
+        comparison["price_per_sqm"]["worst"], comparison["price_per_sqm"]["best"]
+    )
+    
+    elapsed = (datetime.now() - started).total_seconds()
+    logger.info(f"⚖️ 比較完了: {len(analyzed)}/{len(areas)}地点 / 分析{len(analyses)}回 / クエリ{shared_queries}件 ({elapsed:.1f}秒)")
+    return {
+        "areas": areas,
+        "categories": SCORE_CATEGORIES,
+        "comparison": comparison,
+        "ranking": sorted((i for i, area in enumerate(areas) if "error" not in area),
+                          key=lambda i: -areas[i]["total_score"]),
+        "analyses_run": len(analyses),
+        "queries_run": shared_queries,
+        "elapsed_seconds": round(elapsed, 2)
+    }
+
+# =============================================================================
+# 分析結果の一括エクスポート
+# =============================================================================
+async def export_areas(areas: List[LifestyleAnalysisRequest]):
+    """地点順に分析結果を返す非同期ジェネレーター（先読みは同時実行数の2倍まで）"""
+    semaphore = asyncio.Semaphore(EXPORT_MAX_CONCURRENCY)
+    pending = deque()
+    async with aiohttp.ClientSession() as session:
+        try:
+            for area in areas:
+                # 同じ座標の共有はキャッシュに任せ、分析結果を抱え込まないよう地点ごとに空の辞書を渡す
+                pending.append(asyncio.ensure_future(compare_area(session, area, {}, semaphore)))
+                if len(pending) >= EXPORT_MAX_CONCURRENCY * 2:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # クライアントが途中で切断したら残りの分析は取り消す
+            for task in pending:
+                task.cancel()
+
+@app.post("/api/export/analyses")
+async def export_analyses(request: ExportAnalysesRequest):
+    """地点一覧の8項目分析を CSV / Parquet で順に書き出す（スコア・施設数・㎡単価を1行に平坦化）
+
+    キャッシュ済みの地点はキャッシュから、それ以外はその場で分析する。
+    """
+    if request.format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format は {' / '.join(EXPORT_FORMATS)} のいずれかを指定してください")
+    if request.format == "parquet" and not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Parquet の出力には pyarrow が必要です（format=csv を使用してください）")
+    if not 1 <= len(request.areas) <= EXPORT_MAX_AREAS:
+        raise HTTPException(status_code=400, detail=f"地点は1〜{EXPORT_MAX_AREAS}件で指定してください")
+    logger.info(f"📤 分析結果のエクスポート開始: {len(request.areas)}地点 ({request.format})")
+    
+    filename = f"analyses_{datetime.now():%Y%m%d_%H%M%S}.{request.format}"
+    return StreamingResponse(
+        export_stream(export_areas(request.areas), request.format),
+        media_type=EXPORT_FORMATS[request.format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# =============================================================================
+# 住所オートコンプリート
+# =============================================================================
+@app.get("/api/address/suggest")
+async def suggest_addresses(q: str, limit: int = 10):
+    """入力途中の住所から候補（都道府県 → 市区町村 → 町丁目）と座標を返す"""
+    suggest_index = get_address_suggest_index()
+    if suggest_index is None:
+        raise HTTPException(
+            status_code=503,
+            detail="住所候補データがありません（python -m app.jobs.build_gazetteer を実行してください）"
+        )
+    
+    limit = max(1, min(limit, 50))
+    suggestions = suggest_index.suggest(q, limit=limit)
+    return {
+        "query": q,
+        "suggestions": suggestions,
+        "count": len(suggestions)
+    }
+
+# =============================================================================
+# フロントエンド配信（catch-all のため必ずファイル末尾で登録）
+# =============================================================================
+# SPAのフォールバック対象外とするパス
+NON_FRONTEND_PREFIXES = ("api/", "docs", "redoc", "openapi.json", "ws/", "tiles/")
+
+@app.get("/")
+async def serve_frontend(request: Request):
+    """フロントエンドのメインページを提供"""
+    index_asset = frontend_assets.lookup("index.html")
+    if index_asset:
+        return frontend_assets.response(index_asset, request)
+    return {
+        "message": "Location Insights API v3.1",
+        "status": "フロントエンドビルド待機中",
+        "instruction": "フロントエンドをビルドしてください: cd frontend && npm run build",
+        "api_docs": f"http://localhost:{PORT}/docs",
+        "api_health": f"http://localhost:{PORT}/api/health"
+    }
+
+@app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+async def serve_frontend_routes(full_path: str, request: Request):
+    """ビルド済みファイルとSPAの動的ルートを提供（マニフェストのみ参照）"""
+    if full_path.startswith(NON_FRONTEND_PREFIXES):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    asset = frontend_assets.lookup(full_path)
+    if asset:
+        return frontend_assets.response(asset, request)
+
+    # SPAのフォールバック
+    index_asset = frontend_assets.lookup("index.html")
+    if index_asset:
+        return frontend_assets.response(index_asset, request)
+    return {
+        "message": "フロントエンドビルドが必要です",
+        "path": full_path,
+        "instruction": "cd frontend && npm run build を実行してください"
+    }